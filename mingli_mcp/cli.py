@@ -5,16 +5,36 @@
 支持多种传输方式（stdio、HTTP）
 """
 
+import argparse
 import sys
+from typing import List, Optional
 
 from mingli_mcp.config import config
 from mingli_mcp.mcp_server import MingliMCPServer
+from mingli_mcp.utils.slow_log import get_slow_log
 
 logger = config.get_logger(__name__)
 
 
-def main():
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(prog="mingli-mcp", description="命理MCP服务器")
+    parser.add_argument(
+        "--slow-log",
+        metavar="PATH",
+        default=config.SLOW_LOG_FILE or None,
+        help="把慢请求日志（JSON）写入该文件，每次更新时整体重写；"
+        "stdio部署没有/stats端点时用它查看最慢的工具调用",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
     """主函数"""
+    args = parse_args(argv)
+    if args.slow_log:
+        get_slow_log().set_dump_path(args.slow_log)
+
     try:
         server = MingliMCPServer()
         server.start()
@@ -71,11 +71,44 @@ class Config:
     HTTP_HOST: str = os.getenv("HTTP_HOST", "0.0.0.0")
     HTTP_PORT: int = int(os.getenv("HTTP_PORT", "8080"))
     HTTP_API_KEY: str = os.getenv("HTTP_API_KEY", "")
+    # 大于1时使用pre-fork多进程：主进程预热后fork出worker共享监听端口与引擎内存
+    HTTP_WORKERS: int = int(os.getenv("HTTP_WORKERS", "1"))
+    # pre-fork worker超过多少秒没有心跳即视为卡死并重启
+    HTTP_WORKER_TIMEOUT: float = float(os.getenv("HTTP_WORKER_TIMEOUT", "30"))
 
     # 限流配置（仅HTTP模式生效）
     ENABLE_RATE_LIMIT: bool = os.getenv("ENABLE_RATE_LIMIT", "true").lower() == "true"
     RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
     RATE_LIMIT_WINDOW: int = int(os.getenv("RATE_LIMIT_WINDOW", "60"))
+    # 限流算法：sliding_window（逐条记录时间戳）/ gcra（每客户端一个浮点数，O(1)内存）
+    # / sharded（分片锁 + 增量清理的gcra，适合高并发）/ sketch（Count-Min Sketch，内存固定）
+    RATE_LIMIT_ALGORITHM: str = os.getenv("RATE_LIMIT_ALGORITHM", "sliding_window")
+    # sharded 算法的分片（锁）数
+    RATE_LIMIT_SHARDS: int = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+    # sketch 算法的计数表尺寸：内存固定为 2 × width × depth × 4 字节，
+    # width 越大冲突导致的误限流越少，depth 越大出现大误差的概率越低
+    RATE_LIMIT_SKETCH_WIDTH: int = int(os.getenv("RATE_LIMIT_SKETCH_WIDTH", "8192"))
+    RATE_LIMIT_SKETCH_DEPTH: int = int(os.getenv("RATE_LIMIT_SKETCH_DEPTH", "4"))
+    # 限流状态存储：memory（每个进程各自计数）/ sqlite / redis（多worker、多副本共享计数）
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    # sqlite为数据库文件路径（各进程指向同一文件），redis为连接URL
+    RATE_LIMIT_BACKEND_URL: str = os.getenv("RATE_LIMIT_BACKEND_URL", "")
+
+    # 按计算量计费的配额（仅HTTP模式）：每个API key / Bearer凭证（或IP）在QUOTA_WINDOW秒内
+    # 最多消耗QUOTA_BUDGET单位；工具单次成本 = 平均耗时 / QUOTA_UNIT_MS（至少1），发现类方法免费
+    ENABLE_COST_QUOTA: bool = os.getenv("ENABLE_COST_QUOTA", "false").lower() == "true"
+    QUOTA_BUDGET: int = int(os.getenv("QUOTA_BUDGET", "1000"))
+    QUOTA_WINDOW: int = int(os.getenv("QUOTA_WINDOW", "60"))
+    QUOTA_UNIT_MS: float = float(os.getenv("QUOTA_UNIT_MS", "10"))
+
+    # 自适应并发限制（仅HTTP模式）：按最近的计算耗时以AIMD调整同时执行的工具调用数，
+    # 超过上限的请求返回503。上界默认与线程池容量（40）一致
+    ENABLE_ADAPTIVE_CONCURRENCY: bool = (
+        os.getenv("ENABLE_ADAPTIVE_CONCURRENCY", "false").lower() == "true"
+    )
+    CONCURRENCY_TARGET_LATENCY_MS: float = float(os.getenv("CONCURRENCY_TARGET_LATENCY_MS", "250"))
+    CONCURRENCY_MIN_LIMIT: int = int(os.getenv("CONCURRENCY_MIN_LIMIT", "2"))
+    CONCURRENCY_MAX_LIMIT: int = int(os.getenv("CONCURRENCY_MAX_LIMIT", "40"))
 
     # 是否信任反向代理转发的客户端IP头（CF-Connecting-IP / X-Forwarded-For）
     # 默认false：这些头由客户端可控，直连时信任它们会让限流被轮换头值绕过。
@@ -87,6 +120,52 @@ class Config:
     CORS_ORIGINS: str = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:8080")
     CORS_ALLOW_CREDENTIALS: bool = os.getenv("CORS_ALLOW_CREDENTIALS", "false").lower() == "true"
 
+    # 慢请求日志：保留滚动窗口内最慢的N次工具调用（参数只存脱敏指纹）
+    SLOW_LOG_SIZE: int = int(os.getenv("SLOW_LOG_SIZE", "20"))
+    SLOW_LOG_WINDOW: int = int(os.getenv("SLOW_LOG_WINDOW", "3600"))
+    # stdio模式无法访问/stats，可把慢请求日志落盘到该文件（命令行 --slow-log 优先）
+    SLOW_LOG_FILE: str = os.getenv("SLOW_LOG_FILE", "")
+
+    # 按需采样分析（POST /debug/profile）单次允许的最长采样时间（秒）
+    PROFILE_MAX_SECONDS: int = int(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+    # 内存抽样：每N次工具调用用tracemalloc追踪1次（0关闭；追踪期间分配会明显变慢）
+    MEMORY_SAMPLE_RATE: int = int(os.getenv("MEMORY_SAMPLE_RATE", "0"))
+
+    # 事件循环延迟/线程池占用的后台采样间隔（秒，HTTP模式；0关闭）
+    LOOP_MONITOR_INTERVAL: float = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.5"))
+
+    # 链路追踪：导出器 file（本地OTLP-JSON文件）/ memory（进程内）/ 空（关闭）
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "")
+    TRACING_FILE: str = os.getenv("TRACING_FILE", "mingli-traces.jsonl")
+    # 单个追踪文件超过该大小后轮转，保留TRACING_BACKUP_COUNT个旧文件
+    TRACING_MAX_BYTES: int = int(os.getenv("TRACING_MAX_BYTES", str(10 * 1024 * 1024)))
+    TRACING_BACKUP_COUNT: int = int(os.getenv("TRACING_BACKUP_COUNT", "3"))
+
+    # 启动预热：后台对每个命理系统跑几次代表性排盘，HTTP模式的/ready在完成前返回503
+    ENABLE_WARMUP: bool = os.getenv("ENABLE_WARMUP", "true").lower() == "true"
+    # stdio 模式默认不预热：每个客户端会话各起一个进程，多数会话只调用一两个系统，
+    # 预热全部系统的CPU与内存开销得不偿失；需要压低首个调用延迟时再打开
+    ENABLE_STDIO_WARMUP: bool = os.getenv("ENABLE_STDIO_WARMUP", "false").lower() == "true"
+
+    # 在tools/list中声明outputSchema。MCP要求声明后每次调用都返回structuredContent，
+    # 开启后markdown/json结果也会附带结构化数据
+    ADVERTISE_OUTPUT_SCHEMA: bool = os.getenv("ADVERTISE_OUTPUT_SCHEMA", "false").lower() == "true"
+
+    # 流式输出：markdown/json 文本结果由格式化器逐段生成，传输层边生成边写出（stdio 逐块写
+    # stdout，HTTP 用分块传输或 SSE），内存峰值只与块大小（字符数）有关。渲染推迟到写出时，
+    # 不计入工具耗时；声明了 outputSchema 时需要完整结果，不启用
+    STREAM_OUTPUT: bool = os.getenv("STREAM_OUTPUT", "false").lower() == "true"
+    STREAM_CHUNK_SIZE: int = int(os.getenv("STREAM_CHUNK_SIZE", "8192"))
+
+    # HTTP响应压缩：按Accept-Encoding协商 gzip（安装 brotli / zstandard 后也可用 br / zstd）。
+    # 小于 COMPRESSION_MIN_SIZE 字节的响应不压缩（省下的字节抵不过CPU开销）；
+    # 级别按编码截断（gzip 1-9，br 0-11，zstd 1-22）。默认关闭：反向代理通常已经压缩，
+    # 且开启后客户端声明了 Accept-Encoding 的响应体会变化，由部署方显式打开
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "false").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_LEVEL: int = int(os.getenv("COMPRESSION_LEVEL", "6"))
+
     # WebSocket传输配置（预留）
     WS_HOST: str = os.getenv("WS_HOST", "0.0.0.0")
     WS_PORT: int = int(os.getenv("WS_PORT", "8081"))
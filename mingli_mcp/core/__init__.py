@@ -3,7 +3,7 @@
 """
 
 from .base_system import BaseFortuneSystem
-from .birth_info import BirthInfo
+from .birth_info import BirthInfo, ValidatedBirthInfo
 from .chart_result import ChartResult
 from .exceptions import (
     ConfigError,
@@ -20,6 +20,7 @@ from .exceptions import (
 __all__ = [
     "BaseFortuneSystem",
     "BirthInfo",
+    "ValidatedBirthInfo",
     "ChartResult",
     "MingliMCPError",
     "ValidationError",
@@ -6,9 +6,12 @@
 
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional
 
-from .exceptions import ValidationError
+from .birth_info import ValidatedBirthInfo
+
+if TYPE_CHECKING:
+    from mingli_mcp.utils.projection import FieldSelection
 
 
 class BaseFortuneSystem(ABC):
@@ -35,7 +38,12 @@ class BaseFortuneSystem(ABC):
         pass
 
     @abstractmethod
-    def get_chart(self, birth_info: Dict[str, Any], language: str = "zh-CN") -> Dict[str, Any]:
+    def get_chart(
+        self,
+        birth_info: Mapping[str, Any],
+        language: str = "zh-CN",
+        selection: Optional["FieldSelection"] = None,
+    ) -> Dict[str, Any]:
         """
         获取排盘信息
 
@@ -48,6 +56,7 @@ class BaseFortuneSystem(ABC):
                 - is_leap_month: 是否闰月 (bool, 默认False, 仅农历有效)
             language: 输出语言 (str, 默认"zh-CN")
                 支持: zh-CN, zh-TW, en-US, ja-JP, ko-KR, vi-VN
+            selection: 字段选择，None 表示全部字段；未选中的字段应跳过计算且不出现在结果中
 
         Returns:
             排盘详细信息字典，包含：
@@ -67,9 +76,10 @@ class BaseFortuneSystem(ABC):
     @abstractmethod
     def get_fortune(
         self,
-        birth_info: Dict[str, Any],
+        birth_info: Mapping[str, Any],
         query_date: Optional[datetime] = None,
         language: str = "zh-CN",
+        selection: Optional["FieldSelection"] = None,
     ) -> Dict[str, Any]:
         """
         获取运势信息
@@ -79,6 +89,7 @@ class BaseFortuneSystem(ABC):
             query_date: 查询日期，默认为当前时间
             language: 输出语言 (str, 默认"zh-CN")
                 支持: zh-CN, zh-TW, en-US, ja-JP, ko-KR, vi-VN
+            selection: 字段选择（同get_chart）
 
         Returns:
             运势信息字典，可能包含：
@@ -96,7 +107,7 @@ class BaseFortuneSystem(ABC):
 
     @abstractmethod
     def analyze_palace(
-        self, birth_info: Dict[str, Any], palace_name: str, language: str = "zh-CN"
+        self, birth_info: Mapping[str, Any], palace_name: str, language: str = "zh-CN"
     ) -> Dict[str, Any]:
         """
         分析特定宫位的详细信息
@@ -119,45 +130,24 @@ class BaseFortuneSystem(ABC):
         """
         pass
 
-    def validate_birth_info(self, birth_info: Dict[str, Any]) -> None:
+    def validate_birth_info(self, birth_info: Mapping[str, Any]) -> ValidatedBirthInfo:
         """
         验证生辰信息的有效性
 
         Args:
-            birth_info: 生辰信息字典
+            birth_info: 生辰信息字典；handler 已校验过的 ValidatedBirthInfo 直接返回，不再重复校验
+
+        Returns:
+            ValidatedBirthInfo（只读）
 
         Raises:
             ValidationError: 参数无效或缺失
             DateRangeError: 日期超出支持范围
         """
         # 延迟导入避免循环依赖
-        from mingli_mcp.utils.validators import (
-            validate_calendar_strict,
-            validate_date_range,
-            validate_gender_strict,
-            validate_solar_time_params,
-            validate_time_index_strict,
-        )
-
-        required_fields = ["date", "time_index", "gender"]
-        for field in required_fields:
-            if field not in birth_info:
-                raise ValidationError(f"缺少必需字段: {field}")
-
-        # 验证日期格式和范围
-        validate_date_range(birth_info["date"])
-
-        # 验证时辰（用strict版本，非法类型也会得到ValidationError而不是TypeError）
-        validate_time_index_strict(birth_info["time_index"])
-
-        # 验证性别
-        validate_gender_strict(birth_info["gender"])
-
-        # 验证历法（缺省为solar；非法值不能被静默当作solar）
-        validate_calendar_strict(birth_info.get("calendar", "solar"))
+        from mingli_mcp.utils.validators import validate_birth_info
 
-        # 验证真太阳时可选参数
-        validate_solar_time_params(birth_info)
+        return validate_birth_info(birth_info)
 
     def validate_language(self, language: str) -> None:
         """
@@ -174,7 +164,7 @@ class BaseFortuneSystem(ABC):
 
         _validate_language(language)
 
-    def analyze_element(self, birth_info: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze_element(self, birth_info: Mapping[str, Any]) -> Dict[str, Any]:
         """
         分析五行强弱
 
@@ -221,7 +211,7 @@ class BaseFortuneSystem(ABC):
             "compatibility": False,
         }
 
-    def apply_solar_time_correction(self, birth_info: Dict[str, Any]) -> int:
+    def apply_solar_time_correction(self, birth_info: Mapping[str, Any]) -> int:
         """
         应用真太阳时修正，返回修正后的时辰序号
 
@@ -261,6 +251,7 @@ class BaseFortuneSystem(ABC):
             return time_index
 
         # 导入真太阳时计算函数
+        from mingli_mcp.utils.performance import stage
         from mingli_mcp.utils.solar_time import adjust_time_index_for_solar_time
 
         # 获取出生时刻
@@ -272,7 +263,10 @@ class BaseFortuneSystem(ABC):
             birth_hour, birth_minute = self._get_time_index_midpoint(time_index)
 
         # 计算真太阳时修正后的时辰
-        adjusted_index, _, _ = adjust_time_index_for_solar_time(birth_hour, birth_minute, longitude)
+        with stage("solar_time"):
+            adjusted_index, _, _ = adjust_time_index_for_solar_time(
+                birth_hour, birth_minute, longitude
+            )
 
         return adjusted_index
 
@@ -2,9 +2,10 @@
 生辰信息数据模型
 """
 
+from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 
 @dataclass
@@ -249,3 +250,45 @@ class BirthInfo:
         from mingli_mcp.utils.solar_time import get_time_index_name
 
         return get_time_index_name(index)
+
+
+class ValidatedBirthInfo(Mapping):
+    """
+    已通过完整校验的生辰信息（只读；用 validators.validate_birth_info() 获取，不要直接构造）
+
+    handler 校验参数后把它交给排盘系统，系统见到它就跳过 validate_birth_info，
+    一次工具调用只校验一次。实现只读 Mapping 接口，系统照常按键读取。
+    """
+
+    __slots__ = ("_data", "date_parts")
+
+    _data: Dict[str, Any]
+    date_parts: Tuple[int, int, int]
+
+    def __init__(self, birth_info: "Mapping[str, Any]", date_parts: Tuple[int, int, int]):
+        """
+        Args:
+            birth_info: 已校验的生辰信息（复制一份，之后修改原字典不影响本对象）
+            date_parts: date 解析出的 (年, 月, 日)
+        """
+        object.__setattr__(self, "_data", dict(birth_info))
+        object.__setattr__(self, "date_parts", date_parts)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError("ValidatedBirthInfo 是只读的，不能修改")
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __reduce__(self) -> Tuple[Any, Tuple[Dict[str, Any], Tuple[int, int, int]]]:
+        # 槽位禁止赋值，pickle / deepcopy 需要经由构造函数重建
+        return ValidatedBirthInfo, (self._data, self.date_parts)
+
+    def __repr__(self) -> str:
+        return f"ValidatedBirthInfo({self._data!r})"
@@ -5,7 +5,9 @@ This module contains the main MingliMCPServer class that coordinates
 protocol handling, tool execution, and transport management.
 """
 
+import base64
 import time
+from contextlib import ExitStack
 from typing import Any, Dict, List, Optional
 
 from mingli_mcp.config import config
@@ -23,9 +25,21 @@ from mingli_mcp.mcp_server.protocol import (
     get_request_protocol_version,
 )
 from mingli_mcp.mcp_server.tools import ToolRegistry
+from mingli_mcp.mcp_server.tools.output import (
+    STRUCTURED_TEXT,
+    BlobResult,
+    StructuredResult,
+    ToolOutput,
+)
 from mingli_mcp.transports import BaseTransport, StdioTransport
 from mingli_mcp.utils.formatters import format_error_response, format_success_response
-from mingli_mcp.utils.metrics import record_request
+from mingli_mcp.utils.memory import get_memory_sampler
+from mingli_mcp.utils.metrics import get_metrics, record_request
+from mingli_mcp.utils.performance import track_stages
+from mingli_mcp.utils.slow_log import get_slow_log
+from mingli_mcp.utils.streaming import StreamingText
+from mingli_mcp.utils.tracing import get_tracer
+from mingli_mcp.utils.warmup import get_warmup
 
 logger = config.get_logger(__name__)
 
@@ -43,13 +57,14 @@ class MingliMCPServer:
 
     def _initialize_transport(self):
         """初始化传输层"""
-        from mingli_mcp.transports import HTTP_TRANSPORT_AVAILABLE
-
         transport_type = config.TRANSPORT_TYPE.lower()
 
         if transport_type == "stdio":
             self.transport = StdioTransport()
         elif transport_type == "http":
+            # 只有 http 模式才导入 fastapi
+            from mingli_mcp.transports import HTTP_TRANSPORT_AVAILABLE
+
             if not HTTP_TRANSPORT_AVAILABLE:
                 raise ImportError(
                     "HTTP transport is not available. Please install mingli-mcp with HTTP support:\n"
@@ -66,10 +81,14 @@ class MingliMCPServer:
                 enable_rate_limit=config.ENABLE_RATE_LIMIT,
                 rate_limit_requests=config.RATE_LIMIT_REQUESTS,
                 rate_limit_window=config.RATE_LIMIT_WINDOW,
+                rate_limit_algorithm=config.RATE_LIMIT_ALGORITHM,
+                rate_limit_backend=config.RATE_LIMIT_BACKEND,
                 cors_origins=self.http_cors_origins,
                 cors_allow_credentials=config.CORS_ALLOW_CREDENTIALS,
                 supported_protocol_versions=SUPPORTED_PROTOCOL_VERSIONS,
                 trust_proxy_headers=config.TRUST_PROXY_HEADERS,
+                enable_cost_quota=config.ENABLE_COST_QUOTA,
+                enable_adaptive_concurrency=config.ENABLE_ADAPTIVE_CONCURRENCY,
             )
         else:
             raise ValueError(f"Unsupported transport type: {transport_type}")
@@ -83,6 +102,10 @@ class MingliMCPServer:
 
         logger.info(f"Starting {config.MCP_SERVER_NAME} v{config.MCP_SERVER_VERSION}")
         logger.info(f"Available systems: {', '.join(list_systems())}")
+        # 引擎导入与首次排盘的一次性开销放到后台，与客户端握手并行（stdio 需显式开启）
+        # （HTTP 模式由传输层负责：单进程在 lifespan 中启动，pre-fork 由主进程在 fork 前同步完成）
+        if config.ENABLE_STDIO_WARMUP and isinstance(self.transport, StdioTransport):
+            get_warmup().start()
         self.transport.start()
 
     def handle_request(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -95,6 +118,30 @@ class MingliMCPServer:
         Returns:
             JSON-RPC响应；对于notification（无id的消息）返回None
         """
+        tracer = get_tracer()
+        if not tracer.enabled:
+            return self._handle_request(request)
+
+        attributes: Dict[str, Any] = {}
+        if isinstance(request, dict):
+            if isinstance(request.get("method"), str):
+                attributes["mcp.method.name"] = request["method"]
+            meta_version = get_request_protocol_version(request)
+            attributes["mcp.protocol.era"] = (
+                "modern" if meta_version in MODERN_PROTOCOL_VERSIONS else "legacy"
+            )
+            if meta_version is not None:
+                attributes["mcp.protocol.version"] = meta_version
+
+        with tracer.start_span("mcp.handle_request", attributes) as span:
+            response = self._handle_request(request)
+            if response is not None and isinstance(response.get("error"), dict):
+                span.set_error(str(response["error"].get("message", "")))
+                span.set_attribute("rpc.jsonrpc.error_code", response["error"].get("code", 0))
+            return response
+
+    def _handle_request(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """handle_request 的实现（不含链路追踪）"""
         # JSON-RPC规范：请求必须是对象。数组（批处理）和标量都是Invalid Request。
         # 这里必须先挡住，否则下面的 request.get 会抛 AttributeError，
         # 在stdio模式下会直接终结消息循环（整个会话挂死）。
@@ -212,6 +259,34 @@ class MingliMCPServer:
                 return system, f"{verb}_{subject}"
         return "server", tool_name
 
+    @staticmethod
+    def _tool_result(result: ToolOutput, tool_name: str) -> Dict[str, Any]:
+        """把工具输出包装成 tools/call 的 result（结构化结果放在 structuredContent）"""
+        if isinstance(result, BlobResult):
+            # 二进制结果以内嵌资源的 base64 blob 返回
+            payload: Dict[str, Any] = {
+                "content": [
+                    {
+                        "type": "resource",
+                        "resource": {
+                            "uri": f"mingli://results/{tool_name}",
+                            "mimeType": result.mime_type,
+                            "blob": base64.b64encode(result.blob).decode("ascii"),
+                        },
+                    }
+                ]
+            }
+            if result.structured is not None:
+                payload["structuredContent"] = result.structured
+            return payload
+        if isinstance(result, StructuredResult):
+            text = STRUCTURED_TEXT if result.text is None else result.text
+            return {
+                "content": [{"type": "text", "text": text}],
+                "structuredContent": result.data,
+            }
+        return {"content": [{"type": "text", "text": result}]}
+
     def _handle_tools_call(self, request: Dict[str, Any], request_id: Any) -> Dict[str, Any]:
         """处理工具调用请求"""
         params = request.get("params", {})
@@ -222,10 +297,32 @@ class MingliMCPServer:
         logger.debug(f"Arguments: {arguments}")
 
         system, method = self._split_tool_name(tool_name)
+        protocol_version = get_request_protocol_version(request)
         started = time.monotonic()
-
-        def record(success: bool, error_type: Optional[str] = None) -> None:
-            record_request(system, method, time.monotonic() - started, success, error_type)
+        stages: Dict[str, float] = {}
+
+        def record(
+            success: bool,
+            error_type: Optional[str] = None,
+            result: Optional[str] = None,
+            duration: Optional[float] = None,
+            result_bytes: Optional[int] = None,
+        ) -> None:
+            if duration is None:
+                duration = time.monotonic() - started
+            record_request(system, method, duration, success, error_type)
+            if success:
+                get_metrics().record_tool_latency(str(tool_name), duration)
+            get_slow_log().record(
+                str(tool_name),
+                arguments,
+                duration,
+                stages=stages,
+                protocol_version=protocol_version,
+                result=result,
+                success=success,
+                result_bytes=result_bytes,
+            )
 
         try:
             handler = self.tool_registry.get_handler(tool_name)
@@ -233,11 +330,45 @@ class MingliMCPServer:
                 record(False, "UnknownTool")
                 return format_error_response(-32602, f"Unknown tool: {tool_name}", request_id)
 
-            result = handler(arguments)
-            record(True)
-            return format_success_response(
-                {"content": [{"type": "text", "text": result}]}, request_id
-            )
+            sampling = ExitStack()
+            with (
+                get_tracer().start_span(
+                    f"mcp.tool {tool_name}", {"gen_ai.tool.name": str(tool_name)}
+                ) as span,
+                track_stages() as stages,
+                sampling,
+            ):
+                sampling.enter_context(get_memory_sampler().sample(str(tool_name)))
+                result = handler(arguments)
+                if isinstance(result, StreamingText):
+                    # 流式文本在传输层写出时才渲染：span 与内存抽样保持到文本结束
+                    end_span = span.defer_end()
+                    sampling = sampling.pop_all()
+            if isinstance(result, StreamingText):
+                handler_seconds = time.monotonic() - started
+                stream = result
+
+                def on_stream_done(error: Optional[BaseException]) -> None:
+                    # 计入渲染耗时，不计写出时等待客户端的时间
+                    stages["render"] = stages.get("render", 0.0) + stream.render_seconds
+                    sampling.close()
+                    end_span(error)
+                    record(
+                        error is None,
+                        None if error is None else type(error).__name__,
+                        duration=handler_seconds + stream.render_seconds,
+                        result_bytes=stream.result_bytes,
+                    )
+
+                stream.add_done_callback(on_stream_done)
+            elif isinstance(result, StructuredResult):
+                record(True, result=result.text)
+            elif isinstance(result, str):
+                record(True, result=result)
+            else:
+                # 二进制结果
+                record(True)
+            return format_success_response(self._tool_result(result, tool_name), request_id)
 
         except ValidationError as e:
             logger.error(f"Parameter validation error: {e}")
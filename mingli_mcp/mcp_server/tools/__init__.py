@@ -2,42 +2,40 @@
 MCP Tools package.
 
 This package contains tool definitions and handlers for the MCP server.
+
+Handler modules import the fortune engines, so they are registered by import
+path and loaded on the first call; tools/list only needs the definitions.
 """
 
-from typing import Any, Callable, Dict, List, Optional
+import importlib
+from typing import Any, Callable, Dict, List, Optional, Union
 
-from mingli_mcp.mcp_server.tools.bazi_handlers import (
-    handle_analyze_bazi_element,
-    handle_get_bazi_chart,
-    handle_get_bazi_fortune,
-)
 from mingli_mcp.mcp_server.tools.definitions import get_all_tool_definitions
-from mingli_mcp.mcp_server.tools.ziwei_handlers import (
-    handle_analyze_ziwei_palace,
-    handle_get_ziwei_chart,
-    handle_get_ziwei_fortune,
-)
+
+_ZIWEI_HANDLERS = "mingli_mcp.mcp_server.tools.ziwei_handlers"
+_BAZI_HANDLERS = "mingli_mcp.mcp_server.tools.bazi_handlers"
 
 
 class ToolRegistry:
     """Registry for MCP tools"""
 
     def __init__(self):
-        self._tools: Dict[str, Callable] = {}
+        # handler or "module.path:function" (resolved on first use)
+        self._tools: Dict[str, Union[Callable, str]] = {}
         self._definitions: List[Dict[str, Any]] = []
         self._register_default_tools()
 
     def _register_default_tools(self):
         """Register all default tools"""
         # Ziwei tools
-        self.register("get_ziwei_chart", handle_get_ziwei_chart)
-        self.register("get_ziwei_fortune", handle_get_ziwei_fortune)
-        self.register("analyze_ziwei_palace", handle_analyze_ziwei_palace)
+        self.register("get_ziwei_chart", f"{_ZIWEI_HANDLERS}:handle_get_ziwei_chart")
+        self.register("get_ziwei_fortune", f"{_ZIWEI_HANDLERS}:handle_get_ziwei_fortune")
+        self.register("analyze_ziwei_palace", f"{_ZIWEI_HANDLERS}:handle_analyze_ziwei_palace")
 
         # Bazi tools
-        self.register("get_bazi_chart", handle_get_bazi_chart)
-        self.register("get_bazi_fortune", handle_get_bazi_fortune)
-        self.register("analyze_bazi_element", handle_analyze_bazi_element)
+        self.register("get_bazi_chart", f"{_BAZI_HANDLERS}:handle_get_bazi_chart")
+        self.register("get_bazi_fortune", f"{_BAZI_HANDLERS}:handle_get_bazi_fortune")
+        self.register("analyze_bazi_element", f"{_BAZI_HANDLERS}:handle_analyze_bazi_element")
 
         # System tools
         self.register("list_fortune_systems", self._handle_list_systems)
@@ -45,13 +43,18 @@ class ToolRegistry:
         # Load definitions
         self._definitions = get_all_tool_definitions()
 
-    def register(self, name: str, handler: Callable) -> None:
-        """Register a tool with its handler"""
+    def register(self, name: str, handler: Union[Callable, str]) -> None:
+        """Register a tool with its handler or the handler's "module:function" path"""
         self._tools[name] = handler
 
     def get_handler(self, name: str) -> Optional[Callable]:
-        """Get handler for a tool"""
-        return self._tools.get(name)
+        """Get handler for a tool, importing it on first use"""
+        handler = self._tools.get(name)
+        if isinstance(handler, str):
+            module_name, _, attribute = handler.partition(":")
+            handler = getattr(importlib.import_module(module_name), attribute)
+            self._tools[name] = handler
+        return handler
 
     def get_definitions(self) -> List[Dict[str, Any]]:
         """Get all tool definitions for tools/list"""
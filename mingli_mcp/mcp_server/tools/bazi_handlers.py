@@ -4,19 +4,19 @@ Bazi (八字) tool handlers.
 This module contains handlers for Bazi-related MCP tools.
 """
 
-import json
 from datetime import datetime
 from typing import Any, Dict, List
 
+from mingli_mcp.core.birth_info import ValidatedBirthInfo
+from mingli_mcp.mcp_server.tools.output import ToolOutput, field_selection, render_output
 from mingli_mcp.systems import get_system
 from mingli_mcp.systems.bazi.formatter import BaziFormatter
-from mingli_mcp.utils.performance import PerformanceTimer, log_performance
+from mingli_mcp.utils.performance import PerformanceTimer, log_performance, stage
 from mingli_mcp.utils.validators import (
+    validate_birth_info,
     validate_date_range,
-    validate_gender_strict,
     validate_language,
     validate_required_params,
-    validate_time_index_strict,
 )
 
 # Shared formatter instance
@@ -47,20 +47,25 @@ def _validate_common_params(
     required_params: List[str],
     param_descriptions: Dict[str, str],
     date_key: str = "date",
-) -> None:
-    """验证通用参数"""
-    # Check required params first
-    validate_required_params(args, required_params, param_descriptions)
-
-    # Validate individual fields
-    validate_date_range(args[date_key])
-    validate_time_index_strict(args["time_index"])
-    validate_gender_strict(args["gender"])
-
-    # Validate language if provided
-    language = args.get("language")
-    if language:
-        validate_language(language)
+) -> ValidatedBirthInfo:
+    """
+    验证通用参数
+
+    Returns:
+        校验过的生辰信息，直接交给排盘系统（系统不再重复校验）
+    """
+    with stage("validate"):
+        # Check required params first
+        validate_required_params(args, required_params, param_descriptions)
+
+        # Validate birth info once; systems skip validation for the returned token
+        birth_info = validate_birth_info(_build_birth_info(args, date_key))
+
+        # Validate language if provided
+        language = args.get("language")
+        if language:
+            validate_language(language)
+    return birth_info
 
 
 def _build_birth_info(args: Dict[str, Any], date_key: str = "date") -> Dict[str, Any]:
@@ -81,70 +86,59 @@ def _build_birth_info(args: Dict[str, Any], date_key: str = "date") -> Dict[str,
     return birth_info
 
 
-def _to_json(data: Any) -> str:
-    """序列化为JSON文本（MCP的content.text必须是字符串）"""
-    return json.dumps(data, ensure_ascii=False, indent=2)
-
-
 @log_performance
-def handle_get_bazi_chart(args: Dict[str, Any]) -> str:
+def handle_get_bazi_chart(args: Dict[str, Any]) -> ToolOutput:
     """工具：获取八字排盘"""
     # Validate parameters
-    _validate_common_params(
+    birth_info = _validate_common_params(
         args, ["date", "time_index", "gender"], BAZI_CHART_PARAM_DESCRIPTIONS, date_key="date"
     )
+    selection = field_selection("get_bazi_chart", args)
 
     with PerformanceTimer("八字排盘"):
-        birth_info = _build_birth_info(args)
         language = args.get("language", "zh-CN")
 
         system = get_system("bazi")
-        chart = system.get_chart(birth_info, language)
+        chart = system.get_chart(birth_info, language, selection=selection)
 
         output_format = args.get("format", "markdown")
-        if output_format == "json":
-            return _to_json(chart)
-        else:
-            return _bazi_formatter.format_chart_markdown(chart)
+        with stage("render"):
+            return render_output(chart, output_format, _bazi_formatter.iter_chart_markdown)
 
 
 @log_performance
-def handle_get_bazi_fortune(args: Dict[str, Any]) -> str:
+def handle_get_bazi_fortune(args: Dict[str, Any]) -> ToolOutput:
     """工具：获取八字运势"""
     # Validate parameters
-    _validate_common_params(
+    birth_info = _validate_common_params(
         args,
         ["birth_date", "time_index", "gender"],
         BAZI_FORTUNE_PARAM_DESCRIPTIONS,
         date_key="birth_date",
     )
+    selection = field_selection("get_bazi_fortune", args)
 
     with PerformanceTimer("八字运势查询"):
-        birth_info = _build_birth_info(args, date_key="birth_date")
-
         query_date_str = args.get("query_date")
         if query_date_str:
-            validate_date_range(query_date_str)
-            query_date = datetime.strptime(query_date_str, "%Y-%m-%d")
+            query_date = datetime(*validate_date_range(query_date_str))
         else:
             query_date = datetime.now()
 
         language = args.get("language", "zh-CN")
         system = get_system("bazi")
-        fortune = system.get_fortune(birth_info, query_date, language)
+        fortune = system.get_fortune(birth_info, query_date, language, selection=selection)
 
         output_format = args.get("format", "markdown")
-        if output_format == "json":
-            return _to_json(fortune)
-        else:
-            return _bazi_formatter.format_fortune_markdown(fortune)
+        with stage("render"):
+            return render_output(fortune, output_format, _bazi_formatter.iter_fortune_markdown)
 
 
 @log_performance
-def handle_analyze_bazi_element(args: Dict[str, Any]) -> str:
+def handle_analyze_bazi_element(args: Dict[str, Any]) -> ToolOutput:
     """工具：分析八字五行"""
     # Validate parameters
-    _validate_common_params(
+    birth_info = _validate_common_params(
         args,
         ["birth_date", "time_index", "gender"],
         BAZI_ELEMENT_PARAM_DESCRIPTIONS,
@@ -152,13 +146,11 @@ def handle_analyze_bazi_element(args: Dict[str, Any]) -> str:
     )
 
     with PerformanceTimer("八字五行分析"):
-        birth_info = _build_birth_info(args, date_key="birth_date")
-
         system = get_system("bazi")
         analysis = system.analyze_element(birth_info)
 
         output_format = args.get("format", "markdown")
-        if output_format == "json":
-            return _to_json(analysis)
-        else:
-            return _bazi_formatter.format_element_analysis_markdown(analysis)
+        with stage("render"):
+            return render_output(
+                analysis, output_format, _bazi_formatter.iter_element_analysis_markdown
+            )
@@ -4,7 +4,61 @@ MCP Tool definitions.
 This module contains all tool schema definitions for the MCP server.
 """
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+
+from mingli_mcp.config import config
+
+# 输出格式参数（六个排盘/分析工具共享）
+_FORMAT_PROPERTY: Dict[str, Any] = {
+    "type": "string",
+    "enum": ["json", "markdown", "structured", "msgpack"],
+    "default": "markdown",
+    "description": (
+        "输出格式：markdown(默认)、json(JSON文本)、"
+        "structured(结果放在MCP structuredContent中，只编码一次，适合程序化调用)、"
+        "msgpack(MessagePack编码，以内嵌资源的base64 blob返回)"
+    ),
+}
+
+# 字段投影参数（四个排盘/运势工具共享），各级别包含的字段见 DETAIL_PRESETS
+_DETAIL_PROPERTIES: Dict[str, Any] = {
+    "detail": {
+        "type": "string",
+        "enum": ["brief", "standard", "full"],
+        "description": (
+            "详略级别：brief(只含核心字段)、standard(常用字段)、full(全部字段)。"
+            "未传时若给了 fields 则只返回 fields，否则为 full；未选中的字段不会计算"
+        ),
+    },
+    "fields": {
+        "type": "array",
+        "items": {"type": "string"},
+        "description": (
+            '只返回指定字段，点号分隔、列表透明，如 ["basic_info", "palaces.major_stars"]；'
+            "与 detail 同时给出时取并集，必需字段总会返回"
+        ),
+    },
+}
+
+_LANGUAGE_CODES = ["zh-CN", "zh-TW", "en-US", "ja-JP", "ko-KR", "vi-VN"]
+
+# 紫微排盘/运势的语言参数：可传列表，一次排盘输出多种语言
+_MULTI_LANGUAGE_PROPERTY: Dict[str, Any] = {
+    "anyOf": [
+        {"type": "string", "enum": _LANGUAGE_CODES},
+        {
+            "type": "array",
+            "items": {"type": "string", "enum": _LANGUAGE_CODES},
+            "minItems": 1,
+            "uniqueItems": True,
+        },
+    ],
+    "default": "zh-CN",
+    "description": (
+        '输出语言。传列表（如 ["zh-CN", "en-US"]）时只排一次盘：第一种语言的结果在顶层，'
+        "其余语言的完整结果在 translations 下"
+    ),
+}
 
 # 真太阳时修正相关的可选参数（紫微各工具共享）
 _SOLAR_TIME_PROPERTIES: Dict[str, Any] = {
@@ -94,16 +148,9 @@ def get_ziwei_chart_definition() -> Dict[str, Any]:
                     "default": False,
                     "description": "是否为闰月（仅当calendar=lunar时有效）",
                 },
-                "format": {
-                    "type": "string",
-                    "enum": ["json", "markdown"],
-                    "default": "markdown",
-                },
-                "language": {
-                    "type": "string",
-                    "enum": ["zh-CN", "zh-TW", "en-US", "ja-JP", "ko-KR", "vi-VN"],
-                    "default": "zh-CN",
-                },
+                "format": _FORMAT_PROPERTY,
+                **_DETAIL_PROPERTIES,
+                "language": _MULTI_LANGUAGE_PROPERTY,
                 **_SOLAR_TIME_PROPERTIES,
             },
             "required": ["date", "time_index", "gender"],
@@ -152,16 +199,9 @@ def get_ziwei_fortune_definition() -> Dict[str, Any]:
                     "type": "string",
                     "description": "查询运势的日期，格式：YYYY-MM-DD",
                 },
-                "format": {
-                    "type": "string",
-                    "enum": ["json", "markdown"],
-                    "default": "markdown",
-                },
-                "language": {
-                    "type": "string",
-                    "enum": ["zh-CN", "zh-TW", "en-US", "ja-JP", "ko-KR", "vi-VN"],
-                    "default": "zh-CN",
-                },
+                "format": _FORMAT_PROPERTY,
+                **_DETAIL_PROPERTIES,
+                "language": _MULTI_LANGUAGE_PROPERTY,
                 **_SOLAR_TIME_PROPERTIES,
             },
             "required": ["birth_date", "time_index", "gender"],
@@ -223,11 +263,7 @@ def get_analyze_ziwei_palace_definition() -> Dict[str, Any]:
                     "type": "boolean",
                     "default": False,
                 },
-                "format": {
-                    "type": "string",
-                    "enum": ["json", "markdown"],
-                    "default": "markdown",
-                },
+                "format": _FORMAT_PROPERTY,
                 "language": {
                     "type": "string",
                     "enum": ["zh-CN", "zh-TW", "en-US", "ja-JP", "ko-KR", "vi-VN"],
@@ -304,11 +340,8 @@ def get_bazi_chart_definition() -> Dict[str, Any]:
                     "type": "boolean",
                     "default": False,
                 },
-                "format": {
-                    "type": "string",
-                    "enum": ["json", "markdown"],
-                    "default": "markdown",
-                },
+                "format": _FORMAT_PROPERTY,
+                **_DETAIL_PROPERTIES,
                 "language": {
                     "type": "string",
                     "enum": ["zh-CN", "zh-TW", "en-US", "ja-JP", "ko-KR", "vi-VN"],
@@ -364,11 +397,8 @@ def get_bazi_fortune_definition() -> Dict[str, Any]:
                     "type": "string",
                     "description": "查询运势的日期，格式：YYYY-MM-DD",
                 },
-                "format": {
-                    "type": "string",
-                    "enum": ["json", "markdown"],
-                    "default": "markdown",
-                },
+                "format": _FORMAT_PROPERTY,
+                **_DETAIL_PROPERTIES,
                 "language": {
                     "type": "string",
                     "enum": ["zh-CN", "zh-TW", "en-US", "ja-JP", "ko-KR", "vi-VN"],
@@ -417,11 +447,7 @@ def get_analyze_bazi_element_definition() -> Dict[str, Any]:
                     "type": "boolean",
                     "default": False,
                 },
-                "format": {
-                    "type": "string",
-                    "enum": ["json", "markdown"],
-                    "default": "markdown",
-                },
+                "format": _FORMAT_PROPERTY,
                 "language": {
                     "type": "string",
                     "enum": ["zh-CN", "zh-TW", "en-US", "ja-JP", "ko-KR", "vi-VN"],
@@ -434,6 +460,284 @@ def get_analyze_bazi_element_definition() -> Dict[str, Any]:
     }
 
 
+# ---------------------------------------------------------------------------
+# outputSchema：结构化结果（format="structured"）的JSON Schema。
+# MCP 规定声明了 outputSchema 的工具每次调用都必须返回 structuredContent，
+# 因此只在 ADVERTISE_OUTPUT_SCHEMA 开启时出现在 tools/list 中（开启后文本格式也会附带）
+# ---------------------------------------------------------------------------
+
+_STRING_MAP: Dict[str, Any] = {"type": "object", "additionalProperties": {"type": "string"}}
+_NUMBER_MAP: Dict[str, Any] = {"type": "object", "additionalProperties": {"type": "number"}}
+_STRING_LIST: Dict[str, Any] = {"type": "array", "items": {"type": "string"}}
+
+_ZIWEI_STAR: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "type": {"type": "string"},
+        "brightness": {"type": ["string", "null"]},
+        "scope": {"type": "string"},
+    },
+    "required": ["name"],
+}
+
+_ZIWEI_STAGE: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "range": {"type": "array", "items": {"type": "integer"}},
+        "heavenly_stem": {"type": "string"},
+    },
+}
+
+_ZIWEI_PALACE_PROPERTIES: Dict[str, Any] = {
+    "is_body_palace": {"type": "boolean"},
+    "is_original_palace": {"type": "boolean"},
+    "heavenly_stem": {"type": "string"},
+    "earthly_branch": {"type": "string"},
+    "major_stars": {"type": "array", "items": _ZIWEI_STAR},
+    "minor_stars": {"type": "array", "items": _ZIWEI_STAR},
+    "adjective_stars": {"type": "array", "items": _ZIWEI_STAR},
+    "changsheng12": {"type": "string"},
+    "boshi12": {"type": "string"},
+    "stage": _ZIWEI_STAGE,
+}
+
+ZIWEI_CHART_OUTPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "system": {"type": "string"},
+        "basic_info": _STRING_MAP,
+        "palaces": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"name": {"type": "string"}, **_ZIWEI_PALACE_PROPERTIES},
+                "required": ["name", "heavenly_stem", "earthly_branch", "major_stars"],
+            },
+        },
+        "metadata": {"type": "object"},
+        # language 传列表时，其余语言的完整结果（结构同本对象）
+        "translations": {"type": "object", "additionalProperties": {"type": "object"}},
+    },
+    "required": ["system", "basic_info", "palaces"],
+}
+
+_ZIWEI_LIMIT: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "index": {"type": "integer"},
+        "heavenly_stem": {"type": "string"},
+        "earthly_branch": {"type": "string"},
+        "palace_names": _STRING_LIST,
+        "mutagen": _STRING_LIST,
+        "age": {"type": "string"},
+    },
+    "required": ["name", "heavenly_stem", "earthly_branch", "palace_names"],
+}
+
+ZIWEI_FORTUNE_OUTPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "query_date": {"type": "string"},
+        "solar_date": {"type": "string"},
+        "lunar_date": {"type": "string"},
+        "decadal": _ZIWEI_LIMIT,
+        "yearly": _ZIWEI_LIMIT,
+        "monthly": _ZIWEI_LIMIT,
+        "daily": _ZIWEI_LIMIT,
+        "hourly": _ZIWEI_LIMIT,
+        "translations": {"type": "object", "additionalProperties": {"type": "object"}},
+    },
+    "required": ["query_date", "solar_date", "lunar_date"],
+}
+
+ZIWEI_PALACE_OUTPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "palace_name": {"type": "string"},
+        **_ZIWEI_PALACE_PROPERTIES,
+        "basic_info": _STRING_MAP,
+    },
+    "required": ["palace_name", "heavenly_stem", "earthly_branch"],
+}
+
+_BAZI_PILLAR: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "gan": {"type": "string"},
+        "zhi": {"type": "string"},
+        "pillar": {"type": "string"},
+    },
+    "required": ["gan", "zhi", "pillar"],
+}
+
+_BAZI_BY_PILLAR_LISTS: Dict[str, Any] = {
+    "type": "object",
+    "additionalProperties": _STRING_LIST,
+}
+
+BAZI_CHART_OUTPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "solar_date": {"type": "string"},
+        "lunar_date": {"type": "string"},
+        "gender": {"type": "string"},
+        "pillars": {
+            "type": "object",
+            "properties": {pillar: _BAZI_PILLAR for pillar in ("year", "month", "day", "hour")},
+            "required": ["year", "month", "day", "hour"],
+        },
+        "eight_char": {"type": "string"},
+        "zodiac": {"type": "string"},
+        "deities": _STRING_MAP,
+        "wu_xing": {
+            "type": "object",
+            "properties": {"scores": _NUMBER_MAP, "description": {"type": "string"}},
+        },
+        "zhi_cang_gan": _BAZI_BY_PILLAR_LISTS,
+        "zhi_deities": _BAZI_BY_PILLAR_LISTS,
+        "day_master": {"type": "string"},
+    },
+    "required": ["pillars", "eight_char", "day_master"],
+}
+
+_BAZI_DEITIES: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "gan": {"type": "string"},
+        "zhi_hide_gan": _STRING_LIST,
+        "zhi": _STRING_LIST,
+    },
+}
+
+_BAZI_DA_YUN: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "index": {"type": "integer"},
+        "gan_zhi": {"type": "string"},
+        "start_age": {"type": "integer"},
+        "end_age": {"type": "integer"},
+        "start_year": {"type": "integer"},
+        "end_year": {"type": "integer"},
+        "age_range": {"type": "string"},
+        "year_range": {"type": "string"},
+        "is_pre_start": {"type": "boolean"},
+        "description": {"type": "string"},
+        "deities": _BAZI_DEITIES,
+        "xun_kong": {"type": "string"},
+    },
+}
+
+BAZI_FORTUNE_OUTPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "query_date": {"type": "string"},
+        "age": {"type": "integer"},
+        "nominal_age": {"type": "integer"},
+        "day_master": {"type": "string"},
+        "qi_yun": {"type": "object"},
+        "da_yun_direction": {"type": "string"},
+        "da_yun": _BAZI_DA_YUN,
+        "da_yun_list": {"type": "array", "items": _BAZI_DA_YUN},
+        "liu_nian": {
+            "type": "object",
+            "properties": {
+                "year": {"type": "integer"},
+                "gan_zhi": {"type": "string"},
+                "zodiac": {"type": "string"},
+                "age": {"type": "integer"},
+                "deities": _BAZI_DEITIES,
+            },
+        },
+        "basic_chart": BAZI_CHART_OUTPUT_SCHEMA,
+    },
+    "required": ["query_date", "age", "day_master", "da_yun", "liu_nian"],
+}
+
+_BAZI_ELEMENT_SCORE: Dict[str, Any] = {
+    "type": "object",
+    "properties": {"element": {"type": "string"}, "score": {"type": "number"}},
+}
+
+BAZI_ELEMENT_OUTPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "scores": _NUMBER_MAP,
+        "percentages": _NUMBER_MAP,
+        "strongest": _BAZI_ELEMENT_SCORE,
+        "weakest": _BAZI_ELEMENT_SCORE,
+        "missing": _STRING_LIST,
+        "balance": {"type": "string"},
+        "day_master": {"type": "string"},
+        "day_master_element": {"type": "string"},
+    },
+    "required": ["scores", "day_master"],
+}
+
+OUTPUT_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "get_ziwei_chart": ZIWEI_CHART_OUTPUT_SCHEMA,
+    "get_ziwei_fortune": ZIWEI_FORTUNE_OUTPUT_SCHEMA,
+    "analyze_ziwei_palace": ZIWEI_PALACE_OUTPUT_SCHEMA,
+    "get_bazi_chart": BAZI_CHART_OUTPUT_SCHEMA,
+    "get_bazi_fortune": BAZI_FORTUNE_OUTPUT_SCHEMA,
+    "analyze_bazi_element": BAZI_ELEMENT_OUTPUT_SCHEMA,
+}
+
+# detail 各级别包含的字段路径（None 表示全部）。outputSchema 中 required 的字段总会补上
+_ZIWEI_BRIEF_FIELDS = (
+    "system",
+    "basic_info",
+    "palaces.name",
+    "palaces.is_body_palace",
+    "palaces.is_original_palace",
+    "palaces.heavenly_stem",
+    "palaces.earthly_branch",
+    "palaces.major_stars",
+)
+_BAZI_BRIEF_FIELDS = (
+    "solar_date",
+    "lunar_date",
+    "gender",
+    "zodiac",
+    "pillars",
+    "eight_char",
+    "day_master",
+)
+_BAZI_FORTUNE_BRIEF_FIELDS = (
+    "query_date",
+    "age",
+    "nominal_age",
+    "day_master",
+    "da_yun",
+    "liu_nian",
+)
+_ZIWEI_FORTUNE_BRIEF_FIELDS = ("query_date", "solar_date", "lunar_date", "decadal", "yearly")
+
+DETAIL_PRESETS: Dict[str, Dict[str, Optional[Tuple[str, ...]]]] = {
+    "get_ziwei_chart": {
+        "brief": _ZIWEI_BRIEF_FIELDS,
+        "standard": _ZIWEI_BRIEF_FIELDS + ("palaces.minor_stars", "palaces.stage"),
+        "full": None,
+    },
+    "get_ziwei_fortune": {
+        "brief": _ZIWEI_FORTUNE_BRIEF_FIELDS,
+        "standard": _ZIWEI_FORTUNE_BRIEF_FIELDS + ("monthly", "daily"),
+        "full": None,
+    },
+    "get_bazi_chart": {
+        "brief": _BAZI_BRIEF_FIELDS,
+        "standard": _BAZI_BRIEF_FIELDS + ("deities", "wu_xing"),
+        "full": None,
+    },
+    "get_bazi_fortune": {
+        "brief": _BAZI_FORTUNE_BRIEF_FIELDS,
+        "standard": _BAZI_FORTUNE_BRIEF_FIELDS + ("qi_yun", "da_yun_direction", "da_yun_list"),
+        "full": None,
+    },
+}
+
+
 def get_all_tool_definitions() -> List[Dict[str, Any]]:
     """Get all tool definitions"""
     tools = [
@@ -449,4 +753,6 @@ def get_all_tool_definitions() -> List[Dict[str, Any]]:
         tool["title"] = _TOOL_TITLES[tool["name"]]
         tool["annotations"]["openWorldHint"] = False
         tool["inputSchema"]["additionalProperties"] = False
+        if config.ADVERTISE_OUTPUT_SCHEMA and tool["name"] in OUTPUT_SCHEMAS:
+            tool["outputSchema"] = OUTPUT_SCHEMAS[tool["name"]]
     return tools
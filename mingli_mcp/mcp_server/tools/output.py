@@ -0,0 +1,142 @@
+"""
+Tool output rendering.
+
+Handlers hand their result dict to render_output(), which returns either the
+text for content[0].text, a StructuredResult that the server turns into MCP
+structuredContent, or a BlobResult sent as a base64 embedded resource.
+Structured results skip the JSON-in-text double encoding: the dict is
+serialized exactly once, by the transport. Blob results are MessagePack for
+clients that decode programmatically. With STREAM_OUTPUT the text is a
+StreamingText that the transport renders and writes chunk by chunk.
+
+Result dicts may hold compact read-only Mapping records (the interned ziwei
+star records); they are turned into plain dicts only here, when encoding.
+"""
+
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+from mingli_mcp.config import config
+from mingli_mcp.mcp_server.tools.definitions import DETAIL_PRESETS, OUTPUT_SCHEMAS
+from mingli_mcp.utils.binary_codecs import MSGPACK
+from mingli_mcp.utils.projection import FieldSelection, resolve_selection
+from mingli_mcp.utils.streaming import StreamingText
+
+# content[0].text for format="structured" (the data itself is in structuredContent)
+STRUCTURED_TEXT = "结果见 structuredContent"
+
+
+@dataclass(frozen=True)
+class StructuredResult:
+    """Tool result carried as MCP structuredContent"""
+
+    data: Dict[str, Any]
+    # Text block sent alongside; None means the short STRUCTURED_TEXT pointer
+    text: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class BlobResult:
+    """Tool result carried as a base64 blob in an embedded resource"""
+
+    blob: bytes
+    mime_type: str
+    # structuredContent to send alongside (only when outputSchema is advertised)
+    structured: Optional[Dict[str, Any]] = None
+
+
+ToolOutput = Union[str, StreamingText, StructuredResult, BlobResult]
+
+
+# 与 to_json 参数相同，流式输出时用它的 iterencode 逐段生成
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+
+def to_json(data: Any) -> str:
+    """序列化为JSON文本（MCP的content.text必须是字符串）"""
+    return json.dumps(to_plain(data), ensure_ascii=False, indent=2)
+
+
+# 结果中绝大多数值是标量，先按类型直接放过（isinstance(…, Mapping) 走 ABC 检查，较慢）
+_SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+def to_plain(data: Any) -> Any:
+    """
+    把结果中的只读记录转成普通字典（JSON / structuredContent / MessagePack 编码前用）
+
+    先整体转换再交给 json 编码，比用 default 钩子逐个回调记录更快
+
+    Args:
+        data: 结果字典
+
+    Returns:
+        只含 dict / list / 标量的等价结构（新建的容器，原结果不变）
+    """
+    if type(data) in _SCALAR_TYPES:
+        return data
+    if isinstance(data, dict):
+        return {key: to_plain(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [to_plain(item) for item in data]
+    if isinstance(data, Mapping):
+        # 只读记录：自带 to_dict 时用它，比逐键读取快
+        to_dict = getattr(data, "to_dict", None)
+        return to_dict() if to_dict is not None else dict(data)
+    return data
+
+
+def field_selection(tool_name: str, args: Dict[str, Any]) -> FieldSelection:
+    """
+    由工具参数中的 detail / fields 得到字段选择
+
+    Args:
+        tool_name: 工具名（决定详略预设与字段校验所用的 outputSchema）
+        args: 工具参数
+
+    Returns:
+        FieldSelection，未传 detail/fields 时为全部字段
+    """
+    return resolve_selection(
+        args.get("detail"), args.get("fields"), DETAIL_PRESETS[tool_name], OUTPUT_SCHEMAS[tool_name]
+    )
+
+
+def render_output(
+    data: Dict[str, Any],
+    output_format: str,
+    iter_markdown: Callable[[Dict[str, Any]], Iterable[str]],
+) -> ToolOutput:
+    """
+    按 format 参数渲染工具结果
+
+    Args:
+        data: 排盘/分析结果字典
+        output_format: markdown / json / structured / msgpack
+        iter_markdown: 逐段生成 Markdown 的渲染函数（格式化器的 iter_*_markdown）
+
+    Returns:
+        文本结果（STREAM_OUTPUT 时为 StreamingText，渲染推迟到传输层写出时）；
+        format="structured" 时为 StructuredResult，format="msgpack" 时为 BlobResult。
+        声明了 outputSchema 时（ADVERTISE_OUTPUT_SCHEMA）MCP 要求每次都返回结构化结果，
+        其他格式也附带 data
+    """
+    if output_format == "structured":
+        return StructuredResult(to_plain(data))
+    if output_format == "msgpack":
+        data = to_plain(data)
+        structured = data if config.ADVERTISE_OUTPUT_SCHEMA else None
+        return BlobResult(MSGPACK.dumps(data), MSGPACK.media_type, structured)
+    if config.STREAM_OUTPUT and not config.ADVERTISE_OUTPUT_SCHEMA:
+        fragments: Iterable[str] = (
+            _JSON_ENCODER.iterencode(to_plain(data))
+            if output_format == "json"
+            else iter_markdown(data)
+        )
+        return StreamingText(fragments, config.STREAM_CHUNK_SIZE)
+    text = to_json(data) if output_format == "json" else "".join(iter_markdown(data))
+    if config.ADVERTISE_OUTPUT_SCHEMA:
+        return StructuredResult(to_plain(data), text)
+    return text
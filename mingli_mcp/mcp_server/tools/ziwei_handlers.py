@@ -4,19 +4,20 @@ Ziwei (紫微斗数) tool handlers.
 This module contains handlers for Ziwei-related MCP tools.
 """
 
-import json
 from datetime import datetime
 from typing import Any, Dict, List
 
+from mingli_mcp.core.birth_info import ValidatedBirthInfo
+from mingli_mcp.mcp_server.tools.output import ToolOutput, field_selection, render_output
 from mingli_mcp.systems import get_system
 from mingli_mcp.systems.ziwei.formatter import ZiweiFormatter
-from mingli_mcp.utils.performance import PerformanceTimer, log_performance
+from mingli_mcp.utils.performance import PerformanceTimer, log_performance, stage
 from mingli_mcp.utils.validators import (
+    validate_birth_info,
     validate_date_range,
-    validate_gender_strict,
     validate_language,
+    validate_languages,
     validate_required_params,
-    validate_time_index_strict,
 )
 
 # Shared formatter instance
@@ -48,20 +49,28 @@ def _validate_common_params(
     required_params: List[str],
     param_descriptions: Dict[str, str],
     date_key: str = "date",
-) -> None:
-    """验证通用参数"""
-    # Check required params first
-    validate_required_params(args, required_params, param_descriptions)
-
-    # Validate individual fields
-    validate_date_range(args[date_key])
-    validate_time_index_strict(args["time_index"])
-    validate_gender_strict(args["gender"])
-
-    # Validate language if provided
-    language = args.get("language")
-    if language:
-        validate_language(language)
+    multi_language: bool = False,
+) -> ValidatedBirthInfo:
+    """
+    验证通用参数（multi_language 为 True 时 language 可以是语言列表）
+
+    Returns:
+        校验过的生辰信息，直接交给排盘系统（系统不再重复校验）
+    """
+    with stage("validate"):
+        # Check required params first
+        validate_required_params(args, required_params, param_descriptions)
+
+        # Validate birth info once; systems skip validation for the returned token
+        birth_info = validate_birth_info(_build_birth_info(args, date_key))
+
+        # Validate language if provided
+        language = args.get("language")
+        if multi_language and isinstance(language, list):
+            validate_languages(language)
+        elif language:
+            validate_language(language)
+    return birth_info
 
 
 def _build_birth_info(args: Dict[str, Any], date_key: str = "date") -> Dict[str, Any]:
@@ -82,70 +91,65 @@ def _build_birth_info(args: Dict[str, Any], date_key: str = "date") -> Dict[str,
     return birth_info
 
 
-def _to_json(data: Any) -> str:
-    """序列化为JSON文本（MCP的content.text必须是字符串）"""
-    return json.dumps(data, ensure_ascii=False, indent=2)
-
-
 @log_performance
-def handle_get_ziwei_chart(args: Dict[str, Any]) -> str:
+def handle_get_ziwei_chart(args: Dict[str, Any]) -> ToolOutput:
     """工具：获取紫微斗数排盘"""
     # Validate parameters
-    _validate_common_params(
-        args, ["date", "time_index", "gender"], ZIWEI_CHART_PARAM_DESCRIPTIONS, date_key="date"
+    birth_info = _validate_common_params(
+        args,
+        ["date", "time_index", "gender"],
+        ZIWEI_CHART_PARAM_DESCRIPTIONS,
+        date_key="date",
+        multi_language=True,
     )
+    selection = field_selection("get_ziwei_chart", args)
 
     with PerformanceTimer("紫微排盘"):
-        birth_info = _build_birth_info(args)
+        # 语言可以是列表：只排一次盘，各语言只是换译名表
         language = args.get("language", "zh-CN")
 
         system = get_system("ziwei")
-        chart = system.get_chart(birth_info, language)
+        chart = system.get_chart(birth_info, language, selection=selection)
 
         output_format = args.get("format", "markdown")
-        if output_format == "json":
-            return _to_json(chart)
-        else:
-            return _ziwei_formatter.format_chart_markdown(chart)
+        with stage("render"):
+            return render_output(chart, output_format, _ziwei_formatter.iter_chart_markdown)
 
 
 @log_performance
-def handle_get_ziwei_fortune(args: Dict[str, Any]) -> str:
+def handle_get_ziwei_fortune(args: Dict[str, Any]) -> ToolOutput:
     """工具：获取紫微斗数运势"""
     # Validate parameters
-    _validate_common_params(
+    birth_info = _validate_common_params(
         args,
         ["birth_date", "time_index", "gender"],
         ZIWEI_FORTUNE_PARAM_DESCRIPTIONS,
         date_key="birth_date",
+        multi_language=True,
     )
+    selection = field_selection("get_ziwei_fortune", args)
 
     with PerformanceTimer("紫微运势查询"):
-        birth_info = _build_birth_info(args, date_key="birth_date")
-
         query_date_str = args.get("query_date")
         if query_date_str:
-            validate_date_range(query_date_str)
-            query_date = datetime.strptime(query_date_str, "%Y-%m-%d")
+            query_date = datetime(*validate_date_range(query_date_str))
         else:
             query_date = datetime.now()
 
         language = args.get("language", "zh-CN")
         system = get_system("ziwei")
-        fortune = system.get_fortune(birth_info, query_date, language)
+        fortune = system.get_fortune(birth_info, query_date, language, selection=selection)
 
         output_format = args.get("format", "markdown")
-        if output_format == "json":
-            return _to_json(fortune)
-        else:
-            return _ziwei_formatter.format_fortune_markdown(fortune)
+        with stage("render"):
+            return render_output(fortune, output_format, _ziwei_formatter.iter_fortune_markdown)
 
 
 @log_performance
-def handle_analyze_ziwei_palace(args: Dict[str, Any]) -> str:
+def handle_analyze_ziwei_palace(args: Dict[str, Any]) -> ToolOutput:
     """工具：分析紫微斗数宫位"""
     # Validate parameters
-    _validate_common_params(
+    birth_info = _validate_common_params(
         args,
         ["birth_date", "time_index", "gender", "palace_name"],
         ZIWEI_PALACE_PARAM_DESCRIPTIONS,
@@ -153,7 +157,6 @@ def handle_analyze_ziwei_palace(args: Dict[str, Any]) -> str:
     )
 
     with PerformanceTimer("紫微宫位分析"):
-        birth_info = _build_birth_info(args, date_key="birth_date")
         palace_name = args["palace_name"]
         language = args.get("language", "zh-CN")
 
@@ -161,7 +164,7 @@ def handle_analyze_ziwei_palace(args: Dict[str, Any]) -> str:
         analysis = system.analyze_palace(birth_info, palace_name, language)
 
         output_format = args.get("format", "markdown")
-        if output_format == "json":
-            return _to_json(analysis)
-        else:
-            return _ziwei_formatter.format_palace_analysis_markdown(analysis)
+        with stage("render"):
+            return render_output(
+                analysis, output_format, _ziwei_formatter.iter_palace_analysis_markdown
+            )
@@ -1,7 +1,12 @@
 """
 命理系统实现模块
+
+系统按"名称 -> 导入路径"登记，第一次 get_system() 时才导入实现模块。
+iztro-py（含 i18n 表）和 lunar_python 的导入要几百毫秒，initialize / tools/list
+不需要它们；容器休眠唤醒和 IDE 每次会话启动 stdio 服务都能省下这段时间。
 """
 
+import importlib
 import logging
 from typing import Dict, Optional, Type
 
@@ -11,6 +16,9 @@ from mingli_mcp.core.exceptions import SystemNotFoundError
 # 系统注册表
 _SYSTEMS: Dict[str, Type[BaseFortuneSystem]] = {}
 
+# 尚未导入的系统：名称 -> "模块路径:类名"
+_LAZY_SYSTEMS: Dict[str, str] = {}
+
 # 系统实例缓存
 _SYSTEM_INSTANCES: Dict[str, BaseFortuneSystem] = {}
 
@@ -24,6 +32,32 @@ def register_system(name: str, system_class: Type[BaseFortuneSystem]):
         system_class: 系统类
     """
     _SYSTEMS[name] = system_class
+    _LAZY_SYSTEMS.pop(name, None)
+
+
+def register_lazy_system(name: str, import_path: str):
+    """
+    按导入路径登记命理系统，第一次使用时才导入
+
+    Args:
+        name: 系统名称（用于标识）
+        import_path: "模块路径:类名"，如 "mingli_mcp.systems.ziwei:ZiweiSystem"
+    """
+    if name not in _SYSTEMS:
+        _LAZY_SYSTEMS[name] = import_path
+
+
+def _load_system(name: str) -> None:
+    """导入延迟登记的系统；依赖缺失时移出登记表，与导入期注册失败的行为一致"""
+    import_path = _LAZY_SYSTEMS[name]
+    module_name, _, class_name = import_path.partition(":")
+    try:
+        system_class = getattr(importlib.import_module(module_name), class_name)
+    except ImportError as e:
+        _LAZY_SYSTEMS.pop(name, None)
+        _logger.warning(f"{name} system unavailable: {e}")
+        raise SystemNotFoundError(f"System '{name}' is unavailable: {e}") from e
+    register_system(name, system_class)
 
 
 def get_system(name: str, cached: bool = True) -> BaseFortuneSystem:
@@ -45,9 +79,11 @@ def get_system(name: str, cached: bool = True) -> BaseFortuneSystem:
         如果需要独立实例，可设置 cached=False
     """
     if name not in _SYSTEMS:
-        raise SystemNotFoundError(
-            f"System '{name}' not registered. Available: {list(_SYSTEMS.keys())}"
-        )
+        if name not in _LAZY_SYSTEMS:
+            raise SystemNotFoundError(
+                f"System '{name}' not registered. Available: {list_systems()}"
+            )
+        _load_system(name)
 
     # 如果启用缓存且实例已存在，直接返回
     if cached and name in _SYSTEM_INSTANCES:
@@ -80,30 +116,39 @@ def clear_cache(name: Optional[str] = None):
 
 def list_systems() -> list:
     """
-    列出所有已注册的系统
+    列出所有已注册的系统（含尚未导入的系统，不会触发导入）
 
     Returns:
         系统名称列表
     """
-    return list(_SYSTEMS.keys())
+    return list(_SYSTEMS.keys()) + [name for name in _LAZY_SYSTEMS if name not in _SYSTEMS]
 
 
-# 自动导入并注册所有系统
-# 注册失败不阻断启动，但必须留下日志，避免系统"静默消失"难以排查
-_logger = logging.getLogger(__name__)
+def is_system_loaded(name: str) -> bool:
+    """
+    系统实现是否已导入
 
-try:
-    from .ziwei import ZiweiSystem
+    Args:
+        name: 系统名称
 
-    register_system("ziwei", ZiweiSystem)
-except ImportError as e:
-    _logger.warning(f"Ziwei system unavailable: {e}")
+    Returns:
+        已导入返回True
+    """
+    return name in _SYSTEMS
 
-try:
-    from .bazi import BaziSystem
 
-    register_system("bazi", BaziSystem)
-except ImportError as e:
-    _logger.warning(f"Bazi system unavailable: {e}")
+# 内置系统只登记导入路径；导入失败时在第一次使用时记录日志并报 SystemNotFoundError，
+# 避免系统"静默消失"难以排查
+_logger = logging.getLogger(__name__)
 
-__all__ = ["register_system", "get_system", "clear_cache", "list_systems"]
+register_lazy_system("ziwei", "mingli_mcp.systems.ziwei:ZiweiSystem")
+register_lazy_system("bazi", "mingli_mcp.systems.bazi:BaziSystem")
+
+__all__ = [
+    "register_system",
+    "register_lazy_system",
+    "get_system",
+    "clear_cache",
+    "list_systems",
+    "is_system_loaded",
+]
@@ -7,10 +7,13 @@
 
 import logging
 from datetime import datetime
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional
 
 from mingli_mcp.core.base_system import BaseFortuneSystem
+from mingli_mcp.core.birth_info import ValidatedBirthInfo
 from mingli_mcp.core.exceptions import DependencyError, SystemError, ValidationError
+from mingli_mcp.utils.performance import stage
+from mingli_mcp.utils.projection import ALL_FIELDS, FieldSelection
 
 from .formatter import BaziFormatter
 
@@ -231,7 +234,12 @@ class BaziSystem(BaseFortuneSystem):
     def get_system_version(self) -> str:
         return "1.0.0"
 
-    def get_chart(self, birth_info: Dict[str, Any], language: str = "zh-CN") -> Dict[str, Any]:
+    def get_chart(
+        self,
+        birth_info: Mapping[str, Any],
+        language: str = "zh-CN",
+        selection: Optional[FieldSelection] = None,
+    ) -> Dict[str, Any]:
         """
         获取八字排盘
 
@@ -243,16 +251,19 @@ class BaziSystem(BaseFortuneSystem):
                 - calendar: 历法 (solar/lunar)，默认solar
                 - is_leap_month: 是否闰月（仅农历），默认False
             language: 输出语言（暂未实现，保留接口一致性）
+            selection: 字段选择，默认全部字段；十神、五行、藏干、藏干十神未选中时不计算
 
         Returns:
             八字排盘详细信息
         """
-        self.validate_birth_info(birth_info)
+        birth_info = self.validate_birth_info(birth_info)
         # Note: lunar_python doesn't support i18n yet, language parameter is ignored for now
+        selection = selection or ALL_FIELDS
 
         try:
             # 获取lunar对象
-            lunar = self._get_lunar_object(birth_info)
+            with stage("engine"):
+                lunar = self._get_lunar_object(birth_info)
 
             # 提取四柱：必须走EightChar，不能用Lunar.get*InGanZhi()
             #
@@ -273,27 +284,11 @@ class BaziSystem(BaseFortuneSystem):
             day_gan, day_zhi = day_pillar[0], day_pillar[1]
             hour_gan, hour_zhi = hour_pillar[0], hour_pillar[1]
 
-            # 计算十神
-            deities = self._calculate_ten_deities(
-                day_gan,
-                [year_gan, month_gan, day_gan, hour_gan, year_zhi, month_zhi, day_zhi, hour_zhi],
-            )
-
-            # 计算五行
-            wu_xing = self._calculate_wu_xing(
-                [year_gan, month_gan, day_gan, hour_gan, year_zhi, month_zhi, day_zhi, hour_zhi]
-            )
-
-            zhi_cang_gan = self._get_zhi_cang_gan(year_zhi, month_zhi, day_zhi, hour_zhi)
-
             # 构建结果
             # solar_date必须是真正的阳历日期：农历输入时birth_info["date"]是农历，
             # 需要从lunar对象反查阳历，否则会把农历日期标成阳历。
-            solar_obj = lunar.getSolar()
             result = {
-                "solar_date": (
-                    f"{solar_obj.getYear():04d}-{solar_obj.getMonth():02d}-{solar_obj.getDay():02d}"
-                ),
+                "solar_date": self._solar_date_str(lunar),
                 "lunar_date": lunar.toString(),
                 "gender": birth_info["gender"],
                 "pillars": {
@@ -306,14 +301,25 @@ class BaziSystem(BaseFortuneSystem):
                 # 生肖直接取年柱地支对应的生肖：年柱按立春精确时刻换柱，
                 # getYearShengXiaoByLiChun() 只按天换，立春当天两者会自相矛盾
                 "zodiac": self._zodiac_from_zhi(year_zhi),
-                "deities": deities,
-                "wu_xing": wu_xing,
-                "zhi_cang_gan": zhi_cang_gan,
-                "zhi_deities": self._calculate_zhi_deities(day_gan, zhi_cang_gan),
-                "day_master": day_gan,  # 日主（日干）
             }
 
-            return result
+            # 以下各项按字段选择计算（默认全部），未选中的不计算
+            wants = selection.wants
+            chars = [year_gan, month_gan, day_gan, hour_gan, year_zhi, month_zhi, day_zhi, hour_zhi]
+            if wants("deities"):
+                # 计算十神
+                result["deities"] = self._calculate_ten_deities(day_gan, chars)
+            if wants("wu_xing"):
+                # 计算五行
+                result["wu_xing"] = self._calculate_wu_xing(chars)
+            if wants("zhi_cang_gan") or wants("zhi_deities"):
+                zhi_cang_gan = self._get_zhi_cang_gan(year_zhi, month_zhi, day_zhi, hour_zhi)
+                result["zhi_cang_gan"] = zhi_cang_gan
+                if wants("zhi_deities"):
+                    result["zhi_deities"] = self._calculate_zhi_deities(day_gan, zhi_cang_gan)
+            result["day_master"] = day_gan  # 日主（日干）
+
+            return result if selection.is_all else selection.project(result)
 
         except ValidationError:
             raise
@@ -326,9 +332,10 @@ class BaziSystem(BaseFortuneSystem):
 
     def get_fortune(
         self,
-        birth_info: Dict[str, Any],
+        birth_info: Mapping[str, Any],
         query_date: Optional[datetime] = None,
         language: str = "zh-CN",
+        selection: Optional[FieldSelection] = None,
     ) -> Dict[str, Any]:
         """
         获取八字运势（大运、流年）
@@ -337,6 +344,7 @@ class BaziSystem(BaseFortuneSystem):
             birth_info: 生辰信息
             query_date: 查询日期，默认当前时间
             language: 输出语言（暂未实现，保留接口一致性）
+            selection: 字段选择，默认全部字段；未选 basic_chart 时不排本命盘
 
         Returns:
             运势信息
@@ -346,39 +354,41 @@ class BaziSystem(BaseFortuneSystem):
             起运时间由出生到月令节气的距离换算（三天折一年）。
             这部分由lunar_python计算，不再是按年龄除以10的近似。
         """
-        self.validate_birth_info(birth_info)
+        birth_info = self.validate_birth_info(birth_info)
         # Note: lunar_python doesn't support i18n yet, language parameter is ignored for now
 
         if query_date is None:
             query_date = datetime.now()
+        selection = selection or ALL_FIELDS
 
         try:
-            # 获取基本八字
-            chart = self.get_chart(birth_info, language)
+            with stage("engine"):
+                lunar = self._get_lunar_object(birth_info)
 
             # 年份差（保留原字段口径）与虚岁（大运/流年年龄使用虚岁）
-            birth_year = int(chart["solar_date"].split("-")[0])
+            solar_date = self._solar_date_str(lunar)
+            birth_year = int(solar_date.split("-")[0])
             current_year = query_date.year
             age = current_year - birth_year
 
             # 查询日期早于出生日期时，大运序号/年龄都是无意义结果，直接拒绝。
             # 按天比较：同年出生日之前的查询同样无效
-            birth_solar_date = datetime.strptime(chart["solar_date"], "%Y-%m-%d").date()
+            birth_solar_date = datetime.strptime(solar_date, "%Y-%m-%d").date()
             if query_date.date() < birth_solar_date:
                 raise ValidationError(
                     f"查询日期不能早于出生日期: {query_date.strftime('%Y-%m-%d')} "
-                    f"早于 {chart['solar_date']}"
+                    f"早于 {solar_date}"
                 )
 
             nominal_age = age + 1  # 虚岁
 
-            lunar = self._get_lunar_object(birth_info)
-            eight_char = self._get_eight_char(lunar)
-            day_gan = eight_char.getDayGan()
+            with stage("engine"):
+                eight_char = self._get_eight_char(lunar)
+                day_gan = eight_char.getDayGan()
 
-            # 大运推演（阳男阴女顺排 / 阴男阳女逆排，起运由节气距离决定）
-            yun = eight_char.getYun(1 if birth_info["gender"] == "男" else 0)
-            da_yun_list = self._build_da_yun_list(yun, day_gan)
+                # 大运推演（阳男阴女顺排 / 阴男阳女逆排，起运由节气距离决定）
+                yun = eight_char.getYun(1 if birth_info["gender"] == "男" else 0)
+                da_yun_list = self._build_da_yun_list(yun, day_gan)
             current_da_yun = self._find_current_da_yun(da_yun_list, current_year)
 
             # 获取流年天干地支（同样以立春换年，与年柱口径保持一致）
@@ -402,10 +412,14 @@ class BaziSystem(BaseFortuneSystem):
                     "age": nominal_age,
                     "deities": self._gan_zhi_deities(liu_nian_gan_zhi, day_gan),
                 },
-                "basic_chart": chart,
             }
+            # 本命盘（基本八字）是整段重新排盘，未选中时整段跳过
+            if selection.wants("basic_chart"):
+                result["basic_chart"] = self.get_chart(
+                    birth_info, language, selection.child("basic_chart")
+                )
 
-            return result
+            return result if selection.is_all else selection.project(result)
 
         except ValidationError:
             raise
@@ -416,7 +430,7 @@ class BaziSystem(BaseFortuneSystem):
             logger.exception("Unexpected error calculating bazi fortune")
             raise SystemError(f"运势计算失败: {str(e)}")
 
-    def analyze_element(self, birth_info: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze_element(self, birth_info: Mapping[str, Any]) -> Dict[str, Any]:
         """
         分析五行强弱
 
@@ -556,10 +570,15 @@ class BaziSystem(BaseFortuneSystem):
         eight_char.setSect(DAY_BOUNDARY_SECT)
         return eight_char
 
-    def _get_lunar_object(self, birth_info: Dict[str, Any]) -> Lunar:
-        """获取lunar对象"""
-        date_str = birth_info["date"]
-        year, month, day = map(int, date_str.split("-"))
+    @staticmethod
+    def _solar_date_str(lunar: "Lunar") -> str:
+        """lunar对象对应的阳历日期（YYYY-MM-DD）"""
+        solar_obj = lunar.getSolar()
+        return f"{solar_obj.getYear():04d}-{solar_obj.getMonth():02d}-{solar_obj.getDay():02d}"
+
+    def _get_lunar_object(self, birth_info: ValidatedBirthInfo) -> Lunar:
+        """获取lunar对象（日期已在校验时解析）"""
+        year, month, day = birth_info.date_parts
 
         # 计算小时
         if "hour" in birth_info:
@@ -693,7 +712,7 @@ class BaziSystem(BaseFortuneSystem):
         }
 
     def analyze_palace(
-        self, birth_info: Dict[str, Any], palace_name: str, language: str = "zh-CN"
+        self, birth_info: Mapping[str, Any], palace_name: str, language: str = "zh-CN"
     ) -> Dict[str, Any]:
         """
         八字系统不支持宫位分析
@@ -4,7 +4,20 @@
 用于将八字数据格式化为JSON和Markdown格式
 """
 
-from typing import Any, Dict, Union
+from typing import Any, Dict, Iterator, Union
+
+# 地支藏干/藏干十神各行的 (柱键, 标签)
+_ZHI_LABELS = (("year", "年支"), ("month", "月支"), ("day", "日支"), ("hour", "时支"))
+
+# 基本信息各行的 (字段, 标签)
+_BASIC_INFO_LABELS = (
+    ("solar_date", "阳历"),
+    ("lunar_date", "农历"),
+    ("gender", "性别"),
+    ("zodiac", "生肖"),
+)
+
+_MD_DA_YUN_TABLE_HEADER = "\n## 大运一览\n\n| 步 | 干支 | 年龄 | 公历年份 | 十神 |\n|---|------|------|----------|------|\n"
 
 
 class BaziFormatter:
@@ -80,14 +93,26 @@ class BaziFormatter:
 
     def _format_chart_markdown(self, data: Dict[str, Any]) -> str:
         """格式化排盘为Markdown"""
-        md = f"""# 八字排盘
+        return "".join(self.iter_chart_markdown(data))
 
-## 基本信息
-- **阳历**: {data['solar_date']}
-- **农历**: {data['lunar_date']}
-- **性别**: {data['gender']}
-- **生肖**: {data['zodiac']}
+    def iter_chart_markdown(self, data: Dict[str, Any]) -> Iterator[str]:
+        """
+        逐段生成排盘的Markdown（四柱部分是一个 f-string，其余段落按字段有无产出）
 
+        Args:
+            data: 排盘数据
+
+        Yields:
+            Markdown片段，依次拼接即为 format_chart_markdown 的结果
+        """
+        pillars = data["pillars"]
+        yield "# 八字排盘\n\n## 基本信息\n"
+        for key, label in _BASIC_INFO_LABELS:
+            if key in data:
+                yield f"- **{label}**: {data[key]}\n"
+
+        yield (
+            f"""
 ## 四柱八字
 ```
 {data['eight_char']}
@@ -96,46 +121,48 @@ class BaziFormatter:
 ### 详细四柱
 | 柱 | 天干 | 地支 | 干支 |
 |---|------|------|------|
-| 年柱 | {data['pillars']['year']['gan']} | {data['pillars']['year']['zhi']} | {data['pillars']['year']['pillar']} |
-| 月柱 | {data['pillars']['month']['gan']} | {data['pillars']['month']['zhi']} | {data['pillars']['month']['pillar']} |
-| 日柱 | {data['pillars']['day']['gan']} | {data['pillars']['day']['zhi']} | {data['pillars']['day']['pillar']} |
-| 时柱 | {data['pillars']['hour']['gan']} | {data['pillars']['hour']['zhi']} | {data['pillars']['hour']['pillar']} |
+| 年柱 | {pillars['year']['gan']} | {pillars['year']['zhi']} | {pillars['year']['pillar']} |
+| 月柱 | {pillars['month']['gan']} | {pillars['month']['zhi']} | {pillars['month']['pillar']} |
+| 日柱 | {pillars['day']['gan']} | {pillars['day']['zhi']} | {pillars['day']['pillar']} |
+| 时柱 | {pillars['hour']['gan']} | {pillars['hour']['zhi']} | {pillars['hour']['pillar']} |
 
 **日主**: {data['day_master']}（命主本身，以日干为准）
-
-## 十神分析
-- **年干**: {data['deities']['year_gan']}
-- **月干**: {data['deities']['month_gan']}
-- **日干**: {data['deities']['day_gan']}
-- **时干**: {data['deities']['hour_gan']}
-
-## 五行分析
-- **分数**: {data['wu_xing']['description']}
-- **详细**: 金{data['wu_xing']['scores']['金']} 木{data['wu_xing']['scores']['木']} 水{data['wu_xing']['scores']['水']} 火{data['wu_xing']['scores']['火']} 土{data['wu_xing']['scores']['土']}
-
-## 地支藏干
-- **年支** {data['pillars']['year']['zhi']}: {', '.join(data['zhi_cang_gan']['year'])}
-- **月支** {data['pillars']['month']['zhi']}: {', '.join(data['zhi_cang_gan']['month'])}
-- **日支** {data['pillars']['day']['zhi']}: {', '.join(data['zhi_cang_gan']['day'])}
-- **时支** {data['pillars']['hour']['zhi']}: {', '.join(data['zhi_cang_gan']['hour'])}
 """
+        )
+
+        # 以下段落在 detail/fields 裁剪后可能不存在
+        deities = data.get("deities")
+        if deities:
+            yield (
+                f"\n## 十神分析\n- **年干**: {deities['year_gan']}\n"
+                f"- **月干**: {deities['month_gan']}\n- **日干**: {deities['day_gan']}\n"
+                f"- **时干**: {deities['hour_gan']}\n"
+            )
+
+        wu_xing = data.get("wu_xing")
+        if wu_xing:
+            scores = wu_xing["scores"]
+            yield (
+                f"\n## 五行分析\n- **分数**: {wu_xing['description']}\n"
+                f"- **详细**: 金{scores['金']} 木{scores['木']} 水{scores['水']} "
+                f"火{scores['火']} 土{scores['土']}\n"
+            )
+
+        zhi_cang_gan = data.get("zhi_cang_gan") or {}
+        if zhi_cang_gan:
+            yield "\n## 地支藏干\n"
+            for key, label in _ZHI_LABELS:
+                yield f"- **{label}** {pillars[key]['zhi']}: {', '.join(zhi_cang_gan[key])}\n"
 
         # 藏干十神（可选：旧结构的数据没有这个字段）
         zhi_deities = data.get("zhi_deities")
         if zhi_deities:
-            md += "\n## 藏干十神\n"
-            for key, label in (
-                ("year", "年支"),
-                ("month", "月支"),
-                ("day", "日支"),
-                ("hour", "时支"),
-            ):
-                hidden = data["zhi_cang_gan"].get(key, [])
+            yield "\n## 藏干十神\n"
+            for key, label in _ZHI_LABELS:
+                hidden = zhi_cang_gan.get(key, [])
                 names = zhi_deities.get(key, [])
-                pairs = "、".join(f"{g}({d})" for g, d in zip(hidden, names))
-                md += f"- **{label}** {data['pillars'][key]['zhi']}: {pairs}\n"
-
-        return md
+                pairs = "、".join([f"{g}({d})" for g, d in zip(hidden, names)] or names)
+                yield f"- **{label}** {pillars[key]['zhi']}: {pairs}\n"
 
     @staticmethod
     def _format_deities(deities: Dict[str, Any]) -> str:
@@ -151,84 +178,99 @@ class BaziFormatter:
 
     def _format_fortune_markdown(self, data: Dict[str, Any]) -> str:
         """格式化运势为Markdown"""
+        return "".join(self.iter_fortune_markdown(data))
+
+    def iter_fortune_markdown(self, data: Dict[str, Any]) -> Iterator[str]:
+        """
+        逐段生成运势的Markdown
+
+        Args:
+            data: 运势数据
+
+        Yields:
+            Markdown片段，依次拼接即为 format_fortune_markdown 的结果
+        """
         da_yun = data.get("da_yun", {})
         liu_nian = data.get("liu_nian", {})
 
-        md = f"""# 八字运势
-
-## 查询信息
-- **查询日期**: {data['query_date']}
-- **当前年龄**: {data['age']}岁"""
+        yield (
+            f"# 八字运势\n\n## 查询信息\n- **查询日期**: {data['query_date']}\n"
+            f"- **当前年龄**: {data['age']}岁"
+        )
 
         if data.get("nominal_age"):
-            md += f"（虚岁 {data['nominal_age']}）"
+            yield f"（虚岁 {data['nominal_age']}）"
 
-        md += f"\n- **日主**: {data['day_master']}\n"
+        yield f"\n- **日主**: {data['day_master']}\n"
 
         # 起运信息（真实推演才有）
         qi_yun = data.get("qi_yun")
         if qi_yun:
-            md += f"- **起运**: {qi_yun['description']}\n"
+            yield f"- **起运**: {qi_yun['description']}\n"
         if data.get("da_yun_direction"):
-            md += f"- **排运方向**: {data['da_yun_direction']}\n"
+            yield f"- **排运方向**: {data['da_yun_direction']}\n"
 
-        md += "\n## 当前大运\n"
+        yield "\n## 当前大运\n"
         if da_yun.get("is_pre_start"):
-            md += f"- **状态**: 尚未起运，当前处于小运期（{da_yun.get('age_range', '')}）\n"
+            yield f"- **状态**: 尚未起运，当前处于小运期（{da_yun.get('age_range', '')}）\n"
         else:
             if da_yun.get("gan_zhi"):
-                md += f"- **干支**: {da_yun['gan_zhi']}\n"
-            md += f"- **{'年龄段' if not da_yun.get('gan_zhi') else '年龄范围'}**: "
-            md += f"{da_yun.get('age_range', '')}\n"
+                yield f"- **干支**: {da_yun['gan_zhi']}\n"
+            yield (
+                f"- **{'年龄段' if not da_yun.get('gan_zhi') else '年龄范围'}**: "
+                f"{da_yun.get('age_range', '')}\n"
+            )
             if da_yun.get("year_range"):
-                md += f"- **公历年份**: {da_yun['year_range']}\n"
+                yield f"- **公历年份**: {da_yun['year_range']}\n"
             deity_text = self._format_deities(da_yun.get("deities", {}))
             if deity_text:
-                md += f"- **十神**: {deity_text}\n"
+                yield f"- **十神**: {deity_text}\n"
             if da_yun.get("xun_kong"):
-                md += f"- **旬空**: {da_yun['xun_kong']}\n"
+                yield f"- **旬空**: {da_yun['xun_kong']}\n"
         if da_yun.get("description"):
-            md += f"- **说明**: {da_yun['description']}\n"
+            yield f"- **说明**: {da_yun['description']}\n"
 
-        md += f"""
-## 流年
-- **流年**: {liu_nian.get('year', '')}年
-- **干支**: {liu_nian.get('gan_zhi', '')}
-- **生肖**: {liu_nian.get('zodiac', '')}
-"""
+        yield (
+            f"\n## 流年\n- **流年**: {liu_nian.get('year', '')}年\n"
+            f"- **干支**: {liu_nian.get('gan_zhi', '')}\n"
+            f"- **生肖**: {liu_nian.get('zodiac', '')}\n"
+        )
         liu_nian_deities = self._format_deities(liu_nian.get("deities", {}))
         if liu_nian_deities:
-            md += f"- **十神**: {liu_nian_deities}\n"
+            yield f"- **十神**: {liu_nian_deities}\n"
 
         # 大运一览表
         da_yun_list = data.get("da_yun_list") or []
         if da_yun_list:
-            md += "\n## 大运一览\n\n"
-            md += "| 步 | 干支 | 年龄 | 公历年份 | 十神 |\n"
-            md += "|---|------|------|----------|------|\n"
+            yield _MD_DA_YUN_TABLE_HEADER
             for entry in da_yun_list:
                 current = "▶ " if entry is da_yun else ""
                 gan_zhi = entry.get("gan_zhi") or "—"
                 label = "小运" if entry.get("is_pre_start") else str(entry.get("index", ""))
                 deity_text = self._format_deities(entry.get("deities", {})) or "—"
-                md += (
+                yield (
                     f"| {current}{label} | {gan_zhi} | {entry.get('age_range', '')} "
                     f"| {entry.get('year_range', '')} | {deity_text} |\n"
                 )
 
-        md += f"""
----
-
-## 本命八字
-```
-{data['basic_chart']['eight_char']}
-```
-"""
-        return md
+        if "basic_chart" in data:
+            yield f"\n---\n\n## 本命八字\n```\n{data['basic_chart']['eight_char']}\n```\n"
 
     def _format_element_markdown(self, data: Dict[str, Any]) -> str:
         """格式化五行分析为Markdown"""
-        md = f"""# 五行分析
+        return "".join(self.iter_element_analysis_markdown(data))
+
+    def iter_element_analysis_markdown(self, data: Dict[str, Any]) -> Iterator[str]:
+        """
+        逐段生成五行分析的Markdown
+
+        Args:
+            data: 五行分析数据
+
+        Yields:
+            Markdown片段，依次拼接即为 format_element_analysis_markdown 的结果
+        """
+        yield f"""# 五行分析
 
 ## 日主信息
 - **日主**: {data['day_master']}
@@ -254,9 +296,10 @@ class BaziFormatter:
 
         # 根据五行情况给出建议
         if data["missing"]:
-            md += f"\n命局缺{', '.join(data['missing'])}，建议在生活中补充这些元素。\n"
+            yield f"\n命局缺{', '.join(data['missing'])}，建议在生活中补充这些元素。\n"
 
         if data["balance"] == "五行不平衡":
-            md += f"\n五行不够平衡，{data['strongest']['element']}过旺，{data['weakest']['element']}较弱，建议适当调和。\n"
-
-        return md
+            yield (
+                f"\n五行不够平衡，{data['strongest']['element']}过旺，"
+                f"{data['weakest']['element']}较弱，建议适当调和。\n"
+            )
@@ -5,13 +5,32 @@
 """
 
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 from iztro_py.i18n import t
 
+from mingli_mcp.utils.projection import ALL_FIELDS, FieldSelection
+
+from .records import StarRecord, intern_star
+from .translations import TranslationTable, get_translation_table
+
+# Markdown 中的固定段落。渲染由 iter_*_markdown 生成器逐段产出（流式输出时边生成边写出），
+# 非流式时 join 一次，不再逐行 md += 拼接；动态行仍用 f-string（编译期就拆好了片段，
+# 比运行时解析模板的 str.format 快）
+_MD_SIZHU_NOTE = (
+    "\n> 四柱按紫微惯例以农历年换年干支；八字工具以立春换年，"
+    "立春前后出生者两者的年柱/月柱可能不同。\n"
+)
+_MD_PALACES_HEADER = "\n## 十二宫详情\n\n"
+_MD_ANALYSIS_STARS_HEADER = "\n## 星曜配置\n\n"
+# 多语言结果中每个译本前的分隔
+_MD_TRANSLATION_SEPARATOR = "\n---\n\n> 语言: {}\n\n"
+_FORTUNE_LIMIT_KEYS = ("decadal", "yearly", "monthly", "daily", "hourly")
+_FORTUNE_LIMIT_NAMES = ("大限", "流年", "流月", "流日", "流时")
+
 
 class ZiweiFormatter:
-    """紫微斗数格式化器（使用 iztro-py 0.3.0+ 的国际化功能）"""
+    """紫微斗数格式化器（译名来自 iztro-py 的国际化资源，按语言预先翻好见 translations.py）"""
 
     # 天干地支映射（用于运势对象，因为 HoroscopeItem 没有 translate 方法）
     HEAVENLY_STEMS = {
@@ -42,17 +61,18 @@ class ZiweiFormatter:
         "haiEarthly": "亥",
     }
 
-    def format_chart(self, astrolabe) -> Dict[str, Any]:
+    def format_chart(self, astrolabe, selection: FieldSelection = ALL_FIELDS) -> Dict[str, Any]:
         """
         格式化星盘数据
 
         Args:
             astrolabe: iztro-py返回的astrolabe对象
+            selection: 字段选择，未选中的宫位字段不做翻译/格式化
 
         Returns:
             格式化后的星盘数据字典
         """
-        return {
+        result = {
             "system": "紫微斗数",
             "basic_info": {
                 "阳历日期": astrolabe.solar_date,
@@ -68,12 +88,21 @@ class ZiweiFormatter:
                 "身主": astrolabe.body,
                 "五行局": astrolabe.five_elements_class,
             },
-            "palaces": self._format_palaces(astrolabe.palaces),
+            "palaces": (
+                self._format_palaces(
+                    astrolabe.palaces,
+                    selection.child("palaces"),
+                    get_translation_table(astrolabe.language),
+                )
+                if selection.wants("palaces")
+                else []
+            ),
             "metadata": {
                 "generated_at": datetime.now().isoformat(),
                 "version": "1.0.0",
             },
         }
+        return result if selection.is_all else selection.project(result)
 
     def format_chart_markdown(self, chart_data: Dict[str, Any]) -> str:
         """
@@ -85,29 +114,45 @@ class ZiweiFormatter:
         Returns:
             Markdown格式的字符串
         """
-        md = f"# {chart_data['system']}排盘\n\n"
+        return "".join(self.iter_chart_markdown(chart_data))
+
+    def iter_chart_markdown(self, chart_data: Dict[str, Any]) -> Iterator[str]:
+        """
+        逐段生成星盘的Markdown（流式输出时由传输层边生成边写出）
+
+        Args:
+            chart_data: format_chart返回的字典
+
+        Yields:
+            Markdown片段，依次拼接即为 format_chart_markdown 的结果
+        """
+        yield f"# {chart_data['system']}排盘\n\n## 基本信息\n\n"
 
         # 基本信息
-        md += "## 基本信息\n\n"
-        for key, value in chart_data["basic_info"].items():
-            md += f"- **{key}**: {value}\n"
+        basic_info = chart_data["basic_info"]
+        for key, value in basic_info.items():
+            yield f"- **{key}**: {value}\n"
 
         # 四柱口径与八字不同，立春前后会不一致，这里说明清楚避免误读
-        if "四柱" in chart_data["basic_info"]:
-            md += (
-                "\n> 四柱按紫微惯例以农历年换年干支；八字工具以立春换年，"
-                "立春前后出生者两者的年柱/月柱可能不同。\n"
-            )
+        if "四柱" in basic_info:
+            yield _MD_SIZHU_NOTE
 
         # 十二宫详情
-        md += "\n## 十二宫详情\n\n"
+        yield _MD_PALACES_HEADER
         for palace in chart_data["palaces"]:
-            md += self._format_palace_markdown(palace)
+            yield from self._iter_palace_markdown(palace)
 
-        return md
+        # 同一星盘的其他语言版本
+        for language, translation in chart_data.get("translations", {}).items():
+            yield _MD_TRANSLATION_SEPARATOR.format(language)
+            yield from self.iter_chart_markdown(translation)
 
     def format_fortune(
-        self, horoscope, query_date: datetime, language: str = "zh-CN"
+        self,
+        horoscope,
+        query_date: datetime,
+        language: str = "zh-CN",
+        selection: FieldSelection = ALL_FIELDS,
     ) -> Dict[str, Any]:
         """
         格式化运势数据
@@ -115,6 +160,8 @@ class ZiweiFormatter:
         Args:
             horoscope: iztro-py返回的horoscope对象
             query_date: 查询日期
+            language: 输出语言
+            selection: 字段选择，未选中的运限不做翻译/格式化
 
         Returns:
             格式化后的运势数据字典
@@ -125,27 +172,13 @@ class ZiweiFormatter:
             "lunar_date": horoscope.lunar_date,
         }
 
-        # 大限
-        if hasattr(horoscope, "decadal"):
-            result["decadal"] = self._format_limit(horoscope.decadal, "大限", language)
-
-        # 流年
-        if hasattr(horoscope, "yearly"):
-            result["yearly"] = self._format_limit(horoscope.yearly, "流年", language)
-
-        # 流月
-        if hasattr(horoscope, "monthly"):
-            result["monthly"] = self._format_limit(horoscope.monthly, "流月", language)
+        # 大限、流年、流月、流日、流时
+        table = get_translation_table(language)
+        for key, name in zip(_FORTUNE_LIMIT_KEYS, _FORTUNE_LIMIT_NAMES):
+            if hasattr(horoscope, key) and selection.wants(key):
+                result[key] = self._format_limit(getattr(horoscope, key), name, table)
 
-        # 流日
-        if hasattr(horoscope, "daily"):
-            result["daily"] = self._format_limit(horoscope.daily, "流日", language)
-
-        # 流时
-        if hasattr(horoscope, "hourly"):
-            result["hourly"] = self._format_limit(horoscope.hourly, "流时", language)
-
-        return result
+        return result if selection.is_all else selection.project(result)
 
     def format_fortune_markdown(self, fortune_data: Dict[str, Any]) -> str:
         """
@@ -157,30 +190,44 @@ class ZiweiFormatter:
         Returns:
             Markdown格式的字符串
         """
-        md = "# 紫微斗数运势\n\n"
-        md += f"**查询日期**: {fortune_data['query_date']}\n\n"
-        md += f"**阳历**: {fortune_data['solar_date']}\n\n"
-        md += f"**农历**: {fortune_data['lunar_date']}\n\n"
+        return "".join(self.iter_fortune_markdown(fortune_data))
+
+    def iter_fortune_markdown(self, fortune_data: Dict[str, Any]) -> Iterator[str]:
+        """
+        逐段生成运势的Markdown
+
+        Args:
+            fortune_data: format_fortune返回的字典
+
+        Yields:
+            Markdown片段，依次拼接即为 format_fortune_markdown 的结果
+        """
+        yield (
+            f"# 紫微斗数运势\n\n**查询日期**: {fortune_data['query_date']}\n\n"
+            f"**阳历**: {fortune_data['solar_date']}\n\n**农历**: {fortune_data['lunar_date']}\n\n"
+        )
 
         # 各运限
-        for key in ["decadal", "yearly", "monthly", "daily", "hourly"]:
+        for key in _FORTUNE_LIMIT_KEYS:
             if key in fortune_data:
                 limit_data = fortune_data[key]
-                md += f"## {limit_data['name']}\n\n"
-                md += (
+                yield (
+                    f"## {limit_data['name']}\n\n"
                     f"- **天干地支**: {limit_data['heavenly_stem']}{limit_data['earthly_branch']}\n"
+                    f"- **宫位顺序**: {' → '.join(limit_data['palace_names'])}\n"
                 )
-                md += f"- **宫位顺序**: {' → '.join(limit_data['palace_names'])}\n"
 
                 if limit_data.get("mutagen"):
-                    md += f"- **四化**: {', '.join(limit_data['mutagen'])}\n"
+                    yield f"- **四化**: {', '.join(limit_data['mutagen'])}\n"
 
                 if limit_data.get("age"):
-                    md += f"- **年龄范围**: {limit_data['age']}\n"
+                    yield f"- **年龄范围**: {limit_data['age']}\n"
 
-                md += "\n"
+                yield "\n"
 
-        return md
+        for language, translation in fortune_data.get("translations", {}).items():
+            yield _MD_TRANSLATION_SEPARATOR.format(language)
+            yield from self.iter_fortune_markdown(translation)
 
     def format_palace_analysis(
         self, palace: Dict[str, Any], basic_info: Dict[str, Any]
@@ -220,6 +267,18 @@ class ZiweiFormatter:
         Returns:
             Markdown格式的字符串
         """
+        return "".join(self.iter_palace_analysis_markdown(analysis))
+
+    def iter_palace_analysis_markdown(self, analysis: Dict[str, Any]) -> Iterator[str]:
+        """
+        逐段生成宫位分析的Markdown
+
+        Args:
+            analysis: format_palace_analysis返回的字典
+
+        Yields:
+            Markdown片段，依次拼接即为 format_palace_analysis_markdown 的结果
+        """
         palace_label = self._palace_label(analysis["palace_name"])
         markers = []
         if analysis["is_body_palace"]:
@@ -231,131 +290,119 @@ class ZiweiFormatter:
         if markers:
             title += f" {' '.join(markers)}"
 
-        md = title + "\n\n"
-
         # 宫位基本信息
-        md += "## 宫位信息\n\n"
-        md += f"- **天干地支**: {analysis['heavenly_stem']}{analysis['earthly_branch']}\n"
+        yield (
+            f"{title}\n\n## 宫位信息\n\n"
+            f"- **天干地支**: {analysis['heavenly_stem']}{analysis['earthly_branch']}\n"
+        )
 
         if analysis.get("stage"):
             stage = analysis["stage"]
             if isinstance(stage, dict) and "range" in stage:
-                md += f"- **大限**: {stage['range'][0]}-{stage['range'][1]}岁\n"
+                yield f"- **大限**: {stage['range'][0]}-{stage['range'][1]}岁\n"
 
         if analysis.get("changsheng12"):
-            md += f"- **长生十二神**: {analysis['changsheng12']}\n"
+            yield f"- **长生十二神**: {analysis['changsheng12']}\n"
 
         if analysis.get("boshi12"):
-            md += f"- **博士十二神**: {analysis['boshi12']}\n"
+            yield f"- **博士十二神**: {analysis['boshi12']}\n"
 
         # 星曜信息
-        md += "\n## 星曜配置\n\n"
+        yield _MD_ANALYSIS_STARS_HEADER
 
         if analysis.get("major_stars"):
-            md += "### 主星\n\n"
+            yield "### 主星\n\n"
             for star in analysis["major_stars"]:
                 brightness = f"({star.get('brightness', '')})" if star.get("brightness") else ""
-                md += f"- **{star['name']}** {brightness}\n"
-            md += "\n"
+                yield f"- **{star['name']}** {brightness}\n"
+            yield "\n"
 
         if analysis.get("minor_stars"):
-            md += "### 辅星\n\n"
+            yield "### 辅星\n\n"
             for star in analysis["minor_stars"]:
                 brightness = f"({star.get('brightness', '')})" if star.get("brightness") else ""
-                md += f"- {star['name']} {brightness}\n"
-            md += "\n"
+                yield f"- {star['name']} {brightness}\n"
+            yield "\n"
 
         if analysis.get("adjective_stars"):
-            md += "### 杂耀\n\n"
-            star_names = [star["name"] for star in analysis["adjective_stars"]]
-            md += f"{', '.join(star_names)}\n\n"
+            yield "### 杂耀\n\n"
+            yield ", ".join([star["name"] for star in analysis["adjective_stars"]])
+            yield "\n\n"
+
+    def _format_palaces(
+        self, palaces, selection: FieldSelection, table: TranslationTable
+    ) -> List[Dict[str, Any]]:
+        """格式化十二宫数据（译名查表；未选中的星曜/神煞不翻译）"""
+        palace_names, stems, branches = table.palaces, table.stems, table.branches
+        wants = selection.wants
+        star_groups = [
+            key for key in ("major_stars", "minor_stars", "adjective_stars") if wants(key)
+        ]
+        plain_fields = [key for key in ("changsheng12", "boshi12") if wants(key)]
+        want_stage = wants("stage")
 
-        return md
-
-    def _format_palaces(self, palaces) -> List[Dict[str, Any]]:
-        """格式化十二宫数据（使用 iztro-py 0.3.0 的翻译方法）"""
         result = []
         for palace in palaces:
-            # 使用 translate_name() 获取中文宫位名（iztro-py 0.3.0+）
-            chinese_name = palace.translate_name()
-
-            # 使用翻译方法获取中文天干地支
-            heavenly_stem = palace.translate_heavenly_stem()
-            earthly_branch = palace.translate_earthly_branch()
-
-            result.append(
-                {
-                    "name": chinese_name,
-                    "is_body_palace": palace.is_body_palace,
-                    "is_original_palace": palace.is_original_palace,
-                    "heavenly_stem": heavenly_stem,
-                    "earthly_branch": earthly_branch,
-                    "major_stars": [self._format_star(s) for s in palace.major_stars],
-                    "minor_stars": [self._format_star(s) for s in palace.minor_stars],
-                    "adjective_stars": [self._format_star(s) for s in palace.adjective_stars],
-                    "changsheng12": palace.changsheng12,
-                    "boshi12": palace.boshi12,
-                    "stage": (
-                        self._format_stage(palace.decadal) if hasattr(palace, "decadal") else {}
-                    ),
-                }
-            )
+            # 宫名与天干地支是必需字段，总要翻译；表里没有的键（不应出现）交回 iztro-py 翻译
+            entry = {
+                "name": palace_names.get(palace.name) or palace.translate_name(),
+                "is_body_palace": palace.is_body_palace,
+                "is_original_palace": palace.is_original_palace,
+                "heavenly_stem": (
+                    stems.get(palace.heavenly_stem) or palace.translate_heavenly_stem()
+                ),
+                "earthly_branch": (
+                    branches.get(palace.earthly_branch) or palace.translate_earthly_branch()
+                ),
+            }
+            for key in star_groups:
+                entry[key] = [self._format_star(s, table) for s in getattr(palace, key)]
+            for key in plain_fields:
+                entry[key] = getattr(palace, key)
+            if want_stage:
+                entry["stage"] = self._format_stage(palace.decadal)
+            result.append(entry)
         return result
 
-    def _format_star(self, star) -> Dict[str, str]:
-        """格式化星曜数据（使用 iztro-py 0.3.0 的翻译方法）"""
-        # 使用 translate_name() 获取中文星曜名
-        star_name = star.translate_name() if hasattr(star, "translate_name") else star.name
-
-        # 使用 translate_brightness() 获取中文亮度描述
-        brightness = ""
-        if hasattr(star, "translate_brightness") and star.brightness:
-            try:
-                brightness = star.translate_brightness()
-            except Exception:
-                brightness = getattr(star, "brightness", "")
-        else:
-            brightness = getattr(star, "brightness", "")
+    def _format_star(self, star, table: TranslationTable) -> StarRecord:
+        """格式化星曜数据（星名与亮度查表；返回驻留的只读记录，不再每颗星新建字典）"""
+        brightness = star.brightness
+        if brightness:
+            brightness = table.brightness.get(brightness) or star.translate_brightness()
 
-        return {
-            "name": star_name,
-            "type": star.type,
-            "brightness": brightness,
-            "scope": getattr(star, "scope", "origin"),
-        }
+        return intern_star(
+            table.stars.get(star.name) or star.translate_name(), star.type, brightness, star.scope
+        )
 
     def _format_stage(self, stage) -> Dict[str, Any]:
-        """格式化大限数据（使用 iztro-py 0.3.0 的翻译方法）"""
-        if hasattr(stage, "range"):
-            # 使用翻译方法获取中文天干
-            heavenly_stem = (
-                stage.translate_heavenly_stem()
-                if hasattr(stage, "translate_heavenly_stem")
-                else stage.heavenly_stem
-            )
-            return {
-                "range": list(stage.range),
-                "heavenly_stem": heavenly_stem,
-            }
-        return {}
+        """格式化大限数据（iztro-py 的大限对象没有翻译方法，天干保持内部 ID）"""
+        if stage is None:
+            return {}
+        return {
+            "range": list(stage.range),
+            "heavenly_stem": stage.heavenly_stem,
+        }
 
-    def _translate_palace_name(self, palace_name: str, language: str) -> str:
+    def _translate_palace_name(self, palace_name: str, table: TranslationTable) -> str:
         """将运限中的内部宫位 ID 翻译为用户可读文本。"""
         if isinstance(palace_name, str) and palace_name.endswith("Palace"):
-            return t(f"palaces.{palace_name}", language)
+            return table.palaces.get(palace_name) or t(f"palaces.{palace_name}", table.language)
         return palace_name
 
-    def _translate_star_name(self, star_name: str, language: str) -> str:
-        """将内部星曜 ID 翻译为用户可读文本。"""
+    def _translate_star_name(self, star_name: str, table: TranslationTable) -> str:
+        """将内部星曜 ID 翻译为用户可读文本（只翻译主星、辅星）。"""
         if not isinstance(star_name, str):
             return star_name
+        translated = table.major_minor_stars.get(star_name)
+        if translated:
+            return translated
         if star_name.endswith("Maj"):
-            return t(f"stars.major.{star_name}", language)
+            return t(f"stars.major.{star_name}", table.language)
         if star_name.endswith("Min"):
-            return t(f"stars.minor.{star_name}", language)
+            return t(f"stars.minor.{star_name}", table.language)
         return star_name
 
-    def _format_limit(self, limit, name: str, language: str) -> Dict[str, Any]:
+    def _format_limit(self, limit, name: str, table: TranslationTable) -> Dict[str, Any]:
         """格式化运限数据（运势对象没有 translate 方法，使用映射表）"""
         # HoroscopeItem 没有 translate 方法，使用映射表翻译
         heavenly_stem = self.HEAVENLY_STEMS.get(limit.heavenly_stem, limit.heavenly_stem)
@@ -367,14 +414,14 @@ class ZiweiFormatter:
             "heavenly_stem": heavenly_stem,
             "earthly_branch": earthly_branch,
             "palace_names": [
-                self._translate_palace_name(palace_name, language)
+                self._translate_palace_name(palace_name, table)
                 for palace_name in limit.palace_names
             ],
         }
 
         if hasattr(limit, "mutagen"):
             result["mutagen"] = [
-                self._translate_star_name(star_name, language) for star_name in limit.mutagen
+                self._translate_star_name(star_name, table) for star_name in limit.mutagen
             ]
 
         if hasattr(limit, "age"):
@@ -392,37 +439,35 @@ class ZiweiFormatter:
 
     def _format_palace_markdown(self, palace: Dict[str, Any]) -> str:
         """格式化单个宫位为Markdown"""
-        markers = []
-        if palace.get("is_body_palace"):
-            markers.append("⭐")
-        if palace.get("is_original_palace"):
-            markers.append("🏠")
-
-        marker_str = "".join(markers) + " " if markers else ""
+        return "".join(self._iter_palace_markdown(palace))
 
-        palace_label = self._palace_label(palace["name"])
-        md = f"### {marker_str}{palace_label} ({palace['heavenly_stem']}{palace['earthly_branch']})\n\n"
+    def _iter_palace_markdown(self, palace: Dict[str, Any]) -> Iterator[str]:
+        """逐段生成单个宫位的Markdown"""
+        if palace.get("is_body_palace"):
+            marker_str = "⭐🏠 " if palace.get("is_original_palace") else "⭐ "
+        else:
+            marker_str = "🏠 " if palace.get("is_original_palace") else ""
+        yield (
+            f"### {marker_str}{self._palace_label(palace['name'])} "
+            f"({palace['heavenly_stem']}{palace['earthly_branch']})\n\n"
+        )
 
         if palace.get("major_stars"):
-            stars = []
-            for star in palace["major_stars"]:
-                name = star["name"]
-                brightness = f"({star['brightness']})" if star.get("brightness") else ""
-                stars.append(f"{name}{brightness}")
-            md += f"- **主星**: {', '.join(stars)}\n"
+            stars = [
+                f"{star['name']}({star['brightness']})" if star.get("brightness") else star["name"]
+                for star in palace["major_stars"]
+            ]
+            yield f"- **主星**: {', '.join(stars)}\n"
 
         if palace.get("minor_stars"):
-            stars = [s["name"] for s in palace["minor_stars"]]
-            md += f"- **辅星**: {', '.join(stars)}\n"
+            yield f"- **辅星**: {', '.join([s['name'] for s in palace['minor_stars']])}\n"
 
         if palace.get("adjective_stars"):
-            stars = [s["name"] for s in palace["adjective_stars"]]
-            md += f"- **杂耀**: {', '.join(stars)}\n"
+            yield f"- **杂耀**: {', '.join([s['name'] for s in palace['adjective_stars']])}\n"
 
         if palace.get("stage"):
             stage = palace["stage"]
             if isinstance(stage, dict) and stage.get("range"):
-                md += f"- **大限**: {stage['range'][0]}-{stage['range'][1]}岁\n"
+                yield f"- **大限**: {stage['range'][0]}-{stage['range'][1]}岁\n"
 
-        md += "\n"
-        return md
+        yield "\n"
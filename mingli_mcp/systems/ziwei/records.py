@@ -0,0 +1,94 @@
+"""
+紫微命盘的紧凑星曜记录
+
+一张命盘一百多颗星，每颗星原先都是一个新的 4 键字典，而星名、类型、亮度、作用范围
+的取值组合是有限的（星曜 × 亮度 × 语言）。StarRecord 是带 __slots__ 的只读记录，
+按内容驻留（flyweight）：同样的星在所有命盘里是同一个对象，命盘里只剩列表中的引用，
+内存中缓存成千上万张命盘时不再重复保存这些字段。
+
+StarRecord 实现只读 Mapping 接口（star["name"]、star.get("brightness")），Markdown
+渲染和字段投影照常读取；只在 JSON / MessagePack 编码前由 output.to_plain() 转成普通字典。
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+STAR_FIELDS = ("name", "type", "brightness", "scope")
+
+_StarKey = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+
+class StarRecord(Mapping):
+    """星曜记录（不可变；用 intern_star() 获取，不要直接构造）"""
+
+    __slots__ = STAR_FIELDS
+
+    name: str
+    type: Optional[str]
+    brightness: Optional[str]
+    scope: Optional[str]
+
+    def __init__(
+        self, name: str, type: Optional[str], brightness: Optional[str], scope: Optional[str]
+    ):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "type", type)
+        object.__setattr__(self, "brightness", brightness)
+        object.__setattr__(self, "scope", scope)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError("StarRecord 是共享的只读记录，不能修改")
+
+    def __getitem__(self, key: str) -> Any:
+        if key in STAR_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(STAR_FIELDS)
+
+    def __len__(self) -> int:
+        return len(STAR_FIELDS)
+
+    def __reduce__(self) -> Tuple[Any, _StarKey]:
+        # 反序列化 / deepcopy 时重新驻留，仍得到共享对象
+        return intern_star, (self.name, self.type, self.brightness, self.scope)
+
+    def __repr__(self) -> str:
+        return f"StarRecord({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转成普通字典（JSON 编码用）"""
+        return {
+            "name": self.name,
+            "type": self.type,
+            "brightness": self.brightness,
+            "scope": self.scope,
+        }
+
+
+# (星名, 类型, 亮度, 作用范围) -> 共享的记录。取值组合有限（所有语言合计几千个），不需要淘汰
+_STARS: Dict[_StarKey, StarRecord] = {}
+
+
+def intern_star(
+    name: str, type: Optional[str], brightness: Optional[str], scope: Optional[str]
+) -> StarRecord:
+    """
+    获取驻留的星曜记录（同样内容总是返回同一个对象）
+
+    Args:
+        name: 星名（已翻译）
+        type: 星曜类型
+        brightness: 亮度（已翻译）
+        scope: 作用范围
+
+    Returns:
+        StarRecord
+    """
+    key = (name, type, brightness, scope)
+    record = _STARS.get(key)
+    if record is None:
+        # setdefault 是原子的：并发时多建的记录直接丢弃，所有调用方拿到同一个对象
+        record = _STARS.setdefault(key, StarRecord(name, type, brightness, scope))
+    return record
@@ -0,0 +1,107 @@
+"""
+紫微斗数译名表
+
+iztro-py 的 t() 每次翻译都要按点号拆键、逐层查字典，查不到再回退中文；
+星曜/宫位的 translate_*() 还要先沿宫位找到所属星盘的语言。一张命盘一百多颗星，
+每次排盘、运势都要把这些重复一遍。这里按语言在第一次用到时把星曜、宫位、天干、
+地支、亮度的全部译名一次翻好，冻结成只读字典，格式化时只剩字典查找。
+
+译名仍然来自 iztro-py 的 t()，查不到时的回退规则（先回退简体中文、再原样返回）
+与逐个调用 translate_*() 完全一致。
+"""
+
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple
+
+from iztro_py.i18n import t
+from iztro_py.i18n.locales import zh_CN
+
+from mingli_mcp.utils.validators import SUPPORTED_LANGUAGES
+
+# 星盘里的亮度直接是中文，翻译键是拼音（与 iztro-py 的 translate_brightness 一致）
+_BRIGHTNESS_KEYS = {
+    "庙": "miao",
+    "旺": "wang",
+    "得": "de",
+    "利": "li",
+    "平": "ping",
+    "不": "bu",
+    "陷": "xian",
+}
+
+
+class TranslationTable(NamedTuple):
+    """单个语言的译名表（各字段都是只读字典）"""
+
+    language: str
+    # 星曜：主星、辅星及杂耀等顶层键（内部 key → 译名）
+    stars: Mapping[str, str]
+    # 只含主星、辅星：运限四化只翻译这两类
+    major_minor_stars: Mapping[str, str]
+    palaces: Mapping[str, str]
+    stems: Mapping[str, str]
+    branches: Mapping[str, str]
+    # 中文亮度 → 译名
+    brightness: Mapping[str, str]
+
+
+_TABLES: Dict[str, TranslationTable] = {}
+_lock = threading.Lock()
+
+
+def _section(name: str) -> Dict[str, Any]:
+    value = zh_CN.translations.get(name)
+    return value if isinstance(value, dict) else {}
+
+
+def _translate_section(prefix: str, keys, language: str) -> Mapping[str, str]:
+    return MappingProxyType({key: t(f"{prefix}.{key}", language) for key in keys})
+
+
+def _build_table(language: str) -> TranslationTable:
+    """按简体中文资源中的全部键翻译一遍（简体中文是 t() 的回退源，键全集以它为准）"""
+    star_sections = _section("stars")
+    major_minor: Dict[str, str] = {}
+    for group in ("major", "minor"):
+        for key in star_sections.get(group, {}):
+            major_minor[key] = t(f"stars.{group}.{key}", language)
+
+    # 杂耀等星名是资源里的顶层字符串键，iztro-py 对它们直接 t(key)
+    stars = {
+        key: t(key, language) for key, value in zh_CN.translations.items() if isinstance(value, str)
+    }
+    stars.update(major_minor)
+
+    return TranslationTable(
+        language=language,
+        stars=MappingProxyType(stars),
+        major_minor_stars=MappingProxyType(major_minor),
+        palaces=_translate_section("palaces", _section("palaces"), language),
+        stems=_translate_section("heavenlyStem", _section("heavenlyStem"), language),
+        branches=_translate_section("earthlyBranch", _section("earthlyBranch"), language),
+        brightness=MappingProxyType(
+            {value: t(f"brightness.{key}", language) for value, key in _BRIGHTNESS_KEYS.items()}
+        ),
+    )
+
+
+def get_translation_table(language: str) -> TranslationTable:
+    """
+    获取某个语言的译名表（第一次调用时构建，之后复用）
+
+    Args:
+        language: 语言代码；不在 SUPPORTED_LANGUAGES 中时与 iztro-py 一样回退简体中文
+
+    Returns:
+        TranslationTable
+    """
+    if language not in SUPPORTED_LANGUAGES:
+        language = "zh-CN"
+    table = _TABLES.get(language)
+    if table is None:
+        with _lock:
+            table = _TABLES.get(language)
+            if table is None:
+                table = _TABLES[language] = _build_table(language)
+    return table
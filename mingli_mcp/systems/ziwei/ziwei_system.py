@@ -6,10 +6,12 @@
 
 import logging
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
 
 from mingli_mcp.core.base_system import BaseFortuneSystem
 from mingli_mcp.core.exceptions import DependencyError, SystemError, ValidationError
+from mingli_mcp.utils.performance import stage
+from mingli_mcp.utils.projection import ALL_FIELDS, FieldSelection
 
 from .formatter import ZiweiFormatter
 
@@ -27,6 +29,19 @@ except ImportError:
     hour_to_time_index = None  # type: ignore
 
 
+def _language_list(language: Union[str, Sequence[str]]) -> List[str]:
+    """单个语言代码或语言列表统一为列表（去重，保持顺序）"""
+    return [language] if isinstance(language, str) else list(dict.fromkeys(language))
+
+
+def _with_translations(languages: List[str], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """第一种语言的结果放在顶层（与单语言时结构相同），其余语言的完整结果放在 translations 下"""
+    primary = results[0]
+    if len(results) > 1:
+        primary["translations"] = dict(zip(languages[1:], results[1:]))
+    return primary
+
+
 class ZiweiSystem(BaseFortuneSystem):
     """紫微斗数系统实现"""
 
@@ -136,43 +151,52 @@ class ZiweiSystem(BaseFortuneSystem):
             return f"{normalized}宫"
         return normalized
 
-    def get_chart(self, birth_info: Dict[str, Any], language: str = "zh-CN") -> Dict[str, Any]:
+    def _build_astrolabe(self, birth_info: Mapping[str, Any], time_index: int):
+        """按历法类型调用 iztro-py 排出星盘（time_index 为真太阳时修正后的时辰）"""
+        if birth_info.get("calendar", "solar") == "lunar":
+            return astro.by_lunar(
+                birth_info["date"],
+                time_index,
+                birth_info["gender"],
+                birth_info.get("is_leap_month", False),
+            )
+        return astro.by_solar(birth_info["date"], time_index, birth_info["gender"])
+
+    def get_chart(
+        self,
+        birth_info: Mapping[str, Any],
+        language: Union[str, Sequence[str]] = "zh-CN",
+        selection: Optional[FieldSelection] = None,
+    ) -> Dict[str, Any]:
         """
         获取紫微斗数排盘
 
         Args:
             birth_info: 生辰信息
-            language: 输出语言
+            language: 输出语言；传列表时只排一次盘，按各语言的译名表分别格式化
+            selection: 字段选择，默认全部字段
 
         Returns:
-            排盘详细信息
+            排盘详细信息（多语言时其余语言的结果在 translations 下）
         """
-        self.validate_birth_info(birth_info)
+        languages = _language_list(language)
+        birth_info = self.validate_birth_info(birth_info)
 
         try:
             # 应用真太阳时修正（如果启用）
             adjusted_time_index = self.apply_solar_time_correction(birth_info)
 
             # 根据历法类型调用不同的方法
-            if birth_info.get("calendar", "solar") == "lunar":
-                astrolabe = astro.by_lunar(
-                    birth_info["date"],
-                    adjusted_time_index,  # 使用修正后的时辰
-                    birth_info["gender"],
-                    birth_info.get("is_leap_month", False),
-                )
-            else:
-                astrolabe = astro.by_solar(
-                    birth_info["date"],
-                    adjusted_time_index,
-                    birth_info["gender"],  # 使用修正后的时辰
-                )
-
-            # 设置语言
-            astrolabe.set_language(language)
+            with stage("engine"):
+                astrolabe = self._build_astrolabe(birth_info, adjusted_time_index)
 
-            # 格式化输出
-            return self.formatter.format_chart(astrolabe)
+            # 格式化输出：星盘与语言无关，切换语言只换一张译名表
+            with stage("format"):
+                charts = []
+                for chart_language in languages:
+                    astrolabe.set_language(chart_language)
+                    charts.append(self.formatter.format_chart(astrolabe, selection or ALL_FIELDS))
+                return _with_translations(languages, charts)
 
         except ValidationError:
             raise
@@ -185,9 +209,10 @@ class ZiweiSystem(BaseFortuneSystem):
 
     def get_fortune(
         self,
-        birth_info: Dict[str, Any],
+        birth_info: Mapping[str, Any],
         query_date: Optional[datetime] = None,
-        language: str = "zh-CN",
+        language: Union[str, Sequence[str]] = "zh-CN",
+        selection: Optional[FieldSelection] = None,
     ) -> Dict[str, Any]:
         """
         获取紫微斗数运势（大限、流年、流月、流日、流时）
@@ -195,12 +220,14 @@ class ZiweiSystem(BaseFortuneSystem):
         Args:
             birth_info: 生辰信息
             query_date: 查询日期，默认当前时间
-            language: 输出语言
+            language: 输出语言；传列表时只排一次盘、推一次运限，按各语言分别格式化
+            selection: 字段选择，默认全部字段
 
         Returns:
-            运势信息
+            运势信息（多语言时其余语言的结果在 translations 下）
         """
-        self.validate_birth_info(birth_info)
+        languages = _language_list(language)
+        birth_info = self.validate_birth_info(birth_info)
 
         if query_date is None:
             query_date = datetime.now()
@@ -209,30 +236,24 @@ class ZiweiSystem(BaseFortuneSystem):
             # 应用真太阳时修正（如果启用）
             adjusted_time_index = self.apply_solar_time_correction(birth_info)
 
-            # 先获取星盘
-            if birth_info.get("calendar", "solar") == "lunar":
-                astrolabe = astro.by_lunar(
-                    birth_info["date"],
-                    adjusted_time_index,  # 使用修正后的时辰
-                    birth_info["gender"],
-                    birth_info.get("is_leap_month", False),
-                )
-            else:
-                astrolabe = astro.by_solar(
-                    birth_info["date"],
-                    adjusted_time_index,
-                    birth_info["gender"],  # 使用修正后的时辰
-                )
-
-            # 设置语言
-            astrolabe.set_language(language)
-
-            # 获取运势（iztro-py 需要日期字符串和时辰索引）
-            date_str, hour_index = self._convert_datetime_for_horoscope(query_date)
-            horoscope = astrolabe.horoscope(date_str, hour_index)
+            with stage("engine"):
+                # 先获取星盘
+                astrolabe = self._build_astrolabe(birth_info, adjusted_time_index)
+                astrolabe.set_language(languages[0])
+
+                # 获取运势（iztro-py 需要日期字符串和时辰索引）
+                date_str, hour_index = self._convert_datetime_for_horoscope(query_date)
+                horoscope = astrolabe.horoscope(date_str, hour_index)
 
             # 格式化输出
-            return self.formatter.format_fortune(horoscope, query_date, language)
+            with stage("format"):
+                fortunes = [
+                    self.formatter.format_fortune(
+                        horoscope, query_date, fortune_language, selection or ALL_FIELDS
+                    )
+                    for fortune_language in languages
+                ]
+                return _with_translations(languages, fortunes)
 
         except ValidationError:
             raise
@@ -244,7 +265,7 @@ class ZiweiSystem(BaseFortuneSystem):
             raise SystemError(f"运势查询失败: {str(e)}")
 
     def analyze_palace(
-        self, birth_info: Dict[str, Any], palace_name: str, language: str = "zh-CN"
+        self, birth_info: Mapping[str, Any], palace_name: str, language: str = "zh-CN"
     ) -> Dict[str, Any]:
         """
         分析特定宫位
@@ -263,7 +284,7 @@ class ZiweiSystem(BaseFortuneSystem):
                 f"无效的宫位名称: {palace_name}. 有效宫位: {', '.join(self.PALACES)}"
             )
 
-        self.validate_birth_info(birth_info)
+        birth_info = self.validate_birth_info(birth_info)
 
         try:
             # 获取完整星盘（formatter 已经将宫位名转换为中文）
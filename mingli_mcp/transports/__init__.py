@@ -7,20 +7,29 @@ MCP传输层抽象模块
 - websocket: WebSocket传输（用于实时应用）
 """
 
-from typing import Any, Optional
+from typing import Any, Dict
 
 from .base_transport import BaseTransport
 from .stdio_transport import StdioTransport
 
-# 延迟导入 HTTP 传输（需要 fastapi / uvicorn 依赖）
-HttpTransport: Optional[Any]
-try:
-    from .http_transport import HttpTransport as _HttpTransport
 
-    HttpTransport = _HttpTransport
-    HTTP_TRANSPORT_AVAILABLE = True
-except ImportError:
-    HttpTransport = None
-    HTTP_TRANSPORT_AVAILABLE = False
+def __getattr__(name: str) -> Any:
+    """
+    延迟导入 HTTP 传输（需要 fastapi / uvicorn 依赖）
+
+    第一次访问 HttpTransport / HTTP_TRANSPORT_AVAILABLE 时才导入 fastapi，
+    stdio 模式启动时不再为用不到的 HTTP 栈付出几百毫秒的导入时间。
+    """
+    if name not in ("HttpTransport", "HTTP_TRANSPORT_AVAILABLE"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    try:
+        from .http_transport import HttpTransport
+    except ImportError:
+        values: Dict[str, Any] = {"HttpTransport": None, "HTTP_TRANSPORT_AVAILABLE": False}
+    else:
+        values = {"HttpTransport": HttpTransport, "HTTP_TRANSPORT_AVAILABLE": True}
+    globals().update(values)
+    return values[name]
+
 
 __all__ = ["BaseTransport", "StdioTransport", "HttpTransport", "HTTP_TRANSPORT_AVAILABLE"]
@@ -14,27 +14,78 @@ MCP Streamable HTTP规范要点（2026-07-28）：
 - 2026-07-28 请求调用未实现的方法时返回404 + Method not found(-32601)
 - 协议级会话已移除；本实现从未使用Mcp-Session-Id，天然满足无状态要求
 - 不支持SSE的服务器对GET返回405（FastAPI自动处理）
+
+/mcp 额外支持二进制编码（非MCP规范，供程序化客户端使用）：请求体可按
+Content-Type 用 application/msgpack 或 application/cbor 编码；Accept 中更偏好
+这两种类型时，JSON-RPC 响应也用对应编码。MCP 客户端默认的 Accept 总是得到 JSON。
+
+开启 STREAM_OUTPUT 时，含流式文本的工具结果边渲染边以分块传输写出；Accept 只接受
+text/event-stream（不接受 JSON）时改为一条 SSE message 事件。
+
+开启 COMPRESSION_ENABLED 时 /mcp 的响应按 Accept-Encoding 压缩；tools/list 等目录类响应
+使用预压缩缓存，只有 id 部分每次压缩。
 """
 
 import base64
 import binascii
 import inspect
+import json
 import logging
 import secrets
-from typing import Any, Awaitable, Callable, Dict, List, Optional, Union, cast
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 from urllib.parse import urlparse
 
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from starlette.concurrency import run_in_threadpool
 
 from mingli_mcp.config import config
+from mingli_mcp.utils.binary_codecs import Codec, codec_for_content_type, negotiate
+from mingli_mcp.utils.compression import (
+    PrecompressedCache,
+    compress,
+    compress_stream,
+    negotiate_encoding,
+)
+from mingli_mcp.utils.concurrency import AdaptiveConcurrencyLimiter
+from mingli_mcp.utils.loop_monitor import (
+    EventLoopMonitor,
+    run_timed_in_threadpool,
+    sample_threadpool,
+)
+from mingli_mcp.utils.memory import get_memory_stats
 from mingli_mcp.utils.metrics import get_metrics
-from mingli_mcp.utils.rate_limiter import RateLimiter
+from mingli_mcp.utils.profiler import SamplingProfiler
+from mingli_mcp.utils.quota import CostQuota
+from mingli_mcp.utils.rate_limiter import SharedRateLimiter, create_rate_limiter
+from mingli_mcp.utils.slow_log import get_slow_log
+from mingli_mcp.utils.streaming import (
+    has_stream,
+    iter_json,
+    materialize,
+    prepare_streams,
+    when_streams_done,
+)
+from mingli_mcp.utils.tracing import SPAN_KIND_SERVER, get_tracer
+from mingli_mcp.utils.warmup import get_warmup
 
 from .base_transport import BaseTransport
+from .prefork import PreforkSupervisor, get_cluster_stats
 
 logger = logging.getLogger(__name__)
 
@@ -60,12 +111,146 @@ MCP_NAME_SOURCE_FIELDS = {
 _B64_SENTINEL_PREFIX = "=?base64?"
 _B64_SENTINEL_SUFFIX = "?="
 
+# 结果只取决于服务配置的目录类方法，响应走预压缩缓存
+CATALOG_METHODS = frozenset(
+    {
+        "tools/list",
+        "prompts/list",
+        "resources/list",
+        "resources/templates/list",
+        "server/discover",
+    }
+)
+
 MessageResponse = Optional[Dict[str, Any]]
 SyncMessageHandler = Callable[[Dict[str, Any]], MessageResponse]
 AsyncMessageHandler = Callable[[Dict[str, Any]], Awaitable[MessageResponse]]
 MessageHandler = Union[SyncMessageHandler, AsyncMessageHandler]
 
 
+def _contains_tool_call(message: Any) -> bool:
+    """请求体（单条或批量）中是否含有 tools/call"""
+    if isinstance(message, list):
+        return any(_contains_tool_call(item) for item in message)
+    return isinstance(message, dict) and message.get("method") == "tools/call"
+
+
+def _wants_event_stream(accept: Optional[str]) -> bool:
+    """Accept 只接受 SSE、不接受 JSON（MCP 客户端通常两者都接受，此时按 JSON 响应）"""
+    if not accept or "text/event-stream" not in accept:
+        return False
+    return "application/json" not in accept and "*/*" not in accept
+
+
+def _sse_frames(chunks: Iterator[str]) -> Iterator[str]:
+    """把一条 JSON 消息包成一个 SSE message 事件（转义后的 JSON 不含换行，可放在一行 data 里）"""
+    yield "event: message\ndata: "
+    yield from chunks
+    yield "\n\n"
+
+
+def _render_json(content: Any) -> bytes:
+    """与 JSONResponse.render 相同的编码参数"""
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _catalog_parts(content: Any) -> Optional[Tuple[bytes, bytes]]:
+    """
+    把成功响应拆成不随请求变化的前缀和 id 部分
+
+    Returns:
+        (prefix, suffix)，拼接后与 _render_json(content) 相同；不是 {jsonrpc, result, id}
+        顺序的成功响应时返回 None
+    """
+    if not isinstance(content, dict) or list(content) != ["jsonrpc", "result", "id"]:
+        return None
+    prefix = b'{"jsonrpc":' + _render_json(content["jsonrpc"])
+    prefix += b',"result":' + _render_json(content["result"]) + b',"id":'
+    return prefix, _render_json(content["id"]) + b"}"
+
+
+def _compressed_headers(headers: Optional[Dict[str, str]], encoding: str) -> Dict[str, str]:
+    """压缩后的响应头"""
+    return {**(headers or {}), "Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+
+
+def _body_response(
+    body: bytes,
+    status_code: int,
+    headers: Optional[Dict[str, str]],
+    media_type: str,
+    encoding: Optional[str],
+) -> Response:
+    """完整响应体：达到 COMPRESSION_MIN_SIZE 时按协商的编码压缩"""
+    if encoding is not None and len(body) >= config.COMPRESSION_MIN_SIZE:
+        body = compress(body, encoding, config.COMPRESSION_LEVEL)
+        headers = _compressed_headers(headers, encoding)
+    return Response(content=body, status_code=status_code, headers=headers, media_type=media_type)
+
+
+def _rpc_response(
+    content: Any,
+    codec: Optional[Codec],
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[Dict[str, str]] = None,
+    event_stream: bool = False,
+    encoding: Optional[str] = None,
+    catalog: Optional[PrecompressedCache] = None,
+) -> Response:
+    """
+    JSON-RPC 响应：按协商结果用 JSON 或二进制编码，流式文本边渲染边写出
+
+    Args:
+        content: JSON-RPC 消息
+        codec: 二进制编码；None 为 JSON
+        status_code: HTTP 状态码
+        headers: 额外的响应头
+        event_stream: 流式结果是否以 SSE 事件写出
+        encoding: 协商出的内容编码（gzip / br / zstd）；None 不压缩
+        catalog: 目录类响应的预压缩缓存；None 表示不是目录类请求
+    """
+    streaming = has_stream(content)
+    if codec is not None:
+        # 二进制编码需要完整数据
+        if streaming:
+            materialize(content)
+        return _body_response(
+            codec.dumps(content), status_code, headers, codec.media_type, encoding
+        )
+    if not streaming:
+        if catalog is not None and encoding is not None:
+            parts = _catalog_parts(content)
+            if parts is not None and len(parts[0]) + len(parts[1]) >= config.COMPRESSION_MIN_SIZE:
+                return Response(
+                    content=catalog.get(*parts, encoding, config.COMPRESSION_LEVEL),
+                    status_code=status_code,
+                    headers=_compressed_headers(headers, encoding),
+                    media_type="application/json",
+                )
+        return _body_response(
+            _render_json(content), status_code, headers, "application/json", encoding
+        )
+    # 同步迭代器由 starlette 放到线程池里逐块取
+    chunks = iter_json(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+    media_type = "application/json"
+    if event_stream:
+        chunks = _sse_frames(chunks)
+        media_type = "text/event-stream"
+    if encoding is None:
+        return StreamingResponse(chunks, status_code, headers, media_type=media_type)
+    # 流式结果通常很大，不看阈值；每块压缩后立即 flush，不推迟首块
+    return StreamingResponse(
+        compress_stream(
+            (chunk.encode("utf-8") for chunk in chunks), encoding, config.COMPRESSION_LEVEL
+        ),
+        status_code,
+        _compressed_headers(headers, encoding),
+        media_type=media_type,
+    )
+
+
 class HttpTransport(BaseTransport):
     """HTTP传输实现"""
 
@@ -77,10 +262,17 @@ class HttpTransport(BaseTransport):
         enable_rate_limit: bool = True,
         rate_limit_requests: int = 100,
         rate_limit_window: int = 60,
+        rate_limit_algorithm: Optional[str] = None,
+        rate_limit_backend: Optional[str] = None,
         cors_origins: Optional[List[str]] = None,
         cors_allow_credentials: bool = False,
         supported_protocol_versions: Optional[List[str]] = None,
         trust_proxy_headers: Optional[bool] = None,
+        enable_cost_quota: Optional[bool] = None,
+        enable_adaptive_concurrency: Optional[bool] = None,
+        enable_warmup: Optional[bool] = None,
+        workers: Optional[int] = None,
+        enable_compression: Optional[bool] = None,
     ):
         """
         初始化HTTP传输
@@ -92,10 +284,17 @@ class HttpTransport(BaseTransport):
             enable_rate_limit: 是否启用限流
             rate_limit_requests: 限流窗口内最大请求数
             rate_limit_window: 限流窗口大小（秒）
+            rate_limit_algorithm: 限流算法（sliding_window / gcra / sharded / sketch），默认读取配置
+            rate_limit_backend: 限流状态存储后端（memory / sqlite / redis），默认读取配置
             cors_origins: 允许的CORS来源列表
             cors_allow_credentials: 是否允许携带凭证
             supported_protocol_versions: 支持的MCP协议版本列表（用于校验MCP-Protocol-Version头）
             trust_proxy_headers: 是否信任代理转发的客户端IP头，默认读取配置
+            enable_cost_quota: 是否启用按计算量计费的配额，默认读取配置
+            enable_adaptive_concurrency: 是否按计算耗时自适应限制工具调用并发数，默认读取配置
+            enable_warmup: 是否在启动时后台预热（/ready 在完成前返回503），默认读取配置
+            workers: worker进程数，大于1时以pre-fork方式启动，默认读取配置
+            enable_compression: 是否按Accept-Encoding压缩/mcp响应，默认读取配置
         """
         self.host = host
         self.port = port
@@ -111,20 +310,60 @@ class HttpTransport(BaseTransport):
             config.TRUST_PROXY_HEADERS if trust_proxy_headers is None else trust_proxy_headers
         )
         self.message_handler: Optional[MessageHandler] = None
+        # 采样分析器只在 /debug/profile 的采样窗口内运行，平时不占任何资源
+        self.profiler = SamplingProfiler()
+        self.loop_monitor = EventLoopMonitor(config.LOOP_MONITOR_INTERVAL)
+        self.enable_warmup = config.ENABLE_WARMUP if enable_warmup is None else enable_warmup
+        self.workers = config.HTTP_WORKERS if workers is None else workers
+        self.enable_compression = (
+            config.COMPRESSION_ENABLED if enable_compression is None else enable_compression
+        )
+        # 目录类响应的预压缩缓存（只在协商出压缩编码时使用）
+        self.catalog_cache = PrecompressedCache()
 
         # 初始化限流器
         if self.enable_rate_limit:
-            self.rate_limiter = RateLimiter(
-                max_requests=rate_limit_requests, window_seconds=rate_limit_window
+            algorithm = rate_limit_algorithm or config.RATE_LIMIT_ALGORITHM
+            backend = rate_limit_backend or config.RATE_LIMIT_BACKEND
+            self.rate_limit_backend = backend
+            self.rate_limiter = create_rate_limiter(
+                algorithm,
+                max_requests=rate_limit_requests,
+                window_seconds=rate_limit_window,
+                backend=backend,
+                backend_url=config.RATE_LIMIT_BACKEND_URL,
+            )
+            logger.info(
+                f"Rate limiter enabled ({self.rate_limiter.algorithm}, {backend}): "
+                f"{rate_limit_requests} requests per {rate_limit_window}s"
+            )
+
+        if enable_cost_quota is None:
+            enable_cost_quota = config.ENABLE_COST_QUOTA
+        self.quota: Optional[CostQuota] = CostQuota() if enable_cost_quota else None
+        if self.quota is not None:
+            logger.info(
+                f"Cost quota enabled: {self.quota.budget} units per {self.quota.window_seconds}s "
+                f"({self.quota.unit_ms}ms per unit)"
             )
+
+        if enable_adaptive_concurrency is None:
+            enable_adaptive_concurrency = config.ENABLE_ADAPTIVE_CONCURRENCY
+        self.concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = (
+            AdaptiveConcurrencyLimiter() if enable_adaptive_concurrency else None
+        )
+        if self.concurrency_limiter is not None:
             logger.info(
-                f"Rate limiter enabled: {rate_limit_requests} requests per {rate_limit_window}s"
+                f"Adaptive concurrency enabled: {self.concurrency_limiter.min_limit}-"
+                f"{self.concurrency_limiter.max_limit} concurrent tool calls, target latency "
+                f"{self.concurrency_limiter.target_latency * 1000:.0f}ms"
             )
 
         self.app = FastAPI(
             title="Mingli MCP Server",
             description="命理MCP服务 - HTTP API",
             version=config.MCP_SERVER_VERSION,
+            lifespan=self._lifespan,
         )
 
         # CORS配置 - 从配置文件读取或使用参数
@@ -156,6 +395,7 @@ class HttpTransport(BaseTransport):
                 "MCP-Protocol-Version",
                 "Mcp-Method",
                 "Mcp-Name",
+                "traceparent",
             ],
         )
 
@@ -164,6 +404,17 @@ class HttpTransport(BaseTransport):
         self._setup_routes()
         logger.info(f"HTTP transport initialized on {host}:{port}")
 
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI) -> AsyncIterator[None]:
+        """随应用启停后台监控任务，并开始预热"""
+        if self.enable_warmup:
+            get_warmup().start()
+        self.loop_monitor.start()
+        try:
+            yield
+        finally:
+            await self.loop_monitor.stop()
+
     def _get_client_id(self, request: Request) -> str:
         """获取限流用的客户端标识
 
@@ -183,6 +434,18 @@ class HttpTransport(BaseTransport):
                 return forwarded.split(",")[0].strip()
         return request.client.host if request.client else "unknown"
 
+    def _get_quota_identity(self, request: Request, client_id: str) -> str:
+        """获取配额的计费主体
+
+        Bearer 凭证只在可信时作为主体：配置了API key（此时已校验通过），
+        或服务跑在负责认证的可信代理后面。否则客户端每次换一个随便编的
+        token 就能拿到一份新额度，只能按IP计费。
+        """
+        auth_header = request.headers.get("Authorization", "")
+        token = auth_header[7:].strip() if auth_header[:7].lower() == "bearer " else ""
+        trusted = bool(self.api_key) or self.trust_proxy_headers
+        return CostQuota.identity(token if trusted else None, client_id)
+
     def _check_origin(self, request: Request) -> Optional[JSONResponse]:
         """校验Origin头（MCP规范要求，防DNS rebinding）
 
@@ -328,6 +591,37 @@ class HttpTransport(BaseTransport):
 
         return None
 
+    def _check_rate_limit(self, client_id: str) -> Optional[JSONResponse]:
+        """
+        限流判定
+
+        Args:
+            client_id: 客户端标识
+
+        Returns:
+            超出限制时的429响应；允许时返回None
+        """
+        if self.rate_limiter.is_allowed(client_id):
+            return None
+        reset_time = self.rate_limiter.get_reset_time(client_id)
+        reset_str = reset_time.isoformat() if reset_time else "unknown"
+
+        logger.warning(f"Rate limit exceeded for client: {client_id}")
+
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={
+                "error": "Too Many Requests",
+                "message": "Rate limit exceeded. Please try again later.",
+                "reset_time": reset_str,
+            },
+            headers={
+                "X-RateLimit-Limit": str(self.rate_limiter.max_requests),
+                "X-RateLimit-Remaining": str(self.rate_limiter.get_remaining(client_id)),
+                "X-RateLimit-Reset": reset_str,
+            },
+        )
+
     def _check_api_key(self, request: Request, client_id: str) -> None:
         """API密钥验证（如果配置了），失败抛出401"""
         if not self.api_key:
@@ -339,6 +633,21 @@ class HttpTransport(BaseTransport):
             logger.warning(f"Invalid API key attempt from {client_id}")
             raise HTTPException(status_code=401, detail="Unauthorized")
 
+    def _require_admin(self, request: Request, endpoint: str) -> None:
+        """管理端点（/stats、/debug/*）的认证
+
+        未配置API key时_check_api_key直接放行，会把运行状态暴露给任何人。
+        没有凭证可校验时就不提供这些端点（404）。
+        """
+        if not self.api_key:
+            logger.warning(f"Rejected {endpoint} request: HTTP_API_KEY is not configured")
+            raise HTTPException(
+                status_code=404,
+                detail=f"Not Found: {endpoint} requires HTTP_API_KEY to be configured",
+            )
+
+        self._check_api_key(request, self._get_client_id(request))
+
     def _setup_routes(self):
         """设置路由"""
 
@@ -350,7 +659,12 @@ class HttpTransport(BaseTransport):
                 "version": config.MCP_SERVER_VERSION,
                 "protocol": "MCP",
                 "transport": "HTTP",
-                "endpoints": {"mcp": "/mcp", "health": "/health", "docs": "/docs"},
+                "endpoints": {
+                    "mcp": "/mcp",
+                    "health": "/health",
+                    "ready": "/ready",
+                    "docs": "/docs",
+                },
             }
 
         @self.app.get("/health")
@@ -363,28 +677,76 @@ class HttpTransport(BaseTransport):
                 "rate_limiting": self.enable_rate_limit,
             }
 
+        @self.app.get("/ready")
+        async def ready():
+            """就绪检查：预热完成前返回503，避免首批流量打到冷worker（/health 只表示存活）"""
+            warmup = get_warmup()
+            if self.enable_warmup and not warmup.ready:
+                return JSONResponse(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    content={"status": "warming_up", "warmup": warmup.get_status()},
+                )
+            return {"status": "ready", "warmup": warmup.get_status()}
+
         @self.app.get("/stats")
         async def stats(request: Request):
             """获取限流器统计信息（需要API key）"""
-            # 未配置API key时_check_api_key直接放行，会把客户端数量等运行状态
-            # 暴露给任何人。没有凭证可校验时就不提供这个端点。
-            if not self.api_key:
-                logger.warning("Rejected /stats request: HTTP_API_KEY is not configured")
-                raise HTTPException(
-                    status_code=404,
-                    detail="Not Found: /stats requires HTTP_API_KEY to be configured",
-                )
-
-            self._check_api_key(request, self._get_client_id(request))
+            self._require_admin(request, "/stats")
 
+            # 监控任务的采样有间隔，这里补采一次，保证返回的是当前占用
+            sample_threadpool()
             stats: Dict[str, Any] = {"tool_calls": get_metrics().get_summary()}
             if self.enable_rate_limit:
                 stats["rate_limiting"] = self.rate_limiter.get_stats()
             else:
                 stats["rate_limiting"] = False
+            stats["quota"] = self.quota.get_stats() if self.quota is not None else False
+            stats["concurrency"] = (
+                self.concurrency_limiter.get_stats()
+                if self.concurrency_limiter is not None
+                else False
+            )
+            stats["compression"] = (
+                self.catalog_cache.get_stats() if self.enable_compression else False
+            )
+            stats["slow_requests"] = get_slow_log().get_entries()
+            stats["memory"] = get_memory_stats()
+            # pre-fork 模式下附带主进程汇总的全部 worker 统计
+            cluster = get_cluster_stats()
+            if cluster is not None:
+                stats["workers"] = cluster
 
             return stats
 
+        @self.app.post("/debug/profile", include_in_schema=False)
+        async def debug_profile(
+            request: Request,
+            seconds: float = 10,
+            format: str = "json",
+            all_threads: bool = False,
+        ):
+            """在限定窗口内采样分析运行中的worker（需要API key）
+
+            format=collapsed 时直接返回折叠栈文本（flamegraph.pl / speedscope 可读）。
+            """
+            self._require_admin(request, "/debug/profile")
+
+            if not 0 < seconds <= config.PROFILE_MAX_SECONDS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"seconds must be in (0, {config.PROFILE_MAX_SECONDS}]",
+                )
+
+            logger.info(f"Profiling worker for {seconds}s")
+            # 采样线程要一直睡到窗口结束，放到线程池里以免阻塞事件循环
+            result = await run_in_threadpool(self.profiler.profile, seconds, all_threads)
+            if result is None:
+                raise HTTPException(status_code=409, detail="A profile is already running")
+
+            if format == "collapsed":
+                return PlainTextResponse(result["collapsed"])
+            return result
+
         @self.app.post("/mcp")
         @self.app.post("/mcp/", include_in_schema=False)
         async def handle_mcp(request: Request):
@@ -401,40 +763,41 @@ class HttpTransport(BaseTransport):
 
             client_id = self._get_client_id(request)
 
-            # 限流检查
-            if self.enable_rate_limit and not self.rate_limiter.is_allowed(client_id):
-                reset_time = self.rate_limiter.get_reset_time(client_id)
-                reset_str = reset_time.isoformat() if reset_time else "unknown"
-
-                logger.warning(f"Rate limit exceeded for client: {client_id}")
-
-                return JSONResponse(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={
-                        "error": "Too Many Requests",
-                        "message": "Rate limit exceeded. Please try again later.",
-                        "reset_time": reset_str,
-                    },
-                    headers={
-                        "X-RateLimit-Limit": str(self.rate_limiter.max_requests),
-                        "X-RateLimit-Remaining": str(self.rate_limiter.get_remaining(client_id)),
-                        "X-RateLimit-Reset": reset_str,
-                    },
-                )
+            # 限流检查：共享后端（SQLite / Redis）的判定有阻塞 I/O（等锁、网络往返），
+            # 放到线程池里执行，不卡住事件循环；进程内限流器只是内存操作，直接判定
+            if self.enable_rate_limit:
+                if isinstance(self.rate_limiter, SharedRateLimiter):
+                    limited = await run_in_threadpool(self._check_rate_limit, client_id)
+                else:
+                    limited = self._check_rate_limit(client_id)
+                if limited is not None:
+                    return limited
 
             # API密钥验证（如果配置了）
             self._check_api_key(request, client_id)
 
+            # 响应编码按Accept协商；请求体按Content-Type解码
+            codec = negotiate(request.headers.get("accept"))
+            request_codec = codec_for_content_type(request.headers.get("content-type"))
+            encoding = (
+                negotiate_encoding(request.headers.get("accept-encoding"))
+                if self.enable_compression
+                else None
+            )
             try:
-                data = await request.json()
+                if request_codec is None:
+                    data = await request.json()
+                else:
+                    data = request_codec.loads(await request.body())
             except Exception:
-                return JSONResponse(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    content={
+                return _rpc_response(
+                    {
                         "jsonrpc": "2.0",
                         "error": {"code": -32700, "message": "Parse error"},
                         "id": None,
                     },
+                    codec,
+                    status.HTTP_400_BAD_REQUEST,
                 )
 
             # 2026-07-28 请求：Mcp-Method/Mcp-Name/协议版本头与body一致性校验
@@ -443,26 +806,90 @@ class HttpTransport(BaseTransport):
                 if header_error is not None:
                     return header_error
 
-            logger.debug(
-                f"Received MCP request: {data.get('method') if isinstance(data, dict) else data}"
-            )
+            # 自适应并发限制只约束工具调用，发现类请求很便宜，不占名额。
+            # 先削减再扣配额：被 503 拒绝的调用不消耗额度
+            limiter = self.concurrency_limiter
+            if limiter is not None and not _contains_tool_call(data):
+                limiter = None
+            admitted_at = limiter.try_acquire() if limiter is not None else None
+            if limiter is not None and admitted_at is None:
+                logger.warning(f"Shedding tool call from {client_id}: concurrency limit")
+                return JSONResponse(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    content={
+                        "error": "Service Unavailable",
+                        "message": "Server is overloaded. Please retry shortly.",
+                    },
+                    headers={"Retry-After": str(limiter.retry_after())},
+                )
+            # 从放行到计算完成（含线程池排队，流式结果含首块渲染）的耗时是限制器的延迟信号；
+            # 槽位在请求结束时释放，流式结果交给 when_streams_done，写完响应体再释放。
+            # 写出耗时取决于客户端读得多快，不计入信号
+            release_slot = limiter is not None
+            observe_pending = False
+
+            def observe() -> None:
+                nonlocal observe_pending
+                observe_pending = False
+                if limiter is not None and admitted_at is not None:
+                    limiter.observe(admitted_at)
 
             try:
+                # 按计算量计费：发现类方法免费，工具按平均耗时折算成本
+                quota_headers: Dict[str, str] = {}
+                if self.quota is not None:
+                    identity = self._get_quota_identity(request, client_id)
+                    decision = self.quota.charge(identity, self.quota.message_cost(data))
+                    quota_headers = decision.headers()
+                    if not decision.allowed:
+                        logger.warning(f"Compute quota exhausted for {identity}")
+                        return JSONResponse(
+                            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                            content={
+                                "error": "Too Many Requests",
+                                "message": "Compute quota exhausted. Please try again later.",
+                                "retry_after": decision.retry_after,
+                            },
+                            headers=quota_headers,
+                        )
+
+                logger.debug(
+                    f"Received MCP request: "
+                    f"{data.get('method') if isinstance(data, dict) else data}"
+                )
+
                 # 调用消息处理器
                 if not self.message_handler:
                     raise HTTPException(status_code=500, detail="Message handler not set")
 
-                # 排盘计算是同步阻塞操作，放入线程池避免卡住事件循环
-                if inspect.iscoroutinefunction(self.message_handler):
-                    async_handler = cast(AsyncMessageHandler, self.message_handler)
-                    response = await async_handler(data)
-                else:
-                    sync_handler = cast(SyncMessageHandler, self.message_handler)
-                    response = await run_in_threadpool(sync_handler, data)
+                # 上游网关通过traceparent头传入trace上下文，服务端span挂在它下面
+                with get_tracer().start_span(
+                    "POST /mcp",
+                    {"http.request.method": "POST", "url.path": request.url.path},
+                    kind=SPAN_KIND_SERVER,
+                    traceparent=request.headers.get("traceparent"),
+                ):
+                    # 排盘计算是同步阻塞操作，放入线程池避免卡住事件循环
+                    # （线程池任务会复制当前上下文，span父子关系不受影响）
+                    observe_pending = limiter is not None
+                    if inspect.iscoroutinefunction(self.message_handler):
+                        async_handler = cast(AsyncMessageHandler, self.message_handler)
+                        response = await async_handler(data)
+                    else:
+                        sync_handler = cast(SyncMessageHandler, self.message_handler)
+                        response = await run_timed_in_threadpool(sync_handler, data)
+                # 流式结果先在线程池里渲染第一块：一开始就渲染失败时还能改回错误响应
+                if has_stream(response):
+                    await run_in_threadpool(prepare_streams, response)
+                if limiter is not None:
+                    observe()
+                    # 流式结果在写出响应体时才渲染：写完（或渲染失败、客户端断开）再释放槽位
+                    when_streams_done(response, limiter.release)
+                    release_slot = False
 
                 # notification/response消息：规范要求返回202 Accepted且无body
                 if response is None:
-                    return Response(status_code=status.HTTP_202_ACCEPTED)
+                    return Response(status_code=status.HTTP_202_ACCEPTED, headers=quota_headers)
 
                 # 2026-07-28：未实现的方法必须返回404 + JSON-RPC -32601，
                 # 以便与不承载MCP端点的旧HTTP+SSE服务器的404区分开
@@ -471,9 +898,21 @@ class HttpTransport(BaseTransport):
                     and isinstance(response.get("error"), dict)
                     and response["error"].get("code") == -32601
                 ):
-                    return JSONResponse(content=response, status_code=status.HTTP_404_NOT_FOUND)
+                    return _rpc_response(response, codec, status.HTTP_404_NOT_FOUND, quota_headers)
 
-                return JSONResponse(content=response)
+                catalog = (
+                    self.catalog_cache
+                    if isinstance(data, dict) and data.get("method") in CATALOG_METHODS
+                    else None
+                )
+                return _rpc_response(
+                    response,
+                    codec,
+                    headers=quota_headers,
+                    event_stream=_wants_event_stream(request.headers.get("accept")),
+                    encoding=encoding,
+                    catalog=catalog,
+                )
 
             except HTTPException:
                 # FastAPI 异常直接抛出
@@ -482,17 +921,33 @@ class HttpTransport(BaseTransport):
                 # 记录完整错误详情到日志
                 logger.exception("Error handling MCP request")
                 # 返回通用错误消息，不暴露内部实现细节
-                return JSONResponse(
-                    content={
+                return _rpc_response(
+                    {
                         "jsonrpc": "2.0",
                         "error": {"code": -32603, "message": "Internal server error"},
                         "id": data.get("id") if isinstance(data, dict) else None,
                     },
-                    status_code=500,
+                    codec,
+                    status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    quota_headers,
                 )
+            finally:
+                # 处理器出错时也计入耗时
+                if observe_pending:
+                    observe()
+                if release_slot and limiter is not None:
+                    limiter.release()
 
     def start(self):
         """启动HTTP服务器"""
+        if self.workers > 1:
+            if self.enable_rate_limit and self.rate_limit_backend == "memory":
+                logger.warning(
+                    "Rate limits are tracked per worker with the memory backend; "
+                    "use RATE_LIMIT_BACKEND=redis for a shared limit"
+                )
+            PreforkSupervisor(self, self.workers).run()
+            return
         logger.info(f"Starting HTTP server on {self.host}:{self.port}")
         uvicorn.run(self.app, host=self.host, port=self.port, log_level="info")
 
@@ -0,0 +1,463 @@
+"""
+预派生（pre-fork）多进程 HTTP 服务
+
+主进程导入 mingli_mcp、iztro-py、lunar_python 并完成一次预热，然后绑定监听端口、
+fork 出 N 个 worker 共享同一个 socket。引擎的星曜/节气表、i18n 表与预热填充的缓存
+都在 fork 之前就位，由各 worker 以写时复制（copy-on-write）方式共享：
+- 每个 worker 的独占内存只剩各自处理请求时新分配的部分
+- worker 崩溃后重新 fork 不需要再导入和预热，几十毫秒即可重新接流量
+
+主进程不处理请求，只负责：
+- 健康监督：回收退出的 worker 并重新 fork（快速连续崩溃时退避）；超过
+  HTTP_WORKER_TIMEOUT 没有心跳的 worker 视为卡死，SIGKILL 后重新 fork
+- 统计汇总：每个 worker 在自己的事件循环里定期通过 socketpair 上报调用指标（心跳），
+  主进程回复全部 worker 的汇总，worker 的 /stats 据此返回 "workers" 字段
+
+心跳由 worker 的事件循环发送，事件循环被阻塞时心跳随之停止。
+限流器、配额等状态仍是每个 worker 一份；需要全局一致时使用 RATE_LIMIT_BACKEND=redis。
+仅支持提供 os.fork 的平台（Linux / macOS）。
+"""
+
+import asyncio
+import gc
+import json
+import logging
+import os
+import selectors
+import signal
+import socket
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+import uvicorn
+
+from mingli_mcp.config import config
+from mingli_mcp.utils.metrics import get_metrics
+from mingli_mcp.utils.warmup import get_warmup
+
+if TYPE_CHECKING:
+    from .http_transport import HttpTransport
+
+logger = logging.getLogger(__name__)
+
+# 计数类指标：汇总时逐个 worker 相加
+_SUMMED_FIELDS = ("total_requests", "successful_requests", "failed_requests", "requests_per_second")
+_MERGED_FIELDS = ("system_calls", "method_calls", "error_counts")
+
+# worker 启动后这么多秒内退出算作快速崩溃，连续快速崩溃时指数退避重新 fork
+_MIN_UPTIME = 1.0
+_MAX_RESPAWN_DELAY = 5.0
+
+# 当前进程（worker）最近一次从主进程收到的汇总统计
+_cluster_stats: Optional[Dict[str, Any]] = None
+
+
+def get_cluster_stats() -> Optional[Dict[str, Any]]:
+    """
+    获取多进程汇总统计
+
+    Returns:
+        最近一次心跳时主进程回复的汇总；不在 pre-fork worker 中运行时为None
+    """
+    return _cluster_stats
+
+
+def read_pss_kb(pid: int) -> Optional[int]:
+    """
+    读取进程的比例集大小（PSS，共享页按共享进程数均摊）
+
+    Args:
+        pid: 进程ID
+
+    Returns:
+        PSS（KB）；平台不支持或进程已退出时为None
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+def aggregate_stats(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    汇总各 worker 的调用指标
+
+    Args:
+        snapshots: 各 worker 最近一次上报的 get_metrics().get_summary()
+
+    Returns:
+        计数相加、按系统/方法/错误类型合并后的汇总
+    """
+    totals: Dict[str, Any] = {field: 0 for field in _SUMMED_FIELDS}
+    for field in _MERGED_FIELDS:
+        totals[field] = {}
+    for snapshot in snapshots:
+        for field in _SUMMED_FIELDS:
+            totals[field] += snapshot.get(field, 0)
+        for field in _MERGED_FIELDS:
+            for key, count in snapshot.get(field, {}).items():
+                totals[field][key] = totals[field].get(key, 0) + count
+    totals["requests_per_second"] = round(totals["requests_per_second"], 2)
+    return totals
+
+
+class _Worker:
+    """主进程中对一个 worker 的记录"""
+
+    __slots__ = (
+        "pid",
+        "channel",
+        "buffer",
+        "started_at",
+        "last_heartbeat",
+        "booted_at",
+        "metrics",
+        "pss_kb",
+    )
+
+    def __init__(self, pid: int, channel: socket.socket, started_at: float):
+        self.pid = pid
+        self.channel = channel
+        self.buffer = b""
+        self.started_at = started_at
+        self.last_heartbeat = started_at
+        self.booted_at: Optional[float] = None
+        self.metrics: Dict[str, Any] = {}
+        self.pss_kb: Optional[int] = None
+
+
+class _WorkerServer(uvicorn.Server):
+    """worker 进程内的 uvicorn 服务器，在事件循环里定期向主进程发送心跳"""
+
+    def __init__(self, server_config: uvicorn.Config, channel: socket.socket, interval: float):
+        super().__init__(server_config)
+        self.channel = channel
+        self.interval = interval
+
+    async def serve(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        reporter = asyncio.ensure_future(self._report())
+        try:
+            await super().serve(sockets=sockets)
+        finally:
+            reporter.cancel()
+
+    async def _report(self) -> None:
+        """上报本进程指标并接收汇总（主进程断开后停止）"""
+        global _cluster_stats
+        loop = asyncio.get_running_loop()
+        buffer = b""
+        while True:
+            payload = {"pid": os.getpid(), "metrics": get_metrics().get_summary()}
+            try:
+                await loop.sock_sendall(self.channel, json.dumps(payload).encode() + b"\n")
+                while b"\n" not in buffer:
+                    chunk = await loop.sock_recv(self.channel, 65536)
+                    if not chunk:
+                        raise ConnectionError("master closed the stats channel")
+                    buffer += chunk
+            except OSError as e:
+                logger.warning(f"Stats channel to master lost: {e}")
+                return
+            line, buffer = buffer.split(b"\n", 1)
+            _cluster_stats = json.loads(line)
+            await asyncio.sleep(self.interval)
+
+
+class PreforkSupervisor:
+    """pre-fork 主进程：预热、派生并监督 worker"""
+
+    def __init__(
+        self,
+        transport: "HttpTransport",
+        workers: int,
+        heartbeat_timeout: Optional[float] = None,
+        stats_interval: float = 2.0,
+        graceful_timeout: float = 10.0,
+    ):
+        """
+        初始化主进程
+
+        Args:
+            transport: 已构造好的HTTP传输（worker 直接使用其 FastAPI 应用）
+            workers: worker 进程数
+            heartbeat_timeout: 超过多少秒无心跳即重启 worker，默认读取配置
+            stats_interval: worker 心跳/上报间隔（秒）
+            graceful_timeout: 停止时等待 worker 优雅退出的秒数
+        """
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Pre-fork workers require os.fork (Linux / macOS)")
+        self.transport = transport
+        self.workers = max(1, workers)
+        self.heartbeat_timeout = (
+            config.HTTP_WORKER_TIMEOUT if heartbeat_timeout is None else heartbeat_timeout
+        )
+        self.stats_interval = stats_interval
+        self.graceful_timeout = graceful_timeout
+        self.socket: Optional[socket.socket] = None
+        self.restarts = 0
+        self.hung_kills = 0
+        self._workers: Dict[int, _Worker] = {}
+        self._selector = selectors.DefaultSelector()
+        self._running = False
+        self._fast_failures = 0
+        self._next_spawn = 0.0
+
+    def bind(self) -> socket.socket:
+        """
+        绑定监听端口（重复调用返回同一个 socket）
+
+        Returns:
+            监听 socket（port=0 时可从 getsockname() 读取实际端口）
+        """
+        if self.socket is None:
+            family = socket.AF_INET6 if ":" in self.transport.host else socket.AF_INET
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.transport.host, self.transport.port))
+            sock.listen(2048)
+            sock.set_inheritable(True)
+            self.socket = sock
+        return self.socket
+
+    def preload(self) -> None:
+        """在主进程中导入引擎并预热，然后冻结现有对象，让 worker 共享这些内存页"""
+        from mingli_mcp.systems import get_system, list_systems
+
+        warmup = get_warmup()
+        if self.transport.enable_warmup:
+            if warmup.state == "idle":
+                warmup.run()
+            else:
+                warmup.wait()
+        else:
+            for name in list_systems():
+                get_system(name)
+        # 引用计数之外，分代回收扫描也会写对象头；freeze 后预热留下的对象不再被扫描，
+        # 避免 worker 第一次 GC 就把共享页全部复制一遍
+        gc.collect()
+        gc.freeze()
+        logger.info(f"Preloaded engines, {gc.get_freeze_count()} objects frozen for sharing")
+
+    def run(self) -> None:
+        """预热、派生 worker 并监督，直到收到 SIGTERM / SIGINT"""
+        sock = self.bind()
+        self.preload()
+        logger.info(
+            f"Pre-fork master {os.getpid()} listening on {self.transport.host}:"
+            f"{sock.getsockname()[1]} with {self.workers} workers"
+        )
+
+        self._running = True
+        previous = {
+            signum: signal.signal(signum, self._handle_signal)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            while self._running:
+                self._spawn_missing()
+                for key, _ in self._selector.select(timeout=min(self.stats_interval, 0.5)):
+                    self._read_channel(key.data)
+                self._reap()
+                self._check_heartbeats()
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+            self._shutdown()
+
+    def stop(self) -> None:
+        """请求主循环退出（会停止全部 worker）"""
+        self._running = False
+
+    def _handle_signal(self, signum: int, frame: Any) -> None:
+        logger.info(f"Pre-fork master received signal {signum}, stopping workers")
+        self._running = False
+
+    def _spawn_missing(self) -> None:
+        now = time.monotonic()
+        while len(self._workers) < self.workers and now >= self._next_spawn:
+            self._spawn()
+
+    def _spawn(self) -> None:
+        parent_end, child_end = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            parent_end.close()
+            self._run_worker(child_end)
+        child_end.close()
+        parent_end.setblocking(False)
+        worker = _Worker(pid, parent_end, time.monotonic())
+        self._workers[pid] = worker
+        self._selector.register(parent_end, selectors.EVENT_READ, worker)
+        logger.info(f"Spawned worker {pid}")
+
+    def _run_worker(self, channel: socket.socket) -> None:
+        """worker 进程入口（不返回）"""
+        code = 0
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, signal.SIG_DFL)
+            for other in self._workers.values():
+                other.channel.close()
+            self._selector.close()
+            channel.setblocking(False)
+            server_config = uvicorn.Config(self.transport.app, log_level="info", lifespan="on")
+            server = _WorkerServer(server_config, channel, self.stats_interval)
+            assert self.socket is not None
+            server.run(sockets=[self.socket])
+        except BaseException:
+            logger.exception(f"Worker {os.getpid()} crashed")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _read_channel(self, worker: _Worker) -> None:
+        """读取 worker 心跳并回复汇总"""
+        try:
+            data = worker.channel.recv(1 << 20)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            # worker 已退出，由 _reap 回收
+            self._selector.unregister(worker.channel)
+            return
+
+        *lines, worker.buffer = (worker.buffer + data).split(b"\n")
+        if not lines:
+            return
+        for line in lines:
+            try:
+                payload = json.loads(line)
+            except ValueError:
+                logger.warning(f"Malformed stats from worker {worker.pid}")
+                continue
+            now = time.monotonic()
+            if worker.booted_at is None:
+                worker.booted_at = now
+                logger.info(
+                    f"Worker {worker.pid} ready in {(now - worker.started_at) * 1000:.0f}ms"
+                )
+            worker.last_heartbeat = now
+            worker.metrics = payload.get("metrics", {})
+            worker.pss_kb = read_pss_kb(worker.pid)
+        try:
+            worker.channel.setblocking(True)
+            worker.channel.settimeout(1.0)
+            worker.channel.sendall(json.dumps(self.get_stats()).encode() + b"\n")
+        except OSError as e:
+            logger.warning(f"Failed to send stats to worker {worker.pid}: {e}")
+        finally:
+            worker.channel.setblocking(False)
+
+    def _reap(self) -> None:
+        """回收已退出的 worker"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self._workers.pop(pid, None)
+            if worker is None:
+                continue
+            self._forget(worker)
+            if not self._running:
+                continue
+            self.restarts += 1
+            uptime = time.monotonic() - worker.started_at
+            if uptime < _MIN_UPTIME:
+                self._fast_failures += 1
+                delay = min(0.1 * 2**self._fast_failures, _MAX_RESPAWN_DELAY)
+                self._next_spawn = time.monotonic() + delay
+            else:
+                self._fast_failures = 0
+            logger.warning(
+                f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)} "
+                f"after {uptime:.1f}s, respawning"
+            )
+
+    def _check_heartbeats(self) -> None:
+        """SIGKILL 心跳超时的 worker（随后由 _reap 回收并重新 fork）"""
+        deadline = time.monotonic() - self.heartbeat_timeout
+        for worker in list(self._workers.values()):
+            if worker.last_heartbeat < deadline:
+                logger.error(
+                    f"Worker {worker.pid} missed heartbeats for {self.heartbeat_timeout}s, killing"
+                )
+                self.hung_kills += 1
+                worker.last_heartbeat = time.monotonic()
+                try:
+                    os.kill(worker.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def _forget(self, worker: _Worker) -> None:
+        try:
+            self._selector.unregister(worker.channel)
+        except (KeyError, ValueError):
+            pass
+        worker.channel.close()
+
+    def _shutdown(self) -> None:
+        """SIGTERM 全部 worker，超时后 SIGKILL"""
+        for worker in self._workers.values():
+            try:
+                os.kill(worker.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.graceful_timeout
+        while self._workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for worker in list(self._workers.values()):
+            try:
+                os.kill(worker.pid, signal.SIGKILL)
+                os.waitpid(worker.pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self._forget(worker)
+        self._workers.clear()
+        self._selector.close()
+        if self.socket is not None:
+            self.socket.close()
+        logger.info("Pre-fork master stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取全部 worker 的汇总统计
+
+        Returns:
+            统计字典（汇总指标与每个 worker 的心跳、启动耗时、PSS）
+        """
+        now = time.monotonic()
+        workers = sorted(self._workers.values(), key=lambda worker: worker.started_at)
+        return {
+            "master_pid": os.getpid(),
+            "workers": self.workers,
+            "alive": len(workers),
+            "restarts": self.restarts,
+            "hung_kills": self.hung_kills,
+            "master_pss_kb": read_pss_kb(os.getpid()),
+            "totals": aggregate_stats([worker.metrics for worker in workers]),
+            "per_worker": [
+                {
+                    "pid": worker.pid,
+                    "uptime_seconds": round(now - worker.started_at, 1),
+                    "boot_ms": (
+                        round((worker.booted_at - worker.started_at) * 1000, 1)
+                        if worker.booted_at is not None
+                        else None
+                    ),
+                    "heartbeat_age_seconds": round(now - worker.last_heartbeat, 1),
+                    "total_requests": worker.metrics.get("total_requests", 0),
+                    "pss_kb": worker.pss_kb,
+                }
+                for worker in workers
+            ],
+        }
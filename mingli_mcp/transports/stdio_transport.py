@@ -7,7 +7,10 @@
 import json
 import logging
 import sys
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+from mingli_mcp.utils.streaming import iter_json
+from mingli_mcp.utils.tracing import SPAN_KIND_SERVER, get_tracer
 
 from .base_transport import BaseTransport
 
@@ -20,6 +23,24 @@ PARSE_ERROR_RESPONSE = {
 }
 
 
+def _response_ids(message: Any) -> List[Any]:
+    """响应（或批量响应）中各请求的 id（发送失败时补发错误响应用）"""
+    responses = message if isinstance(message, list) else [message]
+    return [
+        response.get("id")
+        for response in responses
+        if isinstance(response, dict) and response.get("id") is not None
+    ]
+
+
+def _meta_traceparent(message: Any) -> Optional[str]:
+    """stdio没有请求头，trace上下文由客户端放在 params._meta.traceparent"""
+    params = message.get("params") if isinstance(message, dict) else None
+    meta = params.get("_meta") if isinstance(params, dict) else None
+    value = meta.get("traceparent") if isinstance(meta, dict) else None
+    return value if isinstance(value, str) else None
+
+
 class StdioTransport(BaseTransport):
     """标准输入输出传输层"""
 
@@ -57,7 +78,12 @@ class StdioTransport(BaseTransport):
                 logger.debug(f"Received message: {line[:200]}...")
                 # 单条消息处理失败不能终结整个会话，否则客户端会永久挂起
                 try:
-                    response = self.handle_message(message)
+                    with get_tracer().start_span(
+                        "stdio message",
+                        kind=SPAN_KIND_SERVER,
+                        traceparent=_meta_traceparent(message),
+                    ):
+                        response = self.handle_message(message)
                 except Exception as e:
                     logger.exception("Error handling message, continuing loop")
                     response = {
@@ -83,16 +109,42 @@ class StdioTransport(BaseTransport):
         """
         通过stdout发送JSON-RPC消息
 
+        流式结果（STREAM_OUTPUT）边渲染边逐块写出，每块写完即flush，
+        不在内存中拼出整条消息。
+
         Args:
             message: 要发送的消息字典
         """
+        pending: Optional[str] = None
+        written = False
         try:
-            json_str = json.dumps(message, ensure_ascii=False)
-            sys.stdout.write(json_str + "\n")
+            for chunk in iter_json(message, ensure_ascii=False):
+                if pending is not None:
+                    sys.stdout.write(pending)
+                    sys.stdout.flush()
+                    written = True
+                else:
+                    logger.debug(f"Sending message: {chunk[:200]}...")
+                pending = chunk
+            # 最后一块与换行一起写出；非流式消息只有这一块
+            sys.stdout.write(f"{pending}\n")
             sys.stdout.flush()
-            logger.debug(f"Sent message: {json_str[:200]}...")
-        except Exception:
+        except Exception as e:
             logger.exception("Error sending message")
+            # 已写出一部分时先结束这一行，再为每个请求补发错误响应，客户端不会一直等下去
+            try:
+                if written:
+                    sys.stdout.write("\n")
+                for request_id in _response_ids(message):
+                    error = {
+                        "jsonrpc": "2.0",
+                        "error": {"code": -32603, "message": f"Internal error: {e}"},
+                        "id": request_id,
+                    }
+                    sys.stdout.write(json.dumps(error, ensure_ascii=False) + "\n")
+                sys.stdout.flush()
+            except Exception:
+                logger.exception("Error sending error response")
 
     def receive_message(self) -> Optional[Dict[str, Any]]:
         """
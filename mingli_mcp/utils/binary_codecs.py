@@ -0,0 +1,639 @@
+"""
+二进制编码（MessagePack / CBOR）
+
+给程序化消费排盘结果的客户端用：结果里大量是中文短字符串和重复的字段名，
+JSON 文本要给每个字符串加引号、转义，解析时还要逐字符扫描；MessagePack / CBOR
+用长度前缀直接写 UTF-8 字节，体积更小、解码不需要扫描。
+
+- 已安装 msgpack / cbor2（pip install mingli-mcp[binary]）时用它们的 C 扩展
+- 未安装时用本模块的纯 Python 实现，只覆盖 JSON 能表示的类型（外加 bytes），
+  与 json.dumps 一样遇到其他类型抛 TypeError
+
+编码器按调用缓存短字符串的编码结果：一张命盘里 "name"、"brightness" 之类的键
+和星名会重复上百次，只需编码一次。
+"""
+
+import functools
+import importlib
+import re
+import struct
+from types import ModuleType
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+CBOR_MEDIA_TYPE = "application/cbor"
+
+# 超过这个长度的字符串不进缓存（长文本很少重复，缓存只会占内存）
+_CACHE_MAX_LEN = 64
+
+_pack_B_H = struct.Struct(">BH").pack
+_pack_B_I = struct.Struct(">BI").pack
+_pack_B_Q = struct.Struct(">BQ").pack
+_pack_B_b = struct.Struct(">Bb").pack
+_pack_B_h = struct.Struct(">Bh").pack
+_pack_B_i = struct.Struct(">Bi").pack
+_pack_B_q = struct.Struct(">Bq").pack
+_pack_B_d = struct.Struct(">Bd").pack
+
+_unpack_H = struct.Struct(">H").unpack_from
+_unpack_I = struct.Struct(">I").unpack_from
+_unpack_Q = struct.Struct(">Q").unpack_from
+_unpack_b = struct.Struct(">b").unpack_from
+_unpack_h = struct.Struct(">h").unpack_from
+_unpack_i = struct.Struct(">i").unpack_from
+_unpack_q = struct.Struct(">q").unpack_from
+_unpack_e = struct.Struct(">e").unpack_from
+_unpack_f = struct.Struct(">f").unpack_from
+_unpack_d = struct.Struct(">d").unpack_from
+
+
+def _plain(obj: Any, codec: str) -> Any:
+    """把内置类型的子类（IntEnum、OrderedDict 等）还原为基础类型，其他类型报错"""
+    if isinstance(obj, bool):
+        return bool(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    if isinstance(obj, float):
+        return float(obj)
+    if isinstance(obj, str):
+        return str(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return bytes(obj)
+    if isinstance(obj, dict):
+        return dict(obj)
+    if isinstance(obj, (list, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not {codec} serializable")
+
+
+def _check_end(data: bytes, pos: int, size: int) -> int:
+    end = pos + size
+    if end > len(data):
+        raise ValueError("数据被截断")
+    return end
+
+
+# ---------------------------------------------------------------- MessagePack
+
+
+def encode_msgpack(obj: Any) -> bytes:
+    """
+    纯 Python 的 MessagePack 编码
+
+    Args:
+        obj: 由 dict / list / tuple / str / int / float / bool / None / bytes 组成的对象
+
+    Returns:
+        MessagePack 字节串
+    """
+    out = bytearray()
+    strings: Dict[str, bytes] = {}
+
+    def encode(obj: Any) -> None:
+        kind = type(obj)
+        if kind is str:
+            cached = strings.get(obj)
+            if cached is not None:
+                out.extend(cached)
+                return
+            raw = obj.encode("utf-8")
+            size = len(raw)
+            if size < 32:
+                encoded = bytes((0xA0 | size,)) + raw
+            elif size < 0x100:
+                encoded = bytes((0xD9, size)) + raw
+            elif size < 0x10000:
+                encoded = _pack_B_H(0xDA, size) + raw
+            else:
+                encoded = _pack_B_I(0xDB, size) + raw
+            if size <= _CACHE_MAX_LEN:
+                strings[obj] = encoded
+            out.extend(encoded)
+        elif kind is dict:
+            size = len(obj)
+            if size < 16:
+                out.append(0x80 | size)
+            elif size < 0x10000:
+                out.extend(_pack_B_H(0xDE, size))
+            else:
+                out.extend(_pack_B_I(0xDF, size))
+            for key, value in obj.items():
+                encode(key)
+                encode(value)
+        elif kind is list or kind is tuple:
+            size = len(obj)
+            if size < 16:
+                out.append(0x90 | size)
+            elif size < 0x10000:
+                out.extend(_pack_B_H(0xDC, size))
+            else:
+                out.extend(_pack_B_I(0xDD, size))
+            for item in obj:
+                encode(item)
+        elif kind is int:
+            if 0 <= obj < 0x80:
+                out.append(obj)
+            elif -32 <= obj < 0:
+                out.append(obj & 0xFF)
+            elif obj >= 0:
+                if obj < 0x100:
+                    out.extend((0xCC, obj))
+                elif obj < 0x10000:
+                    out.extend(_pack_B_H(0xCD, obj))
+                elif obj < 0x100000000:
+                    out.extend(_pack_B_I(0xCE, obj))
+                elif obj < 0x10000000000000000:
+                    out.extend(_pack_B_Q(0xCF, obj))
+                else:
+                    raise OverflowError("整数超出 MessagePack 范围")
+            elif obj >= -0x80:
+                out.extend(_pack_B_b(0xD0, obj))
+            elif obj >= -0x8000:
+                out.extend(_pack_B_h(0xD1, obj))
+            elif obj >= -0x80000000:
+                out.extend(_pack_B_i(0xD2, obj))
+            elif obj >= -0x8000000000000000:
+                out.extend(_pack_B_q(0xD3, obj))
+            else:
+                raise OverflowError("整数超出 MessagePack 范围")
+        elif obj is None:
+            out.append(0xC0)
+        elif kind is bool:
+            out.append(0xC3 if obj else 0xC2)
+        elif kind is float:
+            out.extend(_pack_B_d(0xCB, obj))
+        elif kind is bytes:
+            size = len(obj)
+            if size < 0x100:
+                out.extend((0xC4, size))
+            elif size < 0x10000:
+                out.extend(_pack_B_H(0xC5, size))
+            else:
+                out.extend(_pack_B_I(0xC6, size))
+            out.extend(obj)
+        else:
+            encode(_plain(obj, "MessagePack"))
+
+    encode(obj)
+    return bytes(out)
+
+
+def decode_msgpack(data: bytes) -> Any:
+    """
+    纯 Python 的 MessagePack 解码
+
+    Args:
+        data: MessagePack 字节串（必须恰好是一个完整对象）
+
+    Returns:
+        解码结果；str 键/值解码为 str，bin 解码为 bytes
+
+    Raises:
+        ValueError: 数据格式错误、被截断或有多余字节；不支持扩展类型
+    """
+    data = bytes(data)
+    total = len(data)
+
+    def decode(pos: int) -> Tuple[Any, int]:
+        head = data[pos]
+        pos += 1
+        if 0xA0 <= head <= 0xBF:
+            # fixstr 最常见（字段名、星名），内联处理
+            end = pos + (head & 0x1F)
+            if end > total:
+                raise ValueError("数据被截断")
+            return data[pos:end].decode("utf-8"), end
+        if 0x80 <= head <= 0x8F:
+            result = {}
+            for _ in range(head & 0x0F):
+                key, pos = decode(pos)
+                result[key], pos = decode(pos)
+            return result, pos
+        if head <= 0x7F:
+            return head, pos
+        if 0x90 <= head <= 0x9F:
+            return read_array(pos, head & 0x0F)
+        if head >= 0xE0:
+            return head - 0x100, pos
+        if head == 0xC0:
+            return None, pos
+        if head == 0xC2:
+            return False, pos
+        if head == 0xC3:
+            return True, pos
+        if head == 0xD9:
+            return read_str(pos + 1, data[pos])
+        if head == 0xDA:
+            return read_str(pos + 2, _unpack_H(data, pos)[0])
+        if head == 0xDB:
+            return read_str(pos + 4, _unpack_I(data, pos)[0])
+        if head == 0xCB:
+            return _unpack_d(data, pos)[0], pos + 8
+        if head == 0xCA:
+            return _unpack_f(data, pos)[0], pos + 4
+        if head == 0xCC:
+            return data[pos], pos + 1
+        if head == 0xCD:
+            return _unpack_H(data, pos)[0], pos + 2
+        if head == 0xCE:
+            return _unpack_I(data, pos)[0], pos + 4
+        if head == 0xCF:
+            return _unpack_Q(data, pos)[0], pos + 8
+        if head == 0xD0:
+            return _unpack_b(data, pos)[0], pos + 1
+        if head == 0xD1:
+            return _unpack_h(data, pos)[0], pos + 2
+        if head == 0xD2:
+            return _unpack_i(data, pos)[0], pos + 4
+        if head == 0xD3:
+            return _unpack_q(data, pos)[0], pos + 8
+        if head == 0xDC:
+            return read_array(pos + 2, _unpack_H(data, pos)[0])
+        if head == 0xDD:
+            return read_array(pos + 4, _unpack_I(data, pos)[0])
+        if head == 0xDE:
+            return read_map(pos + 2, _unpack_H(data, pos)[0])
+        if head == 0xDF:
+            return read_map(pos + 4, _unpack_I(data, pos)[0])
+        if head == 0xC4:
+            return read_bin(pos + 1, data[pos])
+        if head == 0xC5:
+            return read_bin(pos + 2, _unpack_H(data, pos)[0])
+        if head == 0xC6:
+            return read_bin(pos + 4, _unpack_I(data, pos)[0])
+        raise ValueError(f"不支持的 MessagePack 类型字节 0x{head:02x}")
+
+    def read_str(pos: int, size: int) -> Tuple[str, int]:
+        end = _check_end(data, pos, size)
+        return data[pos:end].decode("utf-8"), end
+
+    def read_bin(pos: int, size: int) -> Tuple[bytes, int]:
+        end = _check_end(data, pos, size)
+        return data[pos:end], end
+
+    def read_array(pos: int, size: int) -> Tuple[List[Any], int]:
+        items = []
+        for _ in range(size):
+            item, pos = decode(pos)
+            items.append(item)
+        return items, pos
+
+    def read_map(pos: int, size: int) -> Tuple[Dict[Any, Any], int]:
+        result = {}
+        for _ in range(size):
+            key, pos = decode(pos)
+            result[key], pos = decode(pos)
+        return result, pos
+
+    return _decode_whole(decode, data, "MessagePack")
+
+
+# ---------------------------------------------------------------- CBOR (RFC 8949)
+
+
+def _cbor_head(major: int, value: int) -> bytes:
+    """主类型 + 参数（长度或整数值）"""
+    major <<= 5
+    if value < 24:
+        return bytes((major | value,))
+    if value < 0x100:
+        return bytes((major | 24, value))
+    if value < 0x10000:
+        return _pack_B_H(major | 25, value)
+    if value < 0x100000000:
+        return _pack_B_I(major | 26, value)
+    if value < 0x10000000000000000:
+        return _pack_B_Q(major | 27, value)
+    raise OverflowError("整数超出 CBOR 范围")
+
+
+def encode_cbor(obj: Any) -> bytes:
+    """
+    纯 Python 的 CBOR 编码（定长、不加标签）
+
+    Args:
+        obj: 由 dict / list / tuple / str / int / float / bool / None / bytes 组成的对象
+
+    Returns:
+        CBOR 字节串
+    """
+    out = bytearray()
+    strings: Dict[str, bytes] = {}
+
+    def encode(obj: Any) -> None:
+        kind = type(obj)
+        if kind is str:
+            cached = strings.get(obj)
+            if cached is not None:
+                out.extend(cached)
+                return
+            raw = obj.encode("utf-8")
+            size = len(raw)
+            encoded = (bytes((0x60 | size,)) if size < 24 else _cbor_head(3, size)) + raw
+            if size <= _CACHE_MAX_LEN:
+                strings[obj] = encoded
+            out.extend(encoded)
+        elif kind is dict:
+            size = len(obj)
+            if size < 24:
+                out.append(0xA0 | size)
+            else:
+                out.extend(_cbor_head(5, size))
+            for key, value in obj.items():
+                encode(key)
+                encode(value)
+        elif kind is list or kind is tuple:
+            size = len(obj)
+            if size < 24:
+                out.append(0x80 | size)
+            else:
+                out.extend(_cbor_head(4, size))
+            for item in obj:
+                encode(item)
+        elif kind is int:
+            if 0 <= obj < 24:
+                out.append(obj)
+            elif obj >= 0:
+                out.extend(_cbor_head(0, obj))
+            else:
+                out.extend(_cbor_head(1, -1 - obj))
+        elif obj is None:
+            out.append(0xF6)
+        elif kind is bool:
+            out.append(0xF5 if obj else 0xF4)
+        elif kind is float:
+            out.extend(_pack_B_d(0xFB, obj))
+        elif kind is bytes:
+            out.extend(_cbor_head(2, len(obj)))
+            out.extend(obj)
+        else:
+            encode(_plain(obj, "CBOR"))
+
+    encode(obj)
+    return bytes(out)
+
+
+# 不定长数组/映射/字符串的结束标记
+_BREAK = object()
+# 自描述标签（RFC 8949 3.4.6），部分编码器会加在最外层，不改变数据含义
+_SELF_DESCRIBE_TAG = 55799
+
+
+def decode_cbor(data: bytes) -> Any:
+    """
+    纯 Python 的 CBOR 解码
+
+    支持定长与不定长的字符串/数组/映射、半/单/双精度浮点；标签只接受自描述标签。
+
+    Args:
+        data: CBOR 字节串（必须恰好是一个完整数据项）
+
+    Returns:
+        解码结果；undefined 解码为 None
+
+    Raises:
+        ValueError: 数据格式错误、被截断或有多余字节；不支持的标签或简单值
+    """
+    data = bytes(data)
+    total = len(data)
+
+    def argument(info: int, pos: int) -> Tuple[int, int]:
+        if info < 24:
+            return info, pos
+        if info == 24:
+            return data[pos], pos + 1
+        if info == 25:
+            return _unpack_H(data, pos)[0], pos + 2
+        if info == 26:
+            return _unpack_I(data, pos)[0], pos + 4
+        if info == 27:
+            return _unpack_Q(data, pos)[0], pos + 8
+        raise ValueError(f"CBOR 附加信息 {info} 无效")
+
+    def decode(pos: int) -> Tuple[Any, int]:
+        head = data[pos]
+        pos += 1
+        if 0x60 <= head <= 0x77:
+            # 短文本最常见（字段名、星名），内联处理
+            end = pos + (head & 0x1F)
+            if end > total:
+                raise ValueError("数据被截断")
+            return data[pos:end].decode("utf-8"), end
+        if 0xA0 <= head <= 0xB7:
+            result = {}
+            for _ in range(head & 0x1F):
+                key, pos = decode(pos)
+                result[key], pos = decode(pos)
+            return result, pos
+        major = head >> 5
+        info = head & 0x1F
+        if major == 7:
+            return simple(info, pos)
+        if info == 31:
+            return indefinite(major, pos)
+        value, pos = argument(info, pos)
+        if major == 3:
+            end = _check_end(data, pos, value)
+            return data[pos:end].decode("utf-8"), end
+        if major == 5:
+            result = {}
+            for _ in range(value):
+                key, pos = decode(pos)
+                result[key], pos = decode(pos)
+            return result, pos
+        if major == 4:
+            items = []
+            for _ in range(value):
+                item, pos = decode(pos)
+                items.append(item)
+            return items, pos
+        if major == 0:
+            return value, pos
+        if major == 1:
+            return -1 - value, pos
+        if major == 2:
+            end = _check_end(data, pos, value)
+            return data[pos:end], end
+        if value == _SELF_DESCRIBE_TAG:
+            return decode(pos)
+        raise ValueError(f"不支持的 CBOR 标签 {value}")
+
+    def simple(info: int, pos: int) -> Tuple[Any, int]:
+        if info == 20:
+            return False, pos
+        if info == 21:
+            return True, pos
+        if info == 22 or info == 23:
+            return None, pos
+        if info == 27:
+            return _unpack_d(data, pos)[0], pos + 8
+        if info == 26:
+            return _unpack_f(data, pos)[0], pos + 4
+        if info == 25:
+            return _unpack_e(data, pos)[0], pos + 2
+        if info == 31:
+            return _BREAK, pos
+        raise ValueError(f"不支持的 CBOR 简单值 {info}")
+
+    def indefinite(major: int, pos: int) -> Tuple[Any, int]:
+        if major not in (2, 3, 4, 5):
+            raise ValueError(f"CBOR 主类型 {major} 不能是不定长")
+        items = []
+        while True:
+            item, pos = decode(pos)
+            if item is _BREAK:
+                break
+            items.append(item)
+        if major == 4:
+            return items, pos
+        if major == 5:
+            if len(items) % 2:
+                raise ValueError("CBOR 不定长映射缺少值")
+            return dict(zip(items[::2], items[1::2])), pos
+        chunk_type = str if major == 3 else bytes
+        if not all(type(chunk) is chunk_type for chunk in items):
+            raise ValueError("CBOR 不定长字符串的分段类型不一致")
+        return ("" if major == 3 else b"").join(items), pos
+
+    value = _decode_whole(decode, data, "CBOR")
+    if value is _BREAK:
+        raise ValueError("CBOR 数据以结束标记开头")
+    return value
+
+
+def _decode_whole(decode: Callable[[int], Tuple[Any, int]], data: bytes, codec: str) -> Any:
+    """解码恰好一个完整对象，把各种底层错误统一为 ValueError"""
+    try:
+        value, pos = decode(0)
+    except (IndexError, struct.error) as e:
+        raise ValueError(f"{codec} 数据被截断") from e
+    except UnicodeDecodeError as e:
+        raise ValueError(f"{codec} 字符串不是合法的 UTF-8") from e
+    except (TypeError, RecursionError) as e:
+        # 不可哈希的映射键、嵌套过深
+        raise ValueError(f"{codec} 数据无效: {e}") from e
+    if pos != len(data):
+        raise ValueError(f"{codec} 数据末尾有 {len(data) - pos} 个多余字节")
+    return value
+
+
+# ---------------------------------------------------------------- 编码选择
+
+
+@functools.lru_cache(maxsize=None)
+def _native(module_name: str) -> Optional[ModuleType]:
+    """已安装的 C 扩展（第一次用到时才导入，不拖慢启动）"""
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
+
+class Codec(NamedTuple):
+    """一种二进制编码"""
+
+    name: str
+    media_type: str
+    # 已安装时使用的扩展包
+    module: str
+
+    def dumps(self, obj: Any) -> bytes:
+        """编码（优先用扩展包）"""
+        native = _native(self.module)
+        if native is None:
+            return _PURE[self.name][0](obj)
+        if self.name == "msgpack":
+            return bytes(native.packb(obj, use_bin_type=True))
+        return bytes(native.dumps(obj))
+
+    def loads(self, data: bytes) -> Any:
+        """
+        解码（优先用扩展包）
+
+        Raises:
+            ValueError: 数据无效（扩展包的异常也统一为 ValueError）
+        """
+        native = _native(self.module)
+        if native is None:
+            return _PURE[self.name][1](data)
+        try:
+            if self.name == "msgpack":
+                return native.unpackb(data, raw=False, strict_map_key=False)
+            return native.loads(data)
+        except Exception as e:
+            raise ValueError(f"{self.name} 数据无效: {e}") from e
+
+    @property
+    def native(self) -> bool:
+        """是否使用扩展包"""
+        return _native(self.module) is not None
+
+
+_PURE: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "msgpack": (encode_msgpack, decode_msgpack),
+    "cbor": (encode_cbor, decode_cbor),
+}
+
+MSGPACK = Codec("msgpack", MSGPACK_MEDIA_TYPE, "msgpack")
+CBOR = Codec("cbor", CBOR_MEDIA_TYPE, "cbor2")
+
+# 媒体类型 -> 编码（含常见的非标准别名）
+_MEDIA_TYPES = {
+    MSGPACK_MEDIA_TYPE: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    CBOR_MEDIA_TYPE: CBOR,
+}
+
+# 视为 JSON 的媒体类型（客户端没有更偏好二进制时按 JSON 响应）
+_JSON_MEDIA_TYPES = frozenset({"application/json", "application/*", "*/*"})
+
+_Q_PARAM = re.compile(r";\s*q\s*=\s*([0-9.]+)", re.IGNORECASE)
+
+
+def codec_for_content_type(content_type: Optional[str]) -> Optional[Codec]:
+    """
+    按请求的 Content-Type 找二进制编码
+
+    Args:
+        content_type: Content-Type 头
+
+    Returns:
+        Codec；JSON 或未知类型返回 None
+    """
+    if not content_type:
+        return None
+    return _MEDIA_TYPES.get(content_type.split(";", 1)[0].strip().lower())
+
+
+def negotiate(accept: Optional[str]) -> Optional[Codec]:
+    """
+    按 Accept 头选择响应编码
+
+    按 q 值从高到低、同 q 值按出现顺序，取第一个本服务能提供的类型：
+    二进制类型返回对应 Codec，JSON 或通配符返回 None（按 JSON 响应）。
+    MCP 客户端默认发送的 "application/json, text/event-stream" 总是得到 JSON。
+
+    Args:
+        accept: Accept 头
+
+    Returns:
+        Codec；应按 JSON 响应时返回 None
+    """
+    if not accept:
+        return None
+    ranked = []
+    for index, part in enumerate(accept.split(",")):
+        media_type = part.split(";", 1)[0].strip().lower()
+        if media_type not in _MEDIA_TYPES and media_type not in _JSON_MEDIA_TYPES:
+            continue
+        match = _Q_PARAM.search(part)
+        try:
+            quality = float(match.group(1)) if match else 1.0
+        except ValueError:
+            continue
+        if quality > 0:
+            ranked.append((-quality, index, media_type))
+    if not ranked:
+        return None
+    return _MEDIA_TYPES.get(min(ranked)[2])
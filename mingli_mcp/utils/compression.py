@@ -0,0 +1,315 @@
+"""
+HTTP 响应压缩
+
+排盘结果的 markdown / JSON 文本有几十 KB，大部分是重复的中文星名、宫名和字段名，
+压缩率很高。按 Accept-Encoding 协商编码：
+
+- gzip 用标准库 zlib，总是可用
+- br / zstd 在安装 brotli / zstandard（pip install mingli-mcp[compression]）后可用，
+  第一次用到时才导入，不拖慢启动
+
+tools/list 等目录类响应对同一份服务配置是不变的，只有 JSON-RPC id 随请求变化。
+PrecompressedCache 把响应拆成 "id 之前的部分" 和 "id 及之后的部分"：前者只压缩一次，
+之后每个请求只需压缩几个字节的 id。
+"""
+
+import functools
+import importlib
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from types import ModuleType
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+GZIP = "gzip"
+BROTLI = "br"
+ZSTD = "zstd"
+
+# 服务端偏好（客户端给的 q 值相同时靠前的优先）：zstd 压缩最快，br 压缩率最高
+_PREFERENCE = (ZSTD, BROTLI, GZIP)
+
+# 编码 -> 提供它的扩展包
+_MODULES = {BROTLI: "brotli", ZSTD: "zstandard"}
+
+# 各编码的合法压缩级别，配置的级别超出时截断
+_LEVEL_RANGES = {GZIP: (1, 9), BROTLI: (0, 11), ZSTD: (1, 22)}
+
+# 常见的非标准别名
+_ALIASES = {"x-gzip": GZIP}
+
+# zlib 的 wbits=31 表示带 gzip 头尾（与 gzip 模块输出格式相同，mtime 为 0）
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+_Q_PARAM = re.compile(r";\s*q\s*=\s*([0-9.]+)", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=None)
+def _module(module_name: str) -> Optional[ModuleType]:
+    """已安装的扩展包（第一次用到时才导入）"""
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """本服务能提供的编码（按服务端偏好排序）"""
+    return tuple(
+        encoding
+        for encoding in _PREFERENCE
+        if encoding not in _MODULES or _module(_MODULES[encoding]) is not None
+    )
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    按 Accept-Encoding 头选择内容编码
+
+    取 q 值最高的可用编码，同 q 值按服务端偏好（zstd > br > gzip）；
+    "*" 匹配未单独列出的编码，q=0 表示不接受。identity 的 q 值更高时不压缩。
+
+    Args:
+        accept_encoding: Accept-Encoding 头
+
+    Returns:
+        编码名（gzip / br / zstd）；不压缩时返回 None
+    """
+    if not accept_encoding:
+        return None
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding = part.split(";", 1)[0].strip().lower()
+        if not coding:
+            continue
+        match = _Q_PARAM.search(part)
+        try:
+            quality = float(match.group(1)) if match else 1.0
+        except ValueError:
+            continue
+        qualities[_ALIASES.get(coding, coding)] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    best: Optional[str] = None
+    best_quality = 0.0
+    for encoding in available_encodings():
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    # identity 总是可接受的，除非被显式（或经 "*"）排除
+    identity = qualities.get("identity", qualities.get("*", 1.0))
+    if best is None or identity > best_quality:
+        return None
+    return best
+
+
+def _clamp_level(encoding: str, level: int) -> int:
+    """把压缩级别截断到该编码的合法范围"""
+    low, high = _LEVEL_RANGES[encoding]
+    return min(max(level, low), high)
+
+
+def _require(encoding: str) -> ModuleType:
+    """
+    取 br / zstd 的扩展包
+
+    Raises:
+        ValueError: 未知编码或对应的扩展包未安装
+    """
+    module_name = _MODULES.get(encoding)
+    module = _module(module_name) if module_name else None
+    if module is None:
+        raise ValueError(f"不支持的内容编码: {encoding}")
+    return module
+
+
+def compress(data: bytes, encoding: str, level: int = 6) -> bytes:
+    """
+    一次性压缩
+
+    Args:
+        data: 原始字节
+        encoding: gzip / br / zstd
+        level: 压缩级别（按编码截断到合法范围）
+
+    Returns:
+        压缩后的字节
+
+    Raises:
+        ValueError: 编码不可用
+    """
+    if encoding == GZIP:
+        compressor = zlib.compressobj(_clamp_level(GZIP, level), zlib.DEFLATED, _GZIP_WBITS)
+        return compressor.compress(data) + compressor.flush()
+    module = _require(encoding)
+    level = _clamp_level(encoding, level)
+    if encoding == BROTLI:
+        return bytes(module.compress(data, quality=level))
+    return bytes(module.ZstdCompressor(level=level).compress(data))
+
+
+class StreamCompressor:
+    """
+    流式压缩（分块传输的响应用）
+
+    每块压缩后都做一次同步 flush，客户端收到一块就能解压出对应的文本，
+    不会因为压缩器内部缓冲而拖慢首块。
+    """
+
+    __slots__ = ("encoding", "_compressor", "_module")
+
+    def __init__(self, encoding: str, level: int = 6):
+        """
+        Args:
+            encoding: gzip / br / zstd
+            level: 压缩级别（按编码截断到合法范围）
+
+        Raises:
+            ValueError: 编码不可用
+        """
+        self.encoding = encoding
+        self._module: Any = None
+        self._compressor: Any
+        if encoding == GZIP:
+            self._compressor = zlib.compressobj(
+                _clamp_level(GZIP, level), zlib.DEFLATED, _GZIP_WBITS
+            )
+            return
+        self._module = _require(encoding)
+        level = _clamp_level(encoding, level)
+        if encoding == BROTLI:
+            self._compressor = self._module.Compressor(quality=level)
+        else:
+            self._compressor = self._module.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        """压缩一块并 flush"""
+        if self.encoding == GZIP:
+            return bytes(
+                self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            )
+        if self.encoding == BROTLI:
+            return bytes(self._compressor.process(data) + self._compressor.flush())
+        return bytes(
+            self._compressor.compress(data)
+            + self._compressor.flush(self._module.COMPRESSOBJ_FLUSH_BLOCK)
+        )
+
+    def finish(self) -> bytes:
+        """结束压缩流（写出尾部）"""
+        if self.encoding == BROTLI:
+            return bytes(self._compressor.finish())
+        return bytes(self._compressor.flush())
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, level: int = 6) -> Iterator[bytes]:
+    """
+    逐块压缩
+
+    Args:
+        chunks: 原始字节块
+        encoding: gzip / br / zstd
+        level: 压缩级别
+
+    Yields:
+        压缩后的字节块（跳过空块）
+    """
+    compressor = StreamCompressor(encoding, level)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.finish()
+
+
+class PrecompressedCache:
+    """
+    静态目录响应的预压缩缓存
+
+    响应体 = prefix + suffix，prefix 对同一份目录不变（JSON-RPC 响应把 id 放在最后），
+    suffix 是 id 与收尾的括号。
+
+    - gzip：缓存压缩完 prefix 之后的 zlib 压缩器状态，每个请求复制一份压缩 suffix，
+      任意 id 都命中
+    - br / zstd：压缩器状态不能复制，按 suffix 缓存完整的压缩结果；
+      客户端在 initialize 之后发出的目录请求通常用相同的几个 id，命中率仍然很高
+    """
+
+    # 每个 prefix 最多缓存的 suffix 个数（br / zstd）
+    MAX_SUFFIXES = 64
+
+    def __init__(self, max_entries: int = 32):
+        """
+        Args:
+            max_entries: 最多缓存的 (prefix, 编码, 级别) 组合数，超出时淘汰最久未用的
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[bytes, str, int], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, prefix: bytes, suffix: bytes, encoding: str, level: int = 6) -> bytes:
+        """
+        取 prefix + suffix 的压缩结果
+
+        Args:
+            prefix: 响应体中不变的部分
+            suffix: 随请求变化的部分（id 与收尾）
+            encoding: gzip / br / zstd
+            level: 压缩级别
+
+        Returns:
+            压缩后的完整响应体，与 compress(prefix + suffix) 解压结果相同
+
+        Raises:
+            ValueError: 编码不可用
+        """
+        key = (prefix, encoding, level)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if encoding == GZIP:
+                if entry is None:
+                    self.misses += 1
+                    compressor = zlib.compressobj(
+                        _clamp_level(GZIP, level), zlib.DEFLATED, _GZIP_WBITS
+                    )
+                    entry = (compressor.compress(prefix), compressor)
+                    self._store(key, entry)
+                else:
+                    self.hits += 1
+                head, compressor = entry
+                tail = compressor.copy()
+                return bytes(head + tail.compress(suffix) + tail.flush())
+
+            if entry is None:
+                entry = {}
+                self._store(key, entry)
+            body = entry.get(suffix)
+            if body is not None:
+                self.hits += 1
+                return bytes(body)
+            self.misses += 1
+            body = compress(prefix + suffix, encoding, level)
+            if len(entry) >= self.MAX_SUFFIXES:
+                entry.clear()
+            entry[suffix] = body
+            return body
+
+    def _store(self, key: Tuple[bytes, str, int], entry: Any) -> None:
+        """放入缓存并按容量淘汰（调用方持有锁）"""
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "encodings": list(available_encodings()),
+            }
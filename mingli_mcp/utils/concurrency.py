@@ -0,0 +1,154 @@
+"""
+自适应并发限制（AIMD）
+
+固定的 RATE_LIMIT_REQUESTS 只管请求频率，不管机器能同时算多少：同样的配置在
+Cloudflare 容器上可能压垮 CPU，在 Apify standby 上又浪费算力。本模块按最近的工具调用
+耗时自动调整允许同时执行的工具调用数：
+- 耗时不超过目标且上限确实被用到（在途数不少于上限的一半）：并发上限缓慢加性增长
+  （每完成一个请求 +1/上限，约每轮 +1）
+- 耗时超过目标：并发上限乘性下降（乘以 backoff），每个目标耗时周期内至多下降一次，
+  避免同一批慢请求连续把上限砍到底
+- 在途请求已达上限：直接拒绝（HTTP 503 + Retry-After），而不是排进线程池越积越慢
+
+耗时信号是被放行的工具调用从 try_acquire 到 observe 的耗时（滑动平均）：包含线程池
+排队等待与计算（流式结果含首块渲染），不含 tools/list、initialize、ping 等不占名额的请求。
+名额由 release 单独归还：流式结果写完响应体才归还，但读得慢的客户端不会拉高耗时信号，
+也就不会让所有客户端的并发上限跟着收缩。
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from mingli_mcp.config import config
+from mingli_mcp.utils.metrics import LATENCY_EWMA_ALPHA
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD 并发限制器"""
+
+    def __init__(
+        self,
+        target_latency: Optional[float] = None,
+        min_limit: Optional[int] = None,
+        max_limit: Optional[int] = None,
+        backoff: float = 0.9,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化限制器
+
+        Args:
+            target_latency: 目标耗时（秒），默认读取配置 CONCURRENCY_TARGET_LATENCY_MS
+            min_limit: 并发上限的下界，默认读取配置 CONCURRENCY_MIN_LIMIT
+            max_limit: 并发上限的上界（也是初始值），默认读取配置 CONCURRENCY_MAX_LIMIT
+            backoff: 超过目标耗时时上限的缩小比例
+            clock: 单调时钟（测试可注入）
+        """
+        self.target_latency = (
+            target_latency
+            if target_latency is not None
+            else config.CONCURRENCY_TARGET_LATENCY_MS / 1000
+        )
+        self.min_limit = max(
+            1, min_limit if min_limit is not None else config.CONCURRENCY_MIN_LIMIT
+        )
+        self.max_limit = max(
+            self.min_limit, max_limit if max_limit is not None else config.CONCURRENCY_MAX_LIMIT
+        )
+        self.backoff = backoff
+        self._clock = clock
+
+        # 从上界起步：未过载时与不加限制的行为一致，出现高延迟后再收紧
+        self._limit = float(self.max_limit)
+        self.inflight = 0
+        self.shed = 0
+        self._last_decrease = -math.inf
+        # 被放行调用耗时的滑动平均（秒），还没有调用完成时为None
+        self._latency: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        """当前允许的并发数"""
+        return int(self._limit)
+
+    def try_acquire(self) -> Optional[float]:
+        """
+        尝试占用一个并发名额（不等待）
+
+        Returns:
+            占用成功时为开始时刻，计算完成时把它传给 observe()，执行结束后必须调用
+            release()；None表示已达上限，应当拒绝本次请求
+        """
+        with self._lock:
+            if self.inflight >= int(self._limit):
+                self.shed += 1
+                return None
+            self.inflight += 1
+            return self._clock()
+
+    def observe(self, started: float):
+        """
+        计算完成（名额仍占用）时，按本次耗时更新滑动平均并调整并发上限
+
+        Args:
+            started: try_acquire() 返回的开始时刻
+        """
+        now = self._clock()
+        with self._lock:
+            # 在途数不到上限的一半时上限并不约束吞吐，放宽它没有意义
+            saturated = self.inflight * 2 >= self._limit
+            elapsed = max(0.0, now - started)
+            if self._latency is None:
+                self._latency = elapsed
+            else:
+                self._latency += LATENCY_EWMA_ALPHA * (elapsed - self._latency)
+
+            if self._latency > self.target_latency:
+                if now - self._last_decrease >= self.target_latency:
+                    self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                    self._last_decrease = now
+            elif saturated:
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+
+    def release(self):
+        """归还名额（响应写完时调用，不影响耗时信号）"""
+        with self._lock:
+            self.inflight = max(0, self.inflight - 1)
+
+    @property
+    def recent_latency(self) -> Optional[float]:
+        """被放行调用耗时的滑动平均（秒），还没有调用完成时为None"""
+        with self._lock:
+            return self._latency
+
+    def retry_after(self) -> int:
+        """
+        被拒绝的客户端建议的重试等待（秒）
+
+        Returns:
+            约等于排空一轮在途请求所需的时间，至少1秒
+        """
+        latency = self.recent_latency or self.target_latency
+        return max(1, math.ceil(latency))
+
+    def get_stats(self) -> Dict:
+        """
+        获取限制器统计信息
+
+        Returns:
+            统计信息字典
+        """
+        with self._lock:
+            latency = self._latency
+            return {
+                "limit": int(self._limit),
+                "inflight": self.inflight,
+                "shed": self.shed,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "target_latency_ms": round(self.target_latency * 1000, 3),
+                "recent_latency_ms": round(latency * 1000, 3) if latency is not None else None,
+            }
@@ -0,0 +1,115 @@
+"""
+事件循环与线程池监控（HTTP模式）
+
+HTTP 传输在事件循环里处理请求，再用 run_in_threadpool 把排盘计算交给线程池。
+两处都可能成为瓶颈却看不出来：
+- 有人在事件循环里做了同步计算 -> 所有请求的调度被推迟（事件循环延迟）
+- 线程池满了 -> 请求在队列里等线程（排队等待），这段时间不算在计算耗时里
+
+本模块在后台定期采样事件循环调度延迟和线程池占用/排队数，
+并提供 run_timed_in_threadpool 把单个请求的排队等待与计算耗时分开记录。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+from anyio import to_thread
+from starlette.concurrency import run_in_threadpool
+
+from mingli_mcp.utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def sample_threadpool() -> None:
+    """
+    采样默认线程池（anyio 默认 CapacityLimiter）的占用与排队数并记入 Metrics
+
+    必须在事件循环中调用。
+    """
+    limiter = to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+    get_metrics().record_threadpool(
+        active=int(statistics.borrowed_tokens),
+        queued=statistics.tasks_waiting,
+        limit=int(statistics.total_tokens),
+    )
+
+
+async def run_timed_in_threadpool(func: Callable[..., T], *args: Any) -> T:
+    """
+    在线程池中执行同步函数，分别记录排队等待与计算耗时
+
+    Args:
+        func: 同步函数
+        *args: 函数参数
+
+    Returns:
+        函数返回值
+    """
+    enqueued = time.monotonic()
+
+    def timed() -> T:
+        started = time.monotonic()
+        try:
+            return func(*args)
+        finally:
+            get_metrics().record_worker_timing(
+                queue_wait=started - enqueued, compute=time.monotonic() - started
+            )
+
+    return await run_in_threadpool(timed)
+
+
+class EventLoopMonitor:
+    """
+    事件循环延迟监控
+
+    每隔 interval 秒 sleep 一次，实际醒来时间比预期晚多少就是调度延迟：
+    期间事件循环被同步代码占住，所有在途请求都被推迟了这么久。
+    """
+
+    def __init__(self, interval: float = 0.5):
+        """
+        初始化监控器
+
+        Args:
+            interval: 采样间隔（秒），0表示关闭
+        """
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """后台任务是否在运行"""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """在当前事件循环中启动后台采样任务"""
+        if self.interval <= 0 or self.running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.debug(f"Event loop monitor started (interval={self.interval}s)")
+
+    async def stop(self) -> None:
+        """停止后台采样任务"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            get_metrics().record_loop_lag(max(loop.time() - expected, 0.0))
+            sample_threadpool()
@@ -0,0 +1,240 @@
+"""
+内存统计
+
+- 按 1/N 比例抽样工具调用，用 tracemalloc 记录单次调用的峰值内存与净增内存块数
+- 进程 RSS（容器配额按它来定）
+- GC 停顿统计（gc.callbacks）
+
+tracemalloc 会让所有内存分配变慢数倍，因此默认关闭（MEMORY_SAMPLE_RATE=0），
+开启后也只追踪被抽中的那次调用，其余调用不受影响。
+"""
+
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from itertools import count
+from typing import Any, Dict, Iterator, Optional
+
+from mingli_mcp.config import config
+from mingli_mcp.utils.metrics import get_metrics
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+
+def get_process_memory() -> Dict[str, int]:
+    """
+    获取进程内存占用
+
+    Returns:
+        {"rss_bytes": 当前RSS, "max_rss_bytes": 历史峰值RSS}，取不到的项为0
+    """
+    rss = 0
+    try:
+        # /proc/self/statm 第二列是常驻页数；读它比 psutil 便宜且无需额外依赖
+        with open("/proc/self/statm", "rb") as f:
+            rss = int(f.read().split()[1]) * _page_size()
+    except (OSError, ValueError, IndexError):
+        pass
+
+    max_rss = 0
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 以 KB 为单位，macOS 以字节为单位
+        if sys.platform != "darwin":
+            max_rss *= 1024
+
+    return {"rss_bytes": rss or max_rss, "max_rss_bytes": max_rss}
+
+
+def _page_size() -> int:
+    try:
+        return os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return 4096
+
+
+class GcPauseTracker:
+    """
+    GC 停顿统计
+
+    CPython 的 GC 在触发它的线程里持有 GIL 运行，期间所有线程都停下来，
+    停顿时间会直接叠加到正在处理的请求上。
+    """
+
+    def __init__(self) -> None:
+        self._started: Optional[float] = None
+        self._lock = threading.Lock()
+        self._installed = False
+        self.reset()
+
+    @property
+    def installed(self) -> bool:
+        """是否已注册 gc 回调"""
+        return self._installed
+
+    def install(self) -> None:
+        """注册 gc 回调（重复调用无副作用）"""
+        if not self._installed:
+            gc.callbacks.append(self._callback)
+            self._installed = True
+
+    def uninstall(self) -> None:
+        """移除 gc 回调"""
+        if self._installed:
+            gc.callbacks.remove(self._callback)
+            self._installed = False
+
+    def reset(self) -> None:
+        """清空统计"""
+        with self._lock:
+            self._collections = [0, 0, 0]
+            self._total_pause = [0.0, 0.0, 0.0]
+            self._max_pause = [0.0, 0.0, 0.0]
+            self._collected = 0
+
+    def _callback(self, phase: str, info: Dict[str, Any]) -> None:
+        if phase == "start":
+            self._started = time.perf_counter()
+            return
+        if self._started is None:
+            return
+        pause = time.perf_counter() - self._started
+        self._started = None
+        generation = info.get("generation", 0)
+        with self._lock:
+            self._collections[generation] += 1
+            self._total_pause[generation] += pause
+            self._max_pause[generation] = max(self._max_pause[generation], pause)
+            self._collected += info.get("collected", 0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取 GC 停顿统计
+
+        Returns:
+            按代划分的回收次数、总停顿与最大停顿（毫秒）
+        """
+        with self._lock:
+            return {
+                "collected_objects": self._collected,
+                "generations": {
+                    str(gen): {
+                        "collections": self._collections[gen],
+                        "total_pause_ms": round(self._total_pause[gen] * 1000, 3),
+                        "max_pause_ms": round(self._max_pause[gen] * 1000, 3),
+                    }
+                    for gen in range(3)
+                },
+            }
+
+
+class MemorySampler:
+    """
+    按比例抽样的工具调用内存统计
+
+    tracemalloc 是进程级的：同一时刻只追踪一次调用（其余被抽中的并发调用直接跳过），
+    但与它并发执行的其他线程的分配也会计入峰值，高并发下的数字偏大。
+    """
+
+    def __init__(self, sample_rate: int = 0):
+        """
+        初始化抽样器
+
+        Args:
+            sample_rate: 每N次调用抽样1次，0表示关闭
+        """
+        self.sample_rate = sample_rate
+        self._counter = count(1)
+        self._busy = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """是否开启抽样"""
+        return self.sample_rate > 0
+
+    def _should_sample(self) -> bool:
+        return self.enabled and next(self._counter) % self.sample_rate == 0
+
+    @contextmanager
+    def sample(self, tool: str) -> Iterator[None]:
+        """
+        在被抽中时追踪代码块内的内存分配，并记入 Metrics
+
+        Args:
+            tool: 工具名称
+        """
+        if not self._should_sample() or not self._busy.acquire(blocking=False):
+            yield
+            return
+
+        # 服务以 PYTHONTRACEMALLOC 启动时沿用已有的追踪，只重置峰值
+        owns_tracing = not tracemalloc.is_tracing()
+        try:
+            if owns_tracing:
+                tracemalloc.start()
+            else:
+                tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            blocks_before = sys.getallocatedblocks()
+            try:
+                yield
+            finally:
+                current, peak = tracemalloc.get_traced_memory()
+                blocks = sys.getallocatedblocks() - blocks_before
+                if owns_tracing:
+                    tracemalloc.stop()
+                get_metrics().record_memory(
+                    tool,
+                    peak_bytes=max(peak - baseline, 0),
+                    retained_bytes=current - baseline,
+                    net_blocks=blocks,
+                )
+        finally:
+            self._busy.release()
+
+
+# 全局实例
+_global_sampler = MemorySampler(config.MEMORY_SAMPLE_RATE)
+_global_gc_tracker = GcPauseTracker()
+if _global_sampler.enabled:
+    _global_gc_tracker.install()
+
+
+def get_memory_sampler() -> MemorySampler:
+    """
+    获取全局内存抽样器
+
+    Returns:
+        MemorySampler实例
+    """
+    return _global_sampler
+
+
+def get_gc_tracker() -> GcPauseTracker:
+    """
+    获取全局 GC 停顿统计
+
+    Returns:
+        GcPauseTracker实例
+    """
+    return _global_gc_tracker
+
+
+def get_memory_stats() -> Dict[str, Any]:
+    """
+    获取进程级内存统计（RSS 与 GC 停顿）
+
+    Returns:
+        内存统计字典
+    """
+    stats: Dict[str, Any] = {"process": get_process_memory()}
+    if _global_gc_tracker.installed:
+        stats["gc"] = _global_gc_tracker.get_stats()
+    return stats
@@ -9,6 +9,9 @@ from datetime import datetime
 from threading import Lock
 from typing import Dict, List, Optional
 
+# 工具耗时滑动平均（EWMA）的平滑系数：越大越偏向最近的调用
+LATENCY_EWMA_ALPHA = 0.2
+
 
 @dataclass
 class Metrics:
@@ -34,6 +37,30 @@ class Metrics:
     # 错误统计
     error_counts: Dict[str, int] = field(default_factory=dict)
 
+    # 各工具成功调用耗时的指数滑动平均（秒），用于按计算量计费等
+    tool_latency: Dict[str, float] = field(default_factory=dict)
+
+    # 抽样内存统计（工具名 -> 累计值）
+    memory_samples: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    # 事件循环调度延迟（HTTP模式后台采样）
+    loop_lag_samples: int = 0
+    total_loop_lag: float = 0.0
+    max_loop_lag: float = 0.0
+
+    # 线程池：最近一次采样的占用/排队数，以及请求排队等待与计算耗时
+    threadpool_active: int = 0
+    threadpool_queued: int = 0
+    threadpool_limit: int = 0
+    max_threadpool_queued: int = 0
+    worker_calls: int = 0
+    total_queue_wait: float = 0.0
+    max_queue_wait: float = 0.0
+    total_compute_time: float = 0.0
+    max_compute_time: float = 0.0
+    # 计算耗时的指数滑动平均（秒），反映最近的负载状况
+    recent_compute_time: Optional[float] = None
+
     # 开始时间
     start_time: datetime = field(default_factory=datetime.now)
 
@@ -85,6 +112,171 @@ class Metrics:
             if not success and error_type:
                 self.error_counts[error_type] = self.error_counts.get(error_type, 0) + 1
 
+    def record_tool_latency(self, tool: str, duration: float):
+        """
+        更新工具耗时的指数滑动平均
+
+        Args:
+            tool: 工具名称
+            duration: 本次调用耗时（秒）
+        """
+        with self._lock:
+            previous = self.tool_latency.get(tool)
+            if previous is None:
+                self.tool_latency[tool] = duration
+            else:
+                self.tool_latency[tool] = previous + LATENCY_EWMA_ALPHA * (duration - previous)
+
+    def get_tool_latency(self, tool: str) -> Optional[float]:
+        """
+        获取工具耗时的滑动平均
+
+        Args:
+            tool: 工具名称
+
+        Returns:
+            滑动平均耗时（秒）；还没有成功调用时返回None
+        """
+        with self._lock:
+            return self.tool_latency.get(tool)
+
+    def get_tool_latencies(self) -> Dict[str, float]:
+        """
+        获取所有工具耗时滑动平均的快照
+
+        Returns:
+            工具名称到滑动平均耗时（秒）的字典副本
+        """
+        with self._lock:
+            return dict(self.tool_latency)
+
+    def record_memory(self, tool: str, peak_bytes: int, retained_bytes: int, net_blocks: int):
+        """
+        记录一次抽样的内存统计
+
+        Args:
+            tool: 工具名称
+            peak_bytes: 调用期间追踪到的峰值内存（字节）
+            retained_bytes: 调用结束后仍未释放的内存（字节，可为负）
+            net_blocks: 调用前后已分配内存块数的差值
+        """
+        with self._lock:
+            stats = self.memory_samples.setdefault(
+                tool,
+                {
+                    "samples": 0,
+                    "total_peak_bytes": 0,
+                    "max_peak_bytes": 0,
+                    "total_retained_bytes": 0,
+                    "total_net_blocks": 0,
+                },
+            )
+            stats["samples"] += 1
+            stats["total_peak_bytes"] += peak_bytes
+            stats["max_peak_bytes"] = max(stats["max_peak_bytes"], peak_bytes)
+            stats["total_retained_bytes"] += retained_bytes
+            stats["total_net_blocks"] += net_blocks
+
+    def record_loop_lag(self, lag: float):
+        """
+        记录一次事件循环调度延迟采样
+
+        Args:
+            lag: 实际唤醒时间比预期晚的秒数
+        """
+        with self._lock:
+            self.loop_lag_samples += 1
+            self.total_loop_lag += lag
+            self.max_loop_lag = max(self.max_loop_lag, lag)
+
+    def record_threadpool(self, active: int, queued: int, limit: int):
+        """
+        记录一次线程池占用采样
+
+        Args:
+            active: 正在执行的线程数
+            queued: 排队等待线程的任务数
+            limit: 线程池容量
+        """
+        with self._lock:
+            self.threadpool_active = active
+            self.threadpool_queued = queued
+            self.threadpool_limit = limit
+            self.max_threadpool_queued = max(self.max_threadpool_queued, queued)
+
+    def record_worker_timing(self, queue_wait: float, compute: float):
+        """
+        记录一次线程池任务的排队等待与计算耗时
+
+        Args:
+            queue_wait: 提交到线程池到开始执行的秒数
+            compute: 执行耗时（秒）
+        """
+        with self._lock:
+            self.worker_calls += 1
+            self.total_queue_wait += queue_wait
+            self.max_queue_wait = max(self.max_queue_wait, queue_wait)
+            self.total_compute_time += compute
+            self.max_compute_time = max(self.max_compute_time, compute)
+            if self.recent_compute_time is None:
+                self.recent_compute_time = compute
+            else:
+                self.recent_compute_time += LATENCY_EWMA_ALPHA * (
+                    compute - self.recent_compute_time
+                )
+
+    def get_recent_compute_time(self) -> Optional[float]:
+        """
+        获取线程池任务计算耗时的滑动平均
+
+        Returns:
+            滑动平均耗时（秒）；还没有任务时返回None
+        """
+        with self._lock:
+            return self.recent_compute_time
+
+    def _runtime_summary(self) -> Dict[str, Dict[str, float]]:
+        lag_samples = self.loop_lag_samples
+        calls = self.worker_calls
+        return {
+            "event_loop": {
+                "samples": lag_samples,
+                "avg_lag_ms": (
+                    round(self.total_loop_lag / lag_samples * 1000, 3) if lag_samples else 0.0
+                ),
+                "max_lag_ms": round(self.max_loop_lag * 1000, 3),
+            },
+            "threadpool": {
+                "active": self.threadpool_active,
+                "queued": self.threadpool_queued,
+                "limit": self.threadpool_limit,
+                "max_queued": self.max_threadpool_queued,
+                "calls": calls,
+                "avg_queue_wait_ms": (
+                    round(self.total_queue_wait / calls * 1000, 3) if calls else 0.0
+                ),
+                "max_queue_wait_ms": round(self.max_queue_wait * 1000, 3),
+                "avg_compute_ms": (
+                    round(self.total_compute_time / calls * 1000, 3) if calls else 0.0
+                ),
+                "max_compute_ms": round(self.max_compute_time * 1000, 3),
+                "recent_compute_ms": round((self.recent_compute_time or 0.0) * 1000, 3),
+            },
+        }
+
+    def _memory_summary(self) -> Dict[str, Dict[str, int]]:
+        summary = {}
+        for tool, stats in self.memory_samples.items():
+            samples = stats["samples"]
+            summary[tool] = {
+                "samples": samples,
+                "avg_peak_bytes": stats["total_peak_bytes"] // samples,
+                "max_peak_bytes": stats["max_peak_bytes"],
+                "avg_retained_bytes": stats["total_retained_bytes"] // samples,
+                "avg_net_blocks": stats["total_net_blocks"] // samples,
+            }
+        return summary
+
     def get_summary(self) -> Dict:
         """
         获取指标摘要
@@ -118,6 +310,11 @@ class Metrics:
                 "system_calls": dict(self.system_calls),
                 "method_calls": dict(self.method_calls),
                 "error_counts": dict(self.error_counts),
+                "tool_latency_ms": {
+                    tool: round(latency * 1000, 3) for tool, latency in self.tool_latency.items()
+                },
+                "memory": self._memory_summary(),
+                **self._runtime_summary(),
             }
 
     def get_top_methods(self, limit: int = 10) -> List[tuple]:
@@ -161,6 +358,21 @@ class Metrics:
             self.system_calls.clear()
             self.method_calls.clear()
             self.error_counts.clear()
+            self.tool_latency.clear()
+            self.memory_samples.clear()
+            self.loop_lag_samples = 0
+            self.total_loop_lag = 0.0
+            self.max_loop_lag = 0.0
+            self.threadpool_active = 0
+            self.threadpool_queued = 0
+            self.threadpool_limit = 0
+            self.max_threadpool_queued = 0
+            self.worker_calls = 0
+            self.total_queue_wait = 0.0
+            self.max_queue_wait = 0.0
+            self.total_compute_time = 0.0
+            self.max_compute_time = 0.0
+            self.recent_compute_time = None
             self.start_time = datetime.now()
 
 
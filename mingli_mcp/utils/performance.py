@@ -5,7 +5,11 @@
 import functools
 import logging
 import time
-from typing import Any, Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from mingli_mcp.utils.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
@@ -71,3 +75,58 @@ class PerformanceTimer:
         else:
             logger.error(f"{self.operation_name} 失败，耗时: {self.elapsed:.3f}s，错误: {exc_val}")
         return False
+
+
+# 当前请求的分阶段耗时表。用ContextVar而不是线程局部变量：HTTP模式下
+# 请求在线程池中执行，run_in_threadpool会复制调用方的上下文
+_current_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "mingli_stage_timings", default=None
+)
+
+
+@contextmanager
+def track_stages() -> Iterator[Dict[str, float]]:
+    """
+    为一次请求开启分阶段计时
+
+    用法:
+        with track_stages() as stages:
+            handler(arguments)
+        # stages == {"validate": 0.0001, "engine": 0.012, ...}
+
+    Yields:
+        阶段名 -> 累计耗时（秒）的字典，块内的 stage() 调用会写入其中
+    """
+    stages: Dict[str, float] = {}
+    token = _current_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _current_stages.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    记录一个阶段的耗时
+
+    只有外层存在 track_stages() 或开启了链路追踪时才计时，否则几乎零开销；
+    同名阶段多次出现时耗时累加（如运势查询内部会再排一次盘）。
+    开启链路追踪时每个阶段同时是一个 span（mingli.<name>）。
+
+    Args:
+        name: 阶段名称（如 validate、solar_time、engine、format、render）
+    """
+    stages = _current_stages.get()
+    tracer = get_tracer()
+    if stages is None and not tracer.enabled:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        with tracer.start_span(f"mingli.{name}"):
+            yield
+    finally:
+        if stages is not None:
+            stages[name] = stages.get(name, 0.0) + time.perf_counter() - started
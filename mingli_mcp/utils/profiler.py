@@ -0,0 +1,159 @@
+"""
+按需采样分析器
+
+在限定时间窗口内定时采集所有线程的调用栈（sys._current_frames），
+输出可直接喂给 flamegraph.pl / speedscope 的折叠栈文本，
+以及 iztro-py、lunar_python 和本项目格式化器中累计耗时最高的函数。
+
+选择采样而不是 cProfile：cProfile 只跟踪启用它的那个线程，
+而排盘计算跑在 HTTP 线程池的工作线程里。
+不在采样窗口内时没有任何钩子或线程，常驻代码里零开销。
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+# 汇总累计耗时时关注的代码范围：分组名 -> 模块名前缀
+FOCUS_GROUPS: Dict[str, Tuple[str, ...]] = {
+    "iztro_py": ("iztro_py",),
+    "lunar_python": ("lunar_python",),
+    "formatters": (
+        "mingli_mcp.systems.ziwei.formatter",
+        "mingli_mcp.systems.bazi.formatter",
+        "mingli_mcp.utils.formatters",
+    ),
+}
+
+# 折叠栈默认只保留经过这些模块的栈：空闲的事件循环/线程池线程
+# 一直停在 select/wait 上，全部保留会把火焰图淹没
+WORK_MODULE_PREFIXES = ("mingli_mcp", "iztro_py", "lunar_python")
+
+
+def _frame_label(frame: FrameType) -> Tuple[str, str]:
+    """返回 (模块名, "模块名:限定函数名")"""
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    # co_qualname 自 Python 3.11 起可用，更早的版本退回 co_name
+    name = getattr(code, "co_qualname", code.co_name)
+    return module, f"{module}:{name}"
+
+
+class SamplingProfiler:
+    """
+    采样分析器
+
+    同一时刻只允许一个采样窗口，避免两个采样线程互相干扰、放大开销。
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128):
+        """
+        初始化采样分析器
+
+        Args:
+            interval: 采样间隔（秒）
+            max_depth: 单个调用栈保留的最大深度（从叶子往上数）
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self._busy = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        """是否正在采样"""
+        return self._busy.locked()
+
+    def profile(self, seconds: float, all_threads: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        采样指定时长
+
+        Args:
+            seconds: 采样时长（秒）
+            all_threads: 为True时保留所有线程的栈（包括空闲线程）
+
+        Returns:
+            采样结果；已有采样在进行时返回None
+        """
+        if not self._busy.acquire(blocking=False):
+            return None
+        try:
+            return self._run(seconds, all_threads)
+        finally:
+            self._busy.release()
+
+    def _run(self, seconds: float, all_threads: bool) -> Dict[str, Any]:
+        own_thread = threading.get_ident()
+        stacks: Counter = Counter()
+        inclusive: Counter = Counter()
+        samples = 0
+        ticks = 0
+
+        started = time.monotonic()
+        deadline = started + seconds
+        while time.monotonic() < deadline:
+            ticks += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = self._walk(frame)
+                if not all_threads and not any(
+                    module.startswith(WORK_MODULE_PREFIXES) for module, _ in stack
+                ):
+                    continue
+                labels = [label for _, label in reversed(stack)]
+                stacks[";".join(labels)] += 1
+                # 递归函数在同一个栈里出现多次，只计一次累计样本
+                for label in set(labels):
+                    inclusive[label] += 1
+                samples += 1
+            time.sleep(self.interval)
+
+        # 实际采样周期 = 墙钟时间 / 采样轮数（比配置的interval多出采栈本身的开销）
+        tick_seconds = (time.monotonic() - started) / ticks if ticks else self.interval
+        return {
+            "seconds": seconds,
+            "interval_ms": self.interval * 1000,
+            "samples": samples,
+            "collapsed": self._collapse(stacks),
+            "top_functions": self._top_functions(inclusive, samples, tick_seconds),
+        }
+
+    def _walk(self, frame: Optional[FrameType]) -> List[Tuple[str, str]]:
+        """从叶子往根收集栈帧"""
+        stack: List[Tuple[str, str]] = []
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        return stack
+
+    @staticmethod
+    def _collapse(stacks: Counter) -> str:
+        """折叠栈格式：每行 "根;...;叶 次数"（Brendan Gregg flamegraph 格式）"""
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    @staticmethod
+    def _top_functions(
+        inclusive: Counter, samples: int, tick_seconds: float, limit: int = 15
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """按关注分组列出累计样本最多的函数"""
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        for group, prefixes in FOCUS_GROUPS.items():
+            entries = [
+                (label, count)
+                for label, count in inclusive.items()
+                if label.split(":", 1)[0].startswith(prefixes)
+            ]
+            entries.sort(key=lambda item: item[1], reverse=True)
+            result[group] = [
+                {
+                    "function": label,
+                    "samples": count,
+                    "cumulative_seconds": round(count * tick_seconds, 4),
+                    "percent": round(count / samples * 100, 2) if samples else 0.0,
+                }
+                for label, count in entries[:limit]
+            ]
+        return result
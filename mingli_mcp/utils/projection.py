@@ -0,0 +1,209 @@
+"""
+字段投影（detail / fields 参数）
+
+排盘/运势工具默认返回全部字段，但多数调用只需要其中一部分：只看主星的调用方
+不需要十二宫的杂耀、长生十二神、博士十二神，只看四柱的调用方不需要藏干十神。
+FieldSelection 描述"要哪些字段"，并一路传到系统与格式化器：没被选中的字段
+不仅不输出，连计算/翻译都跳过。
+
+字段路径用点号分隔，列表透明（"palaces.major_stars" 作用于每个宫位）。
+选中某个路径即选中它下面的全部字段。
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+from mingli_mcp.core.exceptions import ValidationError
+
+DETAIL_LEVELS = ("brief", "standard", "full")
+
+# 选择树：True 表示整个子树都要，dict 表示只要其中列出的键
+_Tree = Union[bool, Dict[str, Any]]
+
+
+class FieldSelection:
+    """字段选择（不可变，可安全地在线程间共享）"""
+
+    __slots__ = ("_tree",)
+
+    def __init__(self, tree: _Tree = True):
+        self._tree = tree
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str]) -> "FieldSelection":
+        """
+        由字段路径列表构造
+
+        Args:
+            paths: 点号分隔的字段路径，如 ["basic_info", "palaces.major_stars"]
+
+        Returns:
+            FieldSelection
+        """
+        tree: Dict[str, Any] = {}
+        for path in paths:
+            node = tree
+            segments = path.split(".")
+            for segment in segments[:-1]:
+                child = node.get(segment)
+                if child is True:
+                    break
+                if child is None:
+                    child = node[segment] = {}
+                node = child
+            else:
+                node[segments[-1]] = True
+        return cls(tree)
+
+    @property
+    def is_all(self) -> bool:
+        """是否选中全部字段（此时 project 原样返回数据）"""
+        return self._tree is True
+
+    def wants(self, path: str) -> bool:
+        """路径本身或其下的任一字段是否被选中"""
+        node = self._tree
+        for segment in path.split("."):
+            if not isinstance(node, dict):
+                return True
+            if segment not in node:
+                return False
+            node = node[segment]
+        return True
+
+    def child(self, key: str) -> "FieldSelection":
+        """取某个字段下的子选择（未选中时返回空选择）"""
+        if not isinstance(self._tree, dict):
+            return self
+        return FieldSelection(self._tree.get(key, {}))
+
+    def project(self, data: Any) -> Any:
+        """按选择裁剪数据（字典按键过滤，列表逐项裁剪，标量原样返回）"""
+        return _project(data, self._tree)
+
+    def to_paths(self) -> List[str]:
+        """展开为字段路径列表（全选时为空列表）"""
+        paths: List[str] = []
+        _collect_paths(self._tree, "", paths)
+        return paths
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, FieldSelection) and self._tree == other._tree
+
+    def __hash__(self) -> int:
+        return hash(tuple(self.to_paths()))
+
+    def __repr__(self) -> str:
+        return "FieldSelection(all)" if self.is_all else f"FieldSelection({self.to_paths()})"
+
+
+ALL_FIELDS = FieldSelection()
+
+
+def _project(data: Any, tree: _Tree) -> Any:
+    if not isinstance(tree, dict):
+        return data
+    if isinstance(data, dict):
+        return {key: _project(value, tree[key]) for key, value in data.items() if key in tree}
+    if isinstance(data, list):
+        return [_project(item, tree) for item in data]
+    if isinstance(data, Mapping):
+        # 只读记录（如紫微星曜记录）投影后是普通字典
+        return {key: _project(data[key], tree[key]) for key in data if key in tree}
+    return data
+
+
+def _collect_paths(tree: _Tree, prefix: str, paths: List[str]) -> None:
+    if not isinstance(tree, dict):
+        if prefix:
+            paths.append(prefix)
+        return
+    for key in sorted(tree):
+        _collect_paths(tree[key], f"{prefix}.{key}" if prefix else key, paths)
+
+
+def _schema_child(schema: Mapping[str, Any], segment: str) -> Optional[Mapping[str, Any]]:
+    """在 JSON Schema 中下钻一层；返回 None 表示该字段不存在"""
+    if schema.get("type") == "array":
+        schema = schema.get("items", {})
+    properties = schema.get("properties")
+    if properties is not None and segment in properties:
+        child: Mapping[str, Any] = properties[segment]
+        return child
+    additional = schema.get("additionalProperties")
+    if isinstance(additional, dict):
+        return additional
+    if properties is None and additional is None and schema.get("type") == "object":
+        # 未描述内部结构的对象（如 metadata），任意子路径都放行
+        return {}
+    return None
+
+
+def _validate_path(path: Any, schema: Mapping[str, Any]) -> None:
+    if not isinstance(path, str) or not path or any(not s for s in path.split(".")):
+        raise ValidationError(
+            f"无效的字段路径: {path!r}（应为点号分隔的字段名，如 palaces.major_stars）"
+        )
+    node: Optional[Mapping[str, Any]] = schema
+    for segment in path.split("."):
+        node = _schema_child(node, segment) if node is not None else None
+        if node is None:
+            available = ", ".join(schema.get("properties", {}))
+            raise ValidationError(f"未知字段: {path}. 可选顶层字段: {available}")
+        if not node:
+            return
+
+
+def _add_required(tree: _Tree, schema: Mapping[str, Any]) -> None:
+    """把 schema 中 required 的字段补进部分选择（结果仍满足 outputSchema，Markdown 也有标题可用）"""
+    if not isinstance(tree, dict):
+        return
+    if schema.get("type") == "array":
+        schema = schema.get("items", {})
+    for key in schema.get("required", ()):
+        tree.setdefault(key, True)
+    properties = schema.get("properties", {})
+    for key, child in tree.items():
+        if key in properties:
+            _add_required(child, properties[key])
+
+
+def resolve_selection(
+    detail: Optional[str],
+    fields: Optional[Sequence[str]],
+    presets: Mapping[str, Optional[Sequence[str]]],
+    schema: Mapping[str, Any],
+) -> FieldSelection:
+    """
+    由 detail / fields 参数得到字段选择
+
+    Args:
+        detail: 详略级别 brief / standard / full；未给出时，有 fields 则只取 fields，否则 full
+        fields: 显式字段路径；与 detail 同时给出时取并集
+        presets: 各详略级别对应的字段路径，None 表示全部字段
+        schema: 工具的 outputSchema，用于校验字段路径并补齐必需字段
+
+    Returns:
+        FieldSelection
+
+    Raises:
+        ValidationError: detail 不合法或字段路径不存在
+    """
+    if detail is not None and detail not in DETAIL_LEVELS:
+        raise ValidationError(f"无效的详略级别: {detail}. 可选: {', '.join(DETAIL_LEVELS)}")
+    if fields is not None and not isinstance(fields, (list, tuple)):
+        raise ValidationError("fields 必须是字段路径数组")
+
+    paths: List[str] = []
+    if fields:
+        for path in fields:
+            _validate_path(path, schema)
+        paths.extend(fields)
+    if detail is not None or not fields:
+        preset = presets.get(detail or "full")
+        if preset is None:
+            return ALL_FIELDS
+        paths.extend(preset)
+
+    selection = FieldSelection.from_paths(paths)
+    _add_required(selection._tree, schema)
+    return selection
@@ -0,0 +1,168 @@
+"""
+按计算量计费的配额
+
+限流只数请求：ping 与一次带真太阳时校正的运势排盘各算一次。配额按计算量计：
+- tools/call 的成本由 Metrics 中该工具成功调用耗时的滑动平均折算，每 unit_ms 毫秒计
+  1 单位，至少 1；还没有耗时数据的工具按 1 计
+- initialize、tools/list、ping 等发现类方法不计费
+- 计费主体是 Bearer 凭证（只保存其哈希）或客户端IP，由调用方决定
+
+底层是带成本的 GCRA：每个主体在 window 内最多消耗 budget 单位，之后按
+budget / window 的速率匀速恢复。
+"""
+
+import hashlib
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from mingli_mcp.config import config
+from mingli_mcp.utils.metrics import Metrics, get_metrics
+from mingli_mcp.utils.rate_limiter import ShardedRateLimiter
+
+
+@dataclass(frozen=True)
+class QuotaDecision:
+    """一次计费的结果"""
+
+    allowed: bool
+    cost: int
+    remaining: int
+    limit: int
+    # 被拒绝时，额度恢复到足够支付本次成本所需的秒数
+    retry_after: Optional[int] = None
+
+    def headers(self) -> Dict[str, str]:
+        """响应头（X-Quota-*，被拒绝时另含 Retry-After）"""
+        headers = {
+            "X-Quota-Limit": str(self.limit),
+            "X-Quota-Remaining": str(self.remaining),
+            "X-Quota-Cost": str(self.cost),
+        }
+        if self.retry_after is not None:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class CostQuota:
+    """按工具计算量计费的配额"""
+
+    def __init__(
+        self,
+        budget: Optional[int] = None,
+        window_seconds: Optional[int] = None,
+        unit_ms: Optional[float] = None,
+        metrics: Optional[Metrics] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化配额
+
+        Args:
+            budget: 每个主体在窗口内可消耗的单位数，默认读取配置 QUOTA_BUDGET
+            window_seconds: 窗口（秒），默认读取配置 QUOTA_WINDOW
+            unit_ms: 1 单位对应的平均耗时（毫秒），默认读取配置 QUOTA_UNIT_MS
+            metrics: 提供工具耗时的指标收集器，默认全局实例
+            clock: 单调时钟（测试可注入）
+        """
+        self.budget = max(1, budget if budget is not None else config.QUOTA_BUDGET)
+        self.window_seconds = window_seconds if window_seconds is not None else config.QUOTA_WINDOW
+        self.unit_ms = unit_ms if unit_ms is not None else config.QUOTA_UNIT_MS
+        self.metrics = metrics or get_metrics()
+        self.limiter = ShardedRateLimiter(
+            max_requests=self.budget, window_seconds=self.window_seconds, clock=clock
+        )
+
+    @staticmethod
+    def identity(bearer_token: Optional[str], client_id: str) -> str:
+        """
+        计费主体标识
+
+        Args:
+            bearer_token: 可信的 Bearer 凭证（没有或不可信时传None）
+            client_id: 客户端IP
+
+        Returns:
+            key:<凭证哈希前16位> 或 ip:<客户端IP>；凭证明文不进入限流表与统计
+        """
+        if bearer_token:
+            digest = hashlib.sha256(bearer_token.encode("utf-8")).hexdigest()[:16]
+            return f"key:{digest}"
+        return f"ip:{client_id}"
+
+    def tool_cost(self, tool: str) -> int:
+        """
+        工具的单次成本
+
+        Args:
+            tool: 工具名称
+
+        Returns:
+            成本单位数（1 ~ budget）
+        """
+        return self._latency_cost(self.metrics.get_tool_latency(tool))
+
+    def _latency_cost(self, latency: Optional[float]) -> int:
+        if latency is None:
+            return 1
+        return min(self.budget, max(1, math.ceil(latency * 1000 / self.unit_ms)))
+
+    def message_cost(self, message: Any) -> int:
+        """
+        一条 JSON-RPC 消息（或批量消息）的成本
+
+        Args:
+            message: 已解析的请求体
+
+        Returns:
+            成本单位数；只有 tools/call 计费
+        """
+        if isinstance(message, list):
+            return sum(self.message_cost(item) for item in message)
+        if not isinstance(message, dict) or message.get("method") != "tools/call":
+            return 0
+        params = message.get("params")
+        name = params.get("name") if isinstance(params, dict) else None
+        return self.tool_cost(name) if isinstance(name, str) else 1
+
+    def charge(self, identity: str, cost: int) -> QuotaDecision:
+        """
+        从主体的额度中扣除成本
+
+        Args:
+            identity: 计费主体（见 identity()）
+            cost: 成本单位数（超过 budget 时按 budget 计，避免永远无法放行）
+
+        Returns:
+            计费结果；被拒绝时不扣额度
+        """
+        cost = min(cost, self.budget)
+        allowed = self.limiter.is_allowed(identity, cost)
+        remaining = self.limiter.get_remaining(identity)
+        retry_after = None
+        if not allowed:
+            # 剩余额度向下取整，按差额估算的等待时间只会偏长不会偏短
+            missing = cost - remaining
+            retry_after = max(1, math.ceil(missing * self.limiter.emission_interval))
+        return QuotaDecision(allowed, cost, remaining, self.budget, retry_after)
+
+    def get_stats(self) -> Dict:
+        """
+        获取配额统计信息
+
+        Returns:
+            统计信息字典
+        """
+        stats = self.limiter.get_stats()
+        return {
+            "budget": self.budget,
+            "window_seconds": self.window_seconds,
+            "unit_ms": self.unit_ms,
+            "identities": stats["total_clients"],
+            "exhausted_identities": stats["limited_clients"],
+            "tool_costs": {
+                tool: self._latency_cost(latency)
+                for tool, latency in self.metrics.get_tool_latencies().items()
+            },
+        }
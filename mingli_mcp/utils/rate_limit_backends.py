@@ -0,0 +1,311 @@
+"""
+限流状态存储后端
+
+每个 uvicorn worker / 容器副本各自在内存里限流时，实际限额是配置值的 N 倍。
+把 GCRA 状态（每个客户端一个理论到达时间 TAT）放到共享存储里，
+所有副本对同一客户端的判定就是同一个计数。
+
+- memory: 进程内（默认，等价于 gcra 限流器，主要用于测试与对照）
+- sqlite: SQLite WAL 模式文件，适合同机多 worker 或挂载了共享卷的副本
+- redis:  Redis 及兼容实现（Valkey、KeyDB、Dragonfly 等），判定在 Lua 脚本里原子完成
+
+共享后端跨进程比较时间，只能用墙钟（time.time），不能用各进程独立的单调时钟。
+后端出错（SQLite 等锁超时、Redis 连接失败等）时异常原样抛出，
+由 SharedRateLimiter 按放行处理（fail-open）。
+"""
+
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Iterator, Optional, Tuple
+
+# 浮点累加误差容差：100 * 0.6 可能得到 60.00000000000001
+EPSILON = 1e-9
+
+
+class RateLimitBackend(ABC):
+    """限流状态存储后端接口"""
+
+    @abstractmethod
+    def acquire(self, key: str, now: float, emission_interval: float, window: float) -> bool:
+        """
+        原子地执行一次 GCRA 判定：允许则把 TAT 前进一个发射间隔
+
+        Args:
+            key: 客户端标识
+            now: 当前墙钟时间（秒）
+            emission_interval: 发射间隔 T = window / max_requests
+            window: 时间窗口（秒）
+
+        Returns:
+            是否允许
+        """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[float]:
+        """
+        读取客户端的 TAT
+
+        Args:
+            key: 客户端标识
+
+        Returns:
+            TAT；不存在时返回None
+        """
+
+    @abstractmethod
+    def reset(self, key: Optional[str] = None) -> None:
+        """
+        删除客户端状态
+
+        Args:
+            key: 客户端标识，None表示全部删除
+        """
+
+    @abstractmethod
+    def items(self) -> Iterator[Tuple[str, float]]:
+        """遍历所有 (客户端, TAT)（仅用于统计）"""
+
+
+class MemoryBackend(RateLimitBackend):
+    """进程内后端"""
+
+    # 每次判定顺带删除的额度已恢复客户端个数上限
+    CLEANUP_BATCH = 4
+
+    def __init__(self) -> None:
+        # 按最后放行时间排序，额度最早恢复的在队首
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, now: float, emission_interval: float, window: float) -> bool:
+        with self._lock:
+            for _ in range(self.CLEANUP_BATCH):
+                oldest = next(iter(self._tats), None)
+                if oldest is None or self._tats[oldest] > now:
+                    break
+                del self._tats[oldest]
+
+            new_tat = max(self._tats.get(key, now), now) + emission_interval
+            if new_tat - now > window + EPSILON:
+                return False
+            self._tats[key] = new_tat
+            self._tats.move_to_end(key)
+            return True
+
+    def get(self, key: str) -> Optional[float]:
+        with self._lock:
+            return self._tats.get(key)
+
+    def reset(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._tats.clear()
+            else:
+                self._tats.pop(key, None)
+
+    def items(self) -> Iterator[Tuple[str, float]]:
+        with self._lock:
+            snapshot = list(self._tats.items())
+        return iter(snapshot)
+
+
+class SqliteBackend(RateLimitBackend):
+    """
+    SQLite 后端
+
+    WAL 模式下读不阻塞写；判定用 BEGIN IMMEDIATE 事务，先拿写锁再读-改-写，
+    多个进程对同一客户端的并发判定被串行化，不会超发。
+    每个线程（以及 fork 出的每个子进程）各用一个连接。
+    """
+
+    # 每多少次判定顺带清理一批额度已恢复的客户端
+    CLEANUP_EVERY = 256
+    CLEANUP_BATCH = 128
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        """
+        初始化 SQLite 后端
+
+        Args:
+            path: 数据库文件路径（多个进程需指向同一文件）
+            timeout: 等待写锁的超时（秒）
+        """
+        if not path:
+            raise ValueError(
+                "SQLite rate limit backend requires RATE_LIMIT_BACKEND_URL (file path)"
+            )
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS rate_limits_tat ON rate_limits (tat)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # fork 之后子进程不能复用父进程的连接，按 pid 区分
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def acquire(self, key: str, now: float, emission_interval: float, window: float) -> bool:
+        conn = self._connection()
+        try:
+            # 等写锁超时（database is locked）也在这里抛出，与读写失败一样交给调用方处理
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tat = max(row[0], now) if row else now
+            new_tat = tat + emission_interval
+            allowed = new_tat - now <= window + EPSILON
+            if allowed:
+                conn.execute(
+                    "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                    (key, new_tat),
+                )
+            # 清理计数按线程（连接）各自累计，不需要跨线程同步
+            acquires = getattr(self._local, "acquires", 0) + 1
+            self._local.acquires = acquires
+            if acquires % self.CLEANUP_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM rate_limits WHERE key IN "
+                    "(SELECT key FROM rate_limits WHERE tat <= ? LIMIT ?)",
+                    (now, self.CLEANUP_BATCH),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return allowed
+
+    def get(self, key: str) -> Optional[float]:
+        row = (
+            self._connection()
+            .execute("SELECT tat FROM rate_limits WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return float(row[0]) if row else None
+
+    def reset(self, key: Optional[str] = None) -> None:
+        conn = self._connection()
+        if key is None:
+            conn.execute("DELETE FROM rate_limits")
+        else:
+            conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def items(self) -> Iterator[Tuple[str, float]]:
+        rows = self._connection().execute("SELECT key, tat FROM rate_limits").fetchall()
+        return iter([(str(key), float(tat)) for key, tat in rows])
+
+
+# KEYS[1]=客户端键；ARGV: now, emission_interval, window
+# 允许时写入新的 TAT，并让键在额度完全恢复时自动过期
+_REDIS_GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local emission_interval = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then
+    tat = now
+end
+local new_tat = tat + emission_interval
+if new_tat - now > limit then
+    return 0
+end
+redis.call('SET', KEYS[1], string.format('%.6f', new_tat),
+           'PX', math.ceil((new_tat - now) * 1000))
+return 1
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    Redis 后端（需要安装 redis 包：pip install mingli-mcp[redis]）
+
+    只用到 GET / SET PX / DEL / SCAN / EVALSHA，Redis 兼容实现均可使用。
+    """
+
+    KEY_PREFIX = "mingli:ratelimit:"
+
+    def __init__(self, url: str = "redis://localhost:6379/0", client: Any = None):
+        """
+        初始化 Redis 后端
+
+        Args:
+            url: Redis 连接URL
+            client: 已创建的 redis 客户端（测试可注入），提供时忽略url
+        """
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError(
+                    "Redis rate limit backend requires the 'redis' package. "
+                    "Install it with: pip install mingli-mcp[redis]"
+                ) from e
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self._client = client
+        self._script = client.register_script(_REDIS_GCRA_SCRIPT)
+
+    def acquire(self, key: str, now: float, emission_interval: float, window: float) -> bool:
+        result = self._script(
+            keys=[self.KEY_PREFIX + key], args=[now, emission_interval, window + EPSILON]
+        )
+        return int(result) == 1
+
+    def get(self, key: str) -> Optional[float]:
+        value = self._client.get(self.KEY_PREFIX + key)
+        return float(value) if value is not None else None
+
+    def reset(self, key: Optional[str] = None) -> None:
+        if key is not None:
+            self._client.delete(self.KEY_PREFIX + key)
+            return
+        keys = list(self._client.scan_iter(match=self.KEY_PREFIX + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+    def items(self) -> Iterator[Tuple[str, float]]:
+        prefix_length = len(self.KEY_PREFIX)
+        for raw_key in self._client.scan_iter(match=self.KEY_PREFIX + "*"):
+            value = self._client.get(raw_key)
+            if value is None:
+                continue
+            key = raw_key.decode() if isinstance(raw_key, bytes) else str(raw_key)
+            yield key[prefix_length:], float(value)
+
+
+def create_backend(name: str, url: str = "") -> RateLimitBackend:
+    """
+    按名称创建后端
+
+    Args:
+        name: memory / sqlite / redis
+        url: sqlite 为文件路径，redis 为连接URL
+
+    Returns:
+        后端实例
+
+    Raises:
+        ValueError: 未知后端或缺少必要参数
+    """
+    name = name.strip().lower()
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SqliteBackend(url)
+    if name == "redis":
+        return RedisBackend(url)
+    raise ValueError(
+        f"Unknown rate limit backend: {name!r} (expected one of memory, sqlite, redis)"
+    )
@@ -1,14 +1,32 @@
 """
 请求限流器
 
-实现基于滑动窗口的请求限流，防止API滥用
+防止API滥用，提供两种算法（RATE_LIMIT_ALGORITHM）：
+- sliding_window: 滑动窗口，逐条保存窗口内的请求时间戳
+- gcra: 通用信元速率算法（等价于令牌桶），每个客户端只保存一个浮点数
+- sharded: 分片加锁、增量清理的 GCRA，判定耗时与客户端总数无关
+- sketch: 分窗 Count-Min Sketch，内存固定（width × depth），与客户端数无关；
+  计数只会高估，宁可提前限流也不会多放行
+
+RATE_LIMIT_BACKEND 不为 memory 时，状态放在共享后端（SQLite / Redis）里，
+多个 worker / 副本共用同一份计数（SharedRateLimiter）。共享后端不可用时放行（fail-open）。
 """
 
+import hashlib
+import logging
+import math
+import secrets
 import threading
 import time
-from collections import defaultdict, deque
+from array import array
+from collections import OrderedDict, defaultdict, deque
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple, Type, Union, cast
+
+from mingli_mcp.config import config
+from mingli_mcp.utils.rate_limit_backends import RateLimitBackend, create_backend
+
+logger = logging.getLogger(__name__)
 
 
 class RateLimiter:
@@ -18,6 +36,8 @@ class RateLimiter:
     使用滑动窗口算法限制请求频率
     """
 
+    algorithm = "sliding_window"
+
     def __init__(
         self, max_requests: int = 100, window_seconds: int = 60, cleanup_interval: int = 300
     ):
@@ -42,16 +62,19 @@ class RateLimiter:
         # 请求处理可能在线程池中并发执行，需要加锁保护
         self._lock = threading.Lock()
 
-    def is_allowed(self, client_id: str) -> bool:
+    def is_allowed(self, client_id: str, cost: int = 1) -> bool:
         """
         检查请求是否允许
 
         Args:
             client_id: 客户端标识（如IP地址、用户ID等）
+            cost: 本次请求消耗的额度（默认1；0表示不计数，恒允许）
 
         Returns:
             True表示允许请求，False表示超出限制
         """
+        if cost <= 0:
+            return True
         now = datetime.now()
         cutoff_time = now - self.window
 
@@ -64,11 +87,11 @@ class RateLimiter:
                 self.requests[client_id].popleft()
 
             # 检查是否超出限制
-            if len(self.requests[client_id]) >= self.max_requests:
+            if len(self.requests[client_id]) + cost > self.max_requests:
                 return False
 
-            # 记录本次请求
-            self.requests[client_id].append(now)
+            # 记录本次请求（成本为 n 时记 n 个时间戳）
+            self.requests[client_id].extend([now] * cost)
             return True
 
     def get_remaining(self, client_id: str) -> int:
@@ -181,9 +204,711 @@ class RateLimiter:
                     limited_clients += 1
 
         return {
+            "algorithm": self.algorithm,
             "total_clients": total_clients,
             "total_requests": total_requests,
             "limited_clients": limited_clients,
             "max_requests_per_window": self.max_requests,
             "window_seconds": self.window.total_seconds(),
         }
+
+
+class GcraRateLimiter:
+    """
+    GCRA 限流器
+
+    与滑动窗口版本接口相同，但每个客户端只保存一个"理论到达时间"（TAT）：
+    每放行一个请求 TAT 前进一个发射间隔 T = window / max_requests，
+    TAT 领先当前时间超过 window 即拒绝。允许的突发量与滑动窗口相同（max_requests），
+    之后按 T 匀速恢复额度，而不是到窗口边界一次性恢复。
+
+    使用 time.monotonic()，不受系统时间回拨影响；内存与判定耗时都与请求数无关。
+    """
+
+    algorithm = "gcra"
+
+    # 浮点累加误差容差：100 * 0.6 可能得到 60.00000000000001
+    _EPSILON = 1e-9
+
+    def __init__(
+        self,
+        max_requests: int = 100,
+        window_seconds: int = 60,
+        cleanup_interval: int = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化限流器
+
+        Args:
+            max_requests: 窗口期内最大请求数（即最大突发量）
+            window_seconds: 时间窗口（秒）
+            cleanup_interval: 清理额度已完全恢复的客户端的间隔（秒）
+            clock: 单调时钟（测试可注入）
+        """
+        self.max_requests = max_requests
+        self.window_seconds = float(window_seconds)
+        self.emission_interval = self.window_seconds / max_requests
+        self.cleanup_interval = cleanup_interval
+        self._clock = clock
+
+        # 客户端 -> 理论到达时间（单调时钟）
+        self.tats: Dict[str, float] = {}
+        self.last_cleanup = clock()
+        self._lock = threading.Lock()
+
+    def _shard(self, client_id: str) -> Tuple[threading.Lock, Dict[str, float]]:
+        """客户端状态所在的 (锁, TAT表)"""
+        return self._lock, self.tats
+
+    def _all_shards(self) -> List[Tuple[threading.Lock, Dict[str, float]]]:
+        return [(self._lock, self.tats)]
+
+    def is_allowed(self, client_id: str, cost: int = 1) -> bool:
+        """
+        检查请求是否允许
+
+        Args:
+            client_id: 客户端标识（如IP地址、用户ID等）
+            cost: 本次请求消耗的额度（默认1；0表示不计数，恒允许）
+
+        Returns:
+            True表示允许请求，False表示超出限制
+        """
+        if cost <= 0:
+            return True
+        now = self._clock()
+        lock, tats = self._shard(client_id)
+        with lock:
+            self._cleanup(tats, now)
+
+            new_tat = max(tats.get(client_id, now), now) + self.emission_interval * cost
+            if new_tat - now > self.window_seconds + self._EPSILON:
+                return False
+            self._store(tats, client_id, new_tat)
+            return True
+
+    def get_remaining(self, client_id: str) -> int:
+        """
+        获取剩余可用请求数
+
+        Args:
+            client_id: 客户端标识
+
+        Returns:
+            剩余可用请求数
+        """
+        now = self._clock()
+        lock, tats = self._shard(client_id)
+        with lock:
+            tat = tats.get(client_id)
+        return self._remaining(tat, now)
+
+    def get_reset_time(self, client_id: str) -> Optional[datetime]:
+        """
+        获取限流重置时间
+
+        Args:
+            client_id: 客户端标识
+
+        Returns:
+            下一个请求可被放行的时间；额度已完全恢复时返回None
+        """
+        now = self._clock()
+        lock, tats = self._shard(client_id)
+        with lock:
+            tat = tats.get(client_id)
+        return self._reset_time(tat, now)
+
+    def _reset_time(self, tat: Optional[float], now: float) -> Optional[datetime]:
+        if tat is None or tat <= now:
+            return None
+        next_allowed = max(tat + self.emission_interval - self.window_seconds, now)
+        return datetime.now() + timedelta(seconds=next_allowed - now)
+
+    def _store(self, tats: Dict[str, float], client_id: str, tat: float):
+        tats[client_id] = tat
+
+    def _remaining(self, tat: Optional[float], now: float) -> int:
+        if tat is None or tat <= now:
+            return self.max_requests
+        headroom = self.window_seconds - (tat - now)
+        return max(
+            0, min(self.max_requests, math.floor(headroom / self.emission_interval + self._EPSILON))
+        )
+
+    def _cleanup(self, tats: Dict[str, float], now: float):
+        """定期删除额度已完全恢复的客户端（TAT不晚于当前时间与不存在等价）"""
+        if now - self.last_cleanup > self.cleanup_interval:
+            expired = [client_id for client_id, tat in tats.items() if tat <= now]
+            for client_id in expired:
+                del tats[client_id]
+            self.last_cleanup = now
+
+    def reset(self, client_id: Optional[str] = None):
+        """
+        重置限流计数
+
+        Args:
+            client_id: 客户端标识，如果为None则重置所有客户端
+        """
+        if client_id is not None:
+            lock, tats = self._shard(client_id)
+            with lock:
+                tats.pop(client_id, None)
+            return
+        for lock, tats in self._all_shards():
+            with lock:
+                tats.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        获取限流器统计信息
+
+        Returns:
+            统计信息字典（total_requests 为按已用额度折算的窗口内请求数）
+        """
+        now = self._clock()
+        tat_values: List[float] = []
+        for lock, tats in self._all_shards():
+            with lock:
+                tat_values.extend(tats.values())
+        return self._stats(tat_values, now)
+
+    def _stats(self, tat_values: List[float], now: float) -> Dict:
+        total_requests = 0
+        limited_clients = 0
+        for tat in tat_values:
+            remaining = self._remaining(tat, now)
+            total_requests += self.max_requests - remaining
+            if remaining == 0:
+                limited_clients += 1
+
+        return {
+            "algorithm": self.algorithm,
+            "total_clients": len(tat_values),
+            "total_requests": total_requests,
+            "limited_clients": limited_clients,
+            "max_requests_per_window": self.max_requests,
+            "window_seconds": self.window_seconds,
+        }
+
+
+class ShardedRateLimiter(GcraRateLimiter):
+    """
+    分片 GCRA 限流器（高并发HTTP场景）
+
+    GcraRateLimiter 只有一把全局锁，且定期清理要在锁内扫描全部客户端，
+    恰好撞上清理的那个请求要等 O(客户端数) 的时间。本实现：
+    - 按 client_id 的哈希把状态分到 N 个分片，每个分片一把锁，不同客户端很少互相等待
+    - 不做全量扫描：分片内按最后放行时间排序，每次判定顺带从队首删除几个额度已恢复的
+      客户端。清理成本摊到每个请求上，是常数，与客户端总数无关
+    """
+
+    algorithm = "sharded"
+
+    def __init__(
+        self,
+        max_requests: int = 100,
+        window_seconds: int = 60,
+        shards: Optional[int] = None,
+        cleanup_batch: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化限流器
+
+        Args:
+            max_requests: 窗口期内最大请求数（即最大突发量）
+            window_seconds: 时间窗口（秒）
+            shards: 分片数，默认读取配置 RATE_LIMIT_SHARDS
+            cleanup_batch: 每次判定顺带检查的客户端个数
+            clock: 单调时钟（测试可注入）
+        """
+        super().__init__(max_requests=max_requests, window_seconds=window_seconds, clock=clock)
+        shard_count = max(1, shards if shards is not None else config.RATE_LIMIT_SHARDS)
+        self.cleanup_batch = cleanup_batch
+        self._shards: List[Tuple[threading.Lock, Dict[str, float]]] = [
+            (threading.Lock(), OrderedDict()) for _ in range(shard_count)
+        ]
+
+    @property
+    def shard_count(self) -> int:
+        """分片数"""
+        return len(self._shards)
+
+    def _shard(self, client_id: str) -> Tuple[threading.Lock, Dict[str, float]]:
+        return self._shards[hash(client_id) % len(self._shards)]
+
+    def _all_shards(self) -> List[Tuple[threading.Lock, Dict[str, float]]]:
+        return self._shards
+
+    def _store(self, tats: Dict[str, float], client_id: str, tat: float):
+        # 放行的客户端移到队尾，分片内按最后放行时间排序（LRU）
+        tats[client_id] = tat
+        cast("OrderedDict[str, float]", tats).move_to_end(client_id)
+
+    def _cleanup(self, tats: Dict[str, float], now: float):
+        """
+        增量清理：从分片队首（最久未放行的客户端）起删除至多 cleanup_batch 个
+        额度已恢复的客户端，遇到未恢复的即停（调用方持有分片锁）
+
+        TAT 不会超过最后一次放行时间 + window，所以队首最迟在 window 之后就会过期；
+        排在后面的过期客户端最多晚一个 window 被删除，内存仍有上界。
+        """
+        for _ in range(self.cleanup_batch):
+            if not tats:
+                return
+            client_id = next(iter(tats))
+            if tats[client_id] > now:
+                return
+            del tats[client_id]
+
+
+class SharedRateLimiter(GcraRateLimiter):
+    """
+    共享状态 GCRA 限流器
+
+    状态存放在 RateLimitBackend 中（SQLite / Redis 等），多个 worker 进程或副本共用
+    同一份计数，整体限额就是配置值，而不是 worker 数的倍数。
+    跨进程比较时间只能用墙钟，因此默认时钟为 time.time。
+
+    后端出错（等锁超时、连接失败等）时放行请求（fail-open）：限流只用于防滥用，
+    存储故障不应让整个服务不可用。出错次数计入统计（backend_errors），
+    日志每 ERROR_LOG_INTERVAL 秒至多一条，故障期间不会每个请求刷一条。
+    """
+
+    algorithm = "shared"
+
+    # 后端出错日志的最短间隔（秒）
+    ERROR_LOG_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        max_requests: int = 100,
+        window_seconds: int = 60,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        初始化限流器
+
+        Args:
+            backend: 状态存储后端
+            max_requests: 窗口期内最大请求数（即最大突发量）
+            window_seconds: 时间窗口（秒）
+            clock: 墙钟（测试可注入）
+        """
+        super().__init__(max_requests=max_requests, window_seconds=window_seconds, clock=clock)
+        self.backend = backend
+        self.backend_errors = 0
+        self._last_error_log = -math.inf
+        self._errors_lock = threading.Lock()
+
+    def _backend_failed(self, operation: str, error: Exception) -> None:
+        """记录一次后端错误（按间隔打日志）"""
+        now = time.monotonic()
+        with self._errors_lock:
+            self.backend_errors += 1
+            errors = self.backend_errors
+            if now - self._last_error_log < self.ERROR_LOG_INTERVAL:
+                return
+            self._last_error_log = now
+        logger.warning(
+            f"Rate limit backend {type(self.backend).__name__} failed on {operation} "
+            f"({errors} errors so far), allowing requests: {error!r}"
+        )
+
+    def is_allowed(self, client_id: str, cost: int = 1) -> bool:
+        """
+        检查请求是否允许（在后端中原子地判定并计数）
+
+        Args:
+            client_id: 客户端标识（如IP地址、用户ID等）
+            cost: 本次请求消耗的额度（默认1；0表示不计数，恒允许）
+
+        Returns:
+            True表示允许请求，False表示超出限制；后端出错时为True
+        """
+        if cost <= 0:
+            return True
+        try:
+            return self.backend.acquire(
+                client_id, self._clock(), self.emission_interval * cost, self.window_seconds
+            )
+        except Exception as e:
+            self._backend_failed("acquire", e)
+            return True
+
+    def _get_tat(self, client_id: str) -> Optional[float]:
+        """读取 TAT；后端出错时按无记录处理"""
+        try:
+            return self.backend.get(client_id)
+        except Exception as e:
+            self._backend_failed("get", e)
+            return None
+
+    def get_remaining(self, client_id: str) -> int:
+        """
+        获取剩余可用请求数
+
+        Args:
+            client_id: 客户端标识
+
+        Returns:
+            剩余可用请求数
+        """
+        return self._remaining(self._get_tat(client_id), self._clock())
+
+    def get_reset_time(self, client_id: str) -> Optional[datetime]:
+        """
+        获取限流重置时间
+
+        Args:
+            client_id: 客户端标识
+
+        Returns:
+            下一个请求可被放行的时间；额度已完全恢复时返回None
+        """
+        return self._reset_time(self._get_tat(client_id), self._clock())
+
+    def reset(self, client_id: Optional[str] = None):
+        """
+        重置限流计数
+
+        Args:
+            client_id: 客户端标识，如果为None则重置所有客户端
+        """
+        self.backend.reset(client_id)
+
+    def get_stats(self) -> Dict:
+        """
+        获取限流器统计信息
+
+        Returns:
+            统计信息字典
+        """
+        now = self._clock()
+        try:
+            tats = [tat for _, tat in self.backend.items() if tat > now]
+        except Exception as e:
+            self._backend_failed("items", e)
+            tats = []
+        stats = self._stats(tats, now)
+        stats["backend"] = type(self.backend).__name__
+        stats["backend_errors"] = self.backend_errors
+        return stats
+
+
+class _SketchWindow:
+    """SketchRateLimiter 的一个固定窗口：计数表、精确总请求数、去重计数寄存器"""
+
+    __slots__ = ("counters", "total", "registers")
+
+    def __init__(self, size: int, registers: int):
+        self.counters = array("I", bytes(4 * size))
+        self.total = 0
+        # HyperLogLog 寄存器，用于估计窗口内的不同客户端数
+        self.registers = bytearray(registers)
+
+
+class SketchRateLimiter:
+    """
+    Count-Min Sketch 限流器（海量不同客户端场景）
+
+    抓取或攻击时可能有几十万个不同IP，按客户端保存状态的限流器内存随之线性增长。
+    本实现只保存两张 depth × width 的计数表（当前窗口与上一窗口），内存固定：
+    - 客户端ID经带随机密钥的哈希映射到每行的一个计数器，估计值取各行最小值
+    - 采用保守更新（只把各行计数抬到新的最小值），哈希冲突只会让估计偏高
+    - 按滑动窗口计数法插值：估计 = 上一窗口计数 × 剩余重叠比例 + 当前窗口计数
+
+    误差是单向的：冲突的客户端可能被提前限流，但任何客户端都不会超过限额放行
+    （单独重置某个客户端时例外，见 reset）。
+    总请求数为 N 时，每行高估不超过 e·N / width 的概率至少为 1 - e^-depth。
+    哈希密钥每个实例随机生成，攻击者无法构造互相冲突的客户端ID去"陷害"别人。
+    """
+
+    algorithm = "sketch"
+
+    # HyperLogLog 寄存器个数为 2^_HLL_BITS（4KB，标准误差约 1.6%）
+    _HLL_BITS = 12
+
+    def __init__(
+        self,
+        max_requests: int = 100,
+        window_seconds: int = 60,
+        width: Optional[int] = None,
+        depth: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化限流器
+
+        Args:
+            max_requests: 窗口期内最大请求数
+            window_seconds: 时间窗口（秒）
+            width: 每行计数器个数，默认读取配置 RATE_LIMIT_SKETCH_WIDTH
+            depth: 行数（哈希函数个数），默认读取配置 RATE_LIMIT_SKETCH_DEPTH
+            clock: 单调时钟（测试可注入）
+        """
+        self.max_requests = max_requests
+        self.window_seconds = float(window_seconds)
+        self.width = max(1, width if width is not None else config.RATE_LIMIT_SKETCH_WIDTH)
+        self.depth = max(1, depth if depth is not None else config.RATE_LIMIT_SKETCH_DEPTH)
+        self._clock = clock
+        self._key = secrets.token_bytes(16)
+
+        self._current = self._new_window()
+        self._previous = self._new_window()
+        self._window_start = self._align(clock())
+        self._lock = threading.Lock()
+
+    def _new_window(self) -> _SketchWindow:
+        return _SketchWindow(self.width * self.depth, 1 << self._HLL_BITS)
+
+    def _align(self, now: float) -> float:
+        return math.floor(now / self.window_seconds) * self.window_seconds
+
+    def _hash(self, client_id: str) -> Tuple[List[int], int]:
+        """
+        客户端在每行中的计数器下标（双重哈希：h1 + i * h2）与去重计数用的哈希
+
+        Returns:
+            (下标列表, 64位哈希)
+        """
+        digest = hashlib.blake2b(client_id.encode("utf-8"), digest_size=24, key=self._key).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        width = self.width
+        indexes = [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+        return indexes, int.from_bytes(digest[16:], "little")
+
+    def _rotate(self, now: float) -> float:
+        """
+        按需切换窗口（调用方持有锁）
+
+        Returns:
+            上一窗口计数在估计值中的权重
+        """
+        elapsed = now - self._window_start
+        if elapsed >= self.window_seconds:
+            if elapsed >= 2 * self.window_seconds:
+                self._previous = self._new_window()
+            else:
+                self._previous = self._current
+            self._current = self._new_window()
+            self._window_start = self._align(now)
+            elapsed = now - self._window_start
+        return 1.0 - elapsed / self.window_seconds
+
+    def _estimate(self, indexes: List[int], weight: float) -> Tuple[float, int, int]:
+        """
+        估计客户端在滑动窗口内的请求数（调用方持有锁）
+
+        Returns:
+            (估计值, 取得最小值那一行的上一窗口计数, 当前窗口计数)
+        """
+        previous_counters = self._previous.counters
+        current_counters = self._current.counters
+        best = (math.inf, 0, 0)
+        for index in indexes:
+            previous, current = previous_counters[index], current_counters[index]
+            estimate = previous * weight + current
+            if estimate < best[0]:
+                best = (estimate, previous, current)
+        return best
+
+    def is_allowed(self, client_id: str, cost: int = 1) -> bool:
+        """
+        检查请求是否允许
+
+        Args:
+            client_id: 客户端标识（如IP地址、用户ID等）
+            cost: 本次请求消耗的额度（默认1；0表示不计数，恒允许）
+
+        Returns:
+            True表示允许请求，False表示超出限制（可能因哈希冲突提前限流）
+        """
+        if cost <= 0:
+            return True
+        indexes, fingerprint = self._hash(client_id)
+        register = fingerprint >> (64 - self._HLL_BITS)
+        rank = 65 - self._HLL_BITS - (fingerprint & ((1 << (64 - self._HLL_BITS)) - 1)).bit_length()
+
+        with self._lock:
+            weight = self._rotate(self._clock())
+            window = self._current
+            if rank > window.registers[register]:
+                window.registers[register] = rank
+
+            estimate, _, _ = self._estimate(indexes, weight)
+            if estimate + cost > self.max_requests + 1e-9:
+                return False
+
+            # 保守更新：只把低于新最小值的计数器抬上去
+            counters = window.counters
+            target = min(counters[index] for index in indexes) + cost
+            for index in indexes:
+                if counters[index] < target:
+                    counters[index] = target
+            window.total += cost
+            return True
+
+    def get_remaining(self, client_id: str) -> int:
+        """
+        获取剩余可用请求数（估计值，只会偏少）
+
+        Args:
+            client_id: 客户端标识
+
+        Returns:
+            剩余可用请求数
+        """
+        indexes, _ = self._hash(client_id)
+        with self._lock:
+            weight = self._rotate(self._clock())
+            estimate, _, _ = self._estimate(indexes, weight)
+        return max(0, math.floor(self.max_requests - estimate + 1e-9))
+
+    def get_reset_time(self, client_id: str) -> Optional[datetime]:
+        """
+        获取限流重置时间
+
+        Args:
+            client_id: 客户端标识
+
+        Returns:
+            下一个请求可被放行的时间；当前未被限流时返回None
+        """
+        indexes, _ = self._hash(client_id)
+        with self._lock:
+            now = self._clock()
+            weight = self._rotate(now)
+            estimate, previous, current = self._estimate(indexes, weight)
+            elapsed = now - self._window_start
+
+        allowance = self.max_requests - 1
+        if estimate <= allowance + 1e-9:
+            return None
+        window = self.window_seconds
+        if current <= allowance:
+            # 上一窗口的权重衰减到 (allowance - current) / previous 即可放行
+            delay = (1 - (allowance - current) / previous) * window - elapsed
+        else:
+            # 当前窗口已满：等它轮转成上一窗口后再衰减
+            delay = (window - elapsed) + (1 - allowance / current) * window
+        return datetime.now() + timedelta(seconds=max(0.0, delay))
+
+    def reset(self, client_id: Optional[str] = None):
+        """
+        重置限流计数
+
+        计数器由多个客户端共享，单个客户端无法精确重置：在两个窗口中把它的各个计数器
+        都减去它在该窗口的计数估计（各行最小值，不低于它的真实计数），它的估计值归零。
+        与它哈希冲突的客户端在这几个计数器上可能因此少计，少计的量不超过被重置客户端的
+        估计值；其他客户端不受影响。
+
+        Args:
+            client_id: 客户端标识，如果为None则重置所有客户端
+        """
+        if client_id is None:
+            with self._lock:
+                self._current = self._new_window()
+                self._previous = self._new_window()
+            return
+
+        indexes, _ = self._hash(client_id)
+        with self._lock:
+            self._rotate(self._clock())
+            for window in (self._previous, self._current):
+                counters = window.counters
+                count = min(counters[index] for index in indexes)
+                for index in indexes:
+                    counters[index] -= count
+
+    def _count_distinct(self, registers: List[int]) -> int:
+        """HyperLogLog 基数估计（小基数时改用线性计数）"""
+        m = len(registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0**-value for value in registers)
+        zeros = registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+    def get_stats(self) -> Dict:
+        """
+        获取限流器统计信息
+
+        Returns:
+            统计信息字典（total_clients 为近两个窗口内不同客户端数的估计值；
+            不统计被限流客户端数）
+        """
+        with self._lock:
+            weight = self._rotate(self._clock())
+            current, previous = self._current, self._previous
+            registers = [max(a, b) for a, b in zip(current.registers, previous.registers)]
+            total_requests = round(previous.total * weight + current.total)
+
+        return {
+            "algorithm": self.algorithm,
+            "total_clients": self._count_distinct(registers),
+            "total_requests": total_requests,
+            "max_requests_per_window": self.max_requests,
+            "window_seconds": self.window_seconds,
+            "sketch_width": self.width,
+            "sketch_depth": self.depth,
+            "memory_bytes": 2 * (4 * self.width * self.depth + (1 << self._HLL_BITS)),
+        }
+
+
+AnyRateLimiter = Union[
+    RateLimiter, GcraRateLimiter, ShardedRateLimiter, SharedRateLimiter, SketchRateLimiter
+]
+
+# 算法名 -> 限流器类
+RATE_LIMIT_ALGORITHMS: Dict[str, Type[AnyRateLimiter]] = {
+    "sliding_window": RateLimiter,
+    "gcra": GcraRateLimiter,
+    "sharded": ShardedRateLimiter,
+    "sketch": SketchRateLimiter,
+}
+
+
+def create_rate_limiter(
+    algorithm: str = "sliding_window",
+    max_requests: int = 100,
+    window_seconds: int = 60,
+    backend: str = "memory",
+    backend_url: str = "",
+) -> AnyRateLimiter:
+    """
+    按算法名与存储后端创建限流器
+
+    Args:
+        algorithm: 算法名（见 RATE_LIMIT_ALGORITHMS），仅对 memory 后端生效
+        max_requests: 窗口期内最大请求数
+        window_seconds: 时间窗口（秒）
+        backend: 存储后端（memory / sqlite / redis）；非 memory 时固定使用共享状态的 GCRA
+        backend_url: 后端地址（sqlite 为文件路径，redis 为连接URL）
+
+    Returns:
+        限流器实例
+
+    Raises:
+        ValueError: 未知算法或后端
+    """
+    backend = backend.strip().lower()
+    if backend != "memory":
+        return SharedRateLimiter(
+            create_backend(backend, backend_url),
+            max_requests=max_requests,
+            window_seconds=window_seconds,
+        )
+
+    limiter_class = RATE_LIMIT_ALGORITHMS.get(algorithm.strip().lower())
+    if limiter_class is None:
+        raise ValueError(
+            f"Unknown rate limit algorithm: {algorithm!r} "
+            f"(expected one of {', '.join(RATE_LIMIT_ALGORITHMS)})"
+        )
+    return limiter_class(max_requests=max_requests, window_seconds=window_seconds)
@@ -0,0 +1,262 @@
+"""
+慢请求日志
+
+在滚动时间窗口内保留最慢的N次工具调用及其分阶段耗时，
+用于p99退化时定位是哪类输入（农历闰月、真太阳时修正、运势日期等）变慢。
+
+出生日期等参数属于个人信息，日志里只保存：
+- 加盐哈希指纹（同一进程内相同参数得到相同指纹，便于归并重复请求）
+- 不含个人信息的参数形态（历法、闰月、是否真太阳时、输出格式等）
+"""
+
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import secrets
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from mingli_mcp.config import config
+
+logger = logging.getLogger(__name__)
+
+# 这些参数不含个人信息，且恰好是影响排盘耗时的开关，原样保留
+SAFE_ARGUMENT_KEYS = (
+    "calendar",
+    "is_leap_month",
+    "use_solar_time",
+    "format",
+    "language",
+    "palace_name",
+    "detailed",
+    "detail",
+    "fields",
+)
+
+# 进程级随机盐：出生日期的取值空间只有几百万，不加盐的哈希可被穷举还原
+_FINGERPRINT_SALT = secrets.token_bytes(16)
+
+
+def fingerprint_arguments(arguments: Any) -> str:
+    """
+    计算工具参数的脱敏指纹
+
+    Args:
+        arguments: 工具参数（通常是字典）
+
+    Returns:
+        16位十六进制指纹；同一进程内相同参数指纹相同，跨进程不可比较
+    """
+    try:
+        canonical = json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str)
+    except (TypeError, ValueError):
+        canonical = repr(arguments)
+    digest = hashlib.sha256(_FINGERPRINT_SALT + canonical.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def redact_arguments(arguments: Any) -> Dict[str, Any]:
+    """
+    提取参数形态：保留非敏感开关，敏感字段只记录"是否提供"
+
+    Args:
+        arguments: 工具参数
+
+    Returns:
+        脱敏后的参数形态字典
+    """
+    if not isinstance(arguments, dict):
+        return {}
+
+    shape: Dict[str, Any] = {key: arguments[key] for key in SAFE_ARGUMENT_KEYS if key in arguments}
+    shape["keys"] = sorted(str(key) for key in arguments)
+    return shape
+
+
+class SlowRequestLog:
+    """
+    慢请求日志
+
+    用容量为N的最小堆保存窗口内最慢的N次调用：大多数请求比堆顶还快，
+    只做一次比较就返回，不会计算指纹或拷贝数据。
+    """
+
+    def __init__(
+        self,
+        capacity: int = 20,
+        window_seconds: float = 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        初始化慢请求日志
+
+        Args:
+            capacity: 保留的最慢请求条数，0表示关闭
+            window_seconds: 滚动窗口（秒），更早的条目会被淘汰
+            clock: 时间源（测试可注入）
+        """
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self._clock = clock
+        # 堆元素: (耗时, 序号, 条目)；序号保证耗时相同时不比较字典
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._counter = itertools.count()
+        self._dump_path: Optional[str] = None
+        self._lock = threading.Lock()
+        # 串行化落盘：否则较早的快照可能晚于较新的快照完成rename，把文件写回旧状态
+        self._dump_lock = threading.Lock()
+
+    def set_dump_path(self, path: Optional[str]) -> None:
+        """
+        设置落盘文件（stdio部署没有/stats可查，只能落盘）
+
+        Args:
+            path: 文件路径；日志每次变化时整体重写，None表示不落盘
+        """
+        self._dump_path = path or None
+
+    def record(
+        self,
+        tool: str,
+        arguments: Any,
+        duration: float,
+        stages: Optional[Dict[str, float]] = None,
+        protocol_version: Optional[str] = None,
+        result: Optional[str] = None,
+        success: bool = True,
+        result_bytes: Optional[int] = None,
+    ) -> bool:
+        """
+        记录一次工具调用
+
+        Args:
+            tool: 工具名称
+            arguments: 工具参数（只用于计算指纹与形态，不会原样保存）
+            duration: 总耗时（秒）
+            stages: 分阶段耗时（秒）
+            protocol_version: 请求声明的协议版本，旧时代请求为None
+            result: 工具输出文本，用于统计结果大小
+            success: 是否成功
+            result_bytes: 已知的结果字节数（流式结果写完时统计），优先于 result
+
+        Returns:
+            是否进入了慢请求日志
+        """
+        if self.capacity <= 0:
+            return False
+
+        now = self._clock()
+        with self._lock:
+            self._evict_expired(now)
+            if len(self._heap) >= self.capacity and duration <= self._heap[0][0]:
+                return False
+
+            entry = {
+                "timestamp": round(now, 3),
+                "tool": tool,
+                "duration_ms": round(duration * 1000, 3),
+                "stages_ms": {
+                    name: round(seconds * 1000, 3) for name, seconds in (stages or {}).items()
+                },
+                "protocol_version": protocol_version or "legacy",
+                "result_bytes": (
+                    result_bytes
+                    if result_bytes is not None
+                    else len(result.encode("utf-8")) if isinstance(result, str) else 0
+                ),
+                "success": success,
+                "fingerprint": fingerprint_arguments(arguments),
+                "arguments": redact_arguments(arguments),
+            }
+            item = (duration, next(self._counter), entry)
+            if len(self._heap) >= self.capacity:
+                heapq.heapreplace(self._heap, item)
+            else:
+                heapq.heappush(self._heap, item)
+
+        if self._dump_path:
+            self._dump()
+        return True
+
+    def get_entries(self) -> List[Dict[str, Any]]:
+        """
+        获取窗口内的慢请求（按耗时降序）
+
+        Returns:
+            慢请求条目列表
+        """
+        with self._lock:
+            self._evict_expired(self._clock())
+            return self._sorted_entries()
+
+    def reset(self) -> None:
+        """清空日志"""
+        with self._lock:
+            self._heap.clear()
+
+    def _sorted_entries(self) -> List[Dict[str, Any]]:
+        return [dict(entry) for _, _, entry in sorted(self._heap, reverse=True)]
+
+    def _evict_expired(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        if any(entry["timestamp"] < cutoff for _, _, entry in self._heap):
+            self._heap = [item for item in self._heap if item[2]["timestamp"] >= cutoff]
+            heapq.heapify(self._heap)
+
+    def _dump(self) -> None:
+        """
+        原子地重写落盘文件
+
+        在目标目录下写唯一命名的临时文件再rename：读者不会看到半截JSON，
+        并发写入者（线程池中的多个请求、共享同一路径的多个进程）也不会互相截断临时文件。
+        快照在落盘锁内获取，最后完成的写入总是最新状态。
+        """
+        path = self._dump_path
+        if not path:
+            return
+        with self._dump_lock:
+            with self._lock:
+                entries = self._sorted_entries()
+            tmp_path: Optional[str] = None
+            try:
+                with tempfile.NamedTemporaryFile(
+                    "w",
+                    encoding="utf-8",
+                    dir=os.path.dirname(path) or ".",
+                    prefix=f".{os.path.basename(path)}.",
+                    suffix=".tmp",
+                    delete=False,
+                ) as f:
+                    tmp_path = f.name
+                    json.dump({"slow_requests": entries}, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Failed to write slow request log to {path}: {e}")
+                if tmp_path is not None:
+                    try:
+                        os.unlink(tmp_path)
+                    except OSError:
+                        pass
+
+
+# 全局慢请求日志实例
+_global_slow_log = SlowRequestLog(
+    capacity=config.SLOW_LOG_SIZE, window_seconds=config.SLOW_LOG_WINDOW
+)
+if config.SLOW_LOG_FILE:
+    _global_slow_log.set_dump_path(config.SLOW_LOG_FILE)
+
+
+def get_slow_log() -> SlowRequestLog:
+    """
+    获取全局慢请求日志实例
+
+    Returns:
+        SlowRequestLog实例
+    """
+    return _global_slow_log
@@ -0,0 +1,349 @@
+"""
+流式输出
+
+开启 STREAM_OUTPUT 后，tools/call 结果里的文本不再先拼成完整字符串：
+content[0].text 是一个 StreamingText，包着格式化器的 iter_*_markdown 生成器
+（或 JSON 编码器的 iterencode）。传输层用 iter_json() 编码响应：信封部分照常
+json.dumps，遇到 StreamingText 时逐块转义写出。内存峰值只与块大小有关，
+第一块在渲染完成前就能发出。
+
+JSON 字符串的转义是逐字符的，分块转义后依次拼接与整体转义完全相同；
+转义后的文本也不含原始换行，stdio 的按行分帧与 SSE 的 data 行都不受影响。
+
+渲染发生在服务端已经生成成功响应之后，格式化器出错有两种情况：
+- 第一块就失败（还没写出任何字节）：prepare_streams() 先渲染第一块，
+  失败时把该响应换成 JSON-RPC 内部错误
+- 写出一部分后才失败：已发出的字节无法撤回，iter_json() 在文本末尾注明中断、
+  把该工具结果标为 isError，照常闭合 JSON，连接与压缩流都能正常结束
+"""
+
+import json
+import logging
+import secrets
+import time
+from typing import Any, Callable, Generator, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 默认每块字符数
+DEFAULT_CHUNK_SIZE = 8192
+
+# 写出一部分后渲染失败时追加在文本末尾的说明
+RENDER_FAILED_NOTE = "\n\n[输出中断：渲染失败]"
+
+# 渲染失败时 JSON-RPC 错误响应的错误码（Internal error）
+RENDER_ERROR_CODE = -32603
+
+_UNSET = object()
+_END = object()
+
+
+class StreamAborted(Exception):
+    """流式文本没有写完就被关闭或丢弃（如客户端断开）"""
+
+
+class StreamingText:
+    """
+    按块生成的文本（只能迭代一次）
+
+    文本写完、渲染出错或被丢弃时，依次调用 add_done_callback 登记的回调（只调用一次），
+    参数为 None（写完）或异常。render_seconds 只统计生成文本的耗时，不含写出时等待客户端的时间
+    """
+
+    __slots__ = (
+        "_chunks",
+        "_head",
+        "chunk_size",
+        "render_seconds",
+        "result_bytes",
+        "_callbacks",
+        "_done",
+        "_error",
+    )
+
+    def __init__(self, fragments: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            fragments: 文本片段（通常是格式化器的生成器，片段可能很碎）
+            chunk_size: 合并后每块的最少字符数（最后一块可能更短）
+        """
+        self.chunk_size = max(1, chunk_size)
+        self._chunks = self._merge(iter(fragments))
+        # prime() 预先渲染的第一块
+        self._head: Any = _UNSET
+        # 生成文本的累计耗时（秒）与已生成的 UTF-8 字节数
+        self.render_seconds = 0.0
+        self.result_bytes = 0
+        self._callbacks: List[Callable[[Optional[BaseException]], None]] = []
+        self._done = False
+        self._error: Optional[BaseException] = None
+
+    def _merge(self, fragments: Iterator[str]) -> Generator[str, None, None]:
+        """把碎片合并成不小于 chunk_size 的块，同时累计渲染耗时"""
+        buffer: List[str] = []
+        size = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                fragment = next(fragments, None)
+            finally:
+                self.render_seconds += time.perf_counter() - started
+            if fragment is None:
+                break
+            buffer.append(fragment)
+            size += len(fragment)
+            if size >= self.chunk_size:
+                yield self._count("".join(buffer))
+                buffer.clear()
+                size = 0
+        if buffer:
+            yield self._count("".join(buffer))
+
+    def _count(self, chunk: str) -> str:
+        self.result_bytes += len(chunk.encode("utf-8"))
+        return chunk
+
+    def prime(self) -> None:
+        """
+        先渲染第一块（还没写出任何字节时发现渲染错误）
+
+        Raises:
+            格式化器抛出的异常（此时已按失败结束，回调已调用）
+        """
+        if self._head is not _UNSET or self._done:
+            return
+        try:
+            self._head = next(self._chunks, _END)
+        except BaseException as e:
+            self._finish(e)
+            raise
+
+    def __iter__(self) -> Iterator[str]:
+        """逐块生成文本"""
+        try:
+            self.prime()
+            head, self._head = self._head, _END
+            if head is not _END:
+                yield head
+            yield from self._chunks
+        except GeneratorExit:
+            self._finish(StreamAborted("stream closed before completion"))
+            raise
+        except BaseException as e:
+            self._finish(e)
+            raise
+        self._finish(None)
+
+    def read(self) -> str:
+        """一次读完（不支持流式的路径用，例如二进制编码）"""
+        return "".join(self)
+
+    def close(self) -> None:
+        """丢弃未写出的部分（回调收到 StreamAborted）"""
+        if not self._done:
+            self._chunks.close()
+            self._finish(StreamAborted("stream closed before completion"))
+
+    def __del__(self) -> None:
+        # 响应没被写出（如客户端提前断开）时也要让回调释放资源
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    @property
+    def done(self) -> bool:
+        """是否已结束（写完、出错或被丢弃）"""
+        return self._done
+
+    def add_done_callback(self, callback: Callable[[Optional[BaseException]], None]) -> None:
+        """
+        登记结束回调（已结束时立即调用）
+
+        Args:
+            callback: 参数为 None（写完）或导致结束的异常
+        """
+        if self._done:
+            self._call(callback)
+        else:
+            self._callbacks.append(callback)
+
+    def _finish(self, error: Optional[BaseException]) -> None:
+        if self._done:
+            return
+        self._done = True
+        self._error = error
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            self._call(callback)
+
+    def _call(self, callback: Callable[[Optional[BaseException]], None]) -> None:
+        try:
+            callback(self._error)
+        except Exception:
+            logger.exception("Stream done callback failed")
+
+
+def _response_streams(response: Any) -> List[StreamingText]:
+    """单个 JSON-RPC 响应的 tools/call 结果中的 StreamingText"""
+    result = response.get("result") if isinstance(response, dict) else None
+    content = result.get("content") if isinstance(result, dict) else None
+    if not isinstance(content, list):
+        return []
+    return [
+        item["text"]
+        for item in content
+        if isinstance(item, dict) and isinstance(item.get("text"), StreamingText)
+    ]
+
+
+def has_stream(message: Any) -> bool:
+    """
+    JSON-RPC 响应（或批量响应）的 tools/call 结果中是否有 StreamingText
+
+    只看 result.content 各项的 text，不遍历 structuredContent 等大结构
+    """
+    if isinstance(message, list):
+        return any(has_stream(item) for item in message)
+    return bool(_response_streams(message))
+
+
+def when_streams_done(message: Any, callback: Callable[[], None]) -> None:
+    """
+    消息中的 StreamingText 全部结束后调用 callback（没有流式文本时立即调用）
+
+    传输层用它把并发槽位等资源保持到响应真正写完
+
+    Args:
+        message: JSON-RPC 消息（字典、批量列表或 None）
+        callback: 无参回调，只调用一次
+    """
+    responses = message if isinstance(message, list) else [message]
+    streams = [stream for response in responses for stream in _response_streams(response)]
+    pending = [len(streams)]
+    if not streams:
+        callback()
+        return
+
+    def on_done(error: Optional[BaseException]) -> None:
+        pending[0] -= 1
+        if pending[0] == 0:
+            callback()
+
+    for stream in streams:
+        stream.add_done_callback(on_done)
+
+
+def prepare_streams(message: Any) -> Any:
+    """
+    渲染消息中每个 StreamingText 的第一块
+
+    第一块就渲染失败时（还没写出任何字节），把该响应原地换成 JSON-RPC 内部错误。
+    HTTP 传输在线程池里调用它，避免渲染占用事件循环
+
+    Args:
+        message: JSON-RPC 消息（字典或批量列表）
+
+    Returns:
+        同一个消息对象
+    """
+    responses = message if isinstance(message, list) else [message]
+    for response in responses:
+        streams = _response_streams(response)
+        try:
+            for stream in streams:
+                stream.prime()
+        except Exception as e:
+            logger.exception("Rendering streamed tool result failed")
+            for stream in streams:
+                stream.close()
+            request_id = response.get("id")
+            response.clear()
+            response.update(
+                {
+                    "jsonrpc": "2.0",
+                    "error": {"code": RENDER_ERROR_CODE, "message": f"Internal error: {e}"},
+                    "id": request_id,
+                }
+            )
+    return message
+
+
+def materialize(message: Any) -> Any:
+    """
+    把消息中的 StreamingText 读成普通字符串（原地替换）
+
+    Args:
+        message: JSON-RPC 消息（字典或批量列表）
+
+    Returns:
+        同一个消息对象
+    """
+    if isinstance(message, dict):
+        for key, value in message.items():
+            if isinstance(value, StreamingText):
+                message[key] = value.read()
+            elif isinstance(value, (dict, list)):
+                materialize(value)
+    elif isinstance(message, list):
+        for index, value in enumerate(message):
+            if isinstance(value, StreamingText):
+                message[index] = value.read()
+            elif isinstance(value, (dict, list)):
+                materialize(value)
+    return message
+
+
+def iter_json(message: Any, **dumps_kwargs: Any) -> Iterator[str]:
+    """
+    把消息编码为 JSON 片段，其中的 StreamingText 边生成边转义
+
+    写出一部分后渲染失败时，文本末尾追加 RENDER_FAILED_NOTE，该工具结果加上
+    "isError": true，JSON 照常闭合
+
+    Args:
+        message: JSON-RPC 消息
+        **dumps_kwargs: 传给 json.dumps 的参数（ensure_ascii、separators 等）
+
+    Yields:
+        JSON 片段，依次拼接即为完整的 JSON 文本；消息中没有 StreamingText 时只有一段
+    """
+    prepare_streams(message)
+    streams: List[StreamingText] = []
+    # 占位符带随机数，不会与结果中的真实文本撞上
+    nonce = secrets.token_hex(8)
+
+    def default(value: Any) -> str:
+        if isinstance(value, StreamingText):
+            streams.append(value)
+            return f"\x00stream-{nonce}-{len(streams) - 1}"
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    encoded = json.dumps(message, default=default, **dumps_kwargs)
+    if not streams:
+        yield encoded
+        return
+
+    escape_kwargs = {"ensure_ascii": dumps_kwargs.get("ensure_ascii", True)}
+    item_separator, key_separator = dumps_kwargs.get("separators") or (", ", ": ")
+    try:
+        for index, stream in enumerate(streams):
+            placeholder = json.dumps(f"\x00stream-{nonce}-{index}", **escape_kwargs)
+            head, encoded = encoded.split(placeholder, 1)
+            yield head + '"'
+            try:
+                for chunk in stream:
+                    yield json.dumps(chunk, **escape_kwargs)[1:-1]
+            except Exception:
+                logger.exception("Streamed tool result failed after output was sent")
+                yield json.dumps(RENDER_FAILED_NOTE, **escape_kwargs)[1:-1]
+                # 文本后紧跟 content 与 result 的结尾（结果里没有其他键）时插入 isError
+                if encoded.startswith("}]}"):
+                    is_error = f'{item_separator}"isError"{key_separator}true'
+                    encoded = "}]" + is_error + encoded[2:]
+            encoded = '"' + encoded
+        yield encoded
+    finally:
+        # 客户端中途断开时，没写到的流也要结束（触发回调释放资源）
+        for stream in streams:
+            stream.close()
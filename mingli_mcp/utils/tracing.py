@@ -0,0 +1,421 @@
+"""
+请求链路追踪（OpenTelemetry 兼容的最小实现）
+
+链路: 传输层 -> MingliMCPServer.handle_request -> 工具处理器 -> 各阶段（校验/真太阳时/排盘/格式化/渲染）
+
+- 导出为 OTLP-JSON（与 OpenTelemetry Collector 的 file exporter 相同的 JSON Lines 格式），
+  写入本地按大小轮转的文件，或保存在进程内（测试/调试用），不需要任何网络 collector
+- 支持 W3C traceparent：HTTP 从请求头读取，stdio 从 params._meta.traceparent 读取，
+  服务端的 span 挂在网关 trace 下面，两边的链路可以拼起来
+
+不依赖 opentelemetry-sdk：链路只有五六个 span，SDK 的批处理、采样器、上下文传播器
+对这里都是多余的启动开销。未配置导出器时 start_span 只做一次判断就返回。
+"""
+
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from mingli_mcp import __version__
+from mingli_mcp.config import config
+
+logger = logging.getLogger(__name__)
+
+# OTLP SpanKind / StatusCode 取值
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_CODE_UNSET = 0
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+_TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+AttributeValue = Union[str, bool, int, float]
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    解析 W3C traceparent 头
+
+    Args:
+        header: traceparent 值，如 "00-<trace-id>-<parent-id>-01"
+
+    Returns:
+        (trace_id, parent_span_id)；格式非法或ID全零时返回None
+    """
+    if not header:
+        return None
+    match = _TRACEPARENT_RE.match(header.strip().lower())
+    if not match:
+        return None
+    version, trace_id, span_id, _ = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id
+
+
+class Span:
+    """一个已开始的 span"""
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_span_id: Optional[str],
+        kind: int,
+        attributes: Optional[Dict[str, AttributeValue]],
+        root: Optional["Span"],
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes: Dict[str, AttributeValue] = dict(attributes or {})
+        self.status_code = STATUS_CODE_UNSET
+        self.status_message = ""
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns = 0
+        # 本进程内的根 span 收集整条链路已结束的 span，结束时一次性导出
+        self._root = root or self
+        self._finished: List["Span"] = []
+        self._exporter: Optional["SpanExporter"] = None
+        self._deferred = False
+
+    @property
+    def recording(self) -> bool:
+        """是否记录（未开启追踪时的占位 span 为False）"""
+        return True
+
+    @property
+    def traceparent(self) -> str:
+        """当前 span 作为父节点时的 W3C traceparent 值"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        """设置属性"""
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        """标记为失败"""
+        self.status_code = STATUS_CODE_ERROR
+        self.status_message = message
+
+    def defer_end(self) -> Callable[[Optional[BaseException]], None]:
+        """
+        推迟结束：离开 start_span 时不结束，改由返回的函数结束（如流式结果写完时）
+
+        推迟结束时根 span 可能已经导出，此时这个 span 单独导出（trace_id 与父节点不变）
+
+        Returns:
+            结束函数，参数为导致失败的异常（成功时为 None）
+        """
+        self._deferred = True
+
+        def end(error: Optional[BaseException] = None) -> None:
+            if error is not None:
+                self._record_exception(error)
+            self._end()
+
+        return end
+
+    def _record_exception(self, error: BaseException) -> None:
+        self.set_error(str(error) or type(error).__name__)
+        self.set_attribute("exception.type", type(error).__name__)
+
+    def _end(self) -> None:
+        """结束并交给根 span 导出（只生效一次）"""
+        if self.end_time_ns or self._exporter is None:
+            return
+        self.end_time_ns = time.time_ns()
+        root = self._root
+        if root is not self and root.end_time_ns:
+            self._exporter.export([self])
+            return
+        root._finished.append(self)
+        if root is self:
+            self._exporter.export(self._finished)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """转换为 OTLP-JSON 的 span 对象"""
+        span: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()
+            ],
+            "status": {"code": self.status_code},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class _NonRecordingSpan:
+    """未开启追踪时返回的占位 span，调用方无需判空"""
+
+    recording = False
+    traceparent = ""
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        pass
+
+    def set_error(self, message: str) -> None:
+        pass
+
+    def defer_end(self) -> Callable[[Optional[BaseException]], None]:
+        return _ignore_end
+
+
+def _ignore_end(error: Optional[BaseException] = None) -> None:
+    pass
+
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("mingli_current_span", default=None)
+
+
+def _otlp_value(value: AttributeValue) -> Dict[str, Any]:
+    # bool 是 int 的子类，必须先判断
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # OTLP-JSON 中 int64 以字符串表示
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def build_export_request(spans: List[Span]) -> Dict[str, Any]:
+    """
+    构建 OTLP ExportTraceServiceRequest（JSON 形式）
+
+    Args:
+        spans: 已结束的 span 列表
+
+    Returns:
+        {"resourceSpans": [...]} 字典
+    """
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": config.MCP_SERVER_NAME}},
+                        {"key": "service.version", "value": {"stringValue": __version__}},
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "mingli_mcp", "version": __version__},
+                        "spans": [span.to_otlp() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class InMemorySpanExporter:
+    """进程内导出器（测试/调试用）"""
+
+    def __init__(self) -> None:
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        """保存一批已结束的 span"""
+        with self._lock:
+            self._spans.extend(spans)
+
+    def get_finished_spans(self) -> List[Span]:
+        """获取已导出的 span（按结束顺序）"""
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        """清空"""
+        with self._lock:
+            self._spans.clear()
+
+
+class OtlpJsonFileExporter:
+    """
+    OTLP-JSON 文件导出器
+
+    每条链路（一次请求）写一行 ExportTraceServiceRequest；
+    文件超过 max_bytes 时轮转为 .1 / .2 ...，最多保留 backup_count 个旧文件。
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 3):
+        """
+        初始化文件导出器
+
+        Args:
+            path: 输出文件路径
+            max_bytes: 单个文件的最大字节数，0表示不轮转
+            backup_count: 保留的旧文件个数
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        """追加一批已结束的 span"""
+        line = json.dumps(build_export_request(spans), ensure_ascii=False, separators=(",", ":"))
+        data = (line + "\n").encode("utf-8")
+        with self._lock:
+            try:
+                if self.max_bytes and self._size() + len(data) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, "ab") as f:
+                    f.write(data)
+            except OSError as e:
+                logger.warning(f"Failed to export spans to {self.path}: {e}")
+
+    def _size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def _rotate(self) -> None:
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if os.path.exists(self.path):
+            os.replace(self.path, f"{self.path}.1")
+
+
+SpanExporter = Union[InMemorySpanExporter, OtlpJsonFileExporter]
+
+
+class Tracer:
+    """链路追踪器"""
+
+    def __init__(self, exporter: Optional[SpanExporter] = None):
+        """
+        初始化追踪器
+
+        Args:
+            exporter: 导出器，None表示关闭追踪
+        """
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        """是否开启追踪"""
+        return self.exporter is not None
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, AttributeValue]] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        traceparent: Optional[str] = None,
+    ) -> Iterator[Union[Span, _NonRecordingSpan]]:
+        """
+        开始一个 span 并设为当前 span
+
+        Args:
+            name: span 名称
+            attributes: 初始属性
+            kind: SpanKind（SPAN_KIND_SERVER / SPAN_KIND_INTERNAL）
+            traceparent: 上游传入的 W3C traceparent（仅在没有当前 span 时生效）
+
+        Yields:
+            Span；未开启追踪时为 NON_RECORDING_SPAN
+        """
+        exporter = self.exporter
+        if exporter is None:
+            yield NON_RECORDING_SPAN
+            return
+
+        parent = _current_span.get()
+        if parent is not None:
+            span = Span(name, parent.trace_id, parent.span_id, kind, attributes, parent._root)
+        else:
+            remote = parse_traceparent(traceparent)
+            trace_id, parent_id = remote if remote else (secrets.token_hex(16), None)
+            span = Span(name, trace_id, parent_id, kind, attributes, None)
+
+        span._exporter = exporter
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span._record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            if not span._deferred:
+                span._end()
+
+
+def get_current_span() -> Union[Span, _NonRecordingSpan]:
+    """
+    获取当前 span
+
+    Returns:
+        当前 span；不在任何 span 内时为 NON_RECORDING_SPAN
+    """
+    return _current_span.get() or NON_RECORDING_SPAN
+
+
+def create_exporter(kind: str) -> Optional[SpanExporter]:
+    """
+    按配置创建导出器
+
+    Args:
+        kind: "file"、"memory"，空字符串表示关闭
+
+    Returns:
+        导出器实例或None
+    """
+    kind = kind.strip().lower()
+    if kind == "file":
+        return OtlpJsonFileExporter(
+            config.TRACING_FILE,
+            max_bytes=config.TRACING_MAX_BYTES,
+            backup_count=config.TRACING_BACKUP_COUNT,
+        )
+    if kind == "memory":
+        return InMemorySpanExporter()
+    if kind:
+        logger.warning(f"Unknown TRACING_EXPORTER {kind!r}, tracing disabled")
+    return None
+
+
+# 全局追踪器
+_global_tracer = Tracer(create_exporter(config.TRACING_EXPORTER))
+
+
+def get_tracer() -> Tracer:
+    """
+    获取全局追踪器
+
+    Returns:
+        Tracer实例
+    """
+    return _global_tracer
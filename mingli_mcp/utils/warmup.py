@@ -0,0 +1,149 @@
+"""
+启动预热
+
+启动后的第一次排盘远慢于稳态：要导入 iztro-py / lunar_python、加载 i18n 表、初始化
+lunar_python 的节气表，各级缓存也是空的。预热在后台线程里对每个已注册系统跑几次
+代表性的工具调用，把这些一次性开销挪到接流量之前。
+
+HTTP 模式的 /ready 在预热完成前返回 503（/health 只表示进程存活），负载均衡和
+Apify Standby 代理不会把首批请求发给冷 worker。预热直接调用工具处理函数，
+不计入调用指标和慢请求日志；开启链路追踪时整个预热是一条 mingli.warmup 追踪。
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from mingli_mcp.utils.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+_BIRTH: Dict[str, Any] = {"time_index": 6, "gender": "女"}
+
+# 每个内置系统的代表性调用：(工具名, 参数)。未列出的系统只导入并创建实例
+WARMUP_CALLS: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {
+    "ziwei": [
+        ("get_ziwei_chart", {**_BIRTH, "date": "2000-08-16"}),
+        (
+            "get_ziwei_fortune",
+            {
+                **_BIRTH,
+                "birth_date": "2000-08-16",
+                "use_solar_time": True,
+                "longitude": 116.4,
+                "birth_hour": 12,
+                "birth_minute": 30,
+            },
+        ),
+    ],
+    "bazi": [
+        ("get_bazi_chart", {**_BIRTH, "date": "2000-08-16"}),
+        ("get_bazi_fortune", {**_BIRTH, "birth_date": "2000-08-16"}),
+    ],
+}
+
+
+class Warmup:
+    """后台预热任务（每个进程只运行一次）"""
+
+    def __init__(self) -> None:
+        # idle -> running -> ready
+        self.state = "idle"
+        self.durations: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.total_duration: Optional[float] = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """预热是否已完成（部分系统失败也算完成，失败记录在 errors 中）"""
+        return self._done.is_set()
+
+    def start(self) -> bool:
+        """
+        在后台线程中开始预热（重复调用无效）
+
+        Returns:
+            本次调用是否真正启动了预热
+        """
+        with self._lock:
+            if self.state != "idle":
+                return False
+            self.state = "running"
+        threading.Thread(target=self.run, name="mingli-warmup", daemon=True).start()
+        return True
+
+    def run(self) -> None:
+        """同步执行预热"""
+        # 运行期导入：工具处理函数位于 mcp_server，模块级导入会形成 utils -> mcp_server 的环
+        from mingli_mcp.mcp_server.tools import ToolRegistry
+        from mingli_mcp.systems import get_system, list_systems
+
+        self.state = "running"
+        registry = ToolRegistry()
+        started = time.perf_counter()
+        try:
+            with get_tracer().start_span("mingli.warmup"):
+                for name in list_systems():
+                    system_started = time.perf_counter()
+                    try:
+                        get_system(name)
+                        for tool, arguments in WARMUP_CALLS.get(name, []):
+                            handler = registry.get_handler(tool)
+                            if handler is not None:
+                                handler(dict(arguments))
+                    except Exception as e:
+                        logger.warning(f"Warmup of {name} system failed: {e}")
+                        self.errors[name] = f"{type(e).__name__}: {e}"
+                    self.durations[name] = time.perf_counter() - system_started
+        finally:
+            self.total_duration = time.perf_counter() - started
+            self.state = "ready"
+            self._done.set()
+        logger.info(f"Warmup finished in {self.total_duration * 1000:.0f}ms")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待预热完成
+
+        Args:
+            timeout: 最长等待秒数，None表示一直等
+
+        Returns:
+            是否已完成
+        """
+        return self._done.wait(timeout)
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        获取预热状态
+
+        Returns:
+            状态字典（各系统预热耗时与失败原因）
+        """
+        return {
+            "state": self.state,
+            "durations_ms": {
+                name: round(duration * 1000, 1) for name, duration in self.durations.items()
+            },
+            "total_ms": (
+                round(self.total_duration * 1000, 1) if self.total_duration is not None else None
+            ),
+            "errors": dict(self.errors),
+        }
+
+
+# 全局预热任务
+_warmup = Warmup()
+
+
+def get_warmup() -> Warmup:
+    """
+    获取全局预热任务
+
+    Returns:
+        Warmup实例
+    """
+    return _warmup
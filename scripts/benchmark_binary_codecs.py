@@ -0,0 +1,112 @@
+"""
+二进制编码（MessagePack / CBOR）与 JSON 对比
+
+对紫微、八字的排盘与运势结果字典（format="structured" 时的 structuredContent），比较：
+1. 编码后的字节数：JSON 按 HTTP 响应的方式（starlette JSONResponse，不转义中文、无空白），
+   另给出 msgpack 以 base64 放进 format="msgpack" 结果时的大小
+2. 编码、解码耗时：JSON 用标准库 json（C 加速），二进制编码用本项目的纯 Python 实现；
+   安装了 msgpack / cbor2 时另给出 C 扩展的耗时
+
+用法:
+    python scripts/benchmark_binary_codecs.py [--repeat 300]
+"""
+
+import argparse
+import base64
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mingli_mcp.mcp_server.server import MingliMCPServer  # noqa: E402
+from mingli_mcp.utils import binary_codecs  # noqa: E402
+from mingli_mcp.utils.binary_codecs import (  # noqa: E402
+    CBOR,
+    MSGPACK,
+    decode_cbor,
+    decode_msgpack,
+    encode_cbor,
+    encode_msgpack,
+)
+
+_BIRTH = {"time_index": 6, "gender": "女"}
+CASES = {
+    "get_ziwei_chart": {**_BIRTH, "date": "2000-08-16"},
+    "get_ziwei_fortune": {**_BIRTH, "birth_date": "2000-08-16", "query_date": "2026-03-01"},
+    "get_bazi_chart": {**_BIRTH, "date": "2000-08-16"},
+    "get_bazi_fortune": {**_BIRTH, "birth_date": "2000-08-16", "query_date": "2026-03-01"},
+}
+
+
+def _json_dumps(data):
+    # 与 starlette JSONResponse.render 相同
+    return json.dumps(
+        data, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _json_loads(raw):
+    return json.loads(raw)
+
+
+def best_of(func, repeat, rounds=5):
+    """最快一轮的平均每次耗时（微秒）"""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - started) / repeat * 1e6)
+    return best
+
+
+def _codecs():
+    codecs = [
+        ("json", _json_dumps, _json_loads),
+        ("msgpack", encode_msgpack, decode_msgpack),
+        ("cbor", encode_cbor, decode_cbor),
+    ]
+    for codec in (MSGPACK, CBOR):
+        if codec.native:
+            codecs.append((f"{codec.name}(C)", codec.dumps, codec.loads))
+    return codecs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MessagePack / CBOR 与 JSON 对比")
+    parser.add_argument("--repeat", type=int, default=300, help="每轮次数")
+    args = parser.parse_args()
+
+    server = MingliMCPServer()
+    codecs = _codecs()
+    print(f"{'工具':<20}{'编码':<14}{'字节':>8}{'base64':>8}{'编码(μs)':>10}{'解码(μs)':>10}")
+    print("-" * 70)
+    for tool, arguments in CASES.items():
+        response = server.handle_request(
+            {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "tools/call",
+                "params": {"name": tool, "arguments": {**arguments, "format": "structured"}},
+            }
+        )
+        data = response["result"]["structuredContent"]
+        for name, dumps, loads in codecs:
+            raw = dumps(data)
+            assert loads(raw) == data, name
+            encoded = len(base64.b64encode(raw)) if name != "json" else 0
+            encode_us = best_of(lambda: dumps(data), args.repeat)
+            decode_us = best_of(lambda: loads(raw), args.repeat)
+            b64 = f"{encoded:>8}" if encoded else f"{'-':>8}"
+            print(f"{tool:<20}{name:<14}{len(raw):>8}{b64}{encode_us:>10.0f}{decode_us:>10.0f}")
+        print()
+
+    missing = [codec.module for codec in (MSGPACK, CBOR) if not codec.native]
+    if missing:
+        print(f"未安装 {', '.join(missing)}，运行时使用纯 Python 实现（{binary_codecs.__name__}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+紫微命盘内存占用（tracemalloc）
+
+模拟在内存中缓存大量命盘：对 N 个不同的出生时间排盘并保留格式化结果，用 tracemalloc
+统计保留下来的内存，比较
+- 记录:   format_chart 的结果（星曜为驻留的 StarRecord，同样的星只有一个对象）
+- 字典:   to_plain() 转成的普通字典结构（即每颗星一个新字典的旧表示）
+
+两者都不含星盘对象本身。另外给出 format_chart 的耗时，以及 JSON 编码耗时：
+字典直接 json.dumps（旧做法）与 to_json（先 to_plain 再编码）。
+
+用法:
+    python scripts/benchmark_chart_memory.py [--charts 1000] [--repeat 200]
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mingli_mcp.mcp_server.tools.output import to_json, to_plain  # noqa: E402
+from mingli_mcp.systems import get_system  # noqa: E402
+
+
+def _astrolabes(system, count):
+    """count 个不同出生日期/时辰的星盘"""
+    start = date(1960, 1, 1)
+    for index in range(count):
+        birth = {
+            "date": (start + timedelta(days=index * 7)).isoformat(),
+            "gender": "男" if index % 2 else "女",
+        }
+        yield system._build_astrolabe(birth, index % 12)
+
+
+def _retained(build):
+    """build() 返回的对象保留下来的内存（字节）"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def best_of(func, repeat, rounds=5):
+    """最快一轮的平均每次耗时（微秒）"""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - started) / repeat * 1e6)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="紫微命盘内存占用")
+    parser.add_argument("--charts", type=int, default=1000, help="缓存的命盘数")
+    parser.add_argument("--repeat", type=int, default=200, help="计时每轮次数")
+    args = parser.parse_args()
+
+    system = get_system("ziwei")
+    formatter = system.formatter
+    astrolabes = list(_astrolabes(system, args.charts))
+    # 先格式化一遍：驻留表与译名表是所有命盘共享的一次性开销，不计入每张命盘
+    for astrolabe in astrolabes:
+        formatter.format_chart(astrolabe)
+
+    plain = [to_plain(formatter.format_chart(astrolabe)) for astrolabe in astrolabes]
+    record_bytes = _retained(lambda: [formatter.format_chart(a) for a in astrolabes])
+    dict_bytes = _retained(lambda: [to_plain(chart) for chart in plain])
+    stars = sum(
+        len(palace[group])
+        for palace in plain[0]["palaces"]
+        for group in ("major_stars", "minor_stars", "adjective_stars")
+    )
+
+    print(f"{args.charts} 张命盘（每张约 {stars} 颗星）")
+    print(f"{'表示':<8}{'合计(KB)':>12}{'每张(KB)':>12}")
+    print("-" * 32)
+    for name, size in (("字典", dict_bytes), ("记录", record_bytes)):
+        print(f"{name:<8}{size / 1024:>12.1f}{size / args.charts / 1024:>12.2f}")
+    print(f"节省 {1 - record_bytes / dict_bytes:.0%}")
+
+    astrolabe = astrolabes[0]
+    chart = formatter.format_chart(astrolabe)
+    plain_chart = to_plain(chart)
+    print(
+        f"\nformat_chart: {best_of(lambda: formatter.format_chart(astrolabe), args.repeat):.1f}μs"
+    )
+    dumps = best_of(lambda: json.dumps(plain_chart, ensure_ascii=False, indent=2), args.repeat)
+    print(f"json.dumps(字典): {dumps:.1f}μs")
+    print(f"to_json(记录): {best_of(lambda: to_json(chart), args.repeat):.1f}μs")
+    print(f"  其中 to_plain: {best_of(lambda: to_plain(chart), args.repeat):.1f}μs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+HTTP 响应压缩对比
+
+对几种典型的 /mcp 响应体（JSON-RPC 编码后的字节），比较不压缩与各编码 / 级别：
+1. 响应字节数与压缩率
+2. 压缩耗时、解压耗时
+3. 远程客户端的端到端耗时：压缩 + 传输（字节数 / 带宽）+ 解压，按几档带宽估算
+   （不含往返时延，它与是否压缩无关）
+
+tools/list 另外测预压缩缓存（PrecompressedCache）命中时每个请求的压缩耗时。
+
+用法:
+    python scripts/benchmark_compression.py [--repeat 50] [--levels 1,6,9]
+"""
+
+import argparse
+import gzip
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mingli_mcp.mcp_server.server import MingliMCPServer  # noqa: E402
+from mingli_mcp.transports.http_transport import _catalog_parts, _render_json  # noqa: E402
+from mingli_mcp.utils.compression import (  # noqa: E402
+    PrecompressedCache,
+    available_encodings,
+    compress,
+)
+
+_BIRTH = {"time_index": 6, "gender": "女"}
+CASES = [
+    ("tools/list", "tools/list", {}),
+    (
+        "ziwei markdown",
+        "tools/call",
+        {"name": "get_ziwei_chart", "arguments": {**_BIRTH, "date": "2000-08-16"}},
+    ),
+    (
+        "ziwei json",
+        "tools/call",
+        {
+            "name": "get_ziwei_chart",
+            "arguments": {**_BIRTH, "date": "2000-08-16", "format": "json"},
+        },
+    ),
+    (
+        "bazi fortune json",
+        "tools/call",
+        {
+            "name": "get_bazi_fortune",
+            "arguments": {**_BIRTH, "birth_date": "2000-08-16", "format": "json"},
+        },
+    ),
+]
+
+# 带宽档位（Mbit/s）
+BANDWIDTHS = [1, 10, 100]
+
+
+def _decompressor(encoding):
+    if encoding == "gzip":
+        return gzip.decompress
+    if encoding == "br":
+        import brotli
+
+        return brotli.decompress
+    import zstandard
+
+    return zstandard.ZstdDecompressor().decompress
+
+
+def _best(func, repeat):
+    """多次运行取最短耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _transfer(size, mbps):
+    return size * 8 / (mbps * 1_000_000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP 响应压缩对比")
+    parser.add_argument("--repeat", type=int, default=50, help="每种情况运行次数")
+    parser.add_argument("--levels", default="1,6,9", help="压缩级别，逗号分隔")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    levels = [int(level) for level in args.levels.split(",")]
+
+    server = MingliMCPServer()
+    header = f"{'编码':<10}{'大小(KB)':>10}{'压缩率':>8}{'压缩(ms)':>10}{'解压(ms)':>10}"
+    header += "".join(f"{f'{mbps}Mbps(ms)':>13}" for mbps in BANDWIDTHS)
+    for label, method, params in CASES:
+        response = server.handle_request(
+            {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        )
+        body = _render_json(response)
+        print(f"\n## {label}（{len(body) / 1024:.1f} KB）")
+        print(header)
+        print("-" * len(header.encode("gbk")))
+
+        row = f"{'identity':<10}{len(body) / 1024:>10.1f}{1:>8.2f}{0:>10.2f}{0:>10.2f}"
+        row += "".join(f"{_transfer(len(body), mbps) * 1000:>13.2f}" for mbps in BANDWIDTHS)
+        print(row)
+
+        for encoding in available_encodings():
+            decompress = _decompressor(encoding)
+            for level in levels:
+                compressed = compress(body, encoding, level)
+                compress_time = _best(lambda: compress(body, encoding, level), args.repeat)
+                decompress_time = _best(lambda: decompress(compressed), args.repeat)
+                name = f"{encoding}-{level}"
+                row = f"{name:<10}{len(compressed) / 1024:>10.1f}"
+                row += f"{len(compressed) / len(body):>8.2f}"
+                row += f"{compress_time * 1000:>10.2f}{decompress_time * 1000:>10.2f}"
+                cpu_time = compress_time + decompress_time
+                row += "".join(
+                    f"{(cpu_time + _transfer(len(compressed), mbps)) * 1000:>13.2f}"
+                    for mbps in BANDWIDTHS
+                )
+                print(row)
+
+        parts = _catalog_parts(response)
+        if method == "tools/list" and parts is not None:
+            cache = PrecompressedCache()
+            for encoding in available_encodings():
+                for level in levels:
+                    cache.get(*parts, encoding, level)
+                    cached = _best(lambda: cache.get(*parts, encoding, level), args.repeat)
+                    print(f"  预压缩缓存命中 {encoding}-{level}: {cached * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Markdown 渲染性能测试
+
+对固定的排盘/运势数据反复调用格式化器的 Markdown 渲染方法，只计渲染本身
+（排盘计算在计时之外完成一次）。Markdown 是所有工具的默认输出格式，
+每次工具调用都要走一遍这里。
+
+用法:
+    python scripts/benchmark_formatters.py [--repeat 2000]
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mingli_mcp.systems import get_system  # noqa: E402
+
+_BIRTH = {"date": "2000-08-16", "time_index": 6, "gender": "女"}
+_QUERY = datetime(2026, 3, 1)
+
+
+def _cases():
+    """(名称, 渲染函数, 输入数据)"""
+    ziwei = get_system("ziwei")
+    bazi = get_system("bazi")
+    return [
+        ("ziwei.chart", ziwei.formatter.format_chart_markdown, ziwei.get_chart(_BIRTH)),
+        (
+            "ziwei.fortune",
+            ziwei.formatter.format_fortune_markdown,
+            ziwei.get_fortune(_BIRTH, _QUERY),
+        ),
+        (
+            "ziwei.palace",
+            ziwei.formatter.format_palace_analysis_markdown,
+            ziwei.analyze_palace(_BIRTH, "命宫"),
+        ),
+        ("bazi.chart", bazi.formatter.format_chart_markdown, bazi.get_chart(_BIRTH)),
+        ("bazi.fortune", bazi.formatter.format_fortune_markdown, bazi.get_fortune(_BIRTH, _QUERY)),
+        (
+            "bazi.element",
+            bazi.formatter.format_element_analysis_markdown,
+            bazi.analyze_element(_BIRTH),
+        ),
+    ]
+
+
+def benchmark(render, data, repeat):
+    """返回 (每次渲染平均微秒, 最快一轮的每次微秒, 输出字符数)"""
+    rounds = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            output = render(data)
+        rounds.append((time.perf_counter() - started) / repeat * 1e6)
+    return sum(rounds) / len(rounds), min(rounds), len(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Markdown 渲染性能测试")
+    parser.add_argument("--repeat", type=int, default=2000, help="每轮渲染次数")
+    args = parser.parse_args()
+
+    print(f"{'渲染':<16}{'平均(μs)':>12}{'最快(μs)':>12}{'字符数':>10}")
+    print("-" * 50)
+    for name, render, data in _cases():
+        average, best, size = benchmark(render, data, args.repeat)
+        print(f"{name:<16}{average:>12.1f}{best:>12.1f}{size:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+限流器性能测试：sliding_window vs gcra vs sharded vs sketch
+
+模拟大量不同客户端（默认10万个）各发若干请求，对比：
+1. 单次 is_allowed 判定耗时（平均 / p99）
+2. 恰好触发定期清理的那次判定的耗时（全量扫描的停顿）
+3. 常驻内存（tracemalloc）
+4. get_stats 耗时
+5. 误限流次数（每个客户端的请求数都远低于限额，任何拒绝都来自近似算法的高估）
+
+用法:
+    python scripts/benchmark_rate_limiter.py [--clients 100000] [--requests 5]
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mingli_mcp.utils.rate_limiter import RATE_LIMIT_ALGORITHMS  # noqa: E402
+
+
+def _percentile(sorted_values, percent):
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+
+def benchmark(algorithm, clients, requests_per_client):
+    """对单个算法跑一轮，返回结果字典"""
+    limiter_class = RATE_LIMIT_ALGORITHMS[algorithm]
+    client_ids = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)]
+
+    # 第一遍只统计内存（tracemalloc 会拖慢分配，不与计时混在一起）
+    gc.collect()
+    tracemalloc.start()
+    limiter = limiter_class(max_requests=100, window_seconds=60)
+    for _ in range(requests_per_client):
+        for client_id in client_ids:
+            limiter.is_allowed(client_id)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del limiter
+
+    # 第二遍计时
+    limiter = limiter_class(max_requests=100, window_seconds=60)
+    timings = []
+    denied = 0
+    perf_counter = time.perf_counter
+    for _ in range(requests_per_client):
+        for client_id in client_ids:
+            started = perf_counter()
+            allowed = limiter.is_allowed(client_id)
+            timings.append(perf_counter() - started)
+            denied += not allowed
+
+    # 强制下一次判定触发定期清理（sharded 没有全量清理，测的是普通判定）
+    if hasattr(limiter, "last_cleanup"):
+        limiter.last_cleanup = float("-inf")
+    started = perf_counter()
+    limiter.is_allowed("cleanup-probe")
+    cleanup_time = perf_counter() - started
+
+    started = perf_counter()
+    limiter.get_stats()
+    stats_time = perf_counter() - started
+
+    timings.sort()
+    return {
+        "avg_us": sum(timings) / len(timings) * 1e6,
+        "p99_us": _percentile(timings, 99) * 1e6,
+        "cleanup_ms": cleanup_time * 1000,
+        "memory_mb": memory / 1024 / 1024,
+        "stats_ms": stats_time * 1000,
+        "denied": denied,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="限流器性能测试")
+    parser.add_argument("--clients", type=int, default=100_000, help="不同客户端数量")
+    parser.add_argument("--requests", type=int, default=5, help="每个客户端的请求数")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"限流器性能测试: {args.clients} 个客户端 × {args.requests} 次请求")
+    print("=" * 60)
+    print(
+        f"{'算法':<16}{'平均(µs)':>10}{'p99(µs)':>10}{'清理停顿(ms)':>14}"
+        f"{'内存(MB)':>10}{'get_stats(ms)':>15}{'误限流':>8}"
+    )
+    for algorithm in RATE_LIMIT_ALGORITHMS:
+        result = benchmark(algorithm, args.clients, args.requests)
+        print(
+            f"{algorithm:<16}{result['avg_us']:>10.2f}{result['p99_us']:>10.2f}"
+            f"{result['cleanup_ms']:>14.2f}{result['memory_mb']:>10.1f}{result['stats_ms']:>15.1f}"
+            f"{result['denied']:>8}"
+        )
+    print("\n注：内存为 tracemalloc 统计到的限流器状态分配，不含客户端ID字符串本身")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+启动与导入耗时基准（带预算）
+
+每个场景在全新的子进程里用 `python -X importtime` 运行，记录：
+1. 进程总墙钟时间（含解释器启动）与场景内各步骤耗时
+2. 场景新导入的模块数（不含解释器启动时已加载的 site 等模块，便于跨环境比较）
+3. 各模块的导入耗时（自身 / 含子模块），列出最慢的若干个
+
+场景：
+- import:          import mingli_mcp
+- stdio_server:    构造 stdio 模式的 MingliMCPServer
+- http_server:     构造 http 模式的 MingliMCPServer
+- first_requests:  stdio 服务器依次处理第一个 initialize、tools/list、tools/call
+
+超出 BUDGETS 时退出码为 1。IDE 每次会话都会重新拉起 stdio 服务、容器休眠后要冷启动，
+启动耗时用户可见，用这个脚本（以及 tests/test_startup_budget.py）防止回退。
+
+用法:
+    python scripts/benchmark_startup.py [--json] [--top 10] [--budget-scale 2]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 子进程里执行的场景代码；STEP(name) 记录从上一个步骤结束到现在的耗时
+_PRELUDE = """
+import json, sys, time
+_baseline = len(sys.modules)
+_steps = {}
+_last = [time.perf_counter()]
+def STEP(name):
+    now = time.perf_counter()
+    _steps[name] = (now - _last[0]) * 1000
+    _last[0] = now
+"""
+
+_EPILOGUE = """
+print("@@RESULT@@" + json.dumps({
+    "steps": _steps, "modules": len(sys.modules) - _baseline, "total_modules": len(sys.modules),
+}))
+"""
+
+_BIRTH = '{"date": "2000-08-16", "time_index": 6, "gender": "女"}'
+
+SCENARIOS: Dict[str, Dict] = {
+    "import": {"code": "import mingli_mcp\nSTEP('import')", "env": {}},
+    "stdio_server": {
+        "code": (
+            "from mingli_mcp.mcp_server.server import MingliMCPServer\n"
+            "MingliMCPServer()\nSTEP('construct')"
+        ),
+        "env": {"TRANSPORT_TYPE": "stdio"},
+    },
+    "http_server": {
+        "code": (
+            "from mingli_mcp.mcp_server.server import MingliMCPServer\n"
+            "MingliMCPServer()\nSTEP('construct')"
+        ),
+        "env": {"TRANSPORT_TYPE": "http"},
+    },
+    "first_requests": {
+        "code": (
+            "from mingli_mcp.mcp_server.server import MingliMCPServer\n"
+            "server = MingliMCPServer()\nSTEP('construct')\n"
+            "server.handle_request({'jsonrpc': '2.0', 'id': 1, 'method': 'initialize',"
+            " 'params': {'protocolVersion': '2025-06-18', 'capabilities': {},"
+            " 'clientInfo': {'name': 'bench', 'version': '1'}}})\nSTEP('initialize')\n"
+            "server.handle_request({'jsonrpc': '2.0', 'id': 2, 'method': 'tools/list'})\n"
+            "STEP('tools/list')\n"
+            "server.handle_request({'jsonrpc': '2.0', 'id': 3, 'method': 'tools/call',"
+            f" 'params': {{'name': 'get_ziwei_chart', 'arguments': {_BIRTH}}}}})\n"
+            "STEP('tools/call')"
+        ),
+        "env": {"TRANSPORT_TYPE": "stdio"},
+    },
+}
+
+# 预算：墙钟与步骤耗时（毫秒，可用 --budget-scale 按机器放宽）、模块数上限
+# 步骤预算按 CI 机器留足余量；模块数基本确定，主要防止引擎/fastapi 被重新提前导入
+BUDGETS: Dict[str, Dict] = {
+    "import": {"wall_ms": 500, "modules": 10, "steps": {"import": 50}},
+    "stdio_server": {"wall_ms": 1000, "modules": 120, "steps": {"construct": 400}},
+    "http_server": {"wall_ms": 3000, "modules": 600, "steps": {"construct": 2000}},
+    "first_requests": {
+        "wall_ms": 3000,
+        "modules": 350,
+        "steps": {"construct": 400, "initialize": 50, "tools/list": 50, "tools/call": 2000},
+    },
+}
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """
+    解析 -X importtime 输出
+
+    Returns:
+        [{"module", "self_ms", "cumulative_ms"}, ...]
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue
+        modules.append(
+            {
+                "module": parts[2].strip(),
+                "self_ms": self_us / 1000,
+                "cumulative_ms": cumulative_us / 1000,
+            }
+        )
+    return modules
+
+
+def run_scenario(name: str) -> Dict:
+    """在全新子进程中运行一个场景"""
+    scenario = SCENARIOS[name]
+    env = {
+        **os.environ,
+        "LOG_LEVEL": "WARNING",
+        "ENABLE_WARMUP": "false",
+        "TRACING_EXPORTER": "",
+        **scenario["env"],
+    }
+    code = _PRELUDE + scenario["code"] + _EPILOGUE
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=str(ROOT),
+        env=env,
+        timeout=120,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Scenario {name} failed:\n{result.stderr[-2000:]}")
+
+    marker = next(line for line in result.stdout.splitlines() if line.startswith("@@RESULT@@"))
+    payload = json.loads(marker[len("@@RESULT@@") :])
+    imports = parse_importtime(result.stderr)
+    return {
+        "wall_ms": wall_ms,
+        "steps": payload["steps"],
+        "modules": payload["modules"],
+        "total_modules": payload["total_modules"],
+        "imports": sorted(imports, key=lambda item: item["cumulative_ms"], reverse=True),
+    }
+
+
+def check_budgets(name: str, result: Dict, scale: float = 1.0) -> List[str]:
+    """
+    对照预算检查一个场景的结果
+
+    Args:
+        name: 场景名
+        result: run_scenario 的返回值
+        scale: 时间预算的放大倍数（慢机器）
+
+    Returns:
+        超预算说明列表，空列表表示全部达标
+    """
+    budget = BUDGETS.get(name, {})
+    violations = []
+    if "wall_ms" in budget and result["wall_ms"] > budget["wall_ms"] * scale:
+        violations.append(
+            f"{name}: wall time {result['wall_ms']:.0f}ms > {budget['wall_ms'] * scale:.0f}ms"
+        )
+    if "modules" in budget and result["modules"] > budget["modules"]:
+        violations.append(f"{name}: {result['modules']} modules > {budget['modules']}")
+    for step, limit in budget.get("steps", {}).items():
+        elapsed = result["steps"].get(step)
+        if elapsed is not None and elapsed > limit * scale:
+            violations.append(f"{name}: {step} {elapsed:.1f}ms > {limit * scale:.0f}ms")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动与导入耗时基准")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    parser.add_argument("--top", type=int, default=10, help="每个场景列出的最慢模块数")
+    parser.add_argument(
+        "--budget-scale",
+        type=float,
+        default=float(os.getenv("STARTUP_BUDGET_SCALE", "1")),
+        help="时间预算放大倍数（慢机器/CI，默认读取 STARTUP_BUDGET_SCALE）",
+    )
+    parser.add_argument("scenarios", nargs="*", help="只运行指定场景（默认全部）")
+    args = parser.parse_args()
+
+    names = args.scenarios or list(SCENARIOS)
+    results = {}
+    violations: List[str] = []
+    for name in names:
+        result = run_scenario(name)
+        result["imports"] = result["imports"][: args.top]
+        results[name] = result
+        violations.extend(check_budgets(name, result, args.budget_scale))
+
+    if args.json:
+        print(json.dumps({"results": results, "violations": violations}, indent=2))
+    else:
+        print("=" * 60)
+        print("启动与导入耗时")
+        print("=" * 60)
+        for name, result in results.items():
+            steps = ", ".join(f"{step} {ms:.1f}ms" for step, ms in result["steps"].items())
+            print(f"\n[{name}] 墙钟 {result['wall_ms']:.0f}ms, 模块 {result['modules']} 个")
+            print(f"  步骤: {steps}")
+            for item in result["imports"]:
+                print(
+                    f"  {item['cumulative_ms']:>9.1f}ms (自身 {item['self_ms']:>7.1f}ms)  "
+                    f"{item['module']}"
+                )
+        print()
+        if violations:
+            print("超出预算:")
+            for violation in violations:
+                print(f"  - {violation}")
+        else:
+            print("全部在预算内")
+
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
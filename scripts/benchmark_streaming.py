@@ -0,0 +1,104 @@
+"""
+流式输出（STREAM_OUTPUT）对比
+
+对同一次工具调用，比较不开流式（handle_request 返回完整文本，再整体 json.dumps）与
+开流式（返回 StreamingText，由 iter_json 逐块编码）时：
+1. 首块耗时：从调用开始到第一块可以写出（不开流式时即完整响应编码完）
+2. 总耗时：全部写完
+3. 峰值内存：tracemalloc 统计的调用 + 编码期间峰值（写出的块直接丢弃，模拟写入socket）
+
+用法:
+    python scripts/benchmark_streaming.py [--repeat 50] [--chunk-size 8192]
+"""
+
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mingli_mcp.config import config  # noqa: E402
+from mingli_mcp.mcp_server.server import MingliMCPServer  # noqa: E402
+from mingli_mcp.utils.streaming import iter_json  # noqa: E402
+
+_BIRTH = {"time_index": 6, "gender": "女"}
+CASES = [
+    ("get_ziwei_chart", {**_BIRTH, "date": "2000-08-16"}, "markdown"),
+    ("get_ziwei_chart", {**_BIRTH, "date": "2000-08-16"}, "json"),
+    ("get_bazi_fortune", {**_BIRTH, "birth_date": "2000-08-16"}, "markdown"),
+    ("get_bazi_fortune", {**_BIRTH, "birth_date": "2000-08-16"}, "json"),
+]
+
+
+def _request(tool, arguments, output_format):
+    return {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tools/call",
+        "params": {"name": tool, "arguments": {**arguments, "format": output_format}},
+    }
+
+
+def _run(server, request):
+    """返回 (首块耗时, 总耗时, 字节数)"""
+    started = time.perf_counter()
+    response = server.handle_request(request)
+    first = None
+    size = 0
+    for chunk in iter_json(response, ensure_ascii=False):
+        if first is None:
+            first = time.perf_counter() - started
+        size += len(chunk.encode("utf-8"))
+    return first, time.perf_counter() - started, size
+
+
+def _peak(server, request):
+    """调用 + 编码期间的 tracemalloc 峰值（字节）"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        response = server.handle_request(request)
+        for _ in iter_json(response, ensure_ascii=False):
+            pass
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式输出对比")
+    parser.add_argument("--repeat", type=int, default=50, help="每种情况调用次数")
+    parser.add_argument("--chunk-size", type=int, default=8192, help="STREAM_CHUNK_SIZE")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    server = MingliMCPServer()
+    config.STREAM_CHUNK_SIZE = args.chunk_size
+    print(
+        f"{'工具':<18}{'格式':<10}{'模式':<8}{'首块(ms)':>10}{'总计(ms)':>10}"
+        f"{'峰值(KB)':>10}{'响应(KB)':>10}"
+    )
+    print("-" * 76)
+    for tool, arguments, output_format in CASES:
+        request = _request(tool, arguments, output_format)
+        for stream in (False, True):
+            config.STREAM_OUTPUT = stream
+            _run(server, request)
+            runs = [_run(server, request) for _ in range(args.repeat)]
+            first = min(run[0] for run in runs) * 1000
+            total = min(run[1] for run in runs) * 1000
+            size = runs[0][2] / 1024
+            peak = min(_peak(server, request) for _ in range(3)) / 1024
+            mode = "流式" if stream else "整体"
+            print(
+                f"{tool:<18}{output_format:<10}{mode:<8}{first:>10.2f}{total:>10.2f}"
+                f"{peak:>10.1f}{size:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
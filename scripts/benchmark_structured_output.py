@@ -0,0 +1,96 @@
+"""
+结构化输出（structuredContent）与 JSON 文本输出对比
+
+format="json" 时排盘字典先被 json.dumps(indent=2) 成字符串放进 content[0].text，
+传输层再把整个响应编码一次，字符串里的每个引号、换行都要转义；
+format="structured" 时字典直接放进 structuredContent，只编码一次。
+
+对一批出生信息取最大的紫微命盘，比较完整 JSON-RPC 响应：
+1. 编码后的字节数（stdio 与 HTTP 两种编码方式）
+2. 序列化耗时：json 为 json.dumps(indent=2) 成文本 + 编码响应，structured 只编码响应
+   （排盘计算两种格式相同，不计入）
+
+用法:
+    python scripts/benchmark_structured_output.py [--repeat 2000]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mingli_mcp.mcp_server.server import MingliMCPServer  # noqa: E402
+from mingli_mcp.mcp_server.tools.output import to_json  # noqa: E402
+
+
+def _stdio_encode(response):
+    return json.dumps(response, ensure_ascii=False).encode("utf-8")
+
+
+def _http_encode(response):
+    # 与 starlette JSONResponse.render 相同
+    return json.dumps(
+        response, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _request(tool, arguments, output_format):
+    return {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tools/call",
+        "params": {"name": tool, "arguments": {**arguments, "format": output_format}},
+    }
+
+
+def _largest_chart(server):
+    """在一批出生信息中找编码后最大的紫微命盘"""
+    largest, largest_size = None, 0
+    for date in ("1950-01-01", "1985-03-20", "2000-08-16", "2023-12-31"):
+        for time_index in range(13):
+            for gender in ("男", "女"):
+                arguments = {"date": date, "time_index": time_index, "gender": gender}
+                response = server.handle_request(_request("get_ziwei_chart", arguments, "json"))
+                size = len(_stdio_encode(response))
+                if size > largest_size:
+                    largest, largest_size = arguments, size
+    return largest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="structuredContent 与 JSON 文本输出对比")
+    parser.add_argument("--repeat", type=int, default=2000, help="每种格式调用次数")
+    args = parser.parse_args()
+
+    server = MingliMCPServer()
+    cases = [
+        ("get_ziwei_chart", _largest_chart(server)),
+        ("get_bazi_fortune", {"birth_date": "2000-08-16", "time_index": 6, "gender": "女"}),
+    ]
+
+    print(f"{'工具':<18}{'格式':<12}{'stdio字节':>10}{'HTTP字节':>10}{'序列化(μs)':>12}")
+    print("-" * 62)
+    for tool, arguments in cases:
+        structured = server.handle_request(_request(tool, arguments, "structured"))
+        data = structured["result"]["structuredContent"]
+        for output_format in ("json", "structured"):
+            response = server.handle_request(_request(tool, arguments, output_format))
+            stdio_size = len(_stdio_encode(response))
+            http_size = len(_http_encode(response))
+
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                if output_format == "json":
+                    result = {"content": [{"type": "text", "text": to_json(data)}]}
+                else:
+                    result = {"content": [{"type": "text", "text": ""}], "structuredContent": data}
+                _http_encode({"jsonrpc": "2.0", "id": 1, "result": result})
+            elapsed = (time.perf_counter() - started) / args.repeat * 1e6
+            print(f"{tool:<18}{output_format:<12}{stdio_size:>10}{http_size:>10}{elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+紫微译名查表性能测试（按语言）
+
+对每个支持的语言排一张固定星盘，比较把十二宫全部宫名、干支、星名、亮度翻译一遍的耗时：
+- translate_*(): 逐个调用 iztro-py 星盘对象的翻译方法（改造前格式化器的做法）
+- 译名表:       查 translations.get_translation_table() 预先翻好的只读字典
+
+另外给出建表耗时（每个语言只在第一次用到时付出一次）和 format_chart / format_fortune
+的整体耗时。
+
+最后比较多语言输出：对 1..N 种语言，逐个语言各调一次 get_chart / get_fortune
+与 language 传列表调用一次（只排一次盘）的耗时，以及列表调用中每多一种语言的增量。
+
+用法:
+    python scripts/benchmark_translations.py [--repeat 200]
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mingli_mcp.systems import get_system  # noqa: E402
+from mingli_mcp.systems.ziwei import translations  # noqa: E402
+from mingli_mcp.utils.validators import SUPPORTED_LANGUAGES  # noqa: E402
+
+_BIRTH = {"date": "2000-08-16", "time_index": 6, "gender": "女"}
+_QUERY = datetime(2026, 3, 1)
+_STAR_GROUPS = ("major_stars", "minor_stars", "adjective_stars")
+
+
+def _via_methods(astrolabe):
+    """逐个调用 translate_*()"""
+    for palace in astrolabe.palaces:
+        palace.translate_name()
+        palace.translate_heavenly_stem()
+        palace.translate_earthly_branch()
+        for group in _STAR_GROUPS:
+            for star in getattr(palace, group):
+                star.translate_name()
+                if star.brightness:
+                    star.translate_brightness()
+
+
+def _via_table(astrolabe):
+    """查预先翻好的译名表"""
+    table = translations.get_translation_table(astrolabe.language)
+    for palace in astrolabe.palaces:
+        table.palaces[palace.name]
+        table.stems[palace.heavenly_stem]
+        table.branches[palace.earthly_branch]
+        for group in _STAR_GROUPS:
+            for star in getattr(palace, group):
+                table.stars[star.name]
+                if star.brightness:
+                    table.brightness[star.brightness]
+
+
+def best_of(func, repeat, rounds=5):
+    """最快一轮的平均每次耗时（微秒）"""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - started) / repeat * 1e6)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="紫微译名查表性能测试")
+    parser.add_argument("--repeat", type=int, default=200, help="每轮次数")
+    args = parser.parse_args()
+
+    system = get_system("ziwei")
+    formatter = system.formatter
+    print(
+        f"{'语言':<8}{'建表(ms)':>10}{'translate_*(μs)':>18}{'译名表(μs)':>14}"
+        f"{'format_chart(μs)':>18}{'format_fortune(μs)':>20}"
+    )
+    print("-" * 88)
+    for language in SUPPORTED_LANGUAGES:
+        translations._TABLES.pop(language, None)
+        started = time.perf_counter()
+        translations.get_translation_table(language)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        astrolabe = system._build_astrolabe(_BIRTH, _BIRTH["time_index"])
+        astrolabe.set_language(language)
+        date_str, hour_index = system._convert_datetime_for_horoscope(_QUERY)
+        horoscope = astrolabe.horoscope(date_str, hour_index)
+
+        methods = best_of(lambda: _via_methods(astrolabe), args.repeat)
+        table = best_of(lambda: _via_table(astrolabe), args.repeat)
+        chart = best_of(lambda: formatter.format_chart(astrolabe), args.repeat)
+        fortune = best_of(
+            lambda: formatter.format_fortune(horoscope, _QUERY, language), args.repeat
+        )
+        print(
+            f"{language:<8}{build_ms:>10.2f}{methods:>18.1f}{table:>14.1f}"
+            f"{chart:>18.1f}{fortune:>20.1f}"
+        )
+
+    print(
+        f"\n{'方法':<14}{'语言数':>6}{'逐个调用(ms)':>14}{'列表调用(ms)':>14}{'每多一种(ms)':>14}"
+    )
+    print("-" * 66)
+    calls = {
+        "get_chart": lambda language: system.get_chart(_BIRTH, language),
+        "get_fortune": lambda language: system.get_fortune(_BIRTH, _QUERY, language),
+    }
+    repeat = max(1, args.repeat // 10)
+    for name, call in calls.items():
+        single = best_of(lambda: call(SUPPORTED_LANGUAGES[0]), repeat) / 1000
+        for count in (2, 3, len(SUPPORTED_LANGUAGES)):
+            languages = SUPPORTED_LANGUAGES[:count]
+            separate = best_of(lambda: [call(language) for language in languages], repeat)
+            combined = best_of(lambda: call(languages), repeat) / 1000
+            extra = (combined - single) / (count - 1)
+            print(f"{name:<14}{count:>6}{separate / 1000:>14.2f}{combined:>14.2f}{extra:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
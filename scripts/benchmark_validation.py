@@ -0,0 +1,125 @@
+"""
+参数校验耗时对比
+
+每次工具调用都要校验生辰信息。旧做法：
+- handler 的 _validate_common_params 校验一遍（日期用 datetime.strptime）
+- 排盘系统的 validate_birth_info 再完整校验一遍（又一次 strptime）
+- analyze_palace / analyze_element 内部调用 get_chart，还会再校验第三遍
+
+新做法：手写的 YYYY-MM-DD 解析（parse_date），handler 校验一次得到只读的
+ValidatedBirthInfo，系统收到它直接跳过校验。
+
+本脚本比较：
+1. 单次日期解析：strptime 与 parse_date
+2. 每次工具调用的校验总耗时：旧做法（按原代码复现）与新做法
+
+用法:
+    python scripts/benchmark_validation.py [--repeat 20000]
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mingli_mcp.core.exceptions import DateRangeError, ValidationError  # noqa: E402
+from mingli_mcp.mcp_server.tools import ziwei_handlers  # noqa: E402
+from mingli_mcp.systems import get_system  # noqa: E402
+from mingli_mcp.utils.performance import stage  # noqa: E402
+from mingli_mcp.utils.validators import (  # noqa: E402
+    MAX_YEAR,
+    MIN_YEAR,
+    parse_date,
+    validate_calendar_strict,
+    validate_gender_strict,
+    validate_language,
+    validate_required_params,
+    validate_solar_time_params,
+    validate_time_index_strict,
+)
+
+_ARGS = {"date": "2000-08-16", "time_index": 6, "gender": "女", "language": "zh-CN"}
+_REQUIRED = ["date", "time_index", "gender"]
+_SYSTEM = get_system("ziwei")
+
+
+def _legacy_validate_date_range(date_str):
+    """旧的 validate_date_range（strptime）"""
+    try:
+        dt = datetime.strptime(date_str, "%Y-%m-%d")
+        if not (MIN_YEAR <= dt.year <= MAX_YEAR):
+            raise DateRangeError(date_str)
+    except ValueError as e:
+        raise ValidationError(date_str) from e
+
+
+def _legacy_system_validate(birth_info):
+    """旧的 BaseFortuneSystem.validate_birth_info"""
+    for field in _REQUIRED:
+        if field not in birth_info:
+            raise ValidationError(field)
+    _legacy_validate_date_range(birth_info["date"])
+    validate_time_index_strict(birth_info["time_index"])
+    validate_gender_strict(birth_info["gender"])
+    validate_calendar_strict(birth_info.get("calendar", "solar"))
+    validate_solar_time_params(birth_info)
+
+
+def _legacy_call(args, system_passes):
+    """旧做法：handler 校验一遍，系统再校验 system_passes 遍"""
+    with stage("validate"):
+        validate_required_params(args, _REQUIRED, ziwei_handlers.ZIWEI_CHART_PARAM_DESCRIPTIONS)
+        _legacy_validate_date_range(args["date"])
+        validate_time_index_strict(args["time_index"])
+        validate_gender_strict(args["gender"])
+        validate_language(args["language"])
+    birth_info = ziwei_handlers._build_birth_info(args)
+    for _ in range(system_passes):
+        _legacy_system_validate(birth_info)
+
+
+def _new_call(args, system_passes):
+    """新做法：handler 校验一次，系统收到 ValidatedBirthInfo 直接返回"""
+    birth_info = ziwei_handlers._validate_common_params(
+        args, _REQUIRED, ziwei_handlers.ZIWEI_CHART_PARAM_DESCRIPTIONS
+    )
+    for _ in range(system_passes):
+        birth_info = _SYSTEM.validate_birth_info(birth_info)
+
+
+def _best(func, repeat, rounds=5):
+    """多轮运行取最短的单次平均耗时（μs）"""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="参数校验耗时对比")
+    parser.add_argument("--repeat", type=int, default=20000, help="每轮调用次数")
+    args = parser.parse_args()
+
+    print("## 日期解析")
+    strptime = _best(lambda: datetime.strptime("2000-08-16", "%Y-%m-%d"), args.repeat)
+    parsed = _best(lambda: parse_date("2000-08-16"), args.repeat)
+    print(f"datetime.strptime: {strptime:.2f}μs")
+    print(f"parse_date:        {parsed:.2f}μs  ({strptime / parsed:.1f}x)")
+
+    print("\n## 每次工具调用的校验")
+    print(f"{'场景':<28}{'旧(μs)':>10}{'新(μs)':>10}{'倍数':>8}")
+    # 系统内校验次数：get_chart 1 次；analyze_palace 自身 1 次 + 内部 get_chart 1 次
+    for label, passes in (("get_ziwei_chart", 1), ("analyze_ziwei_palace", 2)):
+        before = _best(lambda: _legacy_call(_ARGS, passes), args.repeat)
+        after = _best(lambda: _new_call(_ARGS, passes), args.repeat)
+        print(f"{label:<28}{before:>10.2f}{after:>10.2f}{before / after:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+二进制编码（MessagePack / CBOR）测试
+"""
+
+import base64
+import json
+
+import pytest
+
+from mingli_mcp.config import config
+from mingli_mcp.mcp_server.server import MingliMCPServer
+from mingli_mcp.utils.binary_codecs import (
+    CBOR,
+    MSGPACK,
+    codec_for_content_type,
+    decode_cbor,
+    decode_msgpack,
+    encode_cbor,
+    encode_msgpack,
+    negotiate,
+)
+from tests.test_structured_output import CALLS
+
+# RFC 8949 附录 A 的示例
+CBOR_VECTORS = [
+    (0, "00"),
+    (23, "17"),
+    (24, "1818"),
+    (1000, "1903e8"),
+    (1000000000000, "1b000000e8d4a51000"),
+    (18446744073709551615, "1bffffffffffffffff"),
+    (-1, "20"),
+    (-1000, "3903e7"),
+    (1.1, "fb3ff199999999999a"),
+    (False, "f4"),
+    (True, "f5"),
+    (None, "f6"),
+    ("", "60"),
+    ("IETF", "6449455446"),
+    ("水", "63e6b0b4"),
+    ([1, [2, 3], [4, 5]], "8301820203820405"),
+    ({"a": 1, "b": [2, 3]}, "a26161016162820203"),
+]
+
+MSGPACK_VECTORS = [
+    (0, "00"),
+    (127, "7f"),
+    (128, "cc80"),
+    (-1, "ff"),
+    (-32, "e0"),
+    (-33, "d0df"),
+    (65536, "ce00010000"),
+    (2**32, "cf0000000100000000"),
+    (-129, "d1ff7f"),
+    (None, "c0"),
+    (True, "c3"),
+    (False, "c2"),
+    (1.5, "cb3ff8000000000000"),
+    ("a", "a161"),
+    ("x" * 40, "d928" + "78" * 40),
+    (b"\x01", "c40101"),
+    ({"a": [1, 2]}, "81a161920102"),
+]
+
+NESTED = {
+    "palaces": [{"name": "命宫", "stars": ["紫微", "天府"], "index": i} for i in range(20)],
+    "long": "長" * 70000,
+    "numbers": [-(2**63), 2**64 - 1, -2.5, 0.0],
+    "flags": [True, False, None],
+    "raw": b"\x00\xff",
+}
+
+PURE = [(encode_msgpack, decode_msgpack), (encode_cbor, decode_cbor)]
+
+
+class TestPureCodecs:
+    """纯 Python 实现"""
+
+    @pytest.mark.parametrize("value, encoded", CBOR_VECTORS)
+    def test_cbor_vectors(self, value, encoded):
+        assert encode_cbor(value).hex() == encoded
+        decoded = decode_cbor(bytes.fromhex(encoded))
+        assert decoded == value and type(decoded) is type(value)
+
+    @pytest.mark.parametrize("value, encoded", MSGPACK_VECTORS)
+    def test_msgpack_vectors(self, value, encoded):
+        assert encode_msgpack(value).hex() == encoded
+        decoded = decode_msgpack(bytes.fromhex(encoded))
+        assert decoded == value and type(decoded) is type(value)
+
+    def test_cbor_indefinite_lengths_and_half_floats(self):
+        assert decode_cbor(bytes.fromhex("7f657374726561646d696e67ff")) == "streaming"
+        assert decode_cbor(bytes.fromhex("9f018202039f0405ffff")) == [1, [2, 3], [4, 5]]
+        assert decode_cbor(bytes.fromhex("bf61610161629f0203ffff")) == {"a": 1, "b": [2, 3]}
+        assert decode_cbor(bytes.fromhex("f93c00")) == 1.0
+        assert decode_cbor(bytes.fromhex("d9d9f700")) == 0
+
+    @pytest.mark.parametrize("encode, decode", PURE)
+    def test_round_trip(self, encode, decode):
+        assert decode(encode(NESTED)) == NESTED
+        # tuple 编码为数组
+        assert decode(encode((1, "a"))) == [1, "a"]
+
+    @pytest.mark.parametrize("encode, decode", PURE)
+    def test_malformed_input(self, encode, decode):
+        encoded = encode(NESTED)
+        for bad in (encoded[:-1], encoded + b"\x00", b""):
+            with pytest.raises(ValueError):
+                decode(bad)
+
+    @pytest.mark.parametrize("encode, decode", PURE)
+    def test_unsupported_types(self, encode, decode):
+        with pytest.raises(TypeError):
+            encode({"when": object()})
+        with pytest.raises(OverflowError):
+            encode(2**64)
+
+    def test_unsupported_tags_and_extensions(self):
+        with pytest.raises(ValueError):
+            decode_cbor(bytes.fromhex("c11a514b67b0"))  # 标签 1（时间戳）
+        with pytest.raises(ValueError):
+            decode_msgpack(bytes.fromhex("d4000a"))  # fixext 1
+
+
+class TestNegotiation:
+    """Accept / Content-Type"""
+
+    @pytest.mark.parametrize(
+        "accept, expected",
+        [
+            (None, None),
+            ("application/json, text/event-stream", None),
+            ("*/*", None),
+            ("application/msgpack", MSGPACK),
+            ("application/x-msgpack", MSGPACK),
+            ("application/cbor", CBOR),
+            ("application/json;q=0.5, application/cbor", CBOR),
+            ("application/msgpack, application/json", MSGPACK),
+            ("application/json, application/msgpack", None),
+            ("application/msgpack;q=0, application/json", None),
+            ("text/html", None),
+        ],
+    )
+    def test_negotiate(self, accept, expected):
+        assert negotiate(accept) == expected
+
+    def test_content_type(self):
+        assert codec_for_content_type("application/msgpack; charset=binary") == MSGPACK
+        assert codec_for_content_type("application/CBOR") == CBOR
+        assert codec_for_content_type("application/json") is None
+        assert codec_for_content_type(None) is None
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(config, "TRANSPORT_TYPE", "stdio")
+    return MingliMCPServer()
+
+
+def _tools_call(tool, **extra):
+    return {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tools/call",
+        "params": {"name": tool, "arguments": {**CALLS[tool], **extra}},
+    }
+
+
+class TestMsgpackFormat:
+    """format="msgpack" """
+
+    @pytest.mark.parametrize("tool", sorted(CALLS))
+    def test_blob_matches_json(self, server, tool):
+        result = server.handle_request(_tools_call(tool, format="msgpack"))["result"]
+        (content,) = result["content"]
+        assert content["type"] == "resource"
+        resource = content["resource"]
+        assert resource["mimeType"] == "application/msgpack"
+        assert resource["uri"] == f"mingli://results/{tool}"
+        assert "structuredContent" not in result
+
+        decoded = MSGPACK.loads(base64.b64decode(resource["blob"]))
+        as_json = json.loads(
+            server.handle_request(_tools_call(tool, format="json"))["result"]["content"][0]["text"]
+        )
+        decoded.pop("metadata", None)
+        as_json.pop("metadata", None)
+        assert decoded == as_json
+
+    def test_advertised_schema_adds_structured_content(self, server, monkeypatch):
+        monkeypatch.setattr(config, "ADVERTISE_OUTPUT_SCHEMA", True)
+        result = server.handle_request(_tools_call("get_bazi_chart", format="msgpack"))["result"]
+        blob = base64.b64decode(result["content"][0]["resource"]["blob"])
+        assert MSGPACK.loads(blob) == result["structuredContent"]
+
+
+class TestHttpNegotiation:
+    """/mcp 的二进制编码"""
+
+    @pytest.fixture
+    def client(self, server):
+        pytest.importorskip("fastapi")
+        from fastapi.testclient import TestClient
+
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        transport = HttpTransport(host="127.0.0.1", port=8080)
+        transport.set_message_handler(server.handle_request)
+        return TestClient(transport.app)
+
+    @pytest.mark.parametrize("codec", [MSGPACK, CBOR])
+    def test_binary_request_and_response(self, client, codec):
+        message = _tools_call("get_ziwei_chart", format="structured")
+        response = client.post(
+            "/mcp",
+            content=codec.dumps(message),
+            headers={"Content-Type": codec.media_type, "Accept": codec.media_type},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == codec.media_type
+        body = codec.loads(response.content)
+        assert body["id"] == 1
+        assert body["result"]["structuredContent"]["palaces"]
+
+        as_json = client.post("/mcp", json=message).json()
+        assert body["result"]["structuredContent"]["palaces"] == (
+            as_json["result"]["structuredContent"]["palaces"]
+        )
+
+    def test_default_accept_gets_json(self, client):
+        response = client.post(
+            "/mcp",
+            json=_tools_call("get_bazi_chart"),
+            headers={"Accept": "application/json, text/event-stream"},
+        )
+        assert response.headers["content-type"].startswith("application/json")
+
+    def test_malformed_binary_body_is_parse_error(self, client):
+        response = client.post(
+            "/mcp",
+            content=b"\xc1",
+            headers={"Content-Type": "application/msgpack", "Accept": "application/msgpack"},
+        )
+        assert response.status_code == 400
+        assert MSGPACK.loads(response.content)["error"]["code"] == -32700
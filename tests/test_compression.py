@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+HTTP 响应压缩测试
+"""
+
+import gzip
+import json
+import zlib
+
+import pytest
+
+from mingli_mcp.config import config
+from mingli_mcp.utils import compression
+from mingli_mcp.utils.compression import (
+    PrecompressedCache,
+    StreamCompressor,
+    available_encodings,
+    compress,
+    compress_stream,
+    negotiate_encoding,
+)
+
+_TEXT = ("# 紫微斗数命盘\n\n## 命宫（子）\n- 紫微（庙）化权\n- 天府（旺）\n" * 200).encode("utf-8")
+
+
+def _decompress(data, encoding):
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "br":
+        return pytest.importorskip("brotli").decompress(data)
+    return pytest.importorskip("zstandard").ZstdDecompressor().decompressobj().decompress(data)
+
+
+@pytest.fixture
+def all_encodings(monkeypatch):
+    """假装 br / zstd 都已安装（只用于协商测试）"""
+    monkeypatch.setattr(compression, "available_encodings", lambda: ("zstd", "br", "gzip"))
+
+
+class TestNegotiateEncoding:
+    """Accept-Encoding 协商"""
+
+    @pytest.mark.parametrize(
+        "header, expected",
+        [
+            (None, None),
+            ("", None),
+            ("identity", None),
+            ("gzip", "gzip"),
+            ("GZip", "gzip"),
+            ("x-gzip", "gzip"),
+            ("deflate", None),
+            ("gzip;q=0", None),
+            ("*", "gzip"),
+            ("*;q=0", None),
+            ("gzip;q=0.5, identity", None),
+            ("gzip, identity;q=0.5", "gzip"),
+            ("gzip;q=1.2.3, deflate", None),
+        ],
+    )
+    def test_gzip_only(self, monkeypatch, header, expected):
+        monkeypatch.setattr(compression, "available_encodings", lambda: ("gzip",))
+        assert negotiate_encoding(header) == expected
+
+    def test_server_preference_on_tie(self, all_encodings):
+        assert negotiate_encoding("gzip, deflate, br, zstd") == "zstd"
+        assert negotiate_encoding("gzip, br") == "br"
+
+    def test_client_quality_wins(self, all_encodings):
+        assert negotiate_encoding("zstd;q=0.5, br;q=0.8, gzip") == "gzip"
+        assert negotiate_encoding("*;q=0.5, gzip;q=0") == "zstd"
+
+    def test_gzip_always_available(self):
+        assert "gzip" in available_encodings()
+
+
+class TestCompress:
+    """一次性与流式压缩"""
+
+    @pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+    def test_round_trip(self, encoding):
+        if encoding not in available_encodings():
+            pytest.skip(f"{encoding} 未安装")
+        compressed = compress(_TEXT, encoding)
+        assert len(compressed) < len(_TEXT) / 10
+        assert _decompress(compressed, encoding) == _TEXT
+
+    def test_level_clamped(self):
+        assert gzip.decompress(compress(_TEXT, "gzip", level=99)) == _TEXT
+        assert gzip.decompress(compress(_TEXT, "gzip", level=-5)) == _TEXT
+
+    def test_unavailable_encoding_raises(self):
+        with pytest.raises(ValueError):
+            compress(_TEXT, "deflate")
+
+    def test_stream_chunks_decodable_as_they_arrive(self):
+        pieces = [_TEXT[i : i + 1000] for i in range(0, len(_TEXT), 1000)]
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        compressed = list(compress_stream(iter(pieces), "gzip"))
+        # 同步 flush 后每块压缩数据都能立刻解出对应的原文
+        for piece, chunk in zip(pieces, compressed):
+            assert decompressor.decompress(chunk) == piece
+        assert gzip.decompress(b"".join(compressed)) == _TEXT
+
+    def test_stream_compressor_finish(self):
+        compressor = StreamCompressor("gzip", 1)
+        body = compressor.compress(b"abc") + compressor.finish()
+        assert gzip.decompress(body) == b"abc"
+
+
+class TestPrecompressedCache:
+    """目录响应的预压缩缓存"""
+
+    def test_matches_full_compression(self):
+        cache = PrecompressedCache()
+        prefix = b'{"jsonrpc":"2.0","result":' + _TEXT + b',"id":'
+        for request_id in (b"1", b'"abc"', b"2", b"1"):
+            body = cache.get(prefix, request_id + b"}", "gzip")
+            assert gzip.decompress(body) == prefix + request_id + b"}"
+        assert cache.misses == 1 and cache.hits == 3
+
+    def test_evicts_least_recently_used(self):
+        cache = PrecompressedCache(max_entries=2)
+        for prefix in (b"a", b"b", b"a", b"c"):
+            cache.get(prefix, b"}", "gzip")
+        assert cache.get_stats()["entries"] == 2
+        cache.get(b"a", b"}", "gzip")
+        assert cache.hits == 2
+
+    def test_per_suffix_cache_without_copyable_state(self):
+        if "br" not in available_encodings():
+            pytest.skip("brotli 未安装")
+        cache = PrecompressedCache()
+        for request_id in (b"1", b"1", b"2"):
+            body = cache.get(_TEXT, request_id, "br")
+            assert _decompress(body, "br") == _TEXT + request_id
+        assert cache.hits == 1 and cache.misses == 2
+
+
+class TestHttpCompression:
+    """/mcp 响应压缩"""
+
+    @pytest.fixture
+    def transport(self, monkeypatch):
+        pytest.importorskip("fastapi")
+        from mingli_mcp.mcp_server.server import MingliMCPServer
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        monkeypatch.setattr(config, "TRANSPORT_TYPE", "stdio")
+        transport = HttpTransport(host="127.0.0.1", port=8080, enable_compression=True)
+        transport.set_message_handler(MingliMCPServer().handle_request)
+        return transport
+
+    @pytest.fixture
+    def client(self, transport):
+        from fastapi.testclient import TestClient
+
+        return TestClient(transport.app)
+
+    @staticmethod
+    def _post(client, method, params=None, request_id=1, accept_encoding="gzip"):
+        return client.post(
+            "/mcp",
+            json={"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}},
+            headers={"Accept-Encoding": accept_encoding},
+        )
+
+    def _chart(self, client, **extra):
+        params = {
+            "name": "get_ziwei_chart",
+            "arguments": {"date": "2000-08-16", "time_index": 6, "gender": "女", **extra},
+        }
+        return self._post(client, "tools/call", params)
+
+    def test_large_result_gzipped(self, client):
+        response = self._chart(client, format="json")
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(response.content) / 3
+        assert json.loads(response.json()["result"]["content"][0]["text"])["basic_info"]
+
+    def test_identity_when_not_accepted(self, client):
+        response = self._post(client, "tools/list", accept_encoding="identity")
+        assert "content-encoding" not in response.headers
+        assert len(response.json()["result"]["tools"]) > 0
+
+    def test_small_response_not_compressed(self, client):
+        response = self._post(client, "ping")
+        assert "content-encoding" not in response.headers
+        assert response.json()["result"] == {}
+
+    def test_threshold_configurable(self, client, monkeypatch):
+        monkeypatch.setattr(config, "COMPRESSION_MIN_SIZE", 0)
+        assert self._post(client, "ping").headers["content-encoding"] == "gzip"
+
+    def test_disabled(self, monkeypatch):
+        pytest.importorskip("fastapi")
+        from fastapi.testclient import TestClient
+
+        from mingli_mcp.mcp_server.server import MingliMCPServer
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        transport = HttpTransport(host="127.0.0.1", port=8080, enable_compression=False)
+        transport.set_message_handler(MingliMCPServer().handle_request)
+        response = self._post(TestClient(transport.app), "tools/list")
+        assert "content-encoding" not in response.headers
+
+    def test_off_by_default(self):
+        pytest.importorskip("fastapi")
+        from fastapi.testclient import TestClient
+
+        from mingli_mcp.mcp_server.server import MingliMCPServer
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        assert config.COMPRESSION_ENABLED is False
+        transport = HttpTransport(host="127.0.0.1", port=8080)
+        transport.set_message_handler(MingliMCPServer().handle_request)
+        response = self._post(TestClient(transport.app), "tools/list")
+        assert transport.enable_compression is False
+        assert "content-encoding" not in response.headers
+
+    def test_catalog_served_from_cache(self, client, transport):
+        plain = self._post(client, "tools/list", accept_encoding="identity").json()
+        for request_id in (1, 2, "three"):
+            response = self._post(client, "tools/list", request_id=request_id)
+            assert response.headers["content-encoding"] == "gzip"
+            assert response.json() == {**plain, "id": request_id}
+        stats = transport.catalog_cache.get_stats()
+        assert stats["misses"] == 1 and stats["hits"] == 2
+
+    def test_tool_calls_bypass_catalog_cache(self, client, transport):
+        self._chart(client)
+        assert transport.catalog_cache.get_stats()["entries"] == 0
+
+    def test_streamed_result_compressed(self, client, monkeypatch):
+        monkeypatch.setattr(config, "STREAM_OUTPUT", True)
+        monkeypatch.setattr(config, "STREAM_CHUNK_SIZE", 512)
+        response = self._chart(client, format="json")
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        text = response.json()["result"]["content"][0]["text"]
+        assert json.loads(text)["basic_info"]
+
+    def test_binary_codec_compressed(self, client):
+        from mingli_mcp.utils.binary_codecs import MSGPACK
+
+        response = client.post(
+            "/mcp",
+            json={"jsonrpc": "2.0", "id": 1, "method": "tools/list", "params": {}},
+            headers={"Accept": "application/msgpack", "Accept-Encoding": "gzip"},
+        )
+        assert response.headers["content-encoding"] == "gzip"
+        assert MSGPACK.loads(response.content)["result"]["tools"]
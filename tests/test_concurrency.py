@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+自适应并发限制测试
+"""
+
+import pytest
+
+from mingli_mcp.utils.concurrency import AdaptiveConcurrencyLimiter
+from mingli_mcp.utils.metrics import Metrics
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _limiter(clock=None, **kwargs):
+    options = {"target_latency": 0.1, "min_limit": 2, "max_limit": 10}
+    options.update(kwargs)
+    return AdaptiveConcurrencyLimiter(clock=clock or FakeClock(), **options)
+
+
+def _run(limiter, clock, latency):
+    started = limiter.try_acquire()
+    assert started is not None
+    clock.now += latency
+    limiter.observe(started)
+    limiter.release()
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """AIMD 调整"""
+
+    def test_starts_at_max_and_sheds_beyond_limit(self):
+        limiter = _limiter(max_limit=3)
+        assert limiter.limit == 3
+        started = [limiter.try_acquire() for _ in range(3)]
+        assert None not in started
+        assert limiter.try_acquire() is None
+        assert limiter.get_stats()["shed"] == 1
+
+        limiter.release()
+        assert limiter.try_acquire() is not None
+
+    def test_slow_latency_decreases_multiplicatively(self):
+        clock = FakeClock()
+        limiter = _limiter(clock, backoff=0.5)
+        _run(limiter, clock, 0.5)
+        assert limiter.limit == 5
+        _run(limiter, clock, 0.5)
+        assert limiter.limit == 2
+        # 不低于下界
+        _run(limiter, clock, 0.5)
+        assert limiter.limit == 2
+
+    def test_latency_measured_from_acquire_to_observe(self):
+        clock = FakeClock()
+        limiter = _limiter(clock)
+        started = limiter.try_acquire()
+        # 排队等待与计算都算在内
+        clock.now += 0.25
+        limiter.observe(started)
+        assert limiter.recent_latency == pytest.approx(0.25)
+        assert limiter.get_stats()["recent_latency_ms"] == 250
+        assert limiter.retry_after() == 1
+        assert limiter.inflight == 1
+        limiter.release()
+        assert limiter.inflight == 0
+
+    def test_slow_release_does_not_lower_limit(self):
+        clock = FakeClock()
+        limiter = _limiter(clock, backoff=0.5)
+        for _ in range(5):
+            started = limiter.try_acquire()
+            clock.now += 0.01
+            limiter.observe(started)
+            # 客户端读得很慢：名额很久之后才归还
+            clock.now += 30
+            limiter.release()
+        assert limiter.limit == 10
+        assert limiter.recent_latency == pytest.approx(0.01)
+
+    def test_burst_of_slow_completions_decreases_once(self):
+        clock = FakeClock()
+        limiter = _limiter(clock, backoff=0.5)
+        started = [limiter.try_acquire() for _ in range(5)]
+        clock.now += 0.5
+        for value in started:
+            limiter.observe(value)
+            limiter.release()
+        assert limiter.limit == 5
+
+    def test_fast_latency_increases_only_when_saturated(self):
+        clock = FakeClock()
+        limiter = _limiter(clock, backoff=0.5)
+        _run(limiter, clock, 0.5)
+        assert limiter.limit == 5
+
+        # 滑动平均回落到目标以下后，上限远未用到：不放宽
+        for _ in range(20):
+            _run(limiter, clock, 0.01)
+        limit = limiter.limit
+        for _ in range(20):
+            _run(limiter, clock, 0.01)
+        assert limiter.limit == limit
+
+        # 用满上限：约每轮 +1
+        for _ in range(3):
+            started = [limiter.try_acquire() for _ in range(limit)]
+            clock.now += 0.01
+            for value in started:
+                limiter.observe(value)
+                limiter.release()
+        assert limiter.limit == limit + 1
+
+    def test_never_exceeds_max(self):
+        clock = FakeClock()
+        limiter = _limiter(clock, max_limit=3)
+        for _ in range(50):
+            started = [limiter.try_acquire() for _ in range(3)]
+            clock.now += 0.01
+            for value in started:
+                limiter.observe(value)
+                limiter.release()
+        assert limiter.limit == 3
+
+    def test_defaults_from_config(self, monkeypatch):
+        from mingli_mcp.config import config
+
+        monkeypatch.setattr(config, "CONCURRENCY_TARGET_LATENCY_MS", 50)
+        monkeypatch.setattr(config, "CONCURRENCY_MIN_LIMIT", 3)
+        monkeypatch.setattr(config, "CONCURRENCY_MAX_LIMIT", 7)
+        limiter = AdaptiveConcurrencyLimiter()
+        assert (limiter.target_latency, limiter.min_limit, limiter.max_limit) == (0.05, 3, 7)
+
+    def test_recent_compute_time_is_smoothed(self):
+        metrics = Metrics()
+        assert metrics.get_recent_compute_time() is None
+        metrics.record_worker_timing(queue_wait=0.0, compute=0.1)
+        metrics.record_worker_timing(queue_wait=0.0, compute=0.2)
+        assert 0.1 < metrics.get_recent_compute_time() < 0.2
+        assert metrics.get_summary()["threadpool"]["recent_compute_ms"] > 100
+
+
+class TestHttpConcurrency:
+    """HTTP 端点的负载削减"""
+
+    @pytest.fixture
+    def transport(self):
+        pytest.importorskip("fastapi")
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        transport = HttpTransport(
+            host="127.0.0.1",
+            port=8080,
+            api_key="test-api-key",
+            enable_rate_limit=False,
+            enable_adaptive_concurrency=True,
+        )
+        transport.concurrency_limiter = _limiter(min_limit=1, max_limit=1)
+        transport.set_message_handler(
+            lambda message: {"jsonrpc": "2.0", "id": message.get("id"), "result": {}}
+        )
+        return transport
+
+    def _post(self, client, method):
+        body = {"jsonrpc": "2.0", "id": 1, "method": method, "params": {"name": "x"}}
+        return client.post("/mcp", json=body, headers={"Authorization": "Bearer test-api-key"})
+
+    def test_tool_calls_are_shed_at_limit(self, transport):
+        from fastapi.testclient import TestClient
+
+        client = TestClient(transport.app)
+        assert self._post(client, "tools/call").status_code == 200
+        assert transport.concurrency_limiter.inflight == 0
+
+        # 名额被占满时工具调用返回503，发现类请求不受影响
+        transport.concurrency_limiter.try_acquire()
+        response = self._post(client, "tools/call")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert self._post(client, "tools/list").status_code == 200
+
+    def test_signal_covers_only_admitted_tool_calls(self, transport):
+        from fastapi.testclient import TestClient
+
+        client = TestClient(transport.app)
+        for method in ("initialize", "tools/list", "ping"):
+            self._post(client, method)
+        assert transport.concurrency_limiter.recent_latency is None
+        self._post(client, "tools/call")
+        assert transport.concurrency_limiter.recent_latency is not None
+
+    def test_slot_is_released_when_handler_fails(self, transport):
+        from fastapi.testclient import TestClient
+
+        def failing(message):
+            raise RuntimeError("boom")
+
+        transport.set_message_handler(failing)
+        client = TestClient(transport.app)
+        assert self._post(client, "tools/call").status_code == 500
+        assert transport.concurrency_limiter.inflight == 0
+
+    def test_slot_held_until_stream_finishes(self, transport):
+        from fastapi.testclient import TestClient
+
+        from mingli_mcp.utils.streaming import StreamingText
+
+        inflight = []
+
+        def fragments(fail):
+            for index in range(3):
+                inflight.append(transport.concurrency_limiter.inflight)
+                yield f"{index}"
+            if fail:
+                raise ValueError("render failed")
+
+        def handler(message):
+            stream = StreamingText(fragments(message["params"]["name"] == "fail"), chunk_size=1)
+            result = {"content": [{"type": "text", "text": stream}]}
+            return {"jsonrpc": "2.0", "id": message.get("id"), "result": result}
+
+        transport.set_message_handler(handler)
+        client = TestClient(transport.app)
+        response = self._post(client, "tools/call")
+        assert response.json()["result"]["content"][0]["text"] == "012"
+        assert inflight == [1, 1, 1]
+        assert transport.concurrency_limiter.inflight == 0
+
+        body = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "fail"}}
+        response = client.post("/mcp", json=body, headers={"Authorization": "Bearer test-api-key"})
+        assert response.json()["result"]["isError"] is True
+        assert transport.concurrency_limiter.inflight == 0
+
+    def test_slow_consumer_does_not_lower_limit(self, transport):
+        from fastapi.testclient import TestClient
+
+        from mingli_mcp.utils.streaming import StreamingText
+
+        clock = FakeClock()
+        limiter = _limiter(clock, backoff=0.5)
+        transport.concurrency_limiter = limiter
+
+        def fragments():
+            yield "first"
+            for index in range(3):
+                # 首块写出后的耗时取决于客户端读取速度，用时钟前进模拟读得很慢的客户端
+                clock.now += 5
+                yield f"{index}"
+
+        def handler(message):
+            stream = StreamingText(fragments(), chunk_size=1)
+            result = {"content": [{"type": "text", "text": stream}]}
+            return {"jsonrpc": "2.0", "id": message.get("id"), "result": result}
+
+        transport.set_message_handler(handler)
+        client = TestClient(transport.app)
+        for _ in range(3):
+            response = self._post(client, "tools/call")
+            assert response.json()["result"]["content"][0]["text"] == "first012"
+        assert limiter.limit == 10
+        assert limiter.recent_latency == 0
+        assert limiter.inflight == 0
+
+    def test_stats_include_concurrency(self, transport):
+        from fastapi.testclient import TestClient
+
+        client = TestClient(transport.app)
+        stats = client.get("/stats", headers={"Authorization": "Bearer test-api-key"}).json()
+        assert stats["concurrency"]["max_limit"] == 1
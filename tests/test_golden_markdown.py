@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Markdown 输出黄金文件测试
+
+固定输入的 Markdown 渲染结果必须与 tests/golden/ 下的文件逐字节一致，
+格式化器重构（如改用列表拼接）不能改变任何输出。
+
+有意修改输出格式时，用 UPDATE_GOLDEN=1 重新生成：
+    UPDATE_GOLDEN=1 pytest tests/test_golden_markdown.py
+"""
+
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from mingli_mcp.systems import get_system
+
+GOLDEN_DIR = Path(__file__).parent / "golden"
+
+_FEMALE = {"date": "2000-08-16", "time_index": 6, "gender": "女"}
+_MALE = {"date": "1985-03-20", "time_index": 4, "gender": "男"}
+_CHILD = {"date": "2020-01-01", "time_index": 0, "gender": "男"}
+_QUERY = datetime(2026, 3, 1)
+
+
+def _ziwei_chart(birth, language="zh-CN"):
+    ziwei = get_system("ziwei")
+    return ziwei.formatter.format_chart_markdown(ziwei.get_chart(birth, language))
+
+
+def _ziwei_fortune(birth, language="zh-CN"):
+    ziwei = get_system("ziwei")
+    return ziwei.formatter.format_fortune_markdown(ziwei.get_fortune(birth, _QUERY, language))
+
+
+def _ziwei_palace(birth, palace):
+    ziwei = get_system("ziwei")
+    return ziwei.formatter.format_palace_analysis_markdown(ziwei.analyze_palace(birth, palace))
+
+
+def _bazi_chart(birth):
+    bazi = get_system("bazi")
+    return bazi.formatter.format_chart_markdown(bazi.get_chart(birth))
+
+
+def _bazi_fortune(birth, query=_QUERY):
+    bazi = get_system("bazi")
+    return bazi.formatter.format_fortune_markdown(bazi.get_fortune(birth, query))
+
+
+def _bazi_element(birth):
+    bazi = get_system("bazi")
+    return bazi.formatter.format_element_analysis_markdown(bazi.analyze_element(birth))
+
+
+def _bazi_legacy_fortune():
+    from mingli_mcp.systems.bazi.formatter import BaziFormatter
+
+    legacy = {
+        "query_date": "2024-01-15",
+        "age": 24,
+        "day_master": "丙",
+        "da_yun": {"description": "乙酉大运", "age_range": "22-31岁"},
+        "liu_nian": {"year": 2024, "gan_zhi": "甲辰", "zodiac": "龙"},
+        "basic_chart": {"eight_char": "庚辰 甲申 丙寅 庚寅"},
+    }
+    return BaziFormatter().format_fortune_markdown(legacy)
+
+
+CASES = {
+    "ziwei_chart_female": lambda: _ziwei_chart(_FEMALE),
+    "ziwei_chart_male": lambda: _ziwei_chart(_MALE),
+    "ziwei_chart_en": lambda: _ziwei_chart(_FEMALE, "en-US"),
+    "ziwei_fortune_female": lambda: _ziwei_fortune(_FEMALE),
+    "ziwei_fortune_male_en": lambda: _ziwei_fortune(_MALE, "en-US"),
+    "ziwei_palace_soul": lambda: _ziwei_palace(_FEMALE, "命宫"),
+    "ziwei_palace_wealth": lambda: _ziwei_palace(_MALE, "财帛"),
+    "bazi_chart_female": lambda: _bazi_chart(_FEMALE),
+    "bazi_chart_male": lambda: _bazi_chart(_MALE),
+    "bazi_fortune_female": lambda: _bazi_fortune(_FEMALE),
+    "bazi_fortune_male": lambda: _bazi_fortune(_MALE),
+    "bazi_fortune_pre_start": lambda: _bazi_fortune(_CHILD, datetime(2021, 1, 1)),
+    "bazi_fortune_legacy": _bazi_legacy_fortune,
+    "bazi_element_female": lambda: _bazi_element(_FEMALE),
+    "bazi_element_male": lambda: _bazi_element(_MALE),
+}
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_markdown_matches_golden(name):
+    rendered = CASES[name]()
+    path = GOLDEN_DIR / f"{name}.md"
+    if os.getenv("UPDATE_GOLDEN"):
+        path.write_text(rendered, encoding="utf-8")
+    assert path.exists(), f"missing golden file {path.name}; run with UPDATE_GOLDEN=1"
+    assert rendered == path.read_text(encoding="utf-8")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+延迟加载测试：initialize / tools/list 不导入排盘引擎
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from mingli_mcp import systems
+from mingli_mcp.core.exceptions import SystemNotFoundError
+
+ENGINE_PREFIXES = ("iztro_py", "lunar_python", "fastapi")
+
+# 在全新解释器里跑，避免被测试进程里已导入的模块干扰
+_PROBE = """
+import json, sys
+from mingli_mcp.mcp_server.server import MingliMCPServer
+
+def engines():
+    return sorted({name.split(".")[0] for name in sys.modules if name.startswith(%(prefixes)r)})
+
+server = MingliMCPServer()
+report = {"construct": engines()}
+server.handle_request({
+    "jsonrpc": "2.0", "id": 1, "method": "initialize",
+    "params": {"protocolVersion": "2025-06-18", "capabilities": {},
+               "clientInfo": {"name": "probe", "version": "1"}},
+})
+tools = server.handle_request({"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+report["tools"] = len(tools["result"]["tools"])
+report["discovery"] = engines()
+server.handle_request({
+    "jsonrpc": "2.0", "id": 3, "method": "tools/call",
+    "params": {"name": "get_bazi_chart",
+               "arguments": {"date": "2000-08-16", "time_index": 6, "gender": "女"}},
+})
+report["bazi_call"] = engines()
+print(json.dumps(report))
+""" % {
+    "prefixes": ENGINE_PREFIXES
+}
+
+
+@pytest.fixture
+def probe_report():
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        capture_output=True,
+        text=True,
+        timeout=120,
+        env={**os.environ, "TRANSPORT_TYPE": "stdio", "LOG_LEVEL": "WARNING"},
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestColdStart:
+    """冷启动路径"""
+
+    def test_discovery_does_not_import_engines(self, probe_report):
+        assert probe_report["construct"] == []
+        assert probe_report["tools"] > 0
+        assert probe_report["discovery"] == []
+
+    def test_first_tool_call_imports_only_its_engine(self, probe_report):
+        assert probe_report["bazi_call"] == ["lunar_python"]
+
+
+class TestLazySystemRegistry:
+    """系统按导入路径登记"""
+
+    def test_builtin_systems_are_listed_without_import(self):
+        assert {"ziwei", "bazi"} <= set(systems.list_systems())
+
+    def test_get_system_imports_on_demand(self):
+        system = systems.get_system("bazi")
+        assert systems.is_system_loaded("bazi")
+        assert system.get_system_name()
+
+    def test_unavailable_system_is_reported_and_dropped(self, monkeypatch):
+        monkeypatch.setattr(systems, "_LAZY_SYSTEMS", {"broken": "no_such_module:System"})
+        with pytest.raises(SystemNotFoundError, match="unavailable"):
+            systems.get_system("broken")
+        assert "broken" not in systems.list_systems()
+
+    def test_unknown_system(self):
+        with pytest.raises(SystemNotFoundError, match="not registered"):
+            systems.get_system("tarot")
+
+
+class TestLazyToolRegistry:
+    """工具处理函数按导入路径登记"""
+
+    def test_handler_is_resolved_and_cached(self):
+        from mingli_mcp.mcp_server.tools import ToolRegistry
+        from mingli_mcp.mcp_server.tools.bazi_handlers import handle_get_bazi_chart
+
+        registry = ToolRegistry()
+        assert registry.get_handler("get_bazi_chart") is handle_get_bazi_chart
+        assert registry._tools["get_bazi_chart"] is handle_get_bazi_chart
+        assert registry.get_handler("nope") is None
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+事件循环与线程池监控测试
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from mingli_mcp.utils.loop_monitor import (
+    EventLoopMonitor,
+    run_timed_in_threadpool,
+    sample_threadpool,
+)
+from mingli_mcp.utils.metrics import Metrics, get_metrics
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    get_metrics().reset()
+    yield
+    get_metrics().reset()
+
+
+class TestEventLoopMonitor:
+    """事件循环调度延迟"""
+
+    def test_detects_blocked_loop(self):
+        async def scenario():
+            monitor = EventLoopMonitor(interval=0.01)
+            monitor.start()
+            await asyncio.sleep(0.02)
+            # 同步阻塞事件循环，模拟在async路径里直接做排盘计算
+            time.sleep(0.1)
+            await asyncio.sleep(0.03)
+            await monitor.stop()
+            return monitor
+
+        monitor = asyncio.run(scenario())
+
+        summary = get_metrics().get_summary()
+        assert not monitor.running
+        assert summary["event_loop"]["samples"] >= 2
+        assert summary["event_loop"]["max_lag_ms"] >= 50
+
+    def test_zero_interval_disables_monitor(self):
+        async def scenario():
+            monitor = EventLoopMonitor(interval=0)
+            monitor.start()
+            running = monitor.running
+            await monitor.stop()
+            return running
+
+        assert asyncio.run(scenario()) is False
+
+    def test_samples_threadpool(self):
+        async def scenario():
+            sample_threadpool()
+
+        asyncio.run(scenario())
+
+        threadpool = get_metrics().get_summary()["threadpool"]
+        assert threadpool["limit"] > 0
+        assert threadpool["active"] == 0
+
+
+class TestWorkerTiming:
+    """排队等待与计算耗时分开记录"""
+
+    def test_queue_wait_is_separate_from_compute(self):
+        from anyio import to_thread
+
+        async def scenario():
+            # 线程池只有1个线程时，第二个任务必须等第一个算完
+            to_thread.current_default_thread_limiter().total_tokens = 1
+            await asyncio.gather(
+                run_timed_in_threadpool(time.sleep, 0.05),
+                run_timed_in_threadpool(time.sleep, 0.05),
+            )
+
+        asyncio.run(scenario())
+
+        threadpool = get_metrics().get_summary()["threadpool"]
+        assert threadpool["calls"] == 2
+        assert threadpool["max_queue_wait_ms"] >= 40
+        assert threadpool["max_compute_ms"] >= 40
+
+    def test_returns_result(self):
+        result = asyncio.run(run_timed_in_threadpool(lambda x: x * 2, 21))
+        assert result == 42
+
+
+class TestMetricsRuntime:
+    """Metrics中的运行时汇总"""
+
+    def test_summary_and_reset(self):
+        metrics = Metrics()
+        metrics.record_loop_lag(0.002)
+        metrics.record_threadpool(active=3, queued=5, limit=40)
+        metrics.record_threadpool(active=1, queued=0, limit=40)
+        metrics.record_worker_timing(queue_wait=0.01, compute=0.03)
+
+        summary = metrics.get_summary()
+        assert summary["event_loop"] == {"samples": 1, "avg_lag_ms": 2.0, "max_lag_ms": 2.0}
+        assert summary["threadpool"]["queued"] == 0
+        assert summary["threadpool"]["max_queued"] == 5
+        assert summary["threadpool"]["avg_queue_wait_ms"] == 10.0
+        assert summary["threadpool"]["avg_compute_ms"] == 30.0
+
+        metrics.reset()
+        assert metrics.get_summary()["threadpool"]["max_queued"] == 0
+
+
+class TestHttpIntegration:
+    """HTTP传输接入监控"""
+
+    def test_monitor_runs_with_app_and_stats_expose_gauges(self):
+        pytest.importorskip("fastapi")
+        from fastapi.testclient import TestClient
+
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        transport = HttpTransport(host="127.0.0.1", port=8080, api_key="k")
+        transport.set_message_handler(lambda message: {"jsonrpc": "2.0", "id": 1, "result": {}})
+        auth = {"Authorization": "Bearer k"}
+
+        with TestClient(transport.app) as client:
+            assert transport.loop_monitor.running
+            client.post("/mcp", headers=auth, json={"jsonrpc": "2.0", "id": 1, "method": "ping"})
+            stats = client.get("/stats", headers=auth).json()["tool_calls"]
+        assert not transport.loop_monitor.running
+
+        assert stats["threadpool"]["calls"] == 1
+        assert stats["threadpool"]["limit"] > 0
+        assert "event_loop" in stats
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+内存统计测试
+"""
+
+import gc
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+
+from mingli_mcp.mcp_server.server import MingliMCPServer
+from mingli_mcp.utils import memory
+from mingli_mcp.utils.memory import (
+    GcPauseTracker,
+    MemorySampler,
+    get_memory_stats,
+    get_process_memory,
+)
+from mingli_mcp.utils.metrics import Metrics, get_metrics
+
+BIRTH_ARGS = {"date": "2000-08-16", "time_index": 6, "gender": "女"}
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    get_metrics().reset()
+    yield
+    get_metrics().reset()
+
+
+class TestMemorySampler:
+    """按比例抽样"""
+
+    def test_disabled_by_default(self):
+        sampler = MemorySampler()
+        with sampler.sample("t"):
+            pass
+        assert get_metrics().get_summary()["memory"] == {}
+
+    def test_samples_one_in_n(self):
+        sampler = MemorySampler(sample_rate=3)
+        for _ in range(9):
+            with sampler.sample("t"):
+                pass
+        assert get_metrics().get_summary()["memory"]["t"]["samples"] == 3
+
+    def test_records_peak_allocation(self):
+        sampler = MemorySampler(sample_rate=1)
+        with sampler.sample("t"):
+            data = [bytearray(1024) for _ in range(1000)]
+            del data
+
+        stats = get_metrics().get_summary()["memory"]["t"]
+        assert stats["max_peak_bytes"] >= 1024 * 1000
+        assert stats["avg_retained_bytes"] < 1024 * 1000
+
+    def test_stops_tracing_it_started(self):
+        assert not tracemalloc.is_tracing()
+        with MemorySampler(sample_rate=1).sample("t"):
+            assert tracemalloc.is_tracing()
+        assert not tracemalloc.is_tracing()
+
+    def test_keeps_existing_tracing(self):
+        tracemalloc.start()
+        try:
+            with MemorySampler(sample_rate=1).sample("t"):
+                pass
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+
+    def test_nested_sample_is_skipped(self):
+        sampler = MemorySampler(sample_rate=1)
+        with sampler.sample("outer"):
+            with sampler.sample("inner"):
+                pass
+        assert set(get_metrics().get_summary()["memory"]) == {"outer"}
+
+    def test_records_even_when_block_raises(self):
+        sampler = MemorySampler(sample_rate=1)
+        with pytest.raises(ValueError):
+            with sampler.sample("t"):
+                raise ValueError("boom")
+        assert get_metrics().get_summary()["memory"]["t"]["samples"] == 1
+
+
+class TestMetricsMemory:
+    """Metrics中的内存汇总"""
+
+    def test_averages_and_max(self):
+        metrics = Metrics()
+        metrics.record_memory("t", peak_bytes=100, retained_bytes=10, net_blocks=2)
+        metrics.record_memory("t", peak_bytes=300, retained_bytes=-10, net_blocks=0)
+
+        assert metrics.get_summary()["memory"]["t"] == {
+            "samples": 2,
+            "avg_peak_bytes": 200,
+            "max_peak_bytes": 300,
+            "avg_retained_bytes": 0,
+            "avg_net_blocks": 1,
+        }
+
+    def test_reset_clears_memory(self):
+        metrics = Metrics()
+        metrics.record_memory("t", peak_bytes=1, retained_bytes=0, net_blocks=0)
+        metrics.reset()
+        assert metrics.get_summary()["memory"] == {}
+
+
+class TestProcessStats:
+    """进程RSS与GC停顿"""
+
+    def test_process_memory_is_positive(self):
+        stats = get_process_memory()
+        assert stats["rss_bytes"] > 0
+        assert stats["max_rss_bytes"] > 0
+
+    def test_gc_pauses_are_tracked(self):
+        tracker = GcPauseTracker()
+        tracker.install()
+        try:
+            gc.collect()
+        finally:
+            tracker.uninstall()
+
+        gen2 = tracker.get_stats()["generations"]["2"]
+        assert gen2["collections"] >= 1
+        assert gen2["total_pause_ms"] >= 0
+
+    def test_install_is_idempotent(self):
+        tracker = GcPauseTracker()
+        tracker.install()
+        tracker.install()
+        try:
+            assert gc.callbacks.count(tracker._callback) == 1
+        finally:
+            tracker.uninstall()
+        assert tracker._callback not in gc.callbacks
+
+    def test_gc_section_only_when_enabled(self):
+        assert "gc" not in get_memory_stats()
+        with patch.object(memory, "_global_gc_tracker", GcPauseTracker()) as tracker:
+            tracker.install()
+            try:
+                assert "generations" in get_memory_stats()["gc"]
+            finally:
+                tracker.uninstall()
+
+
+class TestMemoryIntegration:
+    """工具调用接入内存抽样"""
+
+    def test_tool_call_is_sampled(self):
+        with patch.object(MingliMCPServer, "_initialize_transport"):
+            server = MingliMCPServer()
+
+        with patch.object(memory, "_global_sampler", MemorySampler(sample_rate=1)):
+            server.handle_request(
+                {
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "tools/call",
+                    "params": {"name": "get_ziwei_chart", "arguments": BIRTH_ARGS},
+                }
+            )
+
+        stats = get_metrics().get_summary()["memory"]["get_ziwei_chart"]
+        assert stats["samples"] == 1
+        assert stats["max_peak_bytes"] > 0
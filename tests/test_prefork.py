@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+pre-fork 多进程服务测试
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from mingli_mcp.transports.prefork import aggregate_stats, read_pss_kb  # noqa: E402
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+
+# 在子进程中运行主进程：绑定随机端口后打印端口号
+_MASTER = """
+import os
+os.environ["TRANSPORT_TYPE"] = "stdio"
+from mingli_mcp.mcp_server.server import MingliMCPServer
+from mingli_mcp.transports.http_transport import HttpTransport
+from mingli_mcp.transports.prefork import PreforkSupervisor
+
+transport = HttpTransport(host="127.0.0.1", port=0, api_key="test-api-key",
+                          enable_rate_limit=False, enable_warmup=False, workers=2)
+transport.set_message_handler(MingliMCPServer().handle_request)
+supervisor = PreforkSupervisor(transport, 2, stats_interval=0.1, heartbeat_timeout=3)
+print(supervisor.bind().getsockname()[1], flush=True)
+supervisor.run()
+"""
+
+_HEADERS = {
+    "Authorization": "Bearer test-api-key",
+    "Content-Type": "application/json",
+    "Accept": "application/json, text/event-stream",
+}
+
+
+class TestAggregateStats:
+    """指标汇总"""
+
+    def test_counts_are_summed_and_merged(self):
+        totals = aggregate_stats(
+            [
+                {
+                    "total_requests": 3,
+                    "successful_requests": 2,
+                    "failed_requests": 1,
+                    "requests_per_second": 0.5,
+                    "system_calls": {"ziwei": 3},
+                    "error_counts": {"ValidationError": 1},
+                },
+                {"total_requests": 2, "successful_requests": 2, "system_calls": {"ziwei": 1}},
+                {},
+            ]
+        )
+        assert totals["total_requests"] == 5
+        assert totals["failed_requests"] == 1
+        assert totals["system_calls"] == {"ziwei": 4}
+        assert totals["error_counts"] == {"ValidationError": 1}
+        assert totals["method_calls"] == {}
+
+    def test_pss_of_missing_process(self):
+        assert read_pss_kb(-1) is None
+
+
+class TestPreforkSupervisor:
+    """主进程派生、监督与统计汇总"""
+
+    @pytest.fixture
+    def master(self):
+        process = subprocess.Popen(
+            [sys.executable, "-c", _MASTER],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            env={**os.environ, "LOG_LEVEL": "WARNING"},
+        )
+        port = int(process.stdout.readline())
+        yield process, f"http://127.0.0.1:{port}"
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
+
+    def _request(self, url, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(url, data=data, headers=_HEADERS)
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return json.load(response)
+
+    def _cluster(self, base, predicate, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                cluster = self._request(f"{base}/stats").get("workers")
+            except OSError:
+                cluster = None
+            if cluster is not None and predicate(cluster):
+                return cluster
+            assert time.monotonic() < deadline, cluster
+            time.sleep(0.1)
+
+    def test_workers_serve_report_and_respawn(self, master):
+        process, base = master
+        cluster = self._cluster(base, lambda c: c["alive"] == 2 and c["per_worker"][1]["boot_ms"])
+        assert cluster["master_pid"] == process.pid
+
+        body = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "tools/call",
+            "params": {
+                "name": "get_bazi_chart",
+                "arguments": {"date": "2000-08-16", "time_index": 6, "gender": "女"},
+            },
+        }
+        for _ in range(4):
+            assert "result" in self._request(f"{base}/mcp", body)
+        self._cluster(base, lambda c: c["totals"]["system_calls"].get("bazi") == 4)
+
+        # 杀掉一个 worker：主进程回收并重新 fork
+        victim = cluster["per_worker"][0]["pid"]
+        os.kill(victim, signal.SIGKILL)
+        cluster = self._cluster(
+            base,
+            lambda c: c["restarts"] == 1
+            and c["alive"] == 2
+            and victim not in [w["pid"] for w in c["per_worker"]],
+        )
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+        for worker in cluster["per_worker"]:
+            with pytest.raises(ProcessLookupError):
+                os.kill(worker["pid"], 0)
+
+    def test_hung_worker_is_killed(self, master):
+        _, base = master
+        cluster = self._cluster(base, lambda c: c["alive"] == 2 and c["per_worker"][1]["boot_ms"])
+        victim = cluster["per_worker"][0]["pid"]
+        os.kill(victim, signal.SIGSTOP)
+        self._cluster(
+            base,
+            lambda c: c["hung_kills"] == 1
+            and c["alive"] == 2
+            and victim not in [w["pid"] for w in c["per_worker"]],
+        )
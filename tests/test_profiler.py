@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+按需采样分析器测试
+"""
+
+import threading
+import time
+
+import pytest
+
+from mingli_mcp.utils.profiler import SamplingProfiler
+
+
+def _busy_ziwei_work(stop: threading.Event):
+    """在后台线程里反复排盘，模拟正在处理请求的worker"""
+    from mingli_mcp.systems import get_system
+
+    system = get_system("ziwei")
+    birth_info = {"date": "2000-08-16", "time_index": 6, "gender": "女", "calendar": "solar"}
+    while not stop.is_set():
+        system.get_chart(birth_info)
+
+
+@pytest.fixture
+def busy_worker():
+    stop = threading.Event()
+    thread = threading.Thread(target=_busy_ziwei_work, args=(stop,), daemon=True)
+    thread.start()
+    yield
+    stop.set()
+    thread.join(timeout=5)
+
+
+class TestSamplingProfiler:
+    """采样分析器"""
+
+    def test_collapsed_stacks_include_engine_frames(self, busy_worker):
+        result = SamplingProfiler(interval=0.001).profile(0.5)
+
+        assert result["samples"] > 0
+        lines = result["collapsed"].splitlines()
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        assert any("iztro_py" in line for line in lines)
+
+    def test_top_functions_grouped_by_focus(self, busy_worker):
+        result = SamplingProfiler(interval=0.001).profile(0.5)
+
+        top = result["top_functions"]
+        assert set(top) == {"iztro_py", "lunar_python", "formatters"}
+        assert top["iztro_py"]
+        first = top["iztro_py"][0]
+        assert first["function"].startswith("iztro_py")
+        assert first["cumulative_seconds"] > 0
+        assert 0 < first["percent"] <= 100
+
+    def test_idle_threads_are_filtered_by_default(self):
+        stop = threading.Event()
+        idle = threading.Thread(target=stop.wait, daemon=True)
+        idle.start()
+        try:
+            result = SamplingProfiler(interval=0.001).profile(0.05)
+            everything = SamplingProfiler(interval=0.001).profile(0.05, all_threads=True)
+        finally:
+            stop.set()
+            idle.join()
+
+        assert result["samples"] == 0
+        assert everything["samples"] > 0
+
+    def test_concurrent_profile_is_rejected(self):
+        profiler = SamplingProfiler()
+        worker = threading.Thread(target=profiler.profile, args=(0.3,))
+        worker.start()
+        try:
+            deadline = time.monotonic() + 1
+            while not profiler.active and time.monotonic() < deadline:
+                time.sleep(0.001)
+            assert profiler.profile(0.01) is None
+        finally:
+            worker.join()
+        assert not profiler.active
+
+
+class TestProfileEndpoint:
+    """POST /debug/profile"""
+
+    @pytest.fixture
+    def make_client(self):
+        pytest.importorskip("fastapi")
+        from fastapi.testclient import TestClient
+
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        def _make(api_key="k"):
+            transport = HttpTransport(host="127.0.0.1", port=8080, api_key=api_key)
+            return transport, TestClient(transport.app)
+
+        return _make
+
+    def test_requires_configured_api_key(self, make_client):
+        _, client = make_client(api_key=None)
+        assert client.post("/debug/profile?seconds=0.01").status_code == 404
+
+    def test_rejects_wrong_api_key(self, make_client):
+        _, client = make_client()
+        response = client.post(
+            "/debug/profile?seconds=0.01", headers={"Authorization": "Bearer nope"}
+        )
+        assert response.status_code == 401
+
+    def test_seconds_is_bounded(self, make_client):
+        _, client = make_client()
+        auth = {"Authorization": "Bearer k"}
+        assert client.post("/debug/profile?seconds=0", headers=auth).status_code == 400
+        assert client.post("/debug/profile?seconds=3600", headers=auth).status_code == 400
+
+    def test_returns_json_report(self, make_client):
+        _, client = make_client()
+        response = client.post("/debug/profile?seconds=0.05", headers={"Authorization": "Bearer k"})
+
+        assert response.status_code == 200
+        payload = response.json()
+        assert {"samples", "collapsed", "top_functions"} <= set(payload)
+
+    def test_collapsed_format_returns_text(self, make_client):
+        _, client = make_client()
+        response = client.post(
+            "/debug/profile?seconds=0.05&format=collapsed&all_threads=true",
+            headers={"Authorization": "Bearer k"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.text.strip()
+
+    def test_busy_profiler_returns_409(self, make_client):
+        transport, client = make_client()
+        with transport.profiler._busy:
+            response = client.post(
+                "/debug/profile?seconds=0.01", headers={"Authorization": "Bearer k"}
+            )
+        assert response.status_code == 409
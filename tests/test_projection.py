@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+字段投影（detail / fields 参数）测试
+"""
+
+import json
+
+import pytest
+
+from mingli_mcp.core.exceptions import ValidationError
+from mingli_mcp.mcp_server.tools.bazi_handlers import handle_get_bazi_chart, handle_get_bazi_fortune
+from mingli_mcp.mcp_server.tools.definitions import DETAIL_PRESETS, OUTPUT_SCHEMAS
+from mingli_mcp.mcp_server.tools.output import StructuredResult
+from mingli_mcp.mcp_server.tools.ziwei_handlers import (
+    handle_get_ziwei_chart,
+    handle_get_ziwei_fortune,
+)
+from mingli_mcp.systems.bazi.bazi_system import BaziSystem
+from mingli_mcp.systems.ziwei.formatter import ZiweiFormatter
+from mingli_mcp.utils.projection import ALL_FIELDS, FieldSelection, resolve_selection
+from tests.test_structured_output import CALLS, _check_schema
+
+HANDLERS = {
+    "get_ziwei_chart": handle_get_ziwei_chart,
+    "get_ziwei_fortune": handle_get_ziwei_fortune,
+    "get_bazi_chart": handle_get_bazi_chart,
+    "get_bazi_fortune": handle_get_bazi_fortune,
+}
+
+
+def _call(tool, **extra):
+    result = HANDLERS[tool]({**CALLS[tool], "format": "structured", **extra})
+    assert isinstance(result, StructuredResult)
+    return result.data
+
+
+class TestFieldSelection:
+    """FieldSelection 本身"""
+
+    def test_all_fields(self):
+        assert ALL_FIELDS.is_all
+        assert ALL_FIELDS.wants("anything.below")
+        data = {"a": 1}
+        assert ALL_FIELDS.project(data) is data
+
+    def test_wants_prefixes_and_subtrees(self):
+        selection = FieldSelection.from_paths(["palaces.major_stars", "basic_info"])
+        assert selection.wants("palaces")
+        assert selection.wants("palaces.major_stars")
+        assert selection.wants("palaces.major_stars.name")
+        assert selection.wants("basic_info.命主")
+        assert not selection.wants("palaces.minor_stars")
+        assert not selection.wants("metadata")
+
+    def test_whole_field_overrides_subpaths(self):
+        assert FieldSelection.from_paths(["a.b", "a"]) == FieldSelection.from_paths(["a"])
+        assert FieldSelection.from_paths(["a", "a.b"]) == FieldSelection.from_paths(["a"])
+
+    def test_project_is_list_transparent(self):
+        selection = FieldSelection.from_paths(["items.name", "total"])
+        data = {"items": [{"name": "x", "size": 1}, {"name": "y", "size": 2}], "total": 2, "x": 0}
+        assert selection.project(data) == {"items": [{"name": "x"}, {"name": "y"}], "total": 2}
+
+    def test_child(self):
+        selection = FieldSelection.from_paths(["basic_chart.zodiac"])
+        assert selection.child("basic_chart").to_paths() == ["zodiac"]
+        assert not selection.child("da_yun").wants("gan_zhi")
+        assert ALL_FIELDS.child("basic_chart").is_all
+
+
+class TestResolveSelection:
+    """detail / fields 参数解析"""
+
+    schema = OUTPUT_SCHEMAS["get_bazi_chart"]
+    presets = DETAIL_PRESETS["get_bazi_chart"]
+
+    def test_default_is_full(self):
+        assert resolve_selection(None, None, self.presets, self.schema).is_all
+        assert resolve_selection("full", None, self.presets, self.schema).is_all
+
+    def test_fields_only_adds_required(self):
+        selection = resolve_selection(None, ["zodiac"], self.presets, self.schema)
+        assert set(selection.to_paths()) == {"zodiac", "pillars", "eight_char", "day_master"}
+
+    def test_fields_and_detail_union(self):
+        selection = resolve_selection("brief", ["zhi_deities"], self.presets, self.schema)
+        assert selection.wants("zhi_deities") and selection.wants("lunar_date")
+        assert not selection.wants("wu_xing")
+
+    @pytest.mark.parametrize(
+        "detail, fields",
+        [("verbose", None), (None, ["no_such_field"]), (None, "pillars"), (None, ["pillars."])],
+    )
+    def test_invalid(self, detail, fields):
+        with pytest.raises(ValidationError):
+            resolve_selection(detail, fields, self.presets, self.schema)
+
+    def test_nested_paths_validated_against_schema(self):
+        schema = OUTPUT_SCHEMAS["get_ziwei_chart"]
+        presets = DETAIL_PRESETS["get_ziwei_chart"]
+        resolve_selection(None, ["palaces.major_stars.name", "basic_info.命主"], presets, schema)
+        resolve_selection(None, ["metadata.version"], presets, schema)
+        with pytest.raises(ValidationError):
+            resolve_selection(None, ["palaces.no_such_field"], presets, schema)
+
+
+class TestDetailLevels:
+    """各工具的详略级别"""
+
+    @pytest.mark.parametrize("tool", list(HANDLERS))
+    @pytest.mark.parametrize("detail", ["brief", "standard"])
+    def test_results_match_output_schema(self, tool, detail):
+        _check_schema(_call(tool, detail=detail), OUTPUT_SCHEMAS[tool])
+
+    @pytest.mark.parametrize("tool", list(HANDLERS))
+    def test_levels_are_nested(self, tool):
+        sizes = [len(json.dumps(_call(tool, detail=d))) for d in ("brief", "standard", "full")]
+        assert sizes[0] < sizes[1] < sizes[2]
+
+    @pytest.mark.parametrize("tool", list(HANDLERS))
+    def test_full_equals_default(self, tool):
+        full = _call(tool, detail="full")
+        default = _call(tool)
+        full.pop("metadata", None)
+        default.pop("metadata", None)
+        assert full == default
+
+    def test_ziwei_brief_keeps_major_stars_only(self):
+        chart = _call("get_ziwei_chart", detail="brief")
+        assert "metadata" not in chart
+        palace = chart["palaces"][0]
+        assert set(palace) == {
+            "name",
+            "is_body_palace",
+            "is_original_palace",
+            "heavenly_stem",
+            "earthly_branch",
+            "major_stars",
+        }
+
+    def test_bazi_fortune_brief_drops_basic_chart(self):
+        fortune = _call("get_bazi_fortune", detail="brief")
+        assert "basic_chart" not in fortune and "da_yun_list" not in fortune
+        assert fortune["liu_nian"]["gan_zhi"]
+
+    @pytest.mark.parametrize("tool", list(HANDLERS))
+    def test_markdown_renders_pruned_results(self, tool):
+        for detail in ("brief", "standard"):
+            text = HANDLERS[tool]({**CALLS[tool], "detail": detail})
+            assert isinstance(text, str) and text.startswith("# ")
+
+    def test_invalid_detail_rejected(self):
+        with pytest.raises(ValidationError):
+            handle_get_ziwei_chart({**CALLS["get_ziwei_chart"], "detail": "everything"})
+
+
+class TestPrunedWork:
+    """未选中的字段不计算"""
+
+    def test_ziwei_brief_formats_only_major_stars(self, monkeypatch):
+        formatted = []
+        original = ZiweiFormatter._format_star
+
+        def counting(self, star, *args):
+            formatted.append(star.type)
+            return original(self, star, *args)
+
+        monkeypatch.setattr(ZiweiFormatter, "_format_star", counting)
+        _call("get_ziwei_chart", detail="brief")
+        assert formatted and set(formatted) == {"major"}
+
+    def test_bazi_brief_skips_hidden_stems(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("should not be computed")
+
+        monkeypatch.setattr(BaziSystem, "_get_zhi_cang_gan", fail)
+        monkeypatch.setattr(BaziSystem, "_calculate_ten_deities", fail)
+        _call("get_bazi_chart", detail="brief")
+
+    def test_bazi_fortune_without_basic_chart_skips_chart(self, monkeypatch):
+        monkeypatch.setattr(BaziSystem, "get_chart", lambda *args, **kwargs: 1 / 0)
+        fortune = _call("get_bazi_fortune", fields=["liu_nian"])
+        assert set(fortune) == {"query_date", "age", "day_master", "da_yun", "liu_nian"}
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+按计算量计费的配额测试
+"""
+
+import threading
+
+import pytest
+
+from mingli_mcp.utils.metrics import Metrics
+from mingli_mcp.utils.quota import CostQuota
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _tool_call(name, request_id=1):
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "tools/call",
+        "params": {"name": name, "arguments": {}},
+    }
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics()
+    metrics.record_tool_latency("get_ziwei_fortune", 0.25)
+    metrics.record_tool_latency("get_bazi_chart", 0.004)
+    return metrics
+
+
+class TestToolLatency:
+    """工具耗时滑动平均"""
+
+    def test_first_sample_seeds_average(self):
+        metrics = Metrics()
+        assert metrics.get_tool_latency("t") is None
+        metrics.record_tool_latency("t", 0.1)
+        assert metrics.get_tool_latency("t") == pytest.approx(0.1)
+
+    def test_moves_towards_recent_samples(self):
+        metrics = Metrics()
+        metrics.record_tool_latency("t", 0.1)
+        metrics.record_tool_latency("t", 0.2)
+        assert 0.1 < metrics.get_tool_latency("t") < 0.2
+
+    def test_latencies_snapshot_is_a_copy(self):
+        metrics = Metrics()
+        metrics.record_tool_latency("t", 0.1)
+        snapshot = metrics.get_tool_latencies()
+        assert snapshot == {"t": pytest.approx(0.1)}
+
+        metrics.record_tool_latency("u", 0.2)
+        assert "u" not in snapshot
+
+    def test_summary_and_reset(self):
+        metrics = Metrics()
+        metrics.record_tool_latency("t", 0.0125)
+        assert metrics.get_summary()["tool_latency_ms"] == {"t": 12.5}
+        metrics.reset()
+        assert metrics.get_tool_latency("t") is None
+
+
+class TestCostQuota:
+    """成本计算与扣费"""
+
+    def test_cost_follows_measured_latency(self, metrics):
+        quota = CostQuota(budget=100, window_seconds=60, unit_ms=10, metrics=metrics)
+        assert quota.tool_cost("get_ziwei_fortune") == 25
+        assert quota.tool_cost("get_bazi_chart") == 1
+        assert quota.tool_cost("never_called") == 1
+
+    def test_cost_is_capped_at_budget(self, metrics):
+        quota = CostQuota(budget=10, window_seconds=60, unit_ms=10, metrics=metrics)
+        assert quota.tool_cost("get_ziwei_fortune") == 10
+
+    def test_discovery_methods_are_free(self, metrics):
+        quota = CostQuota(budget=100, window_seconds=60, unit_ms=10, metrics=metrics)
+        for method in ("initialize", "tools/list", "ping", "resources/list"):
+            assert quota.message_cost({"jsonrpc": "2.0", "id": 1, "method": method}) == 0
+        assert quota.message_cost("garbage") == 0
+
+    def test_batch_cost_is_summed(self, metrics):
+        quota = CostQuota(budget=100, window_seconds=60, unit_ms=10, metrics=metrics)
+        batch = [_tool_call("get_ziwei_fortune"), _tool_call("get_bazi_chart", 2)]
+        assert quota.message_cost(batch) == 26
+
+    def test_charge_until_exhausted(self, metrics):
+        clock = FakeClock()
+        quota = CostQuota(budget=60, window_seconds=60, unit_ms=10, metrics=metrics, clock=clock)
+        first = quota.charge("key:a", 25)
+        second = quota.charge("key:a", 25)
+        assert first.allowed and second.allowed
+        assert second.remaining == 10
+
+        denied = quota.charge("key:a", 25)
+        assert not denied.allowed
+        assert denied.remaining == 10
+        assert denied.retry_after == 15
+        assert denied.headers()["Retry-After"] == "15"
+
+        # 免费请求不受额度影响
+        assert quota.charge("key:a", 0).allowed
+
+        clock.now += 15
+        assert quota.charge("key:a", 25).allowed
+
+    def test_identities_are_independent(self, metrics):
+        quota = CostQuota(budget=10, window_seconds=60, metrics=metrics, clock=FakeClock())
+        assert quota.charge("key:a", 10).allowed
+        assert not quota.charge("key:a", 1).allowed
+        assert quota.charge("key:b", 10).allowed
+        assert quota.charge("ip:10.0.0.1", 10).allowed
+
+    def test_identity_hashes_bearer_token(self):
+        identity = CostQuota.identity("secret-token", "10.0.0.1")
+        assert identity.startswith("key:")
+        assert "secret-token" not in identity
+        assert identity == CostQuota.identity("secret-token", "10.0.0.2")
+        assert CostQuota.identity(None, "10.0.0.1") == "ip:10.0.0.1"
+
+    def test_stats(self, metrics):
+        quota = CostQuota(budget=10, window_seconds=60, unit_ms=10, metrics=metrics)
+        quota.charge("key:a", 10)
+        stats = quota.get_stats()
+        assert stats["identities"] == 1
+        assert stats["exhausted_identities"] == 1
+        assert stats["tool_costs"]["get_ziwei_fortune"] == 10
+
+    def test_stats_while_new_tools_are_recorded(self, metrics):
+        quota = CostQuota(budget=10, window_seconds=60, unit_ms=10, metrics=metrics)
+
+        def writer():
+            for i in range(2000):
+                metrics.record_tool_latency(f"tool_{i}", 0.001)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        while thread.is_alive():
+            assert quota.get_stats()["tool_costs"]["get_bazi_chart"] == 1
+        thread.join()
+        assert len(quota.get_stats()["tool_costs"]) == 2002
+
+
+class TestHttpQuota:
+    """HTTP 端点的配额"""
+
+    @pytest.fixture
+    def transport(self, metrics, monkeypatch):
+        pytest.importorskip("fastapi")
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        transport = HttpTransport(
+            host="127.0.0.1",
+            port=8080,
+            api_key="test-api-key",
+            enable_rate_limit=False,
+            enable_cost_quota=True,
+        )
+        transport.quota = CostQuota(budget=30, window_seconds=60, unit_ms=10, metrics=metrics)
+        transport.set_message_handler(
+            lambda message: {"jsonrpc": "2.0", "id": message.get("id"), "result": {}}
+        )
+        return transport
+
+    def _post(self, client, body, token="test-api-key"):
+        return client.post("/mcp", json=body, headers={"Authorization": f"Bearer {token}"})
+
+    def test_headers_report_cost_and_remaining(self, transport):
+        from fastapi.testclient import TestClient
+
+        client = TestClient(transport.app)
+        response = self._post(client, _tool_call("get_ziwei_fortune"))
+        assert response.status_code == 200
+        assert response.headers["X-Quota-Limit"] == "30"
+        assert response.headers["X-Quota-Cost"] == "25"
+        assert response.headers["X-Quota-Remaining"] == "5"
+
+        listing = self._post(client, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        assert listing.headers["X-Quota-Cost"] == "0"
+        assert listing.headers["X-Quota-Remaining"] == "5"
+
+    def test_exhausted_quota_returns_429(self, transport):
+        from fastapi.testclient import TestClient
+
+        client = TestClient(transport.app)
+        self._post(client, _tool_call("get_ziwei_fortune"))
+        response = self._post(client, _tool_call("get_ziwei_fortune"))
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) > 0
+
+        # 发现类请求照常放行，廉价工具只要额度够也放行
+        assert self._post(client, {"jsonrpc": "2.0", "id": 3, "method": "ping"}).status_code == 200
+        assert self._post(client, _tool_call("get_bazi_chart")).status_code == 200
+
+    def test_shed_call_does_not_consume_quota(self, transport):
+        from fastapi.testclient import TestClient
+
+        from mingli_mcp.utils.concurrency import AdaptiveConcurrencyLimiter
+
+        limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=1)
+        transport.concurrency_limiter = limiter
+        client = TestClient(transport.app)
+
+        started = limiter.try_acquire()
+        response = self._post(client, _tool_call("get_ziwei_fortune"))
+        assert response.status_code == 503
+        assert "X-Quota-Cost" not in response.headers
+        limiter.observe(started)
+        limiter.release()
+
+        response = self._post(client, _tool_call("get_ziwei_fortune"))
+        assert response.status_code == 200
+        assert response.headers["X-Quota-Remaining"] == "5"
+
+    def test_quota_rejection_releases_concurrency_slot(self, transport):
+        from fastapi.testclient import TestClient
+
+        from mingli_mcp.utils.concurrency import AdaptiveConcurrencyLimiter
+
+        limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=1)
+        transport.concurrency_limiter = limiter
+        client = TestClient(transport.app)
+        self._post(client, _tool_call("get_ziwei_fortune"))
+        assert self._post(client, _tool_call("get_ziwei_fortune")).status_code == 429
+        assert limiter.inflight == 0
+
+    def test_untrusted_bearer_falls_back_to_ip(self, transport):
+        from fastapi.testclient import TestClient
+
+        transport.api_key = None
+        client = TestClient(transport.app)
+        self._post(client, _tool_call("get_ziwei_fortune"), token="a")
+        # 换一个伪造的 token 拿不到新额度
+        response = self._post(client, _tool_call("get_ziwei_fortune"), token="b")
+        assert response.status_code == 429
+
+    def test_trusted_proxy_bearer_is_per_identity(self, transport):
+        from fastapi.testclient import TestClient
+
+        transport.api_key = None
+        transport.trust_proxy_headers = True
+        client = TestClient(transport.app)
+        self._post(client, _tool_call("get_ziwei_fortune"), token="user-a")
+        response = self._post(client, _tool_call("get_ziwei_fortune"), token="user-b")
+        assert response.status_code == 200
+
+    def test_stats_include_quota(self, transport):
+        from fastapi.testclient import TestClient
+
+        client = TestClient(transport.app)
+        stats = client.get("/stats", headers={"Authorization": "Bearer test-api-key"}).json()
+        assert stats["quota"]["budget"] == 30
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+限流共享后端测试
+"""
+
+import multiprocessing
+import sys
+
+import pytest
+
+from mingli_mcp.utils.rate_limit_backends import (
+    MemoryBackend,
+    RedisBackend,
+    SqliteBackend,
+    create_backend,
+)
+from mingli_mcp.utils.rate_limiter import SharedRateLimiter, create_rate_limiter
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    return SqliteBackend(str(tmp_path / "ratelimit.sqlite3"))
+
+
+class TestBackendContract:
+    """各后端行为一致"""
+
+    def test_acquire_until_limit(self, backend):
+        now = 1000.0
+        assert all(backend.acquire("c", now, 1.0, 3.0) for _ in range(3))
+        assert backend.acquire("c", now, 1.0, 3.0) is False
+        assert backend.get("c") == pytest.approx(1003.0)
+
+    def test_denied_acquire_does_not_advance_tat(self, backend):
+        backend.acquire("c", 1000.0, 1.0, 1.0)
+        backend.acquire("c", 1000.0, 1.0, 1.0)
+        assert backend.get("c") == pytest.approx(1001.0)
+
+    def test_recovers_over_time(self, backend):
+        backend.acquire("c", 1000.0, 1.0, 1.0)
+        assert backend.acquire("c", 1000.5, 1.0, 1.0) is False
+        assert backend.acquire("c", 1001.0, 1.0, 1.0) is True
+
+    def test_reset_and_items(self, backend):
+        backend.acquire("a", 1000.0, 1.0, 5.0)
+        backend.acquire("b", 1000.0, 1.0, 5.0)
+        assert dict(backend.items()).keys() == {"a", "b"}
+
+        backend.reset("a")
+        assert backend.get("a") is None
+        backend.reset()
+        assert list(backend.items()) == []
+
+    def test_unknown_key(self, backend):
+        assert backend.get("nobody") is None
+
+
+class TestSqliteBackend:
+    """SQLite 后端"""
+
+    def test_requires_path(self):
+        with pytest.raises(ValueError, match="RATE_LIMIT_BACKEND_URL"):
+            SqliteBackend("")
+
+    def test_uses_wal_mode(self, tmp_path):
+        backend = SqliteBackend(str(tmp_path / "rl.sqlite3"))
+        mode = backend._connection().execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == "wal"
+
+    def test_state_is_shared_between_instances(self, tmp_path):
+        path = str(tmp_path / "rl.sqlite3")
+        first, second = SqliteBackend(path), SqliteBackend(path)
+        assert first.acquire("c", 1000.0, 1.0, 1.0)
+        assert second.acquire("c", 1000.0, 1.0, 1.0) is False
+
+    def test_amortized_cleanup_removes_recovered_clients(self, tmp_path):
+        backend = SqliteBackend(str(tmp_path / "rl.sqlite3"))
+        for i in range(50):
+            backend.acquire(f"old-{i}", 1000.0, 1.0, 5.0)
+        for _ in range(backend.CLEANUP_EVERY):
+            backend.acquire("new", 2000.0, 0.0001, 5.0)
+        assert {key for key, _ in backend.items()} == {"new"}
+
+
+def _hammer(path, attempts, results):
+    limiter = SharedRateLimiter(SqliteBackend(path), max_requests=60, window_seconds=3600)
+    results.put(sum(limiter.is_allowed("shared-client") for _ in range(attempts)))
+
+    def test_lock_timeout_raises_without_open_transaction(self, tmp_path):
+        import sqlite3
+
+        path = str(tmp_path / "rl.sqlite3")
+        backend = SqliteBackend(path, timeout=0.01)
+        holder = sqlite3.connect(path, isolation_level=None)
+        holder.execute("BEGIN IMMEDIATE")
+        try:
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                backend.acquire("c", 1000.0, 1.0, 5.0)
+            assert not backend._connection().in_transaction
+        finally:
+            holder.execute("ROLLBACK")
+        assert backend.acquire("c", 1000.0, 1.0, 5.0)
+
+    def test_cleanup_counted_per_thread(self, tmp_path, monkeypatch):
+        import threading
+
+        backend = SqliteBackend(str(tmp_path / "rl.sqlite3"))
+        monkeypatch.setattr(SqliteBackend, "CLEANUP_EVERY", 4)
+        backend.acquire("expired", 1000.0, 1.0, 5.0)
+
+        def worker(index):
+            for _ in range(3):
+                backend.acquire(f"t{index}", 2000.0, 1.0, 5.0)
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # 各线程都只判定了 3 次，还没到清理周期
+        assert backend.get("expired") is not None
+        backend.acquire("main", 2000.0, 1.0, 5.0)
+        backend.acquire("main", 2000.0, 1.0, 5.0)
+        backend.acquire("main", 2000.0, 1.0, 5.0)
+        assert backend.get("expired") is None
+
+
+class TestMultiProcess:
+    """多进程共享同一 SQLite 文件时整体限额不被放大"""
+
+    def test_limit_is_global_across_processes(self, tmp_path):
+        path = str(tmp_path / "rl.sqlite3")
+        SqliteBackend(path)
+        method = "fork" if sys.platform.startswith("linux") else "spawn"
+        context = multiprocessing.get_context(method)
+        results = context.Queue()
+        processes = [context.Process(target=_hammer, args=(path, 40, results)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        allowed = [results.get(timeout=30) for _ in processes]
+        for process in processes:
+            process.join(timeout=30)
+
+        assert sum(allowed) == 60
+
+
+class TestSharedRateLimiter:
+    """共享状态限流器"""
+
+    def test_same_semantics_as_gcra(self, tmp_path):
+        clock = FakeClock()
+        limiter = SharedRateLimiter(
+            SqliteBackend(str(tmp_path / "rl.sqlite3")),
+            max_requests=10,
+            window_seconds=60,
+            clock=clock,
+        )
+        assert all(limiter.is_allowed("c") for _ in range(10))
+        assert not limiter.is_allowed("c")
+        assert limiter.get_remaining("c") == 0
+        assert limiter.get_reset_time("c") is not None
+
+        clock.now += 12
+        assert limiter.get_remaining("c") == 2
+
+        stats = limiter.get_stats()
+        assert stats["algorithm"] == "shared"
+        assert stats["backend"] == "SqliteBackend"
+        assert stats["total_clients"] == 1
+        assert stats["total_requests"] == 8
+
+        limiter.reset()
+        assert limiter.get_remaining("c") == 10
+
+    def test_factory_selects_shared_backend(self, tmp_path):
+        limiter = create_rate_limiter(
+            "gcra", backend="sqlite", backend_url=str(tmp_path / "rl.sqlite3")
+        )
+        assert isinstance(limiter, SharedRateLimiter)
+        assert isinstance(limiter.backend, SqliteBackend)
+
+    def test_backend_errors_fail_open(self, caplog):
+        class BrokenBackend(MemoryBackend):
+            def acquire(self, key, now, emission_interval, window):
+                raise ConnectionError("backend down")
+
+            def get(self, key):
+                raise ConnectionError("backend down")
+
+            def items(self):
+                raise ConnectionError("backend down")
+
+        limiter = SharedRateLimiter(BrokenBackend(), max_requests=2, clock=FakeClock())
+        with caplog.at_level("WARNING", logger="mingli_mcp.utils.rate_limiter"):
+            assert all(limiter.is_allowed("c") for _ in range(5))
+            assert limiter.get_remaining("c") == 2
+            assert limiter.get_reset_time("c") is None
+            stats = limiter.get_stats()
+        assert stats["backend_errors"] == limiter.backend_errors == 8
+        assert stats["total_clients"] == 0
+        # 故障期间日志按间隔汇总
+        assert len(caplog.records) == 1
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError, match="Unknown rate limit backend"):
+            create_backend("etcd")
+
+    def test_http_transport_uses_configured_backend(self, tmp_path, monkeypatch):
+        pytest.importorskip("fastapi")
+        from mingli_mcp.config import config
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        monkeypatch.setattr(config, "RATE_LIMIT_BACKEND_URL", str(tmp_path / "rl.sqlite3"))
+        transport = HttpTransport(rate_limit_backend="sqlite")
+        assert isinstance(transport.rate_limiter, SharedRateLimiter)
+
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_http_check_off_event_loop_for_shared_backend(self, backend, tmp_path, monkeypatch):
+        pytest.importorskip("fastapi")
+        import asyncio
+
+        from fastapi.testclient import TestClient
+
+        from mingli_mcp.config import config
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        monkeypatch.setattr(config, "RATE_LIMIT_BACKEND_URL", str(tmp_path / "rl.sqlite3"))
+        transport = HttpTransport(rate_limit_backend=backend, rate_limit_requests=1)
+        transport.set_message_handler(lambda m: {"jsonrpc": "2.0", "id": m.get("id"), "result": {}})
+        in_loop = []
+        original = transport.rate_limiter.is_allowed
+
+        def is_allowed(client_id):
+            try:
+                asyncio.get_running_loop()
+                in_loop.append(True)
+            except RuntimeError:
+                in_loop.append(False)
+            return original(client_id)
+
+        monkeypatch.setattr(transport.rate_limiter, "is_allowed", is_allowed)
+        client = TestClient(transport.app)
+        body = {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+        assert client.post("/mcp", json=body).status_code == 200
+        response = client.post("/mcp", json=body)
+        assert response.status_code == 429
+        assert response.headers["X-RateLimit-Remaining"] == "0"
+        assert in_loop == [backend == "memory"] * 2
+
+
+class TestRedisBackend:
+    """Redis 后端"""
+
+    def test_missing_package_has_install_hint(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "redis", None)
+        with pytest.raises(ImportError, match=r"mingli-mcp\[redis\]"):
+            RedisBackend("redis://localhost:6379/0")
+
+    def test_against_redis_compatible_stand_in(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+
+        backend = RedisBackend(client=fakeredis.FakeRedis())
+        assert all(backend.acquire("c", 1000.0, 1.0, 3.0) for _ in range(3))
+        assert backend.acquire("c", 1000.0, 1.0, 3.0) is False
+        assert backend.get("c") == pytest.approx(1003.0)
+        assert dict(backend.items()).keys() == {"c"}
+        backend.reset()
+        assert backend.get("c") is None
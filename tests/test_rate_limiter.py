@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+限流器测试
+"""
+
+import threading
+from datetime import datetime
+
+import pytest
+
+from mingli_mcp.utils.rate_limiter import (
+    GcraRateLimiter,
+    RateLimiter,
+    ShardedRateLimiter,
+    SketchRateLimiter,
+    create_rate_limiter,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestGcraRateLimiter:
+    """GCRA限流器"""
+
+    def test_allows_burst_up_to_limit(self):
+        limiter = GcraRateLimiter(max_requests=100, window_seconds=60, clock=FakeClock())
+        assert all(limiter.is_allowed("c") for _ in range(100))
+        assert limiter.is_allowed("c") is False
+
+    def test_quota_recovers_at_emission_rate(self):
+        clock = FakeClock()
+        limiter = GcraRateLimiter(max_requests=10, window_seconds=60, clock=clock)
+        for _ in range(10):
+            limiter.is_allowed("c")
+
+        clock.now += 5.9
+        assert limiter.is_allowed("c") is False
+        clock.now += 0.1
+        assert limiter.is_allowed("c") is True
+        assert limiter.is_allowed("c") is False
+
+    def test_clients_are_independent(self):
+        limiter = GcraRateLimiter(max_requests=1, window_seconds=60, clock=FakeClock())
+        assert limiter.is_allowed("a")
+        assert limiter.is_allowed("b")
+        assert not limiter.is_allowed("a")
+
+    def test_remaining(self):
+        clock = FakeClock()
+        limiter = GcraRateLimiter(max_requests=10, window_seconds=60, clock=clock)
+        assert limiter.get_remaining("c") == 10
+        for _ in range(4):
+            limiter.is_allowed("c")
+        assert limiter.get_remaining("c") == 6
+
+        clock.now += 12
+        assert limiter.get_remaining("c") == 8
+
+    def test_reset_time(self):
+        clock = FakeClock()
+        limiter = GcraRateLimiter(max_requests=2, window_seconds=60, clock=clock)
+        assert limiter.get_reset_time("c") is None
+
+        limiter.is_allowed("c")
+        limiter.is_allowed("c")
+        reset_time = limiter.get_reset_time("c")
+        seconds = (reset_time - datetime.now()).total_seconds()
+        assert 29 < seconds <= 30
+
+        clock.now += 61
+        assert limiter.get_reset_time("c") is None
+
+    def test_read_only_queries_do_not_create_entries(self):
+        limiter = GcraRateLimiter()
+        limiter.get_remaining("probe-a")
+        limiter.get_reset_time("probe-b")
+        assert limiter.tats == {}
+
+    def test_denied_request_does_not_consume_quota(self):
+        clock = FakeClock()
+        limiter = GcraRateLimiter(max_requests=1, window_seconds=10, clock=clock)
+        limiter.is_allowed("c")
+        for _ in range(50):
+            limiter.is_allowed("c")
+        clock.now += 10
+        assert limiter.is_allowed("c") is True
+
+    def test_periodic_cleanup_drops_recovered_clients(self):
+        clock = FakeClock()
+        limiter = GcraRateLimiter(
+            max_requests=5, window_seconds=10, cleanup_interval=60, clock=clock
+        )
+        limiter.is_allowed("old")
+        clock.now += 61
+        limiter.is_allowed("new")
+        assert set(limiter.tats) == {"new"}
+
+    def test_reset(self):
+        limiter = GcraRateLimiter(max_requests=1, clock=FakeClock())
+        limiter.is_allowed("a")
+        limiter.is_allowed("b")
+        limiter.reset("a")
+        assert set(limiter.tats) == {"b"}
+        limiter.reset()
+        assert limiter.tats == {}
+
+    def test_stats(self):
+        limiter = GcraRateLimiter(max_requests=2, window_seconds=60, clock=FakeClock())
+        limiter.is_allowed("a")
+        limiter.is_allowed("b")
+        limiter.is_allowed("b")
+
+        stats = limiter.get_stats()
+        assert stats["algorithm"] == "gcra"
+        assert stats["total_clients"] == 2
+        assert stats["total_requests"] == 3
+        assert stats["limited_clients"] == 1
+        assert stats["max_requests_per_window"] == 2
+        assert stats["window_seconds"] == 60
+
+
+class TestShardedRateLimiter:
+    """分片限流器"""
+
+    def _tracked(self, limiter):
+        return sum(len(tats) for _, tats in limiter._all_shards())
+
+    def test_same_semantics_as_gcra(self):
+        clock = FakeClock()
+        limiter = ShardedRateLimiter(max_requests=10, window_seconds=60, shards=4, clock=clock)
+        assert all(limiter.is_allowed("c") for _ in range(10))
+        assert not limiter.is_allowed("c")
+        assert limiter.get_remaining("c") == 0
+        assert limiter.get_reset_time("c") is not None
+
+        clock.now += 6
+        assert limiter.get_remaining("c") == 1
+        assert limiter.is_allowed("c")
+
+    def test_clients_spread_across_shards(self):
+        limiter = ShardedRateLimiter(shards=8, clock=FakeClock())
+        for i in range(200):
+            limiter.is_allowed(f"client-{i}")
+        assert sum(1 for _, tats in limiter._all_shards() if tats) > 1
+        assert limiter.get_stats()["total_clients"] == 200
+
+    def test_shard_count_defaults_to_config(self, monkeypatch):
+        from mingli_mcp.config import config
+
+        monkeypatch.setattr(config, "RATE_LIMIT_SHARDS", 5)
+        assert ShardedRateLimiter().shard_count == 5
+
+    def test_incremental_cleanup_drains_expired_clients(self):
+        clock = FakeClock()
+        limiter = ShardedRateLimiter(
+            max_requests=5, window_seconds=10, shards=1, cleanup_batch=4, clock=clock
+        )
+        for i in range(100):
+            limiter.is_allowed(f"old-{i}")
+        clock.now += 11
+
+        # 每次判定最多删4个，不会一次扫完所有客户端
+        limiter.is_allowed("new")
+        assert self._tracked(limiter) == 97
+        for _ in range(30):
+            limiter.is_allowed("new")
+        assert self._tracked(limiter) == 1
+
+    def test_cleanup_stops_at_live_client(self):
+        clock = FakeClock()
+        limiter = ShardedRateLimiter(
+            max_requests=5, window_seconds=10, shards=1, cleanup_batch=4, clock=clock
+        )
+        limiter.is_allowed("live")
+        limiter.is_allowed("other")
+        clock.now += 1
+        limiter.is_allowed("other")
+        assert self._tracked(limiter) == 2
+
+    def test_concurrent_checks_never_exceed_limit(self):
+        limiter = ShardedRateLimiter(max_requests=50, window_seconds=3600, shards=4)
+        allowed = []
+
+        def worker():
+            count = sum(limiter.is_allowed(f"c{i % 3}") for i in range(300))
+            allowed.append(count)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(allowed) == 150
+
+    def test_reset_and_stats(self):
+        limiter = ShardedRateLimiter(max_requests=1, shards=4, clock=FakeClock())
+        limiter.is_allowed("a")
+        limiter.is_allowed("b")
+        limiter.reset("a")
+        assert limiter.get_remaining("a") == 1
+        assert limiter.get_stats()["algorithm"] == "sharded"
+        limiter.reset()
+        assert limiter.get_stats()["total_clients"] == 0
+
+
+class TestSketchRateLimiter:
+    """Count-Min Sketch 限流器"""
+
+    def test_limits_single_client(self):
+        limiter = SketchRateLimiter(max_requests=10, window_seconds=60, clock=FakeClock(0.0))
+        assert all(limiter.is_allowed("c") for _ in range(10))
+        assert not limiter.is_allowed("c")
+        assert limiter.get_remaining("c") == 0
+        assert limiter.is_allowed("other")
+
+    def test_never_allows_more_than_limit(self):
+        # 极窄的表让大量客户端互相冲突：只会提前限流，不会多放行
+        limiter = SketchRateLimiter(
+            max_requests=5, window_seconds=60, width=8, depth=2, clock=FakeClock(0.0)
+        )
+        allowed = {}
+        for _ in range(10):
+            for i in range(50):
+                client_id = f"client-{i}"
+                allowed[client_id] = allowed.get(client_id, 0) + limiter.is_allowed(client_id)
+        assert max(allowed.values()) <= 5
+
+    def test_memory_is_fixed(self):
+        limiter = SketchRateLimiter(width=64, depth=3, clock=FakeClock(0.0))
+        before = limiter.get_stats()["memory_bytes"]
+        for i in range(5000):
+            limiter.is_allowed(f"10.0.{i >> 8}.{i & 255}")
+        assert limiter.get_stats()["memory_bytes"] == before
+        assert len(limiter._current.counters) == 64 * 3
+
+    def test_previous_window_is_interpolated(self):
+        clock = FakeClock(0.0)
+        limiter = SketchRateLimiter(max_requests=10, window_seconds=60, clock=clock)
+        for _ in range(10):
+            limiter.is_allowed("c")
+
+        # 下一个窗口过去一半：上一窗口的 10 次按一半计
+        clock.now = 90.0
+        assert limiter.get_remaining("c") == 5
+        assert sum(limiter.is_allowed("c") for _ in range(10)) == 5
+
+        # 两个窗口之后完全恢复
+        clock.now = 250.0
+        assert limiter.get_remaining("c") == 10
+
+    def test_reset_time(self):
+        clock = FakeClock(0.0)
+        limiter = SketchRateLimiter(max_requests=2, window_seconds=60, clock=clock)
+        assert limiter.get_reset_time("c") is None
+        limiter.is_allowed("c")
+        limiter.is_allowed("c")
+
+        seconds = (limiter.get_reset_time("c") - datetime.now()).total_seconds()
+        # 当前窗口剩 60s，轮转后上一窗口权重需降到 1/2 再等 30s
+        assert 89 < seconds <= 90
+
+    def test_reset(self):
+        limiter = SketchRateLimiter(max_requests=1, clock=FakeClock(0.0))
+        limiter.is_allowed("c")
+        limiter.reset()
+        assert limiter.is_allowed("c")
+
+    def test_reset_single_client(self):
+        clock = FakeClock(0.0)
+        limiter = SketchRateLimiter(max_requests=3, width=4096, depth=4, clock=clock)
+        for _ in range(3):
+            assert limiter.is_allowed("a")
+        clock.now = 70.0
+        assert limiter.is_allowed("a", cost=2) is False
+        limiter.is_allowed("b", cost=2)
+
+        limiter.reset("a")
+        assert limiter.get_remaining("a") == 3
+        assert limiter.get_remaining("b") == 1
+        assert limiter.is_allowed("a", cost=3)
+
+    def test_stats_estimate_distinct_clients(self):
+        limiter = SketchRateLimiter(max_requests=100, clock=FakeClock(0.0))
+        for i in range(2000):
+            limiter.is_allowed(f"client-{i}")
+            limiter.is_allowed(f"client-{i}")
+
+        stats = limiter.get_stats()
+        assert stats["algorithm"] == "sketch"
+        assert stats["total_requests"] == 4000
+        assert 1900 <= stats["total_clients"] <= 2100
+
+    def test_size_defaults_to_config(self, monkeypatch):
+        from mingli_mcp.config import config
+
+        monkeypatch.setattr(config, "RATE_LIMIT_SKETCH_WIDTH", 128)
+        monkeypatch.setattr(config, "RATE_LIMIT_SKETCH_DEPTH", 2)
+        limiter = create_rate_limiter("sketch")
+        assert isinstance(limiter, SketchRateLimiter)
+        assert (limiter.width, limiter.depth) == (128, 2)
+
+
+class TestCreateRateLimiter:
+    """按配置选择算法"""
+
+    def test_default_is_sliding_window(self):
+        assert isinstance(create_rate_limiter(), RateLimiter)
+
+    def test_gcra(self):
+        limiter = create_rate_limiter(" GCRA ", max_requests=7, window_seconds=30)
+        assert isinstance(limiter, GcraRateLimiter)
+        assert limiter.max_requests == 7
+        assert limiter.window_seconds == 30
+
+    def test_sharded(self):
+        assert isinstance(create_rate_limiter("sharded"), ShardedRateLimiter)
+
+    def test_unknown_algorithm(self):
+        with pytest.raises(ValueError, match="Unknown rate limit algorithm"):
+            create_rate_limiter("leaky")
+
+    def test_http_transport_uses_configured_algorithm(self):
+        pytest.importorskip("fastapi")
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        transport = HttpTransport(rate_limit_algorithm="gcra", rate_limit_requests=3)
+        assert isinstance(transport.rate_limiter, GcraRateLimiter)
+        assert transport.rate_limiter.max_requests == 3
+
+
+class TestWeightedCost:
+    """带成本的 GCRA 判定"""
+
+    def test_cost_consumes_multiple_units(self):
+        clock = FakeClock()
+        limiter = GcraRateLimiter(max_requests=10, window_seconds=60, clock=clock)
+        assert limiter.is_allowed("c", cost=7)
+        assert limiter.get_remaining("c") == 3
+        assert not limiter.is_allowed("c", cost=4)
+        assert limiter.is_allowed("c", cost=3)
+
+    def test_zero_cost_is_free(self):
+        limiter = ShardedRateLimiter(max_requests=1, shards=2, clock=FakeClock())
+        assert limiter.is_allowed("c")
+        assert limiter.is_allowed("c", cost=0)
+        assert not limiter.is_allowed("c")
+
+    @pytest.mark.parametrize("algorithm", ["sliding_window", "gcra", "sharded", "sketch"])
+    def test_every_algorithm_accepts_cost(self, algorithm):
+        limiter = create_rate_limiter(algorithm, max_requests=10, window_seconds=60)
+        assert limiter.is_allowed("c", cost=7)
+        assert limiter.get_remaining("c") == 3
+        assert not limiter.is_allowed("c", cost=4)
+        assert limiter.is_allowed("c", cost=0)
+        assert limiter.is_allowed("c", cost=3)
+        assert not limiter.is_allowed("c")
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+慢请求日志测试
+"""
+
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from mingli_mcp.mcp_server.server import MingliMCPServer
+from mingli_mcp.utils.performance import stage, track_stages
+from mingli_mcp.utils.slow_log import SlowRequestLog, fingerprint_arguments, get_slow_log
+
+BIRTH_ARGS = {"date": "2000-08-16", "time_index": 6, "gender": "女"}
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSlowRequestLog:
+    """慢请求日志的容量、窗口与脱敏"""
+
+    def test_keeps_only_slowest_entries(self):
+        log = SlowRequestLog(capacity=3)
+        for i, duration in enumerate([0.1, 0.5, 0.2, 0.9, 0.05, 0.3]):
+            log.record("get_bazi_chart", {"i": i}, duration)
+
+        durations = [entry["duration_ms"] for entry in log.get_entries()]
+        assert durations == [900.0, 500.0, 300.0]
+
+    def test_faster_request_is_rejected_when_full(self):
+        log = SlowRequestLog(capacity=1)
+        assert log.record("t", {}, 0.5) is True
+        assert log.record("t", {}, 0.1) is False
+
+    def test_entries_expire_after_window(self):
+        clock = FakeClock()
+        log = SlowRequestLog(capacity=5, window_seconds=60, clock=clock)
+        log.record("t", {}, 0.9)
+        clock.now += 61
+        log.record("t", {}, 0.1)
+
+        entries = log.get_entries()
+        assert len(entries) == 1
+        assert entries[0]["duration_ms"] == 100.0
+
+    def test_expired_slow_entry_no_longer_blocks_new_entries(self):
+        clock = FakeClock()
+        log = SlowRequestLog(capacity=1, window_seconds=60, clock=clock)
+        log.record("t", {}, 5.0)
+        clock.now += 61
+
+        assert log.record("t", {}, 0.1) is True
+
+    def test_zero_capacity_disables_log(self):
+        log = SlowRequestLog(capacity=0)
+        assert log.record("t", {}, 1.0) is False
+        assert log.get_entries() == []
+
+    def test_birth_data_is_not_stored(self):
+        log = SlowRequestLog()
+        args = {**BIRTH_ARGS, "calendar": "lunar", "is_leap_month": True, "longitude": 87.6}
+        log.record("get_ziwei_chart", args, 0.2)
+
+        entry = log.get_entries()[0]
+        serialized = json.dumps(entry, ensure_ascii=False)
+        assert "2000-08-16" not in serialized
+        assert "87.6" not in serialized
+        assert entry["arguments"]["calendar"] == "lunar"
+        assert entry["arguments"]["is_leap_month"] is True
+        assert "longitude" in entry["arguments"]["keys"]
+
+    def test_output_switches_are_kept(self):
+        log = SlowRequestLog()
+        args = {**BIRTH_ARGS, "detailed": True, "detail": "full", "fields": ["bazi", "wuxing"]}
+        log.record("get_bazi_chart", args, 0.2)
+
+        shape = log.get_entries()[0]["arguments"]
+        assert shape["detailed"] is True
+        assert shape["detail"] == "full"
+        assert shape["fields"] == ["bazi", "wuxing"]
+        assert "date" not in shape
+
+    def test_fingerprint_is_stable_and_order_independent(self):
+        a = fingerprint_arguments({"date": "2000-08-16", "gender": "女"})
+        b = fingerprint_arguments({"gender": "女", "date": "2000-08-16"})
+        c = fingerprint_arguments({"date": "2000-08-17", "gender": "女"})
+        assert a == b
+        assert a != c
+
+    def test_records_stages_protocol_and_result_size(self):
+        log = SlowRequestLog()
+        log.record(
+            "t",
+            {},
+            0.2,
+            stages={"engine": 0.15},
+            protocol_version="2026-07-28",
+            result="命盘",
+        )
+
+        entry = log.get_entries()[0]
+        assert entry["stages_ms"] == {"engine": 150.0}
+        assert entry["protocol_version"] == "2026-07-28"
+        assert entry["result_bytes"] == len("命盘".encode("utf-8"))
+
+    def test_dump_path_is_rewritten_on_change(self, tmp_path):
+        path = tmp_path / "slow.json"
+        log = SlowRequestLog()
+        log.set_dump_path(str(path))
+        log.record("t", {}, 0.2)
+
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        assert payload["slow_requests"][0]["tool"] == "t"
+
+    def test_concurrent_dumps_leave_valid_file_and_no_temp_files(self, tmp_path):
+        path = tmp_path / "slow.json"
+        log = SlowRequestLog(capacity=50)
+        log.set_dump_path(str(path))
+
+        def worker(offset: int) -> None:
+            for i in range(20):
+                log.record("t", {"i": offset + i}, 0.001 * (offset + i + 1))
+
+        threads = [threading.Thread(target=worker, args=(n * 100,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        assert len(payload["slow_requests"]) == 50
+        assert payload["slow_requests"] == log.get_entries()
+        assert [p.name for p in tmp_path.iterdir()] == ["slow.json"]
+
+    def test_failed_dump_removes_temp_file(self, tmp_path):
+        path = tmp_path / "slow.json"
+        path.mkdir()  # 目标是目录，rename会失败
+        log = SlowRequestLog()
+        log.set_dump_path(str(path))
+
+        assert log.record("t", {}, 0.2) is True
+        assert [p.name for p in tmp_path.iterdir()] == ["slow.json"]
+
+
+class TestStageTracking:
+    """分阶段计时"""
+
+    def test_stage_without_tracking_is_noop(self):
+        with stage("engine"):
+            pass
+
+    def test_same_stage_accumulates(self):
+        with track_stages() as stages:
+            with stage("engine"):
+                pass
+            with stage("engine"):
+                pass
+        assert set(stages) == {"engine"}
+        assert stages["engine"] >= 0
+
+
+class TestSlowLogIntegration:
+    """工具调用写入慢请求日志"""
+
+    @pytest.fixture(autouse=True)
+    def _reset_slow_log(self):
+        get_slow_log().reset()
+        yield
+        get_slow_log().reset()
+
+    @pytest.fixture
+    def server(self):
+        with patch.object(MingliMCPServer, "_initialize_transport"):
+            return MingliMCPServer()
+
+    def _call(self, server, tool, args, meta=None):
+        params = {"name": tool, "arguments": args}
+        if meta:
+            params["_meta"] = meta
+        return server.handle_request(
+            {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": params}
+        )
+
+    def test_tool_call_records_stage_breakdown(self, server):
+        self._call(server, "get_ziwei_chart", BIRTH_ARGS)
+
+        entry = get_slow_log().get_entries()[0]
+        assert entry["tool"] == "get_ziwei_chart"
+        assert entry["success"] is True
+        assert entry["protocol_version"] == "legacy"
+        assert entry["result_bytes"] > 0
+        assert {"validate", "engine", "format", "render"} <= set(entry["stages_ms"])
+
+    def test_solar_time_stage_is_recorded(self, server):
+        args = {**BIRTH_ARGS, "use_solar_time": True, "longitude": 87.6}
+        self._call(server, "get_bazi_chart", args)
+
+        assert "solar_time" in get_slow_log().get_entries()[0]["stages_ms"]
+
+    def test_modern_protocol_version_is_recorded(self, server):
+        meta = {"io.modelcontextprotocol/protocolVersion": "2026-07-28"}
+        self._call(server, "get_bazi_chart", BIRTH_ARGS, meta=meta)
+
+        assert get_slow_log().get_entries()[0]["protocol_version"] == "2026-07-28"
+
+    def test_failed_call_is_recorded(self, server):
+        self._call(server, "get_bazi_chart", {**BIRTH_ARGS, "gender": "X"})
+
+        assert get_slow_log().get_entries()[0]["success"] is False
+
+    def test_stats_endpoint_exposes_slow_requests(self, server):
+        pytest.importorskip("fastapi")
+        from fastapi.testclient import TestClient
+
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        transport = HttpTransport(host="127.0.0.1", port=8080, api_key="k")
+        transport.set_message_handler(server.handle_request)
+        client = TestClient(transport.app)
+        auth = {"Authorization": "Bearer k"}
+
+        client.post(
+            "/mcp",
+            headers=auth,
+            json={
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "tools/call",
+                "params": {"name": "get_bazi_chart", "arguments": BIRTH_ARGS},
+            },
+        )
+        payload = client.get("/stats", headers=auth).json()
+
+        assert payload["slow_requests"][0]["tool"] == "get_bazi_chart"
+
+
+class TestCliSlowLogFlag:
+    """stdio部署通过 --slow-log 落盘"""
+
+    def test_flag_sets_dump_path(self, tmp_path):
+        from mingli_mcp import cli
+
+        path = str(tmp_path / "slow.json")
+        with (
+            patch.object(cli, "MingliMCPServer"),
+            patch.object(cli.get_slow_log(), "set_dump_path") as set_dump_path,
+        ):
+            cli.main(["--slow-log", path])
+
+        set_dump_path.assert_called_once_with(path)
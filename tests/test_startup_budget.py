@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+启动耗时预算测试：运行 scripts/benchmark_startup.py
+"""
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "benchmark_startup.py"
+
+
+def _load_script():
+    spec = importlib.util.spec_from_file_location("benchmark_startup", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestStartupBudget:
+    """冷启动预算"""
+
+    def test_all_scenarios_within_budget(self):
+        # 测试机负载不稳定，时间预算放宽；模块数预算不受影响
+        env = {**os.environ, "STARTUP_BUDGET_SCALE": os.environ.get("STARTUP_BUDGET_SCALE", "3")}
+        result = subprocess.run(
+            [sys.executable, str(SCRIPT), "--json", "--top", "3"],
+            capture_output=True,
+            text=True,
+            timeout=300,
+            env=env,
+        )
+        report = json.loads(result.stdout)
+        assert result.returncode == 0, report["violations"]
+        assert report["violations"] == []
+
+        results = report["results"]
+        assert set(results) == {"import", "stdio_server", "http_server", "first_requests"}
+        assert set(results["first_requests"]["steps"]) == {
+            "construct",
+            "initialize",
+            "tools/list",
+            "tools/call",
+        }
+        for scenario in results.values():
+            assert scenario["wall_ms"] > 0
+            assert scenario["modules"] >= 1
+            assert len(scenario["imports"]) <= 3
+
+    def test_parse_importtime(self):
+        script = _load_script()
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _io\n"
+            "import time:      1500 |       4200 | mingli_mcp.config\n"
+            "some unrelated warning\n"
+        )
+        modules = script.parse_importtime(stderr)
+        assert modules == [
+            {"module": "_io", "self_ms": 0.12, "cumulative_ms": 0.12},
+            {"module": "mingli_mcp.config", "self_ms": 1.5, "cumulative_ms": 4.2},
+        ]
+
+    def test_check_budgets_reports_violations(self):
+        script = _load_script()
+        result = {"wall_ms": 10_000.0, "modules": 10_000, "steps": {"construct": 10_000.0}}
+        violations = script.check_budgets("stdio_server", result)
+        assert len(violations) == 3
+        # 放大倍数只作用于时间预算
+        assert len(script.check_budgets("stdio_server", result, scale=100)) == 1
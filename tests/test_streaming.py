@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+流式输出（STREAM_OUTPUT）测试
+"""
+
+import io
+import json
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from mingli_mcp.config import config
+from mingli_mcp.mcp_server.server import MingliMCPServer
+from mingli_mcp.transports.stdio_transport import StdioTransport
+from mingli_mcp.utils.binary_codecs import MSGPACK
+from mingli_mcp.utils.streaming import (
+    RENDER_FAILED_NOTE,
+    StreamAborted,
+    StreamingText,
+    has_stream,
+    iter_json,
+    materialize,
+    prepare_streams,
+)
+from tests.test_structured_output import CALLS
+
+TEXT_TOOLS = sorted(CALLS)
+
+
+def _request(tool, **extra):
+    return {
+        "jsonrpc": "2.0",
+        "id": 7,
+        "method": "tools/call",
+        "params": {"name": tool, "arguments": {**CALLS[tool], **extra}},
+    }
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(config, "TRANSPORT_TYPE", "stdio")
+    return MingliMCPServer()
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    monkeypatch.setattr(config, "STREAM_OUTPUT", True)
+    monkeypatch.setattr(config, "STREAM_CHUNK_SIZE", 256)
+
+
+def _plain(server, tool, **extra):
+    """不开流式时的完整响应"""
+    with patch.object(config, "STREAM_OUTPUT", False):
+        response = server.handle_request(_request(tool, **extra))
+    return response
+
+
+def _failing_fragments(good=3):
+    """先产出 good 个片段，然后渲染失败"""
+    for index in range(good):
+        yield f"片段{index}\n"
+    raise ValueError("formatter exploded")
+
+
+def _stream_message(fragments, request_id=1):
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "result": {"content": [{"type": "text", "text": StreamingText(fragments, chunk_size=4)}]},
+    }
+
+
+@pytest.fixture
+def failing_palace(monkeypatch):
+    """紫微命盘渲染到第 3 个宫位时格式化器出错"""
+    from mingli_mcp.systems.ziwei.formatter import ZiweiFormatter
+
+    original = ZiweiFormatter._iter_palace_markdown
+    rendered = []
+
+    def failing(self, palace):
+        rendered.append(palace["name"])
+        if len(rendered) == 3:
+            raise ValueError("formatter exploded")
+        return original(self, palace)
+
+    monkeypatch.setattr(ZiweiFormatter, "_iter_palace_markdown", failing)
+
+
+def _strip_metadata(text):
+    """JSON 文本结果里 metadata 的生成时间每次不同"""
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return text
+    data.pop("metadata", None)
+    return data
+
+
+class TestStreamingText:
+    """分块与编码"""
+
+    def test_coalesces_fragments(self):
+        chunks = list(StreamingText(["ab", "cd", "e", "fgh", "i"], chunk_size=4))
+        assert chunks == ["abcd", "efgh", "i"]
+
+    def test_chunks_bounded_by_chunk_size(self):
+        fragments = [f"第{i}行\n" for i in range(1000)]
+        chunks = list(StreamingText(iter(fragments), chunk_size=100))
+        longest_fragment = max(len(fragment) for fragment in fragments)
+        assert "".join(chunks) == "".join(fragments)
+        assert max(len(chunk) for chunk in chunks) < 100 + longest_fragment
+
+    @pytest.mark.parametrize("ensure_ascii", [True, False])
+    def test_iter_json_matches_json_dumps(self, ensure_ascii):
+        text = '紫微"命宫"\n\t🏠 \\ \x00 ' * 50
+        message = {"id": 1, "result": {"content": [{"type": "text", "text": None}]}, "x": [1.5]}
+        message["result"]["content"][0]["text"] = StreamingText(iter(text), chunk_size=7)
+        streamed = "".join(iter_json(message, ensure_ascii=ensure_ascii))
+
+        message["result"]["content"][0]["text"] = text
+        assert streamed == json.dumps(message, ensure_ascii=ensure_ascii)
+
+    def test_iter_json_without_streams_is_one_chunk(self):
+        assert list(iter_json({"a": "b"})) == ['{"a": "b"}']
+
+    def test_has_stream_and_materialize(self):
+        message = {"result": {"content": [{"type": "text", "text": StreamingText(["a", "b"])}]}}
+        assert has_stream(message) and has_stream([message])
+        materialize(message)
+        assert message["result"]["content"][0]["text"] == "ab"
+        assert not has_stream(message)
+
+
+class TestStreamFailures:
+    """渲染出错与结束回调"""
+
+    def test_done_callback_once(self):
+        results = []
+        stream = StreamingText(["ab", "cd"], chunk_size=1)
+        stream.add_done_callback(results.append)
+        assert stream.read() == "abcd"
+        stream.close()
+        stream.add_done_callback(results.append)
+        assert results == [None, None]
+        assert stream.done and stream.result_bytes == 4 and stream.render_seconds >= 0
+
+    def test_close_before_done_aborts(self):
+        results = []
+        stream = StreamingText(["ab", "cd"], chunk_size=1)
+        stream.add_done_callback(results.append)
+        next(iter(stream))
+        stream.close()
+        assert len(results) == 1 and isinstance(results[0], StreamAborted)
+
+    def test_failure_reported_to_callback(self):
+        results = []
+        stream = StreamingText(_failing_fragments(), chunk_size=4)
+        stream.add_done_callback(results.append)
+        with pytest.raises(ValueError):
+            stream.read()
+        assert len(results) == 1 and isinstance(results[0], ValueError)
+
+    def test_failure_before_first_chunk_becomes_error_response(self):
+        message = [_stream_message(_failing_fragments(good=0), 1), _stream_message(["ok"], 2)]
+        prepare_streams(message)
+        assert message[0] == {
+            "jsonrpc": "2.0",
+            "error": {"code": -32603, "message": "Internal error: formatter exploded"},
+            "id": 1,
+        }
+        assert json.loads("".join(iter_json(message)))[1]["result"]["content"][0]["text"] == "ok"
+
+    @pytest.mark.parametrize("separators", [None, (",", ":")])
+    def test_failure_mid_stream_closes_envelope(self, separators):
+        message = _stream_message(_failing_fragments())
+        chunks = []
+        for chunk in iter_json(message, ensure_ascii=False, separators=separators):
+            chunks.append(chunk)
+        assert len(chunks) > 2
+        result = json.loads("".join(chunks))["result"]
+        assert result["isError"] is True
+        assert result["content"][0]["text"] == "片段0\n片段1\n片段2\n" + RENDER_FAILED_NOTE
+
+    def test_abandoned_iteration_closes_streams(self):
+        results = []
+        message = _stream_message(["ab", "cd", "ef"])
+        message["result"]["content"][0]["text"].add_done_callback(results.append)
+        chunks = iter_json(message)
+        next(chunks)
+        chunks.close()
+        assert len(results) == 1 and isinstance(results[0], StreamAborted)
+
+
+class TestStreamedResults:
+    """开启 STREAM_OUTPUT 后的工具结果"""
+
+    @pytest.mark.parametrize("tool", TEXT_TOOLS)
+    @pytest.mark.parametrize("output_format", ["markdown", "json"])
+    def test_same_text_as_unstreamed(self, server, streaming, tool, output_format):
+        response = server.handle_request(_request(tool, format=output_format))
+        assert has_stream(response)
+        streamed = json.loads("".join(iter_json(response, ensure_ascii=False)))
+
+        plain = _plain(server, tool, format=output_format)
+        streamed_text = streamed["result"]["content"][0]["text"]
+        plain_text = plain["result"]["content"][0]["text"]
+        assert _strip_metadata(streamed_text) == _strip_metadata(plain_text)
+
+    def test_rendering_deferred_until_written(self, server, streaming, monkeypatch):
+        from mingli_mcp.systems.ziwei.formatter import ZiweiFormatter
+
+        rendered = []
+        original = ZiweiFormatter._iter_palace_markdown
+
+        def tracking(self, palace):
+            rendered.append(palace["name"])
+            return original(self, palace)
+
+        monkeypatch.setattr(ZiweiFormatter, "_iter_palace_markdown", tracking)
+        response = server.handle_request(_request("get_ziwei_chart"))
+        assert rendered == []
+        "".join(iter_json(response))
+        assert len(rendered) == 12
+
+    def test_metrics_recorded_when_stream_finishes(self, server, streaming, monkeypatch):
+        from mingli_mcp.mcp_server import server as server_module
+        from mingli_mcp.utils.slow_log import SlowRequestLog
+
+        calls = []
+        slow_log = SlowRequestLog()
+        monkeypatch.setattr(server_module, "record_request", lambda *args: calls.append(args))
+        monkeypatch.setattr(server_module, "get_slow_log", lambda: slow_log)
+
+        response = server.handle_request(_request("get_ziwei_chart"))
+        assert calls == [] and slow_log.get_entries() == []
+
+        body = "".join(iter_json(response, ensure_ascii=False))
+        assert len(calls) == 1
+        _, _, duration, success, error_type = calls[0]
+        assert success and error_type is None
+        entry = slow_log.get_entries()[0]
+        assert entry["success"] and entry["duration_ms"] == round(duration * 1000, 3)
+        assert entry["stages_ms"]["render"] > 0
+        text = json.loads(body)["result"]["content"][0]["text"]
+        assert entry["result_bytes"] == len(text.encode("utf-8"))
+
+    def test_render_failure_recorded(self, server, streaming, failing_palace, monkeypatch):
+        from mingli_mcp.mcp_server import server as server_module
+
+        calls = []
+        monkeypatch.setattr(server_module, "record_request", lambda *args: calls.append(args))
+        "".join(iter_json(server.handle_request(_request("get_ziwei_chart"))))
+        assert [(success, error_type) for *_, success, error_type in calls] == [
+            (False, "ValueError")
+        ]
+
+    def test_tool_span_covers_rendering(self, server, streaming, monkeypatch):
+        from mingli_mcp.utils.tracing import InMemorySpanExporter, get_tracer
+
+        exporter = InMemorySpanExporter()
+        monkeypatch.setattr(get_tracer(), "exporter", exporter)
+        response = server.handle_request(_request("get_ziwei_chart"))
+        assert "mcp.tool get_ziwei_chart" not in [s.name for s in exporter.get_finished_spans()]
+
+        "".join(iter_json(response))
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        assert spans["mcp.tool get_ziwei_chart"].parent_span_id == (
+            spans["mcp.handle_request"].span_id
+        )
+
+    def test_structured_and_binary_formats_unaffected(self, server, streaming):
+        assert not has_stream(
+            server.handle_request(_request("get_bazi_chart", format="structured"))
+        )
+        assert not has_stream(server.handle_request(_request("get_bazi_chart", format="msgpack")))
+
+    def test_disabled_when_output_schema_advertised(self, server, streaming, monkeypatch):
+        monkeypatch.setattr(config, "ADVERTISE_OUTPUT_SCHEMA", True)
+        response = server.handle_request(_request("get_bazi_chart"))
+        assert isinstance(response["result"]["content"][0]["text"], str)
+
+
+class TestStdioStreaming:
+    """stdio 逐块写出"""
+
+    def test_writes_chunks_then_newline(self, server, streaming):
+        response = server.handle_request(_request("get_ziwei_chart"))
+        with patch.object(sys, "stdout", new_callable=io.StringIO) as stdout:
+            writes = []
+            original_write = stdout.write
+
+            def write(text):
+                writes.append(text)
+                return original_write(text)
+
+            stdout.write = write
+            StdioTransport().send_message(response)
+            output = stdout.getvalue()
+
+        assert len(writes) > 3
+        assert output.endswith("\n") and output.count("\n") == 1
+        text = json.loads(output)["result"]["content"][0]["text"]
+        assert text == _plain(server, "get_ziwei_chart")["result"]["content"][0]["text"]
+
+    def test_renderer_raises_mid_stream(self, server, streaming, failing_palace):
+        response = server.handle_request(_request("get_ziwei_chart"))
+        with patch.object(sys, "stdout", new_callable=io.StringIO) as stdout:
+            StdioTransport().send_message(response)
+            output = stdout.getvalue()
+
+        assert output.count("\n") == 1
+        result = json.loads(output)["result"]
+        assert result["isError"] is True
+        assert result["content"][0]["text"].endswith(RENDER_FAILED_NOTE)
+
+    def test_renderer_raises_before_first_chunk(self, server, streaming, failing_palace):
+        with patch.object(config, "STREAM_CHUNK_SIZE", 1 << 20):
+            response = server.handle_request(_request("get_ziwei_chart"))
+        with patch.object(sys, "stdout", new_callable=io.StringIO) as stdout:
+            StdioTransport().send_message(response)
+            output = stdout.getvalue()
+
+        error = json.loads(output)
+        assert error["id"] == 7 and error["error"]["code"] == -32603
+
+    def test_encoding_failure_sends_error_line(self):
+        with patch.object(sys, "stdout", new_callable=io.StringIO) as stdout:
+            StdioTransport().send_message({"jsonrpc": "2.0", "id": 3, "result": {"x": object()}})
+            lines = stdout.getvalue().splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["id"] == 3 and json.loads(lines[0])["error"]["code"] == -32603
+
+    def test_plain_message_single_write(self):
+        with patch.object(sys, "stdout", new_callable=io.StringIO) as stdout:
+            StdioTransport().send_message({"jsonrpc": "2.0", "id": 1, "result": {}})
+            assert stdout.getvalue() == '{"jsonrpc": "2.0", "id": 1, "result": {}}\n'
+
+
+class TestHttpStreaming:
+    """HTTP 分块传输 / SSE"""
+
+    @pytest.fixture
+    def client(self, server):
+        pytest.importorskip("fastapi")
+        from fastapi.testclient import TestClient
+
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        transport = HttpTransport(host="127.0.0.1", port=8080, enable_compression=True)
+        transport.set_message_handler(server.handle_request)
+        return TestClient(transport.app)
+
+    def test_chunked_json(self, client, server, streaming):
+        response = client.post("/mcp", json=_request("get_ziwei_chart"))
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/json")
+        assert "content-length" not in response.headers
+        text = response.json()["result"]["content"][0]["text"]
+        assert text == _plain(server, "get_ziwei_chart")["result"]["content"][0]["text"]
+
+    def test_event_stream_when_json_not_accepted(self, client, streaming):
+        response = client.post(
+            "/mcp", json=_request("get_bazi_fortune"), headers={"Accept": "text/event-stream"}
+        )
+        assert response.headers["content-type"].startswith("text/event-stream")
+        event, data, blank = response.text.split("\n", 2)
+        assert event == "event: message" and blank == "\n"
+        assert json.loads(data[len("data: ") :])["result"]["content"][0]["text"].startswith("#")
+
+    def test_default_accept_gets_chunked_json(self, client, streaming):
+        response = client.post(
+            "/mcp",
+            json=_request("get_bazi_chart"),
+            headers={"Accept": "application/json, text/event-stream"},
+        )
+        assert response.headers["content-type"].startswith("application/json")
+
+    def test_binary_encoding_reads_stream_fully(self, client, streaming):
+        response = client.post(
+            "/mcp", json=_request("get_bazi_chart"), headers={"Accept": "application/msgpack"}
+        )
+        body = MSGPACK.loads(response.content)
+        assert body["result"]["content"][0]["text"].startswith("# 八字排盘")
+
+    @pytest.mark.parametrize("accept_encoding", ["identity", "gzip"])
+    def test_renderer_raises_mid_stream(self, client, streaming, failing_palace, accept_encoding):
+        response = client.post(
+            "/mcp", json=_request("get_ziwei_chart"), headers={"Accept-Encoding": accept_encoding}
+        )
+        assert response.status_code == 200
+        if accept_encoding == "gzip":
+            assert response.headers["content-encoding"] == "gzip"
+        result = response.json()["result"]
+        assert result["isError"] is True
+        assert result["content"][0]["text"].endswith(RENDER_FAILED_NOTE)
+
+    def test_renderer_raises_before_first_chunk(self, client, streaming, failing_palace):
+        with patch.object(config, "STREAM_CHUNK_SIZE", 1 << 20):
+            response = client.post("/mcp", json=_request("get_ziwei_chart"))
+        assert response.status_code == 200
+        assert response.json()["error"]["code"] == -32603
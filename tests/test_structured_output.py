@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+结构化输出（structuredContent / outputSchema）测试
+"""
+
+import json
+
+import pytest
+
+from mingli_mcp.config import config
+from mingli_mcp.mcp_server.server import MingliMCPServer
+from mingli_mcp.mcp_server.tools import ToolRegistry
+from mingli_mcp.mcp_server.tools.definitions import OUTPUT_SCHEMAS
+from mingli_mcp.mcp_server.tools.output import STRUCTURED_TEXT
+
+_BIRTH = {"time_index": 6, "gender": "女"}
+
+CALLS = {
+    "get_ziwei_chart": {**_BIRTH, "date": "2000-08-16"},
+    "get_ziwei_fortune": {**_BIRTH, "birth_date": "2000-08-16", "query_date": "2026-03-01"},
+    "analyze_ziwei_palace": {**_BIRTH, "birth_date": "2000-08-16", "palace_name": "命宫"},
+    "get_bazi_chart": {**_BIRTH, "date": "2000-08-16"},
+    "get_bazi_fortune": {**_BIRTH, "birth_date": "2000-08-16", "query_date": "2026-03-01"},
+    "analyze_bazi_element": {**_BIRTH, "birth_date": "2000-08-16"},
+}
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def _check_schema(value, schema, path="$"):
+    """按 outputSchema 用到的 JSON Schema 子集校验（测试环境没有 jsonschema）"""
+    types = schema.get("type")
+    if types is not None:
+        types = types if isinstance(types, list) else [types]
+        assert any(isinstance(value, _JSON_TYPES[t]) for t in types), f"{path}: {value!r}"
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            assert key in value, f"{path}: missing {key}"
+        properties = schema.get("properties", {})
+        extra = schema.get("additionalProperties")
+        for key, item in value.items():
+            if key in properties:
+                _check_schema(item, properties[key], f"{path}.{key}")
+            elif isinstance(extra, dict):
+                _check_schema(item, extra, f"{path}.{key}")
+    if isinstance(value, list) and "items" in schema:
+        for index, item in enumerate(value):
+            _check_schema(item, schema["items"], f"{path}[{index}]")
+
+
+def _call(server, tool, output_format=None):
+    arguments = dict(CALLS[tool])
+    if output_format is not None:
+        arguments["format"] = output_format
+    response = server.handle_request(
+        {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "tools/call",
+            "params": {"name": tool, "arguments": arguments},
+        }
+    )
+    return response["result"]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(config, "TRANSPORT_TYPE", "stdio")
+    return MingliMCPServer()
+
+
+class TestStructuredFormat:
+    """format="structured" """
+
+    @pytest.mark.parametrize("tool", sorted(CALLS))
+    def test_structured_content_matches_json_text(self, server, tool):
+        structured = _call(server, tool, "structured")
+        as_text = json.loads(_call(server, tool, "json")["content"][0]["text"])
+
+        data = structured["structuredContent"]
+        # 生成时间每次调用都不同
+        data.pop("metadata", None)
+        as_text.pop("metadata", None)
+        assert data == as_text
+        assert structured["content"] == [{"type": "text", "text": STRUCTURED_TEXT}]
+
+    @pytest.mark.parametrize("tool", sorted(CALLS))
+    def test_structured_content_conforms_to_output_schema(self, server, tool):
+        _check_schema(_call(server, tool, "structured")["structuredContent"], OUTPUT_SCHEMAS[tool])
+
+    def test_text_formats_have_no_structured_content(self, server):
+        assert "structuredContent" not in _call(server, "get_bazi_chart")
+        assert "structuredContent" not in _call(server, "get_bazi_chart", "json")
+
+    def test_structured_payload_is_smaller(self, server):
+        encoded = {
+            output_format: json.dumps(_call(server, "get_ziwei_chart", output_format))
+            for output_format in ("json", "structured")
+        }
+        assert len(encoded["structured"]) < len(encoded["json"]) * 0.7
+
+    def test_format_enum_lists_structured(self):
+        for definition in ToolRegistry().get_definitions():
+            if definition["name"] in OUTPUT_SCHEMAS:
+                fmt = definition["inputSchema"]["properties"]["format"]
+                assert "structured" in fmt["enum"]
+
+
+class TestAdvertisedOutputSchema:
+    """ADVERTISE_OUTPUT_SCHEMA"""
+
+    def test_not_advertised_by_default(self):
+        assert all("outputSchema" not in tool for tool in ToolRegistry().get_definitions())
+
+    def test_advertised_schemas_imply_structured_results(self, server, monkeypatch):
+        monkeypatch.setattr(config, "ADVERTISE_OUTPUT_SCHEMA", True)
+        definitions = {tool["name"]: tool for tool in ToolRegistry().get_definitions()}
+        assert set(OUTPUT_SCHEMAS) == {
+            name for name, tool in definitions.items() if "outputSchema" in tool
+        }
+        assert "outputSchema" not in definitions["list_fortune_systems"]
+
+        # 声明了 outputSchema 后，markdown 结果也必须附带 structuredContent
+        result = _call(server, "get_bazi_chart")
+        assert result["content"][0]["text"].startswith("# 八字排盘")
+        _check_schema(result["structuredContent"], OUTPUT_SCHEMAS["get_bazi_chart"])
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+链路追踪测试
+"""
+
+import io
+import json
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from mingli_mcp.mcp_server.server import MingliMCPServer
+from mingli_mcp.utils.tracing import (
+    NON_RECORDING_SPAN,
+    STATUS_CODE_ERROR,
+    InMemorySpanExporter,
+    OtlpJsonFileExporter,
+    Tracer,
+    get_current_span,
+    get_tracer,
+    parse_traceparent,
+)
+
+BIRTH_ARGS = {"date": "2000-08-16", "time_index": 6, "gender": "女"}
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+TRACEPARENT = f"00-{TRACE_ID}-{PARENT_ID}-01"
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = InMemorySpanExporter()
+    monkeypatch.setattr(get_tracer(), "exporter", exporter)
+    return exporter
+
+
+@pytest.fixture
+def server():
+    with patch.object(MingliMCPServer, "_initialize_transport"):
+        return MingliMCPServer()
+
+
+def _tool_call(tool, args, meta=None):
+    params = {"name": tool, "arguments": args}
+    if meta:
+        params["_meta"] = meta
+    return {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": params}
+
+
+class TestTraceparent:
+    """W3C traceparent 解析"""
+
+    def test_valid_header(self):
+        assert parse_traceparent(TRACEPARENT) == (TRACE_ID, PARENT_ID)
+
+    @pytest.mark.parametrize(
+        "header",
+        [
+            None,
+            "",
+            "garbage",
+            f"ff-{TRACE_ID}-{PARENT_ID}-01",
+            f"00-{'0' * 32}-{PARENT_ID}-01",
+            f"00-{TRACE_ID}-{'0' * 16}-01",
+            f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01",
+        ],
+    )
+    def test_invalid_header(self, header):
+        assert parse_traceparent(header) is None
+
+
+class TestTracer:
+    """span 生命周期"""
+
+    def test_disabled_tracer_yields_non_recording_span(self):
+        with Tracer().start_span("x") as span:
+            assert span is NON_RECORDING_SPAN
+            assert get_current_span() is NON_RECORDING_SPAN
+
+    def test_children_are_exported_with_root(self):
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(exporter)
+        with tracer.start_span("root") as root:
+            with tracer.start_span("child") as child:
+                assert get_current_span() is child
+            assert exporter.get_finished_spans() == []
+
+        spans = exporter.get_finished_spans()
+        assert [span.name for span in spans] == ["child", "root"]
+        assert child.parent_span_id == root.span_id
+        assert child.trace_id == root.trace_id
+        assert root.parent_span_id is None
+
+    def test_remote_parent_is_used_for_root(self):
+        exporter = InMemorySpanExporter()
+        with Tracer(exporter).start_span("root", traceparent=TRACEPARENT) as root:
+            pass
+        assert root.trace_id == TRACE_ID
+        assert root.parent_span_id == PARENT_ID
+
+    def test_exception_marks_span_as_error(self):
+        exporter = InMemorySpanExporter()
+        with pytest.raises(ValueError):
+            with Tracer(exporter).start_span("root"):
+                raise ValueError("boom")
+
+        span = exporter.get_finished_spans()[0]
+        assert span.status_code == STATUS_CODE_ERROR
+        assert span.attributes["exception.type"] == "ValueError"
+
+    def test_deferred_end_exported_after_root(self):
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(exporter)
+        with tracer.start_span("root"):
+            with tracer.start_span("child") as child:
+                end = child.defer_end()
+        assert [span.name for span in exporter.get_finished_spans()] == ["root"]
+        assert child.end_time_ns == 0
+
+        end(ValueError("render failed"))
+        end(None)
+        assert [span.name for span in exporter.get_finished_spans()] == ["root", "child"]
+        assert child.status_code == STATUS_CODE_ERROR
+
+    def test_deferred_end_before_root_joins_root_export(self):
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(exporter)
+        with tracer.start_span("root"):
+            with tracer.start_span("child") as child:
+                end = child.defer_end()
+            end(None)
+            assert exporter.get_finished_spans() == []
+        assert [span.name for span in exporter.get_finished_spans()] == ["child", "root"]
+
+    def test_defer_end_on_disabled_tracer(self):
+        with Tracer().start_span("x") as span:
+            end = span.defer_end()
+        end(None)
+
+
+class TestOtlpJsonFileExporter:
+    """本地 OTLP-JSON 文件导出"""
+
+    def test_writes_export_request_per_trace(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer(OtlpJsonFileExporter(str(path)))
+        with tracer.start_span("root", {"mcp.method.name": "tools/call", "n": 3, "ok": True}):
+            with tracer.start_span("child"):
+                pass
+
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 1
+        payload = json.loads(lines[0])
+        resource_spans = payload["resourceSpans"][0]
+        assert resource_spans["resource"]["attributes"][0]["key"] == "service.name"
+        spans = resource_spans["scopeSpans"][0]["spans"]
+        assert [span["name"] for span in spans] == ["child", "root"]
+        assert spans[0]["parentSpanId"] == spans[1]["spanId"]
+        attributes = {attr["key"]: attr["value"] for attr in spans[1]["attributes"]}
+        assert attributes["mcp.method.name"] == {"stringValue": "tools/call"}
+        assert attributes["n"] == {"intValue": "3"}
+        assert attributes["ok"] == {"boolValue": True}
+        assert int(spans[1]["endTimeUnixNano"]) >= int(spans[1]["startTimeUnixNano"])
+
+    def test_rotates_by_size(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer(OtlpJsonFileExporter(str(path), max_bytes=600, backup_count=2))
+        for _ in range(10):
+            with tracer.start_span("root"):
+                pass
+
+        assert path.exists()
+        assert (tmp_path / "traces.jsonl.1").exists()
+        assert (tmp_path / "traces.jsonl.2").exists()
+        assert not (tmp_path / "traces.jsonl.3").exists()
+        assert path.stat().st_size <= 600
+
+
+class TestRequestPathTracing:
+    """请求链路的 span"""
+
+    def test_tool_call_span_tree(self, exporter, server):
+        server.handle_request(_tool_call("get_ziwei_chart", BIRTH_ARGS))
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        request_span = spans["mcp.handle_request"]
+        tool_span = spans["mcp.tool get_ziwei_chart"]
+        assert request_span.attributes["mcp.method.name"] == "tools/call"
+        assert request_span.attributes["mcp.protocol.era"] == "legacy"
+        assert tool_span.parent_span_id == request_span.span_id
+        assert tool_span.attributes["gen_ai.tool.name"] == "get_ziwei_chart"
+        for stage in ("mingli.validate", "mingli.engine", "mingli.format", "mingli.render"):
+            assert spans[stage].trace_id == request_span.trace_id
+
+    def test_modern_request_era(self, exporter, server):
+        meta = {"io.modelcontextprotocol/protocolVersion": "2026-07-28"}
+        server.handle_request(_tool_call("get_bazi_chart", BIRTH_ARGS, meta=meta))
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        attributes = spans["mcp.handle_request"].attributes
+        assert attributes["mcp.protocol.era"] == "modern"
+        assert attributes["mcp.protocol.version"] == "2026-07-28"
+
+    def test_failed_tool_call_is_error(self, exporter, server):
+        server.handle_request(_tool_call("get_bazi_chart", {**BIRTH_ARGS, "gender": "X"}))
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        assert spans["mcp.tool get_bazi_chart"].status_code == STATUS_CODE_ERROR
+        assert spans["mcp.handle_request"].status_code == STATUS_CODE_ERROR
+
+    def test_http_traceparent_is_propagated(self, exporter, server):
+        pytest.importorskip("fastapi")
+        from fastapi.testclient import TestClient
+
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        transport = HttpTransport(host="127.0.0.1", port=8080)
+        transport.set_message_handler(server.handle_request)
+        client = TestClient(transport.app)
+        client.post(
+            "/mcp",
+            headers={"traceparent": TRACEPARENT},
+            json=_tool_call("get_ziwei_chart", BIRTH_ARGS),
+        )
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        transport_span = spans["POST /mcp"]
+        assert transport_span.trace_id == TRACE_ID
+        assert transport_span.parent_span_id == PARENT_ID
+        # 线程池里执行的 handle_request 仍挂在传输层 span 下
+        assert spans["mcp.handle_request"].parent_span_id == transport_span.span_id
+        assert all(span.trace_id == TRACE_ID for span in spans.values())
+
+    def test_stdio_meta_traceparent_is_propagated(self, exporter, server):
+        from mingli_mcp.transports.stdio_transport import StdioTransport
+
+        transport = StdioTransport()
+        transport.set_message_handler(server.handle_request)
+        line = json.dumps(
+            _tool_call("get_bazi_chart", BIRTH_ARGS, meta={"traceparent": TRACEPARENT})
+        )
+        with (
+            patch.object(sys, "stdin", io.StringIO(line + "\n")),
+            patch.object(sys, "stdout", io.StringIO()),
+        ):
+            transport.start()
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        assert spans["stdio message"].parent_span_id == PARENT_ID
+        assert spans["mcp.handle_request"].trace_id == TRACE_ID
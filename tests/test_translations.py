@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+紫微译名表测试
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from mingli_mcp.config import config
+from mingli_mcp.mcp_server.server import MingliMCPServer
+from mingli_mcp.systems import get_system
+from mingli_mcp.systems.ziwei.translations import get_translation_table
+from mingli_mcp.utils.validators import SUPPORTED_LANGUAGES
+
+_BIRTH = {"date": "2000-08-16", "time_index": 6, "gender": "女"}
+_STAR_GROUPS = ("major_stars", "minor_stars", "adjective_stars")
+
+
+class TestTranslationTable:
+    """按语言预先翻好的译名表"""
+
+    def test_built_once_per_language(self):
+        assert get_translation_table("en-US") is get_translation_table("en-US")
+        assert get_translation_table("en-US") is not get_translation_table("ja-JP")
+
+    def test_frozen(self):
+        table = get_translation_table("zh-CN")
+        with pytest.raises(TypeError):
+            table.stars["ziweiMaj"] = "x"  # type: ignore[index]
+
+    def test_unsupported_language_falls_back_to_simplified_chinese(self):
+        assert get_translation_table("fr-FR") is get_translation_table("zh-CN")
+
+    def test_covers_every_section(self):
+        table = get_translation_table("zh-CN")
+        assert table.stars["ziweiMaj"] == "紫微"
+        assert table.major_minor_stars["zuofuMin"] == "左辅"
+        assert table.palaces["soulPalace"] == "命宫"
+        assert table.stems["jiaHeavenly"] == "甲"
+        assert table.branches["ziEarthly"] == "子"
+        assert table.brightness["庙"] == "庙"
+        assert "ziweiMaj" in get_translation_table("en-US").major_minor_stars
+
+    @pytest.mark.parametrize("language", SUPPORTED_LANGUAGES)
+    def test_matches_iztro_translate_methods(self, language):
+        """查表结果必须与逐个调用 iztro-py 的 translate_*() 完全一致"""
+        system = get_system("ziwei")
+        astrolabe = system._build_astrolabe(_BIRTH, _BIRTH["time_index"])
+        astrolabe.set_language(language)
+        table = get_translation_table(language)
+
+        for palace in astrolabe.palaces:
+            assert table.palaces[palace.name] == palace.translate_name()
+            assert table.stems[palace.heavenly_stem] == palace.translate_heavenly_stem()
+            assert table.branches[palace.earthly_branch] == palace.translate_earthly_branch()
+            for group in _STAR_GROUPS:
+                for star in getattr(palace, group):
+                    assert table.stars[star.name] == star.translate_name()
+                    if star.brightness:
+                        assert table.brightness[star.brightness] == star.translate_brightness()
+
+
+class TestMultiLanguage:
+    """language 传列表：一次排盘输出多种语言"""
+
+    _QUERY = datetime(2024, 6, 1, 12)
+
+    def test_chart_translations_match_single_language_calls(self):
+        system = get_system("ziwei")
+        chart = system.get_chart(_BIRTH, ["zh-CN", "en-US", "ja-JP"])
+        assert list(chart["translations"]) == ["en-US", "ja-JP"]
+        for language, translated in [("zh-CN", chart), *chart["translations"].items()]:
+            single = system.get_chart(_BIRTH, language)
+            assert translated["palaces"] == single["palaces"]
+            assert translated["basic_info"] == single["basic_info"]
+
+    def test_astrolabe_built_once(self, monkeypatch):
+        system = get_system("ziwei")
+        built = []
+        original = system._build_astrolabe
+
+        def counting(*args):
+            built.append(args)
+            return original(*args)
+
+        monkeypatch.setattr(system, "_build_astrolabe", counting)
+        system.get_chart(_BIRTH, SUPPORTED_LANGUAGES)
+        system.get_fortune(_BIRTH, self._QUERY, SUPPORTED_LANGUAGES)
+        assert len(built) == 2
+
+    def test_fortune_translations(self):
+        system = get_system("ziwei")
+        fortune = system.get_fortune(_BIRTH, self._QUERY, ["en-US", "zh-CN"])
+        single = system.get_fortune(_BIRTH, self._QUERY, "zh-CN")
+        assert fortune["translations"]["zh-CN"] == single
+        assert fortune["decadal"] == system.get_fortune(_BIRTH, self._QUERY, "en-US")["decadal"]
+
+    def test_single_language_and_duplicates(self):
+        system = get_system("ziwei")
+        assert "translations" not in system.get_chart(_BIRTH, ["en-US"])
+        assert list(system.get_chart(_BIRTH, ["en-US", "en-US", "zh-CN"])["translations"]) == [
+            "zh-CN"
+        ]
+
+    def test_markdown_contains_every_language(self):
+        system = get_system("ziwei")
+        chart = system.get_chart(_BIRTH, ["zh-CN", "en-US"])
+        markdown = system.formatter.format_chart_markdown(chart)
+        english = system.formatter.format_chart_markdown(chart["translations"]["en-US"])
+        assert markdown.startswith(
+            system.formatter.format_chart_markdown(system.get_chart(_BIRTH, "zh-CN"))
+        )
+        assert "> 语言: en-US" in markdown
+        assert markdown.endswith(english)
+
+    @pytest.fixture
+    def server(self, monkeypatch):
+        monkeypatch.setattr(config, "TRANSPORT_TYPE", "stdio")
+        return MingliMCPServer()
+
+    def _call(self, server, tool, **arguments):
+        birth = {"time_index": 6, "gender": "女"}
+        birth["date" if tool == "get_ziwei_chart" else "birth_date"] = _BIRTH["date"]
+        return server.handle_request(
+            {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "tools/call",
+                "params": {"name": tool, "arguments": {**birth, **arguments}},
+            }
+        )
+
+    @pytest.mark.parametrize("tool", ["get_ziwei_chart", "get_ziwei_fortune"])
+    def test_tool_accepts_language_list(self, server, tool):
+        response = self._call(server, tool, language=["zh-CN", "en-US"], format="json")
+        data = json.loads(response["result"]["content"][0]["text"])
+        assert list(data["translations"]) == ["en-US"]
+
+    @pytest.mark.parametrize("language", [[], ["zh-CN", "fr-FR"], "fr-FR"])
+    def test_tool_rejects_invalid_language(self, server, language):
+        response = self._call(server, "get_ziwei_chart", language=language)
+        assert response["error"]["code"] == -32602
+
+    def test_palace_analysis_still_single_language(self, server):
+        response = self._call(
+            server, "analyze_ziwei_palace", language=["zh-CN"], palace_name="命宫"
+        )
+        assert response["error"]["code"] == -32602
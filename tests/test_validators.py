@@ -3,14 +3,25 @@
 验证器测试
 """
 
+import copy
+import pickle
+
 import pytest
 
+from mingli_mcp.config import config
+from mingli_mcp.core.birth_info import ValidatedBirthInfo
 from mingli_mcp.core.exceptions import DateRangeError, LanguageNotSupportedError, ValidationError
+from mingli_mcp.mcp_server.server import MingliMCPServer
+from mingli_mcp.systems import get_system
+from mingli_mcp.utils import validators
 from mingli_mcp.utils.validators import (
+    parse_date,
+    validate_birth_info,
     validate_date,
     validate_date_range,
     validate_gender,
     validate_language,
+    validate_languages,
     validate_time_index,
 )
 
@@ -62,6 +73,112 @@ class TestDateValidation:
             validate_date_range("invalid-date")
         assert "日期格式错误" in str(exc_info.value)
 
+    def test_date_range_returns_parsed_date(self):
+        assert validate_date_range("2000-08-16") == (2000, 8, 16)
+
+
+class TestParseDate:
+    """手写的 YYYY-MM-DD 解析"""
+
+    def test_valid(self):
+        assert parse_date("2000-08-16") == (2000, 8, 16)
+        assert parse_date("2000-8-6") == (2000, 8, 6)
+        assert parse_date("2000-02-29") == (2000, 2, 29)
+        assert parse_date("0001-01-01") == (1, 1, 1)
+
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "1900-02-29",
+            "2000-04-31",
+            "2000-00-10",
+            "2000-01-00",
+            "0000-01-01",
+            "200-01-01",
+            "20000-01-01",
+            "2000-001-01",
+            "2000-01-01 ",
+            "2000-01- 1",
+            "+200-01-01",
+            "２０００-01-01",
+            "2000-01",
+            None,
+            20000101,
+        ],
+    )
+    def test_invalid(self, value):
+        assert parse_date(value) is None
+
+
+class TestValidatedBirthInfo:
+    """校验一次、只读的生辰信息"""
+
+    _BIRTH = {"date": "2000-08-16", "time_index": 6, "gender": "女"}
+
+    def test_validated_once(self):
+        birth_info = validate_birth_info(self._BIRTH)
+        assert isinstance(birth_info, ValidatedBirthInfo)
+        assert birth_info == self._BIRTH
+        assert birth_info.date_parts == (2000, 8, 16)
+        assert validate_birth_info(birth_info) is birth_info
+        assert get_system("ziwei").validate_birth_info(birth_info) is birth_info
+
+    def test_read_only_copy(self):
+        source = dict(self._BIRTH)
+        birth_info = validate_birth_info(source)
+        source["gender"] = "男"
+        assert birth_info["gender"] == "女"
+        with pytest.raises(TypeError):
+            birth_info["gender"] = "男"  # type: ignore[index]
+        with pytest.raises(AttributeError):
+            birth_info.date_parts = (2001, 1, 1)
+
+    def test_pickle_and_deepcopy(self):
+        birth_info = validate_birth_info(self._BIRTH)
+        for clone in (pickle.loads(pickle.dumps(birth_info)), copy.deepcopy(birth_info)):
+            assert clone == birth_info
+            assert clone.date_parts == birth_info.date_parts
+
+    def test_invalid_fields_rejected(self):
+        with pytest.raises(ValidationError):
+            validate_birth_info({**self._BIRTH, "calendar": "julian"})
+        with pytest.raises(ValidationError):
+            validate_birth_info({**self._BIRTH, "use_solar_time": True})
+
+    @pytest.mark.parametrize(
+        "tool, arguments, parses",
+        [
+            ("get_ziwei_chart", {"date": "2000-08-16"}, 1),
+            ("analyze_ziwei_palace", {"birth_date": "2000-08-16", "palace_name": "命宫"}, 1),
+            ("get_bazi_fortune", {"birth_date": "2000-08-16", "query_date": "2024-06-01"}, 2),
+            ("analyze_bazi_element", {"birth_date": "2000-08-16"}, 1),
+        ],
+    )
+    def test_tool_call_parses_dates_once(self, monkeypatch, tool, arguments, parses):
+        """handler 校验后系统不再重复校验（出生日期只解析一次，查询日期另算一次）"""
+        monkeypatch.setattr(config, "TRANSPORT_TYPE", "stdio")
+        calls = []
+        original = validators.parse_date
+
+        def counting(date_str):
+            calls.append(date_str)
+            return original(date_str)
+
+        monkeypatch.setattr(validators, "parse_date", counting)
+        response = MingliMCPServer().handle_request(
+            {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "tools/call",
+                "params": {
+                    "name": tool,
+                    "arguments": {"time_index": 6, "gender": "女", **arguments},
+                },
+            }
+        )
+        assert not response["result"].get("isError")
+        assert len(calls) == parses
+
 
 class TestTimeIndexValidation:
     """时辰验证测试"""
@@ -123,3 +240,15 @@ class TestLanguageValidation:
 
         with pytest.raises(LanguageNotSupportedError):
             validate_language("")
+
+    def test_language_list(self):
+        """语言列表：去重并保持顺序"""
+        assert validate_languages("en-US") == ["en-US"]
+        assert validate_languages(["en-US", "zh-CN", "en-US"]) == ["en-US", "zh-CN"]
+
+        with pytest.raises(LanguageNotSupportedError):
+            validate_languages(["zh-CN", "fr-FR"])
+        with pytest.raises(ValidationError):
+            validate_languages([])
+        with pytest.raises(ValidationError):
+            validate_languages(["zh-CN", 1])
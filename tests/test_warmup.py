@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+启动预热与就绪检查测试
+"""
+
+import pytest
+
+from mingli_mcp.systems import is_system_loaded
+from mingli_mcp.utils import warmup as warmup_module
+from mingli_mcp.utils.warmup import Warmup
+
+
+class TestWarmup:
+    """预热任务"""
+
+    def test_run_warms_every_system(self):
+        warmup = Warmup()
+        assert not warmup.ready
+        warmup.run()
+
+        assert warmup.ready
+        status = warmup.get_status()
+        assert status["state"] == "ready"
+        assert set(status["durations_ms"]) >= {"ziwei", "bazi"}
+        assert status["errors"] == {}
+        assert status["total_ms"] > 0
+        assert is_system_loaded("ziwei") and is_system_loaded("bazi")
+
+    def test_start_runs_once_in_background(self):
+        warmup = Warmup()
+        assert warmup.start()
+        assert not warmup.start()
+        assert warmup.wait(timeout=60)
+        assert warmup.state == "ready"
+
+    def test_failures_are_recorded_and_still_ready(self, monkeypatch):
+        monkeypatch.setitem(
+            warmup_module.WARMUP_CALLS, "bazi", [("get_bazi_chart", {"date": "not-a-date"})]
+        )
+        warmup = Warmup()
+        warmup.run()
+        assert warmup.ready
+        assert "bazi" in warmup.get_status()["errors"]
+        assert "ziwei" not in warmup.get_status()["errors"]
+
+
+class TestReadyEndpoint:
+    """/ready 端点"""
+
+    @pytest.fixture
+    def fresh_warmup(self, monkeypatch):
+        pytest.importorskip("fastapi")
+        from mingli_mcp.transports import http_transport
+
+        warmup = Warmup()
+        monkeypatch.setattr(http_transport, "get_warmup", lambda: warmup)
+        return warmup
+
+    def _transport(self, **kwargs):
+        from mingli_mcp.transports.http_transport import HttpTransport
+
+        return HttpTransport(host="127.0.0.1", port=8080, **kwargs)
+
+    def test_not_ready_until_warmup_completes(self, fresh_warmup):
+        from fastapi.testclient import TestClient
+
+        client = TestClient(self._transport(enable_warmup=True).app)
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming_up"
+        # 存活检查不受预热影响
+        assert client.get("/health").status_code == 200
+
+        fresh_warmup.run()
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["warmup"]["state"] == "ready"
+
+    def test_ready_immediately_when_disabled(self, fresh_warmup):
+        from fastapi.testclient import TestClient
+
+        client = TestClient(self._transport(enable_warmup=False).app)
+        assert client.get("/ready").status_code == 200
+
+    def test_lifespan_starts_warmup(self, fresh_warmup):
+        from fastapi.testclient import TestClient
+
+        with TestClient(self._transport(enable_warmup=True).app) as client:
+            assert fresh_warmup.state != "idle"
+            assert fresh_warmup.wait(timeout=60)
+            assert client.get("/ready").status_code == 200
+
+
+class TestStdioWarmup:
+    """stdio 模式默认不预热"""
+
+    @pytest.fixture
+    def fresh_warmup(self, monkeypatch):
+        from mingli_mcp.mcp_server import server as server_module
+
+        warmup = Warmup()
+        monkeypatch.setattr(server_module, "get_warmup", lambda: warmup)
+        return warmup
+
+    def _start_stdio(self, monkeypatch):
+        from mingli_mcp.config import config
+        from mingli_mcp.mcp_server.server import MingliMCPServer
+
+        monkeypatch.setattr(config, "TRANSPORT_TYPE", "stdio")
+        server = MingliMCPServer()
+        monkeypatch.setattr(server.transport, "start", lambda: None)
+        server.start()
+
+    def test_stdio_does_not_warm_up_by_default(self, fresh_warmup, monkeypatch):
+        from mingli_mcp.config import config
+
+        assert config.ENABLE_STDIO_WARMUP is False
+        self._start_stdio(monkeypatch)
+        assert fresh_warmup.state == "idle"
+
+    def test_stdio_warmup_can_be_enabled(self, fresh_warmup, monkeypatch):
+        from mingli_mcp.config import config
+
+        monkeypatch.setattr(config, "ENABLE_STDIO_WARMUP", True)
+        self._start_stdio(monkeypatch)
+        assert fresh_warmup.state != "idle"
+        assert fresh_warmup.wait(timeout=60)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+紫微星曜记录测试
+"""
+
+import copy
+import json
+import pickle
+
+import pytest
+
+from mingli_mcp.mcp_server.tools.output import to_json, to_plain
+from mingli_mcp.systems import get_system
+from mingli_mcp.systems.ziwei.records import StarRecord, intern_star
+from mingli_mcp.utils.projection import FieldSelection
+
+_BIRTH = {"date": "2000-08-16", "time_index": 6, "gender": "女"}
+_STAR = {"name": "紫微", "type": "major", "brightness": "庙", "scope": "origin"}
+
+
+@pytest.fixture(scope="module")
+def chart():
+    return get_system("ziwei").get_chart(_BIRTH, "zh-CN")
+
+
+class TestStarRecord:
+    """驻留的只读星曜记录"""
+
+    def test_interned(self):
+        assert intern_star(*_STAR.values()) is intern_star(*_STAR.values())
+        assert intern_star(*_STAR.values()) is not intern_star("紫微", "major", "旺", "origin")
+
+    def test_reads_like_dict(self):
+        star = intern_star(*_STAR.values())
+        assert star == _STAR
+        assert star["name"] == "紫微"
+        assert star.get("brightness") == "庙"
+        assert star.get("missing") is None
+        assert list(star) == list(_STAR)
+        assert dict(star) == _STAR == star.to_dict()
+        with pytest.raises(KeyError):
+            star["missing"]
+
+    def test_immutable(self):
+        star = intern_star(*_STAR.values())
+        with pytest.raises(AttributeError):
+            star.name = "天机"
+        with pytest.raises(TypeError):
+            star["name"] = "天机"  # type: ignore[index]
+        with pytest.raises(AttributeError):
+            star.extra = 1
+
+    def test_pickle_and_deepcopy_keep_identity(self):
+        star = intern_star(*_STAR.values())
+        assert pickle.loads(pickle.dumps(star)) is star
+        assert copy.deepcopy(star) is star
+        assert copy.deepcopy({"stars": [star]})["stars"][0] is star
+
+
+class TestChartRecords:
+    """命盘中的星曜用记录表示，输出不变"""
+
+    def test_stars_shared_across_charts(self, chart):
+        other = get_system("ziwei").get_chart(_BIRTH, "zh-CN")
+        for palace, same in zip(chart["palaces"], other["palaces"]):
+            for star, twin in zip(palace["major_stars"], same["major_stars"]):
+                assert isinstance(star, StarRecord)
+                assert star is twin
+
+    def test_to_plain_has_only_builtin_containers(self, chart):
+        def check(value):
+            assert type(value) in (dict, list, str, int, float, bool, type(None))
+            if isinstance(value, dict):
+                for item in value.values():
+                    check(item)
+            elif isinstance(value, list):
+                for item in value:
+                    check(item)
+
+        plain = to_plain(chart)
+        check(plain)
+        assert plain == chart
+        assert json.loads(to_json(chart)) == plain
+
+    def test_projection_yields_plain_dicts(self, chart):
+        selection = FieldSelection.from_paths(["palaces.major_stars.name"])
+        palaces = selection.project(chart)["palaces"]
+        stars = [star for palace in palaces for star in palace["major_stars"]]
+        assert stars and all(type(star) is dict and list(star) == ["name"] for star in stars)